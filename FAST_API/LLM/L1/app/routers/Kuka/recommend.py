@@ -3,6 +3,7 @@
 from fastapi import APIRouter, HTTPException, Query
 from app.services.Kuka.service import spotify_service
 from app.schemas.Kuka.schemas import RecommendResponse, TrackInfo, ModelInfoResponse
+from metrics import stage
 
 router = APIRouter(prefix="/api/spotify", tags=["spotify-recommendation"])
 
@@ -36,7 +37,8 @@ async def recommend(
         raise HTTPException(status_code=400, detail="artist 또는 song 중 하나는 필수입니다")
 
     # 좋아하는 곡 검색
-    liked_indices = spotify_service.find_tracks(artist=artist, song=song)
+    with stage("Kuka", "find_tracks"):
+        liked_indices = spotify_service.find_tracks(artist=artist, song=song)
     if not liked_indices:
         raise HTTPException(
             status_code=404,
@@ -46,21 +48,23 @@ async def recommend(
     query = f"{artist or ''} {song or ''}".strip()
 
     # 추천 실행
-    if model == "ensemble":
-        results = spotify_service.recommend_hybrid(liked_indices, k=k, alpha=0.4)
-    elif model == "knn":
-        results = spotify_service.recommend_knn(liked_indices, k=k, diversity=diversity)
-    elif model == "text":
-        results = spotify_service.recommend_text(liked_indices, k=k)
-    elif model == "hybrid":
-        results = spotify_service.recommend_hybrid(liked_indices, k=k, alpha=0.1)
-    else:
+    if model not in ("ensemble", "knn", "text", "hybrid"):
         raise HTTPException(status_code=400, detail=f"지원하지 않는 모델: {model}")
+    with stage("Kuka", "recommend"):
+        if model == "ensemble":
+            results = spotify_service.recommend_hybrid(liked_indices, k=k, alpha=0.4)
+        elif model == "knn":
+            results = spotify_service.recommend_knn(liked_indices, k=k, diversity=diversity)
+        elif model == "text":
+            results = spotify_service.recommend_text(liked_indices, k=k)
+        else:
+            results = spotify_service.recommend_hybrid(liked_indices, k=k, alpha=0.1)
 
     # RAG 설명 생성
     explanation = None
     if explain:
-        explanation = spotify_service.generate_explanation(liked_indices, results)
+        with stage("Kuka", "explain"):
+            explanation = spotify_service.generate_explanation(liked_indices, results)
 
     return RecommendResponse(
         model=model,
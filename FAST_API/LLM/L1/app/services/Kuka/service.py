@@ -15,10 +15,12 @@ from langsmith import traceable
 import pandas as pd
 import faiss
 import logging
+import time
 from pathlib import Path
 from typing import Optional
 from sklearn.neighbors import NearestNeighbors
-from sentence_transformers import SentenceTransformer
+
+from metrics import record_external
 
 logger = logging.getLogger(__name__)
 
@@ -105,8 +107,9 @@ class SpotifyRecommendService:
 
     def _generate_text_embeddings(self, save_path: Path):
         """텍스트 임베딩 생성 (최초 1회)"""
-        logger.info("  → 텍스트 임베딩 생성 중 (최초 1회, CPU 사용)...")
-        model = SentenceTransformer('all-MiniLM-L6-v2', device='cpu')
+        logger.info("  → 텍스트 임베딩 생성 중 (최초 1회, 공유 MiniLM 사용)...")
+        from embedding_service import get_embedding_service
+        model = get_embedding_service()
 
         texts = []
         for _, row in self.df.iterrows():
@@ -422,12 +425,15 @@ class SpotifyRecommendService:
 3. 위 데이터에 없는 정보는 절대 추가하지 마세요. 제공된 데이터만 사용하세요.
 4. 한국어로 답변하세요. 마크다운 서식 사용하지 마세요."""
 
+        started = time.perf_counter()
         try:
             response = self.gemini_client.models.generate_content(
                 model="gemini-2.5-flash", contents=prompt
             )
+            record_external("gemini", "success", time.perf_counter() - started)
             return response.text
         except Exception as e:
+            record_external("gemini", "error", time.perf_counter() - started)
             logger.error(f"Gemini 호출 실패: {e}")
             return None
 
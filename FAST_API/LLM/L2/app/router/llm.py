@@ -6,6 +6,8 @@ LLM 기반 기능들의 API 엔드포인트를 제공합니다.
 - /api/llm/explain-batch: 여러 곡 설명 (일괄)
 - /api/llm/parse-query: 자연어 검색 쿼리 파싱
 """
+import asyncio
+import time
 from typing import Optional
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
@@ -15,10 +17,17 @@ from app.services.llm import (
     explain_recommendation_batch,
     analyze_query,
 )
+from app.services.llm.explainer import generate_contextual_explanation
+from app.services.llm.metrics import LatencyWindow, stage
+from app.services.llm.query_analyzer import get_query_analyzer, normalize_query
 from app.services.llm.vector_search import semantic_search, get_vector_search_service
 
 router = APIRouter(prefix="/api/llm", tags=["LLM"])
 
+# /search 지연시간 및 추측 검색(speculative search) 통계
+_search_latency = LatencyWindow()
+_speculative_stats = {"launched": 0, "reused": 0, "discarded": 0}
+
 
 # ============================================
 # Pydantic Models (Request/Response)
@@ -35,6 +44,7 @@ class AudioFeatures(BaseModel):
 
 class TrackInfo(BaseModel):
     """곡 정보"""
+    track_id: Optional[str] = Field(None, description="곡 ID (설명 캐시 키)")
     artist: str = Field(..., description="아티스트명")
     title: str = Field(..., description="곡 제목")
     audio_features: AudioFeatures = Field(default_factory=AudioFeatures)
@@ -95,6 +105,7 @@ async def explain(request: ExplainRequest):
 
     # 곡 정보를 dict로 변환
     track_dict = {
+        "track_id": request.track.track_id,
         "artist": request.track.artist,
         "title": request.track.title,
         "audio_features": request.track.audio_features.model_dump()
@@ -118,12 +129,14 @@ async def explain_batch(request: ExplainBatchRequest):
     여러 곡에 대한 추천 이유 일괄 생성
 
     비용 제한을 위해 최대 10곡까지만 처리합니다.
+    캐시에 없는 곡만 모아 1회의 LLM 호출로 생성합니다.
     """
     user_prefs = request.user_preferences or UserPreferences()
 
     # 곡 목록을 dict로 변환
     tracks_dict = [
         {
+            "track_id": track.track_id,
             "artist": track.artist,
             "title": track.title,
             "audio_features": track.audio_features.model_dump()
@@ -217,6 +230,7 @@ async def get_available_genres():
 async def health_check():
     """LLM 서비스 상태 확인 (Google Gemini)"""
     from app.services.llm.config import get_llm_config
+    from app.services.llm.explainer import get_explanation_cache_stats
 
     config = get_llm_config()
     has_api_key = bool(config.GOOGLE_API_KEY)
@@ -225,7 +239,8 @@ async def health_check():
         "status": "ok" if has_api_key else "no_api_key",
         "provider": "Google Gemini",
         "model": config.DEFAULT_MODEL,
-        "api_key_configured": has_api_key
+        "api_key_configured": has_api_key,
+        "explanation_cache": get_explanation_cache_stats()
     }
 
 
@@ -254,7 +269,7 @@ SEARCH_HELP = {
 class SemanticSearchRequest(BaseModel):
     """벡터 기반 자연어 검색 요청"""
     query: str = Field(..., description="자연어 검색어", example="비오는 날 카페에서 들을 잔잔한 재즈")
-    page: int = Field(1, ge=1, le=1, description="페이지 번호")
+    page: int = Field(1, ge=1, le=3, description="페이지 번호 (최대 3페이지)")
     include_explanation: bool = Field(True, description="LLM 추천 이유 포함 여부")
     genres: Optional[list[str]] = Field(None, description="장르 필터 (선택)")
     energy_min: Optional[float] = Field(None, ge=0, le=1)
@@ -296,7 +311,8 @@ async def search_music(request: SemanticSearchRequest):
     """
     자연어로 음악 검색 (벡터 유사도 + LLM 설명)
 
-    - 한국어 쿼리 → LLM이 영어로 번역 + 감성 분석 (1회 호출)
+    - 한국어 쿼리 → LLM이 영어로 번역 + 감성 분석 (1회 호출, 결과 캐시)
+    - 번역 중에는 원본 쿼리로 벡터 검색을 미리 실행 (번역이 원본과 같으면 재사용)
     - 영어 쿼리로 벡터 검색 (정확도 향상)
     - 감성 분석 결과로 오디오 필터 자동 적용
     - 기본 5곡 + 즉시 설명 포함
@@ -307,21 +323,23 @@ async def search_music(request: SemanticSearchRequest):
     - "신나는 운동 음악"
     - "우울할 때 듣는 감성 발라드"
     """
-    from app.services.llm.explainer import generate_contextual_explanation
-    from app.services.llm.query_analyzer import analyze_query
+    started_at = time.perf_counter()
+    try:
+        return await _search_music(request)
+    finally:
+        _search_latency.record(time.perf_counter() - started_at)
 
-    # 1단계: 쿼리 분석 (번역 + 감성 분석)
-    query_analysis = await analyze_query(request.query)
-    search_query = query_analysis["english_query"]  # 영어로 번역된 쿼리
 
-    # 20곡 반환
+async def _search_music(request: SemanticSearchRequest) -> SemanticSearchResponse:
+    """/search 본체 (지연시간 측정을 위해 분리)"""
+    analyzer = get_query_analyzer()
+
+    # 페이지당 20곡 (다음 페이지는 서비스의 결과 커서 캐시에서 슬라이스)
     page_size = 20
-    offset = 0
+    offset = (request.page - 1) * page_size
 
-    # 2단계: 필터 구성 (요청 필터 + LLM 감성 필터 병합)
+    # 필터 구성 1: 명시적 요청 필터 (우선순위 높음)
     filters = {}
-
-    # 명시적 요청 필터 (우선순위 높음)
     if request.genres:
         filters["genres"] = request.genres
     if request.energy_min is not None:
@@ -332,19 +350,51 @@ async def search_music(request: SemanticSearchRequest):
         filters["valence_min"] = request.valence_min
     if request.valence_max is not None:
         filters["valence_max"] = request.valence_max
+    request_filters = dict(filters)
 
-    # LLM 감성 분석 필터 추가 (명시적 필터가 없는 경우에만)
+    # 1단계: 쿼리 분석 (번역 + 감성 분석)
+    # 캐시 적중 또는 LLM 불필요 → 즉시 결과
+    # 캐시 미스 → LLM 호출 동안 원본 쿼리로 벡터 검색을 미리 실행 (추측 검색)
+    speculative_task = None
+    query_analysis = analyzer.lookup(request.query)
+    if query_analysis is None:
+        speculative_task = asyncio.create_task(semantic_search(
+            query=request.query,
+            n_results=page_size,
+            filters=request_filters if request_filters else None,
+            offset=offset
+        ))
+        _speculative_stats["launched"] += 1
+        with stage("L2", "query_analysis"):
+            query_analysis = await analyzer.analyze_with_llm(request.query)
+
+    search_query = query_analysis["english_query"]  # 영어로 번역된 쿼리
+
+    # 필터 구성 2: LLM 감성 분석 필터 추가 (명시적 필터가 없는 경우에만)
     llm_filters = query_analysis.get("audio_filters", {})
     for key, value in llm_filters.items():
         if key not in filters and value is not None:
             filters[key] = value
 
-    # 3단계: 벡터 검색 (영어 쿼리 사용)
-    result = await semantic_search(
-        query=search_query,  # 영어로 번역된 쿼리
-        n_results=offset + page_size,
-        filters=filters if filters else None
-    )
+    # 2단계: 벡터 검색 (영어 쿼리 사용)
+    # 번역 결과가 원본과 같고 추가 필터도 없으면 추측 검색 결과를 그대로 사용
+    result = None
+    with stage("L2", "vector_search"):
+        if speculative_task is not None:
+            if normalize_query(search_query) == normalize_query(request.query) and filters == request_filters:
+                result = await speculative_task
+                _speculative_stats["reused"] += 1
+            else:
+                speculative_task.cancel()
+                _speculative_stats["discarded"] += 1
+
+        if result is None:
+            result = await semantic_search(
+                query=search_query,  # 영어로 번역된 쿼리
+                n_results=page_size,
+                filters=filters if filters else None,
+                offset=offset
+            )
 
     if not result.get("success"):
         return SemanticSearchResponse(
@@ -353,18 +403,18 @@ async def search_music(request: SemanticSearchRequest):
             query=request.query
         )
 
-    # 현재 페이지의 곡만 추출
-    all_tracks = result.get("tracks", [])
-    page_tracks = all_tracks[offset:offset + page_size]
+    # 현재 페이지의 곡 (서비스에서 offset 적용됨)
+    page_tracks = result.get("tracks", [])
 
-    # 4단계: LLM 설명 추가 (요청 시)
+    # 3단계: LLM 설명 추가 (요청 시)
     if request.include_explanation and page_tracks:
         try:
             # 원본 한국어 쿼리로 설명 생성 (사용자 친화적)
-            explanations = await generate_contextual_explanation(
-                tracks=page_tracks,
-                search_context=request.query  # 원본 쿼리 사용
-            )
+            with stage("L2", "explanation"):
+                explanations = await generate_contextual_explanation(
+                    tracks=page_tracks,
+                    search_context=request.query  # 원본 쿼리 사용
+                )
             for i, track in enumerate(page_tracks):
                 if i < len(explanations):
                     track["explanation"] = explanations[i]
@@ -379,7 +429,7 @@ async def search_music(request: SemanticSearchRequest):
         total=len(page_tracks),
         page=request.page,
         max_page=3,
-        has_more=request.page < 3 and len(all_tracks) > offset + page_size,
+        has_more=request.page < 3 and len(page_tracks) == page_size,
         collection_size=result.get("collection_size", 0),
         # 쿼리 분석 정보
         analyzed_query=search_query,
@@ -411,7 +461,11 @@ async def search_status():
     return {
         "ready": service.is_ready,
         "collection_size": service.collection_count,
+        "query_cache": get_query_analyzer().stats(),
+        "speculative_search": dict(_speculative_stats),
+        "latency": _search_latency.stats(),
         "embedding_model": "sentence-transformers/all-MiniLM-L6-v2",
+        "vector_cache": service.cache_stats(),
         "db_type": "ChromaDB",
         "message": "Ready for semantic search" if service.is_ready else "Service not initialized"
     }
@@ -0,0 +1,174 @@
+"""
+LLM 결과 캐시
+
+Gemini 호출 결과(추천 설명 등)를 메모리에 보관하여 동일한 요청이
+반복될 때 LLM 왕복 없이 재사용합니다.
+- LRU 방식으로 최대 크기 유지
+- 항목별 TTL 만료
+- 적중률 통계 제공
+- (선택) SQLite 영구 저장
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """스레드 안전 LRU + TTL 캐시"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """캐시 조회 (없거나 만료되면 None)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, stored_at = entry
+            if self._expired(stored_at):
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """캐시 저장 (최대 크기 초과 시 가장 오래된 항목 제거)"""
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 통계"""
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+        }
+
+
+class PersistentTTLCache(TTLCache):
+    """
+    메모리 LRU + SQLite 영구 캐시
+
+    메모리에서 먼저 찾고, 없으면 SQLite에서 찾아 메모리로 올립니다.
+    서버 재시작 후에도 이전 결과를 재사용할 수 있습니다.
+    값은 JSON 직렬화 가능한 객체여야 합니다.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        table: str = "cache",
+        max_size: int = 1024,
+        ttl_seconds: Optional[float] = None
+    ):
+        super().__init__(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.db_path = str(db_path)
+        self.table = table
+        self.disk_hits = 0
+        self._conn = None
+        self._db_lock = threading.Lock()
+
+        try:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        except Exception as e:
+            logger.warning(f"영구 캐시 초기화 실패, 메모리 캐시만 사용: {e}")
+            self._conn = None
+
+    def get(self, key: str) -> Optional[Any]:
+        value = super().get(key)
+        if value is not None or self._conn is None:
+            return value
+
+        try:
+            with self._db_lock:
+                row = self._conn.execute(
+                    f"SELECT value, stored_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+        except Exception as e:
+            logger.warning(f"영구 캐시 조회 실패: {e}")
+            return None
+
+        if row is None or self._expired(row[1]):
+            return None
+
+        value = json.loads(row[0])
+        # 메모리로 승격 (miss로 집계된 것을 hit로 보정)
+        super().set(key, value)
+        with self._lock:
+            self.misses -= 1
+            self.hits += 1
+            self.disk_hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        super().set(key, value)
+        if self._conn is None:
+            return
+
+        try:
+            with self._db_lock:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), time.time())
+                )
+                self._conn.commit()
+        except Exception as e:
+            logger.warning(f"영구 캐시 저장 실패: {e}")
+
+    def clear(self) -> None:
+        super().clear()
+        if self._conn is None:
+            return
+        with self._db_lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["disk_hits"] = self.disk_hits
+        stats["persistent"] = self._conn is not None
+        return stats
@@ -20,6 +20,21 @@ class LLMConfig:
     MAX_TOKENS: int = 200
     TEMPERATURE: float = 0.7  # 창의성 (0=결정적, 1=창의적)
 
+    # 추천 설명 캐시 설정
+    # 프롬프트를 바꾸면 EXPLANATION_PROMPT_VERSION을 올려서 기존 캐시를 무효화
+    EXPLANATION_PROMPT_VERSION: str = "v1"
+    EXPLANATION_CACHE_SIZE: int = int(os.getenv("EXPLANATION_CACHE_SIZE", "5000"))
+    EXPLANATION_CACHE_TTL: int = int(os.getenv("EXPLANATION_CACHE_TTL", "86400"))  # 초
+    PREFERENCE_BUCKET_SIZE: float = 0.1  # 사용자 취향 수치 버킷 크기
+
+    # 쿼리 분석 캐시 설정 (메모리 LRU + SQLite 영구 저장)
+    QUERY_CACHE_PATH: str = os.getenv(
+        "QUERY_CACHE_PATH",
+        os.path.join(os.path.dirname(__file__), "..", "..", "..", "data", "query_cache.db")
+    )
+    QUERY_CACHE_SIZE: int = int(os.getenv("QUERY_CACHE_SIZE", "2000"))
+    QUERY_CACHE_TTL: int = int(os.getenv("QUERY_CACHE_TTL", str(7 * 86400)))  # 초
+
     # 프롬프트 설정
     SYSTEM_PROMPT: str = """당신은 음악 추천 시스템의 AI 어시스턴트입니다.
 사용자의 음악 취향을 분석하고, 추천된 곡이 왜 사용자에게 맞는지 친근하게 설명합니다.
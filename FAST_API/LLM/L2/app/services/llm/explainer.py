@@ -3,13 +3,19 @@
 
 SVM 모델의 추천 결과에 대해 LLM이 자연어 설명을 생성합니다.
 
+여러 곡은 한 번의 LLM 호출(JSON 배열 응답)로 일괄 생성하고,
+(곡, 버킷화된 사용자 취향, 프롬프트 버전) 단위로 결과를 캐시합니다.
+
 LangSmith 트레이싱 적용됨.
 """
+import json
 from typing import Optional
 import google.generativeai as genai
 from langsmith import traceable
 
+from .cache import TTLCache
 from .config import get_llm_config
+from .metrics import timed_external
 
 # LLM 클라이언트 초기화
 config = get_llm_config()
@@ -22,6 +28,12 @@ if config.GOOGLE_API_KEY:
         system_instruction=config.SYSTEM_PROMPT
     )
 
+# 추천 설명 캐시: (track_key, 취향 버킷, 프롬프트 버전) → 설명
+_explanation_cache = TTLCache(
+    max_size=config.EXPLANATION_CACHE_SIZE,
+    ttl_seconds=config.EXPLANATION_CACHE_TTL
+)
+
 
 # 에너지/발랄함 레벨 해석
 def _interpret_level(value: float) -> str:
@@ -73,6 +85,152 @@ EXPLANATION_PROMPT = """사용자 음악 취향:
 중요: 위에 제공된 정보만 사용하고, 추측하거나 새로운 정보를 만들어내지 마세요."""
 
 
+BATCH_EXPLANATION_PROMPT = """사용자 음악 취향:
+- 평균 에너지: {user_energy:.2f} ({user_energy_desc})
+- 평균 발랄함: {user_valence:.2f} ({user_valence_desc})
+- 선호 장르/태그: {top_genres}
+- 최근 아티스트: {recent_artists}
+
+추천된 곡 목록:
+{tracks_info}
+위 정보를 바탕으로 각 곡을 추천한 이유를 친근한 말투로 곡마다 2문장으로 설명해주세요.
+반드시 한국어로 작성하고, 구체적인 숫자는 언급하지 마세요.
+중요: 위에 제공된 정보만 사용하고, 추측하거나 새로운 정보를 만들어내지 마세요.
+
+응답 형식 (곡 순서와 동일한 JSON 배열, {count}개):
+["첫 번째 곡 설명", "두 번째 곡 설명", ...]"""
+
+
+def _user_fields(user_preferences: dict) -> dict:
+    """프롬프트용 사용자 취향 필드 추출"""
+    user_energy = user_preferences.get("avg_energy", 0.5)
+    user_valence = user_preferences.get("avg_valence", 0.5)
+    top_genres = user_preferences.get("top_genres", ["pop"])
+    recent_artists = user_preferences.get("recent_artists", [])
+
+    return {
+        "user_energy": user_energy,
+        "user_energy_desc": _interpret_energy(user_energy),
+        "user_valence": user_valence,
+        "user_valence_desc": _interpret_valence(user_valence),
+        "top_genres": ", ".join(top_genres[:5]),
+        "recent_artists": ", ".join(recent_artists[:3]) if recent_artists else "없음",
+    }
+
+
+def _track_fields(track: dict) -> dict:
+    """프롬프트용 곡 필드 추출"""
+    # 오디오 피처 추출
+    audio = track.get("audio_features", {})
+    track_energy = audio.get("energy", 0.5)
+    track_valence = audio.get("valence", 0.5)
+    acousticness = audio.get("acousticness", 0.5)
+
+    # 아티스트 태그 추출 (없으면 빈 문자열)
+    artist_tags = track.get("artist_tags", "") or track.get("lfm_artist_tags", "")
+    if not artist_tags:
+        artist_tags = "정보 없음"
+    elif isinstance(artist_tags, list):
+        artist_tags = ", ".join(artist_tags[:5])
+    else:
+        # 문자열인 경우 앞 5개 태그만 사용
+        tags_list = [t.strip() for t in str(artist_tags).split(",")][:5]
+        artist_tags = ", ".join(tags_list) if tags_list else "정보 없음"
+
+    return {
+        "artist": track.get("artist", "Unknown"),
+        "title": track.get("title", "Unknown"),
+        "artist_tags": artist_tags,
+        "track_energy": track_energy,
+        "track_energy_desc": _interpret_energy(track_energy),
+        "track_valence": track_valence,
+        "track_valence_desc": _interpret_valence(track_valence),
+        "acousticness": acousticness,
+    }
+
+
+def _match_score(track: dict, user_preferences: dict) -> float:
+    """매칭 점수 계산 (에너지와 발랄함 유사도)"""
+    audio = track.get("audio_features", {})
+    energy_diff = abs(audio.get("energy", 0.5) - user_preferences.get("avg_energy", 0.5))
+    valence_diff = abs(audio.get("valence", 0.5) - user_preferences.get("avg_valence", 0.5))
+    return round(1 - (energy_diff + valence_diff) / 2, 2)
+
+
+def _bucket(value: float) -> float:
+    """0-1 값을 버킷 단위로 반올림 (비슷한 취향끼리 캐시 공유)"""
+    size = config.PREFERENCE_BUCKET_SIZE
+    return round(round(float(value) / size) * size, 2)
+
+
+def _cache_key(track: dict, user_preferences: dict) -> tuple:
+    """
+    설명 캐시 키: (track_key, 취향 버킷, 프롬프트 버전)
+
+    track_id가 없으면 아티스트|곡명으로 대체합니다.
+    프롬프트에 들어가는 곡 정보(오디오 피처)도 버킷화하여 포함합니다.
+    """
+    track_id = track.get("track_id")
+    if track_id:
+        track_key = str(track_id)
+    else:
+        track_key = f"{str(track.get('artist', '')).lower()}|{str(track.get('title', '')).lower()}"
+
+    audio = track.get("audio_features", {})
+    track_bucket = (
+        _bucket(audio.get("energy", 0.5)),
+        _bucket(audio.get("valence", 0.5)),
+        _bucket(audio.get("acousticness", 0.5)),
+    )
+
+    preference_bucket = (
+        _bucket(user_preferences.get("avg_energy", 0.5)),
+        _bucket(user_preferences.get("avg_valence", 0.5)),
+        tuple(g.lower() for g in user_preferences.get("top_genres", ["pop"])[:5]),
+        tuple(a.lower() for a in (user_preferences.get("recent_artists") or [])[:3]),
+    )
+
+    return (track_key, track_bucket, preference_bucket, config.EXPLANATION_PROMPT_VERSION)
+
+
+def _parse_explanation_list(response_text: str, count: int, default: str) -> list[str]:
+    """LLM 응답(JSON 배열 또는 번호 목록)을 count개의 설명 리스트로 변환"""
+    try:
+        # JSON 배열 추출
+        if "[" in response_text and "]" in response_text:
+            start = response_text.index("[")
+            end = response_text.rindex("]") + 1
+            explanations = [str(e) for e in json.loads(response_text[start:end])]
+
+            # 곡 수에 맞게 조정
+            while len(explanations) < count:
+                explanations.append(default)
+            return explanations[:count]
+
+    except (json.JSONDecodeError, ValueError):
+        pass
+
+    # JSON 파싱 실패 시 줄 단위로 분리
+    lines = [line.strip() for line in response_text.split("\n") if line.strip()]
+    explanations = []
+    for line in lines:
+        # 번호 제거 (1. 2. 등)
+        if line and line[0].isdigit() and "." in line[:3]:
+            line = line.split(".", 1)[1].strip()
+        if line and not line.startswith("["):
+            explanations.append(line)
+
+    while len(explanations) < count:
+        explanations.append(default)
+
+    return explanations[:count]
+
+
+def get_explanation_cache_stats() -> dict:
+    """추천 설명 캐시 통계"""
+    return _explanation_cache.stats()
+
+
 @traceable(name="explain_recommendation", run_type="llm")
 async def explain_recommendation(
     track: dict,
@@ -83,6 +241,7 @@ async def explain_recommendation(
 
     Args:
         track: 추천된 곡 정보
+            - track_id: str (선택, 캐시 키)
             - artist: str
             - title: str
             - audio_features: dict (energy, valence, acousticness 등)
@@ -96,6 +255,7 @@ async def explain_recommendation(
         dict:
             - explanation: str (자연어 설명)
             - match_score: float (매칭 점수, 선택)
+            - cached: bool (캐시 사용 여부)
     """
     if not model:
         return {
@@ -103,67 +263,38 @@ async def explain_recommendation(
             "match_score": None
         }
 
-    # 오디오 피처 추출
-    audio = track.get("audio_features", {})
-    track_energy = audio.get("energy", 0.5)
-    track_valence = audio.get("valence", 0.5)
-    acousticness = audio.get("acousticness", 0.5)
-
-    # 사용자 취향 추출
-    user_energy = user_preferences.get("avg_energy", 0.5)
-    user_valence = user_preferences.get("avg_valence", 0.5)
-    top_genres = user_preferences.get("top_genres", ["pop"])
-    recent_artists = user_preferences.get("recent_artists", [])
-
-    # 아티스트 태그 추출 (없으면 빈 문자열)
-    artist_tags = track.get("artist_tags", "") or track.get("lfm_artist_tags", "")
-    if not artist_tags:
-        artist_tags = "정보 없음"
-    elif isinstance(artist_tags, list):
-        artist_tags = ", ".join(artist_tags[:5])
-    else:
-        # 문자열인 경우 앞 5개 태그만 사용
-        tags_list = [t.strip() for t in str(artist_tags).split(",")][:5]
-        artist_tags = ", ".join(tags_list) if tags_list else "정보 없음"
+    key = _cache_key(track, user_preferences)
+    cached = _explanation_cache.get(key)
+    if cached is not None:
+        return {
+            "explanation": cached,
+            "match_score": _match_score(track, user_preferences),
+            "cached": True
+        }
 
     # 프롬프트 생성
     prompt = EXPLANATION_PROMPT.format(
-        user_energy=user_energy,
-        user_energy_desc=_interpret_energy(user_energy),
-        user_valence=user_valence,
-        user_valence_desc=_interpret_valence(user_valence),
-        top_genres=", ".join(top_genres[:5]),
-        recent_artists=", ".join(recent_artists[:3]) if recent_artists else "없음",
-        artist=track.get("artist", "Unknown"),
-        title=track.get("title", "Unknown"),
-        artist_tags=artist_tags,
-        track_energy=track_energy,
-        track_energy_desc=_interpret_energy(track_energy),
-        track_valence=track_valence,
-        track_valence_desc=_interpret_valence(track_valence),
-        acousticness=acousticness
+        **_user_fields(user_preferences),
+        **_track_fields(track)
     )
 
     try:
-        # Gemini API 호출
-        response = model.generate_content(
+        # Gemini API 호출 (비동기 - 이벤트 루프 블로킹 방지)
+        response = await timed_external("gemini", model.generate_content_async(
             prompt,
             generation_config=genai.types.GenerationConfig(
                 max_output_tokens=config.MAX_TOKENS,
                 temperature=config.TEMPERATURE
             )
-        )
+        ))
 
         explanation = response.text.strip()
-
-        # 매칭 점수 계산 (에너지와 발랄함 유사도)
-        energy_diff = abs(track_energy - user_energy)
-        valence_diff = abs(track_valence - user_valence)
-        match_score = 1 - (energy_diff + valence_diff) / 2
+        _explanation_cache.set(key, explanation)
 
         return {
             "explanation": explanation,
-            "match_score": round(match_score, 2)
+            "match_score": _match_score(track, user_preferences),
+            "cached": False
         }
 
     except Exception as e:
@@ -173,6 +304,7 @@ async def explain_recommendation(
         }
 
 
+@traceable(name="explain_recommendation_batch", run_type="llm")
 async def explain_recommendation_batch(
     tracks: list[dict],
     user_preferences: dict,
@@ -181,22 +313,89 @@ async def explain_recommendation_batch(
     """
     여러 곡에 대한 설명 일괄 생성
 
+    캐시에 없는 곡만 모아 한 번의 LLM 호출(JSON 배열 응답)로 생성하므로
+    곡 수와 관계없이 LLM 왕복은 최대 1회입니다.
+
     Args:
         tracks: 추천된 곡 목록
         user_preferences: 사용자 취향 정보
         max_tracks: 최대 처리 곡 수
 
     Returns:
-        list[dict]: 각 곡에 대한 설명 목록
+        list[dict]: 각 곡에 대한 설명 목록 (입력 순서 유지)
     """
-    results = []
+    tracks = tracks[:max_tracks]
+
+    if not model:
+        return [
+            {
+                "track": track,
+                "explanation": "API 키가 설정되지 않아 설명을 생성할 수 없습니다.",
+                "match_score": None
+            }
+            for track in tracks
+        ]
+
+    # 1단계: 캐시 조회
+    keys = [_cache_key(track, user_preferences) for track in tracks]
+    explanations: list[Optional[str]] = [_explanation_cache.get(key) for key in keys]
+    cached_flags = [e is not None for e in explanations]
+    missing = [i for i, e in enumerate(explanations) if e is None]
+
+    # 2단계: 캐시 미스 곡만 한 번에 생성
+    error_message = None
+    if missing:
+        tracks_info = ""
+        for n, i in enumerate(missing, 1):
+            fields = _track_fields(tracks[i])
+            tracks_info += f"{n}. {fields['artist']} - {fields['title']}\n"
+            tracks_info += f"   아티스트 스타일: {fields['artist_tags']}\n"
+            tracks_info += f"   에너지: {fields['track_energy_desc']}, 발랄함: {fields['track_valence_desc']}, "
+            tracks_info += f"어쿠스틱: {_interpret_level(fields['acousticness'])}\n\n"
+
+        prompt = BATCH_EXPLANATION_PROMPT.format(
+            **_user_fields(user_preferences),
+            tracks_info=tracks_info,
+            count=len(missing)
+        )
+
+        try:
+            response = await timed_external("gemini", model.generate_content_async(
+                prompt,
+                generation_config=genai.types.GenerationConfig(
+                    max_output_tokens=config.MAX_TOKENS * len(missing),
+                    temperature=config.TEMPERATURE
+                )
+            ))
+            generated = _parse_explanation_list(
+                response.text.strip(), len(missing), default=""
+            )
+            for i, explanation in zip(missing, generated):
+                if explanation:
+                    explanations[i] = explanation
+                    _explanation_cache.set(keys[i], explanation)
 
-    for track in tracks[:max_tracks]:
-        result = await explain_recommendation(track, user_preferences)
-        results.append({
-            "track": track,
-            **result
-        })
+        except Exception as e:
+            error_message = f"설명 생성 중 오류가 발생했습니다: {str(e)}"
+
+    # 3단계: 결과 조립
+    results = []
+    for i, track in enumerate(tracks):
+        explanation = explanations[i]
+        if explanation is None:
+            results.append({
+                "track": track,
+                "explanation": error_message or "이 곡을 추천드려요.",
+                "match_score": None if error_message else _match_score(track, user_preferences),
+                "cached": False
+            })
+        else:
+            results.append({
+                "track": track,
+                "explanation": explanation,
+                "match_score": _match_score(track, user_preferences),
+                "cached": cached_flags[i]
+            })
 
     return results
 
@@ -264,48 +463,17 @@ async def generate_contextual_explanation(
 
     try:
         # Gemini API 호출 (배치)
-        response = model.generate_content(
+        response = await timed_external("gemini", model.generate_content_async(
             prompt,
             generation_config=genai.types.GenerationConfig(
                 max_output_tokens=2000,  # 20곡 기준
                 temperature=0.7
             )
-        )
+        ))
 
-        response_text = response.text.strip()
-
-        # JSON 파싱 시도
-        import json
-        try:
-            # JSON 배열 추출
-            if "[" in response_text and "]" in response_text:
-                start = response_text.index("[")
-                end = response_text.rindex("]") + 1
-                json_str = response_text[start:end]
-                explanations = json.loads(json_str)
-
-                # 곡 수에 맞게 조정
-                while len(explanations) < len(tracks):
-                    explanations.append("이 곡을 추천드려요.")
-                return explanations[:len(tracks)]
-
-        except (json.JSONDecodeError, ValueError):
-            pass
-
-        # JSON 파싱 실패 시 줄 단위로 분리
-        lines = [line.strip() for line in response_text.split("\n") if line.strip()]
-        explanations = []
-        for line in lines:
-            # 번호 제거 (1. 2. 등)
-            if line and line[0].isdigit() and "." in line[:3]:
-                line = line.split(".", 1)[1].strip()
-            if line and not line.startswith("["):
-                explanations.append(line)
-
-        while len(explanations) < len(tracks):
-            explanations.append("이 곡을 추천드려요.")
-
-        return explanations[:len(tracks)]
+        return _parse_explanation_list(
+            response.text.strip(), len(tracks), default="이 곡을 추천드려요."
+        )
 
     except Exception as e:
         # 오류 시 기본 메시지
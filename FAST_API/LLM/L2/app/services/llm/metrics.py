@@ -0,0 +1,68 @@
+"""
+간단한 지연시간 통계
+
+최근 N건의 요청 소요 시간을 보관하고 p50/p95/p99를 계산합니다.
+FAST_API에 마운트되면 단계/외부 호출 시간을 프로세스 공용 /metrics(metrics 모듈)에도 기록합니다.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Awaitable, Dict, Optional, TypeVar
+
+# 공용 Prometheus 메트릭 (단독 실행 스크립트 등에서 import 불가하면 기록 생략)
+try:
+    from metrics import record_external, stage
+except ImportError:
+    def record_external(service: str, outcome: str, seconds: Optional[float] = None) -> None:
+        pass
+
+    @contextmanager
+    def stage(model: str, name: str):
+        yield
+
+T = TypeVar("T")
+
+
+async def timed_external(service: str, call: Awaitable[T]) -> T:
+    """외부 API 호출 대기 + 결과/지연시간 기록 (예외는 그대로 전파)"""
+    started = time.perf_counter()
+    try:
+        result = await call
+    except Exception:
+        record_external(service, "error", time.perf_counter() - started)
+        raise
+    record_external(service, "success", time.perf_counter() - started)
+    return result
+
+
+class LatencyWindow:
+    """최근 요청 지연시간 윈도우 (초 단위 기록, ms 단위 보고)"""
+
+    def __init__(self, max_samples: int = 1000):
+        self._samples: deque = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q(0-100) 백분위 지연시간 (ms)"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))
+        return round(samples[index] * 1000, 1)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {
+            "count": self.count,
+            "window": len(self._samples),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+        }
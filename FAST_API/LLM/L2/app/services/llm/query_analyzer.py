@@ -4,14 +4,20 @@ LLM 쿼리 분석기 - 번역 + 감성 분석 통합
 한국어 쿼리를 영어로 번역하고, 감성 분석을 통해 오디오 특성 필터를 추출합니다.
 1회의 LLM 호출로 두 가지를 동시에 처리합니다.
 
+정규화된 쿼리 단위로 분석 결과를 캐시(메모리 LRU + SQLite)하고,
+동시에 들어온 동일 쿼리는 하나의 LLM 호출을 공유합니다.
+
 LangSmith 트레이싱 적용됨.
 """
+import asyncio
 import json
 import logging
 from typing import Optional, Dict, Any
 
 from langsmith import traceable
+from .cache import PersistentTTLCache
 from .config import get_llm_config
+from .metrics import timed_external
 
 logger = logging.getLogger(__name__)
 
@@ -59,6 +65,11 @@ Only set audio filters when the query clearly implies an emotional state or ener
 If the query is just about genre/artist style, leave audio_filters as null values."""
 
 
+def normalize_query(query: str) -> str:
+    """캐시 키용 쿼리 정규화 (공백 정리 + 소문자)"""
+    return " ".join(query.split()).lower()
+
+
 class QueryAnalyzer:
     """LLM 기반 쿼리 분석기"""
 
@@ -66,12 +77,22 @@ class QueryAnalyzer:
         self.model = None
         self._initialized = False
 
+        config = get_llm_config()
+        self.cache = PersistentTTLCache(
+            db_path=config.QUERY_CACHE_PATH,
+            table="query_analysis",
+            max_size=config.QUERY_CACHE_SIZE,
+            ttl_seconds=config.QUERY_CACHE_TTL
+        )
+        # 진행 중인 LLM 호출 (정규화 쿼리 → Task)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced_count = 0
+
         if not GEMINI_AVAILABLE:
             logger.warning("Gemini SDK가 설치되지 않았습니다.")
             return
 
         # config.py와 동일한 GOOGLE_API_KEY 사용
-        config = get_llm_config()
         api_key = config.GOOGLE_API_KEY
         if not api_key:
             logger.warning("GOOGLE_API_KEY가 설정되지 않았습니다.")
@@ -95,7 +116,37 @@ class QueryAnalyzer:
         ascii_chars = sum(1 for c in text if ord(c) < 128)
         return ascii_chars / len(text) > 0.8 if text else True
 
-    @traceable(name="query_analyzer", run_type="llm")
+    def needs_llm(self, query: str) -> bool:
+        """LLM 분석이 필요한 쿼리인지 (영어 + 감성 키워드 없음이면 불필요)"""
+        return not (self._is_english(query) and not self._has_emotion_keywords(query))
+
+    def _passthrough_result(self, query: str) -> Dict[str, Any]:
+        """LLM 없이 원본 쿼리를 그대로 쓰는 결과"""
+        return {
+            "original_query": query,
+            "english_query": query,
+            "detected_emotion": None,
+            "audio_filters": {},
+            "used_llm": False
+        }
+
+    def lookup(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        LLM 호출 없이 얻을 수 있는 분석 결과 조회
+
+        Returns:
+            LLM이 불필요한 쿼리면 원본 그대로의 결과, 캐시 적중이면 캐시된 결과,
+            둘 다 아니면 None (LLM 호출 필요)
+        """
+        if not self.needs_llm(query):
+            return self._passthrough_result(query)
+
+        cached = self.cache.get(normalize_query(query))
+        if cached is None:
+            return None
+
+        return {**cached, "original_query": query, "cached": True}
+
     async def analyze(self, query: str) -> Dict[str, Any]:
         """
         쿼리 분석: 번역 + 감성 분석
@@ -117,26 +168,42 @@ class QueryAnalyzer:
                 "used_llm": bool
             }
         """
-        result = {
-            "original_query": query,
-            "english_query": query,
-            "detected_emotion": None,
-            "audio_filters": {},
-            "used_llm": False
-        }
-
-        # 영어 쿼리이고 감성 키워드가 없으면 LLM 스킵
-        if self._is_english(query) and not self._has_emotion_keywords(query):
+        result = self.lookup(query)
+        if result is not None:
             return result
 
+        return await self.analyze_with_llm(query)
+
+    async def analyze_with_llm(self, query: str) -> Dict[str, Any]:
+        """
+        캐시를 거치지 않고 LLM으로 분석 (동일 쿼리 동시 요청은 1회 호출로 병합)
+        """
         # LLM 사용 불가시 원본 반환
         if not self.is_ready:
             logger.warning("QueryAnalyzer가 준비되지 않아 원본 쿼리 사용")
-            return result
+            return self._passthrough_result(query)
+
+        key = normalize_query(query)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced_count += 1
+        else:
+            task = asyncio.ensure_future(self._call_llm(query, key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # 한 요청이 취소되어도 공유 중인 LLM 호출은 유지
+        result = await asyncio.shield(task)
+        return {**result, "original_query": query}
+
+    @traceable(name="query_analyzer", run_type="llm")
+    async def _call_llm(self, query: str, key: str) -> Dict[str, Any]:
+        """Gemini 호출 + 결과 캐시 저장"""
+        result = self._passthrough_result(query)
 
         try:
             prompt = QUERY_ANALYSIS_PROMPT.format(query=query)
-            response = self.model.generate_content(prompt)
+            response = await timed_external("gemini", self.model.generate_content_async(prompt))
 
             # JSON 파싱
             text = response.text.strip()
@@ -156,15 +223,17 @@ class QueryAnalyzer:
             # 오디오 필터 추출
             audio_filters = parsed.get("audio_filters", {})
             if audio_filters:
-                for key in ["energy_min", "energy_max", "valence_min", "valence_max"]:
-                    value = audio_filters.get(key)
+                for key_name in ["energy_min", "energy_max", "valence_min", "valence_max"]:
+                    value = audio_filters.get(key_name)
                     if value is not None and isinstance(value, (int, float)):
-                        result["audio_filters"][key] = float(value)
+                        result["audio_filters"][key_name] = float(value)
 
             logger.info(f"쿼리 분석 완료: '{query}' → '{result['english_query']}'")
             if result["audio_filters"]:
                 logger.info(f"감성 필터: {result['audio_filters']}")
 
+            # 성공한 분석만 캐시 (실패는 다음 요청에서 재시도)
+            self.cache.set(key, result)
             return result
 
         except json.JSONDecodeError as e:
@@ -174,6 +243,14 @@ class QueryAnalyzer:
             logger.error(f"쿼리 분석 실패: {e}")
             return result
 
+    def stats(self) -> Dict[str, Any]:
+        """쿼리 분석 캐시 통계"""
+        return {
+            **self.cache.stats(),
+            "inflight": len(self._inflight),
+            "coalesced": self.coalesced_count
+        }
+
     def _has_emotion_keywords(self, text: str) -> bool:
         """감성 관련 키워드 포함 여부"""
         emotion_keywords = [
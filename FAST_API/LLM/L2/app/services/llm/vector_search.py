@@ -2,13 +2,23 @@
 벡터 기반 자연어 검색 서비스 (ChromaDB)
 
 114k 곡의 아티스트 태그를 벡터화하여 의미 기반 검색을 수행합니다.
+
+반복 비용을 줄이기 위한 캐시:
+- 쿼리 임베딩 LRU (같은 쿼리를 다시 임베딩하지 않음)
+- 컬렉션 크기 캐시 (upsert/delete 시 갱신)
+- 검색 결과 커서 캐시 (같은 검색의 다음 페이지는 슬라이스로 반환)
 """
 import os
+import json
+import time
+import asyncio
 import logging
 from pathlib import Path
 from typing import List, Dict, Optional, Any
 import pandas as pd
 
+from .cache import TTLCache
+
 try:
     import chromadb
     from chromadb.config import Settings
@@ -19,7 +29,8 @@ except ImportError:
     chromadb = None
     embedding_functions = None
 
-# SentenceTransformer는 chromadb.utils.embedding_functions를 통해 사용
+# SentenceTransformer는 프로세스 공유 임베딩 서비스(embedding_service)를 사용
+# (단독 실행 스크립트 등에서 import 불가하면 chromadb 기본 함수로 대체)
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +45,33 @@ EMBEDDING_MODEL = os.getenv(
     "sentence-transformers/all-MiniLM-L6-v2"
 )
 
+# 캐시 설정
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048"))
+RESULT_CURSOR_TTL = int(os.getenv("RESULT_CURSOR_TTL", "300"))  # 초
+RESULT_CURSOR_CACHE_SIZE = 256
+RESULT_PREFETCH = 60  # 한 번에 가져올 결과 수 (라우터 기준 20곡 x 3페이지)
+COLLECTION_COUNT_TTL = 300  # 외부(초기화 스크립트 등) 변경 반영 주기 (초)
+
+
+class SharedEmbeddingFunction:
+    """공유 MiniLM 인스턴스를 쓰는 Chroma 임베딩 함수 (동시 요청은 micro-batch로 합쳐짐)"""
+
+    def __init__(self, service):
+        self._service = service
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        return self._service.encode(list(input)).tolist()
+
+
+def _create_embedding_function():
+    """공유 임베딩 서비스 기반 임베딩 함수 (불가하면 chromadb 기본 SentenceTransformer)"""
+    try:
+        from embedding_service import get_embedding_service
+    except ImportError:
+        logger.warning("embedding_service를 찾을 수 없어 별도 SentenceTransformer를 로드합니다")
+        return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=EMBEDDING_MODEL)
+    return SharedEmbeddingFunction(get_embedding_service())
+
 
 class VectorSearchService:
     """ChromaDB 기반 벡터 검색 서비스"""
@@ -44,6 +82,14 @@ class VectorSearchService:
         self.embedding_model = None
         self._initialized = False
 
+        # 쿼리 임베딩 캐시 (정규화 쿼리 → 벡터)
+        self._embedding_cache = TTLCache(max_size=QUERY_EMBEDDING_CACHE_SIZE)
+        # 검색 결과 커서 캐시 ((쿼리, 필터) → 결과 목록)
+        self._result_cache = TTLCache(max_size=RESULT_CURSOR_CACHE_SIZE, ttl_seconds=RESULT_CURSOR_TTL)
+        # 컬렉션 크기 캐시
+        self._count: Optional[int] = None
+        self._count_checked_at = 0.0
+
         if not CHROMADB_AVAILABLE:
             logger.warning("ChromaDB가 설치되지 않았습니다. pip install chromadb")
             return
@@ -62,10 +108,8 @@ class VectorSearchService:
                 settings=Settings(anonymized_telemetry=False)
             )
 
-            # 다국어 임베딩 함수 생성
-            self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-                model_name=EMBEDDING_MODEL
-            )
+            # 임베딩 함수 생성 (공유 MiniLM)
+            self.embedding_function = _create_embedding_function()
 
             # 컬렉션 가져오기 또는 생성 (다국어 임베딩 함수 사용)
             self.collection = self.client.get_or_create_collection(
@@ -78,7 +122,7 @@ class VectorSearchService:
             self.embedding_model = self.embedding_function
 
             self._initialized = True
-            logger.info(f"VectorSearchService 초기화 완료. 컬렉션 크기: {self.collection.count()}")
+            logger.info(f"VectorSearchService 초기화 완료. 컬렉션 크기: {self.refresh_collection_count()}")
 
         except Exception as e:
             logger.error(f"VectorSearchService 초기화 실패: {e}")
@@ -91,16 +135,44 @@ class VectorSearchService:
 
     @property
     def collection_count(self) -> int:
-        """컬렉션 내 문서 수"""
+        """컬렉션 내 문서 수 (캐시값, 변경 시 또는 주기적으로 갱신)"""
         if not self.is_ready:
             return 0
-        return self.collection.count()
+        if self._count is None or time.time() - self._count_checked_at > COLLECTION_COUNT_TTL:
+            return self.refresh_collection_count()
+        return self._count
+
+    def refresh_collection_count(self) -> int:
+        """컬렉션 크기를 다시 조회하고 결과 커서 캐시를 비움"""
+        if self.collection is None:
+            return 0
+        self._count = self.collection.count()
+        self._count_checked_at = time.time()
+        self._result_cache.clear()
+        return self._count
+
+    def invalidate(self) -> None:
+        """컬렉션 변경 후 호출 (크기 재조회 + 결과 캐시 초기화)"""
+        self.refresh_collection_count()
 
     def _embed_text(self, text: str) -> List[float]:
-        """텍스트를 벡터로 변환"""
+        """텍스트를 벡터로 변환 (LRU 캐시 사용)"""
         if not self.embedding_model:
             return []
-        return self.embedding_model.encode(text).tolist()
+
+        key = " ".join(text.split()).lower()
+        embedding = self._embedding_cache.get(key)
+        if embedding is None:
+            embedding = [float(x) for x in self.embedding_function([text])[0]]
+            self._embedding_cache.set(key, embedding)
+        return embedding
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """캐시 통계"""
+        return {
+            "query_embedding": self._embedding_cache.stats(),
+            "result_cursor": self._result_cache.stats(),
+        }
 
     def add_track(
         self,
@@ -165,6 +237,7 @@ class VectorSearchService:
                 documents=[search_text],
                 metadatas=[metadata]
             )
+            self.invalidate()
 
             return True
 
@@ -176,15 +249,20 @@ class VectorSearchService:
         self,
         query: str,
         n_results: int = 10,
-        filters: Optional[Dict] = None
+        filters: Optional[Dict] = None,
+        offset: int = 0
     ) -> List[Dict[str, Any]]:
         """
         자연어 쿼리로 유사한 곡 검색
 
+        같은 (쿼리, 필터)의 결과는 잠시 보관되므로, 다음 페이지 요청은
+        벡터 검색을 다시 하지 않고 보관된 결과를 잘라서 반환합니다.
+
         Args:
             query: 검색 쿼리 (예: "비오는 날 잔잔한 재즈")
             n_results: 반환할 결과 수
             filters: 추가 필터 조건 (예: {"genre": "jazz"})
+            offset: 건너뛸 결과 수 (페이지네이션)
 
         Returns:
             유사한 곡 목록
@@ -197,36 +275,63 @@ class VectorSearchService:
             logger.warning("벡터 DB가 비어있습니다. 먼저 초기화가 필요합니다.")
             return []
 
+        needed = offset + n_results
+        cursor_key = (
+            " ".join(query.split()).lower(),
+            json.dumps(filters, sort_keys=True, ensure_ascii=False) if filters else None
+        )
+
+        cursor = self._result_cache.get(cursor_key)
+        # 보관된 결과가 충분하거나, 이미 전체 결과를 가져온 경우(exhausted) 슬라이스
+        if cursor is None or (len(cursor["tracks"]) < needed and not cursor["exhausted"]):
+            fetch_count = max(needed, RESULT_PREFETCH)
+            tracks = self._query(query, fetch_count, filters)
+            if tracks is None:
+                return []
+            cursor = {"tracks": tracks, "exhausted": len(tracks) < fetch_count}
+            self._result_cache.set(cursor_key, cursor)
+
+        # 호출자가 결과 dict를 수정해도 캐시가 오염되지 않도록 복사
+        return [dict(track) for track in cursor["tracks"][offset:needed]]
+
+    def _build_where(self, filters: Optional[Dict]) -> Optional[Dict]:
+        """필터 조건을 ChromaDB where 필터 형식으로 변환"""
+        if not filters:
+            return None
+
+        conditions = []
+        for key, value in filters.items():
+            if key == "genres" and isinstance(value, list):
+                # 장르 목록 중 하나라도 포함되면 매칭
+                # ChromaDB는 $contains 연산자 사용
+                if value:
+                    conditions.append({"genre": {"$in": value}})
+            elif key.endswith("_min"):
+                field = key.replace("_min", "")
+                conditions.append({field: {"$gte": value}})
+            elif key.endswith("_max"):
+                field = key.replace("_max", "")
+                conditions.append({field: {"$lte": value}})
+
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
+
+    def _query(
+        self,
+        query: str,
+        n_results: int,
+        filters: Optional[Dict]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """벡터 검색 수행 (실패 시 None)"""
         try:
-            # 쿼리 필터 구성
-            where_filter = None
-            if filters:
-                # ChromaDB where 필터 형식으로 변환
-                conditions = []
-                for key, value in filters.items():
-                    if key == "genres" and isinstance(value, list):
-                        # 장르 목록 중 하나라도 포함되면 매칭
-                        # ChromaDB는 $contains 연산자 사용
-                        if value:
-                            conditions.append({"genre": {"$in": value}})
-                    elif key.endswith("_min"):
-                        field = key.replace("_min", "")
-                        conditions.append({field: {"$gte": value}})
-                    elif key.endswith("_max"):
-                        field = key.replace("_max", "")
-                        conditions.append({field: {"$lte": value}})
-
-                if conditions:
-                    if len(conditions) == 1:
-                        where_filter = conditions[0]
-                    else:
-                        where_filter = {"$and": conditions}
-
-            # 벡터 검색 수행
+            # 캐시된 쿼리 임베딩으로 검색 (ChromaDB 내부 재임베딩 방지)
             results = self.collection.query(
-                query_texts=[query],
+                query_embeddings=[self._embed_text(query)],
                 n_results=n_results,
-                where=where_filter,
+                where=self._build_where(filters),
                 include=["documents", "metadatas", "distances"]
             )
 
@@ -258,7 +363,7 @@ class VectorSearchService:
 
         except Exception as e:
             logger.error(f"검색 실패: {e}")
-            return []
+            return None
 
     def delete_track(self, track_id: str) -> bool:
         """트랙 삭제"""
@@ -267,6 +372,7 @@ class VectorSearchService:
 
         try:
             self.collection.delete(ids=[str(track_id)])
+            self.invalidate()
             return True
         except Exception as e:
             logger.error(f"삭제 실패: {e}")
@@ -281,8 +387,10 @@ class VectorSearchService:
             self.client.delete_collection(COLLECTION_NAME)
             self.collection = self.client.get_or_create_collection(
                 name=COLLECTION_NAME,
-                metadata={"description": "Music tracks with artist tags for semantic search"}
+                metadata={"description": "Music tracks with artist tags for semantic search"},
+                embedding_function=self.embedding_function
             )
+            self.invalidate()
             logger.info("컬렉션 초기화 완료")
             return True
         except Exception as e:
@@ -305,7 +413,8 @@ def get_vector_search_service() -> VectorSearchService:
 async def semantic_search(
     query: str,
     n_results: int = 10,
-    filters: Optional[Dict] = None
+    filters: Optional[Dict] = None,
+    offset: int = 0
 ) -> Dict[str, Any]:
     """
     자연어 의미 기반 검색 (async wrapper)
@@ -314,6 +423,7 @@ async def semantic_search(
         query: 자연어 검색어
         n_results: 결과 수
         filters: LLM 파싱된 필터 조건
+        offset: 건너뛸 결과 수 (페이지네이션)
 
     Returns:
         검색 결과
@@ -328,7 +438,8 @@ async def semantic_search(
             "total": 0
         }
 
-    tracks = service.search(query, n_results, filters)
+    # ChromaDB 쿼리는 동기 호출이므로 스레드에서 실행 (이벤트 루프 블로킹 방지)
+    tracks = await asyncio.to_thread(service.search, query, n_results, filters, offset)
 
     return {
         "success": True,
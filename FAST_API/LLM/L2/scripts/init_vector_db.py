@@ -4,16 +4,31 @@
 114k Spotify 데이터셋을 ChromaDB에 로드하여 자연어 검색을 가능하게 합니다.
 아티스트 태그(lfm_artist_tags)를 벡터화하여 의미 기반 검색을 수행합니다.
 
+적재 파이프라인:
+- 문서/메타데이터를 pandas 벡터 연산으로 한 번에 생성
+- 임베딩은 별도 워커 스레드에서 큰 배치로 계산하고, 그동안 이전 배치를 upsert
+- upsert에 embeddings=를 직접 전달 (ChromaDB 내부 재임베딩 없음)
+- 배치마다 체크포인트 저장 → 중단 후 재실행 시 이어서 진행
+- --sync-db: MariaDB tracks 테이블에서 신규/변경 곡만 동기화
+  (문서 ID는 CSV 적재와 같은 Spotify track ID → 같은 곡은 한 문서)
+
 사용법:
     python scripts/init_vector_db.py
     python scripts/init_vector_db.py --batch-size 500
     python scripts/init_vector_db.py --clear  # 기존 데이터 삭제 후 재초기화
+    python scripts/init_vector_db.py --restart  # 체크포인트 무시하고 처음부터
+    python scripts/init_vector_db.py --sync-db  # DB tracks 증분 동기화
+    python scripts/init_vector_db.py --compare-legacy 5000  # 기존 방식과 처리량 비교
 """
 
 import os
 import sys
+import json
+import hashlib
+import sqlite3
 import argparse
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from time import time
 
@@ -35,6 +50,13 @@ FAST_API_ROOT = Path(__file__).parent.parent.parent.parent  # FAST_API/
 DATA_DIR = FAST_API_ROOT / "data"
 SPOTIFY_CSV = DATA_DIR / "spotify_114k_with_tags.csv"
 
+# 체크포인트 / 동기화 상태 (LLM/L2/data/)
+L2_DATA_DIR = project_root / "data"
+CHECKPOINT_PATH = L2_DATA_DIR / "init_vector_db.checkpoint.json"
+SYNC_STATE_PATH = L2_DATA_DIR / "vector_sync_state.db"
+
+AUDIO_FEATURES = ["energy", "valence", "acousticness", "danceability", "tempo"]
+
 
 def load_spotify_data() -> pd.DataFrame:
     """Spotify 114k 데이터셋 로드"""
@@ -64,18 +86,162 @@ def load_spotify_data() -> pd.DataFrame:
     return df
 
 
-def init_vector_db(batch_size: int = 500, clear_existing: bool = False):
+def build_documents(df: pd.DataFrame) -> tuple:
+    """
+    DataFrame → (ids, documents, metadatas) 변환 (벡터 연산)
+
+    검색용 텍스트가 비어 있는 곡은 제외합니다.
+    """
+    artist = df["artists"].fillna("Unknown").astype(str)
+    title = df["track_name"].fillna("Unknown").astype(str)
+    tags = df["lfm_artist_tags"].fillna("").astype(str)
+    genre = df["track_genre"].fillna("").astype(str)
+
+    # 검색용 텍스트 생성
+    search_text = (genre + ", " + tags).where(genre != "", tags)
+    valid = search_text.str.strip() != ""
+
+    # 메타데이터 (ChromaDB 메타데이터 크기 제한)
+    base = pd.DataFrame({
+        "artist": artist.str.slice(0, 500),
+        "title": title.str.slice(0, 500),
+        "tags": tags.str.slice(0, 1000),
+        "genre": genre.str.slice(0, 100),
+    })[valid].to_dict("records")
+
+    # 오디오 피처 추가 (있으면, NaN 제외)
+    feature_cols = [f for f in AUDIO_FEATURES if f in df.columns]
+    if feature_cols:
+        features = df.loc[valid, feature_cols].apply(pd.to_numeric, errors="coerce").to_dict("records")
+        metadatas = [
+            {**meta, **{k: float(v) for k, v in feat.items() if pd.notna(v)}}
+            for meta, feat in zip(base, features)
+        ]
+    else:
+        metadatas = base
+
+    # DB 동기화 문서: MariaDB tracks.track_id (문서 ID는 Spotify ID)
+    if "db_track_id" in df.columns:
+        for meta, db_id in zip(metadatas, df.loc[valid, "db_track_id"]):
+            meta["db_track_id"] = int(db_id)
+
+    ids = df.loc[valid, "track_id"].astype(str).tolist()
+    documents = search_text[valid].tolist()
+    return ids, documents, metadatas
+
+
+def _encode(service, documents: list) -> list:
+    """임베딩 계산 (VectorSearchService와 동일한 임베딩 함수 사용)"""
+    return [[float(x) for x in vec] for vec in service.embedding_function(documents)]
+
+
+def ingest(
+    service,
+    collection,
+    ids: list,
+    documents: list,
+    metadatas: list,
+    batch_size: int = 500,
+    encode_batch_size: int = 4096,
+    on_chunk_done=None
+) -> dict:
+    """
+    임베딩 계산과 upsert를 겹쳐서 실행
+
+    워커 스레드가 다음 청크를 임베딩하는 동안 메인 스레드가 현재 청크를 upsert합니다.
+
+    Args:
+        on_chunk_done: 청크 upsert 후 호출 (처리 완료 개수, 청크 ids, 청크 문서, 청크 메타데이터)
+
+    Returns:
+        {"success": int, "fail": int}
+    """
+    total = len(ids)
+    success_count = 0
+    fail_count = 0
+    chunks = [(i, min(i + encode_batch_size, total)) for i in range(0, total, encode_batch_size)]
+    if not chunks:
+        return {"success": 0, "fail": 0}
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed") as encoder:
+        pending = encoder.submit(_encode, service, documents[chunks[0][0]:chunks[0][1]])
+
+        for n, (start, end) in enumerate(chunks):
+            try:
+                embeddings = pending.result()
+            except Exception as e:
+                logger.error(f"임베딩 실패 ({start:,}~{end:,}): {e}")
+                embeddings = None
+
+            # 다음 청크 임베딩을 미리 시작
+            if n + 1 < len(chunks):
+                next_start, next_end = chunks[n + 1]
+                pending = encoder.submit(_encode, service, documents[next_start:next_end])
+
+            if embeddings is None:
+                fail_count += end - start
+                continue
+
+            # 청크를 upsert 배치 단위로 나누어 저장
+            chunk_failed = False
+            for b in range(start, end, batch_size):
+                b_end = min(b + batch_size, end)
+                try:
+                    collection.upsert(
+                        ids=ids[b:b_end],
+                        embeddings=embeddings[b - start:b_end - start],
+                        documents=documents[b:b_end],
+                        metadatas=metadatas[b:b_end]
+                    )
+                    success_count += b_end - b
+                except Exception as e:
+                    logger.error(f"배치 {b // batch_size + 1} 실패: {e}")
+                    fail_count += b_end - b
+                    chunk_failed = True
+
+            if on_chunk_done and not chunk_failed:
+                on_chunk_done(end, ids[start:end], documents[start:end], metadatas[start:end])
+
+    return {"success": success_count, "fail": fail_count}
+
+
+def _load_checkpoint(source: str, total: int) -> int:
+    """체크포인트에서 처리 완료 개수 조회 (원본이 다르면 0)"""
+    if not CHECKPOINT_PATH.exists():
+        return 0
+    try:
+        checkpoint = json.loads(CHECKPOINT_PATH.read_text())
+    except (json.JSONDecodeError, OSError):
+        return 0
+    if checkpoint.get("source") != source or checkpoint.get("total") != total:
+        logger.warning("체크포인트의 데이터셋이 현재와 달라 처음부터 진행합니다.")
+        return 0
+    return int(checkpoint.get("done", 0))
+
+
+def _save_checkpoint(source: str, total: int, done: int):
+    L2_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = CHECKPOINT_PATH.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps({"source": source, "total": total, "done": done}))
+    tmp_path.replace(CHECKPOINT_PATH)
+
+
+def init_vector_db(
+    batch_size: int = 500,
+    clear_existing: bool = False,
+    encode_batch_size: int = 4096,
+    restart: bool = False
+):
     """
     벡터 DB 초기화
 
     Args:
-        batch_size: 배치 처리 크기 (ChromaDB 성능 최적화)
+        batch_size: upsert 배치 크기 (ChromaDB 성능 최적화)
         clear_existing: True면 기존 데이터 삭제 후 재초기화
+        encode_batch_size: 임베딩 워커가 한 번에 처리할 문서 수
+        restart: True면 체크포인트를 무시하고 처음부터 진행
     """
-    from app.services.llm.vector_search import (
-        get_vector_search_service,
-        VectorSearchService
-    )
+    from app.services.llm.vector_search import get_vector_search_service
 
     start_time = time()
 
@@ -92,105 +258,306 @@ def init_vector_db(batch_size: int = 500, clear_existing: bool = False):
 
     logger.info(f"현재 컬렉션 크기: {service.collection_count:,}")
 
-    # 기존 데이터 삭제 옵션
-    if clear_existing and service.collection_count > 0:
-        logger.warning("기존 컬렉션 삭제 중...")
-        service.clear_collection()
-        logger.info("컬렉션 초기화 완료")
+    # 태그가 있는 곡만 필터링
+    df_with_tags = df[df["lfm_artist_tags"].notna() & (df["lfm_artist_tags"] != "")]
+    logger.info(f"태그가 있는 곡: {len(df_with_tags):,}곡 ({len(df_with_tags)/len(df)*100:.1f}%)")
 
-    # 이미 데이터가 있으면 스킵 옵션 제공
-    if service.collection_count > 0 and not clear_existing:
+    ids, documents, metadatas = build_documents(df_with_tags)
+    total = len(ids)
+    source = str(SPOTIFY_CSV)
+    logger.info(f"문서 생성 완료: {total:,}건 ({time() - start_time:.1f}s)")
+
+    # 기존 데이터 삭제 옵션
+    if clear_existing:
+        if service.collection_count > 0:
+            logger.warning("기존 컬렉션 삭제 중...")
+            service.clear_collection()
+            logger.info("컬렉션 초기화 완료")
+        CHECKPOINT_PATH.unlink(missing_ok=True)
+
+    done = 0 if restart else _load_checkpoint(source, total)
+    if done >= total:
+        logger.info("체크포인트 기준 이미 모든 곡이 적재되었습니다. (--restart로 재실행)")
+        return
+    if done > 0:
+        logger.info(f"체크포인트에서 재개: {done:,}/{total:,}")
+    elif service.collection_count > 0 and not clear_existing:
+        # 이미 데이터가 있으면 스킵 옵션 제공
         logger.info(f"이미 {service.collection_count:,}개의 문서가 존재합니다.")
         response = input("계속 추가하시겠습니까? (y/N): ").strip().lower()
         if response != 'y':
             logger.info("초기화 취소됨")
             return
 
-    # 태그가 있는 곡만 필터링
-    df_with_tags = df[df["lfm_artist_tags"].notna() & (df["lfm_artist_tags"] != "")]
-    logger.info(f"태그가 있는 곡: {len(df_with_tags):,}곡 ({len(df_with_tags)/len(df)*100:.1f}%)")
-
-    # 배치 처리
-    total = len(df_with_tags)
-    success_count = 0
-    fail_count = 0
-
-    logger.info(f"벡터 DB에 {total:,}곡 추가 시작 (배치 크기: {batch_size})")
-
-    for batch_start in range(0, total, batch_size):
-        batch_end = min(batch_start + batch_size, total)
-        batch_df = df_with_tags.iloc[batch_start:batch_end]
-
-        # 배치 데이터 준비
-        ids = []
-        documents = []
-        metadatas = []
-
-        for _, row in batch_df.iterrows():
-            track_id = str(row["track_id"])
-            artist = str(row["artists"]) if pd.notna(row["artists"]) else "Unknown"
-            title = str(row["track_name"]) if pd.notna(row["track_name"]) else "Unknown"
-            tags = str(row["lfm_artist_tags"]) if pd.notna(row["lfm_artist_tags"]) else ""
-            genre = str(row["track_genre"]) if pd.notna(row["track_genre"]) else ""
+    logger.info(
+        f"벡터 DB에 {total - done:,}곡 추가 시작 "
+        f"(upsert 배치: {batch_size}, 임베딩 배치: {encode_batch_size})"
+    )
+    ingest_start = time()
 
-            # 검색용 텍스트 생성
-            search_text = f"{genre}, {tags}" if genre else tags
-            if not search_text.strip():
-                continue
+    # 실패한 청크 이후로는 체크포인트를 진행하지 않음 (재실행 시 실패 지점부터)
+    contiguous = {"end": 0}
 
-            # 메타데이터
-            metadata = {
-                "artist": artist[:500],  # ChromaDB 메타데이터 크기 제한
-                "title": title[:500],
-                "tags": tags[:1000],
-                "genre": genre[:100],
-            }
-
-            # 오디오 피처 추가 (있으면)
-            for feature in ["energy", "valence", "acousticness", "danceability", "tempo"]:
-                if feature in row and pd.notna(row[feature]):
-                    metadata[feature] = float(row[feature])
-
-            ids.append(track_id)
-            documents.append(search_text)
-            metadatas.append(metadata)
-
-        # 배치 upsert
-        if ids:
-            try:
-                service.collection.upsert(
-                    ids=ids,
-                    documents=documents,
-                    metadatas=metadatas
-                )
-                success_count += len(ids)
-            except Exception as e:
-                logger.error(f"배치 {batch_start//batch_size + 1} 실패: {e}")
-                fail_count += len(ids)
+    def on_chunk_done(chunk_end, chunk_ids, *_):
+        if chunk_end - len(chunk_ids) == contiguous["end"]:
+            contiguous["end"] = chunk_end
+            _save_checkpoint(source, total, done + chunk_end)
 
-        # 진행 상황 출력
-        progress = (batch_end / total) * 100
-        elapsed = time() - start_time
-        eta = (elapsed / batch_end) * (total - batch_end) if batch_end > 0 else 0
+        processed = done + chunk_end
 
+        elapsed = time() - ingest_start
+        rate = chunk_end / elapsed if elapsed > 0 else 0
+        eta = (total - processed) / rate if rate > 0 else 0
         logger.info(
-            f"진행: {batch_end:,}/{total:,} ({progress:.1f}%) | "
-            f"성공: {success_count:,} | 실패: {fail_count:,} | "
-            f"경과: {elapsed:.1f}s | ETA: {eta:.1f}s"
+            f"진행: {processed:,}/{total:,} ({processed / total * 100:.1f}%) | "
+            f"{rate:,.0f} tracks/s | 경과: {elapsed:.1f}s | ETA: {eta:.1f}s"
         )
 
+    result = ingest(
+        service,
+        service.collection,
+        ids[done:],
+        documents[done:],
+        metadatas[done:],
+        batch_size=batch_size,
+        encode_batch_size=encode_batch_size,
+        on_chunk_done=on_chunk_done
+    )
+    service.invalidate()
+
     # 완료 보고
     total_time = time() - start_time
+    ingest_time = time() - ingest_start
     logger.info("=" * 60)
     logger.info("벡터 DB 초기화 완료!")
-    logger.info(f"총 처리: {success_count + fail_count:,}곡")
-    logger.info(f"성공: {success_count:,}곡")
-    logger.info(f"실패: {fail_count:,}곡")
+    logger.info(f"총 처리: {result['success'] + result['fail']:,}곡")
+    logger.info(f"성공: {result['success']:,}곡")
+    logger.info(f"실패: {result['fail']:,}곡")
+    logger.info(f"처리량: {result['success'] / ingest_time if ingest_time > 0 else 0:,.0f} tracks/s")
     logger.info(f"최종 컬렉션 크기: {service.collection_count:,}")
     logger.info(f"총 소요 시간: {total_time:.1f}초 ({total_time/60:.1f}분)")
     logger.info("=" * 60)
 
 
+# ============================================
+# MariaDB tracks 증분 동기화
+# ============================================
+
+def _tracks_to_frame(rows: list) -> pd.DataFrame:
+    """
+    tracks 테이블 행 → build_documents 입력 형식
+
+    문서 ID(track_id 컬럼)는 CSV 적재와 같은 Spotify track ID를 사용합니다.
+    spotify_id가 없는 곡은 CSV 문서와 대응시킬 수 없으므로 제외합니다.
+    """
+    df = pd.DataFrame(rows, columns=[
+        "db_track_id", "track_id", "track_name", "artists", "genre", "external_metadata", *AUDIO_FEATURES
+    ])
+    df["track_id"] = df["track_id"].fillna("").astype(str).str.strip()
+    df = df[df["track_id"] != ""].copy()
+
+    def extract_tags(metadata) -> str:
+        if not metadata:
+            return ""
+        try:
+            if isinstance(metadata, str):
+                metadata = json.loads(metadata)
+        except (json.JSONDecodeError, TypeError):
+            return ""
+        if not isinstance(metadata, dict):
+            return ""
+        tags = metadata.get("lfm_artist_tags") or metadata.get("artist_tags") or metadata.get("tags") or ""
+        if isinstance(tags, list):
+            tags = ", ".join(str(t) for t in tags)
+        return str(tags)
+
+    df["lfm_artist_tags"] = df["external_metadata"].map(extract_tags)
+    # 장르는 콤마 구분 문자열 → 첫 번째 장르 사용
+    df["track_genre"] = df["genre"].fillna("").astype(str).str.split(",").str[0].str.strip()
+    return df
+
+
+def _content_hash(document: str, metadata: dict) -> str:
+    payload = document + "\x1f" + json.dumps(metadata, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def sync_from_db(batch_size: int = 500, encode_batch_size: int = 4096, chunk_size: int = 20000):
+    """
+    MariaDB tracks 테이블에서 신규/변경 곡만 벡터 DB에 반영
+
+    곡별 문서+메타데이터 해시를 SYNC_STATE_PATH(SQLite)에 저장하고,
+    해시가 달라진 곡만 임베딩/upsert합니다. 해시는 upsert 성공 후에 기록되므로
+    중단 후 재실행하면 남은 곡만 처리됩니다.
+    """
+    from sqlalchemy import text
+
+    # FAST_API/database.py 사용
+    if str(FAST_API_ROOT) not in sys.path:
+        sys.path.append(str(FAST_API_ROOT))
+    from database import engine
+    from app.services.llm.vector_search import get_vector_search_service
+
+    service = get_vector_search_service()
+    if not service.is_ready:
+        logger.error("VectorSearchService 초기화 실패")
+        sys.exit(1)
+
+    L2_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    state = sqlite3.connect(str(SYNC_STATE_PATH))
+    state.execute("CREATE TABLE IF NOT EXISTS synced (doc_id TEXT PRIMARY KEY, content_hash TEXT NOT NULL)")
+
+    start_time = time()
+    scanned = 0
+    changed_total = 0
+    success_total = 0
+    skipped_total = 0
+    last_id = 0
+
+    query = text(f"""
+        SELECT track_id, spotify_id, title, artist, genre, external_metadata, {", ".join(AUDIO_FEATURES)}
+        FROM tracks
+        WHERE track_id > :last_id
+        ORDER BY track_id
+        LIMIT :limit
+    """)
+
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(query, {"last_id": last_id, "limit": chunk_size}).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        scanned += len(rows)
+
+        frame = _tracks_to_frame(rows)
+        skipped_total += len(rows) - len(frame)
+        ids, documents, metadatas = build_documents(frame)
+        hashes = [_content_hash(d, m) for d, m in zip(documents, metadatas)]
+
+        # 저장된 해시와 비교하여 변경분만 선택
+        known = {}
+        for i in range(0, len(ids), 900):  # SQLite 변수 개수 제한
+            part = ids[i:i + 900]
+            known.update(state.execute(
+                f"SELECT doc_id, content_hash FROM synced WHERE doc_id IN ({','.join('?' * len(part))})",
+                part
+            ).fetchall())
+        changed = [i for i, (doc_id, h) in enumerate(zip(ids, hashes)) if known.get(doc_id) != h]
+        if not changed:
+            continue
+        changed_total += len(changed)
+
+        c_ids = [ids[i] for i in changed]
+        c_hashes = dict(zip(c_ids, (hashes[i] for i in changed)))
+
+        def on_chunk_done(_, chunk_ids, *__):
+            state.executemany(
+                "INSERT OR REPLACE INTO synced (doc_id, content_hash) VALUES (?, ?)",
+                [(doc_id, c_hashes[doc_id]) for doc_id in chunk_ids]
+            )
+            state.commit()
+
+        result = ingest(
+            service,
+            service.collection,
+            c_ids,
+            [documents[i] for i in changed],
+            [metadatas[i] for i in changed],
+            batch_size=batch_size,
+            encode_batch_size=encode_batch_size,
+            on_chunk_done=on_chunk_done
+        )
+        success_total += result["success"]
+        logger.info(f"동기화: track_id ≤ {last_id} | 스캔 {scanned:,} | 변경 {changed_total:,} | 반영 {success_total:,}")
+
+    state.close()
+    service.invalidate()
+
+    elapsed = time() - start_time
+    logger.info("=" * 60)
+    logger.info("DB 증분 동기화 완료")
+    logger.info(f"스캔: {scanned:,}곡 | 변경: {changed_total:,}곡 | 반영: {success_total:,}곡")
+    if skipped_total:
+        logger.info(f"spotify_id 없음으로 제외: {skipped_total:,}곡")
+    logger.info(f"소요 시간: {elapsed:.1f}초 ({success_total / elapsed if elapsed > 0 else 0:,.0f} tracks/s)")
+    logger.info("=" * 60)
+
+
+# ============================================
+# 기존 방식과 처리량 비교
+# ============================================
+
+def compare_with_legacy(sample_size: int = 5000, batch_size: int = 500):
+    """
+    기존 방식(iterrows + documents만 upsert)과 새 파이프라인의 처리량 비교
+
+    실제 컬렉션을 건드리지 않도록 임시 컬렉션에 적재 후 삭제합니다.
+    """
+    from app.services.llm.vector_search import get_vector_search_service
+
+    service = get_vector_search_service()
+    if not service.is_ready:
+        logger.error("VectorSearchService 초기화 실패")
+        sys.exit(1)
+
+    df = load_spotify_data()
+    df = df[df["lfm_artist_tags"].notna() & (df["lfm_artist_tags"] != "")].head(sample_size)
+    results = {}
+
+    for mode in ["legacy", "pipeline"]:
+        name = f"music_tags_benchmark_{mode}"
+        try:
+            service.client.delete_collection(name)
+        except Exception:
+            pass
+        collection = service.client.get_or_create_collection(
+            name=name, embedding_function=service.embedding_function
+        )
+
+        started = time()
+        if mode == "legacy":
+            for batch_start in range(0, len(df), batch_size):
+                batch_df = df.iloc[batch_start:batch_start + batch_size]
+                ids, documents, metadatas = [], [], []
+                for _, row in batch_df.iterrows():
+                    tags = str(row["lfm_artist_tags"]) if pd.notna(row["lfm_artist_tags"]) else ""
+                    genre = str(row["track_genre"]) if pd.notna(row["track_genre"]) else ""
+                    search_text = f"{genre}, {tags}" if genre else tags
+                    if not search_text.strip():
+                        continue
+                    metadata = {
+                        "artist": str(row["artists"])[:500],
+                        "title": str(row["track_name"])[:500],
+                        "tags": tags[:1000],
+                        "genre": genre[:100],
+                    }
+                    for feature in AUDIO_FEATURES:
+                        if feature in row and pd.notna(row[feature]):
+                            metadata[feature] = float(row[feature])
+                    ids.append(str(row["track_id"]))
+                    documents.append(search_text)
+                    metadatas.append(metadata)
+                if ids:
+                    collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
+        else:
+            ids, documents, metadatas = build_documents(df)
+            ingest(service, collection, ids, documents, metadatas, batch_size=batch_size)
+
+        elapsed = time() - started
+        results[mode] = len(df) / elapsed if elapsed > 0 else 0
+        service.client.delete_collection(name)
+
+    logger.info("=" * 60)
+    logger.info(f"처리량 비교 ({len(df):,}곡)")
+    logger.info(f"  기존 방식:   {results['legacy']:,.0f} tracks/s")
+    logger.info(f"  새 파이프라인: {results['pipeline']:,.0f} tracks/s")
+    if results["legacy"] > 0:
+        logger.info(f"  속도 향상: x{results['pipeline'] / results['legacy']:.2f}")
+    logger.info("=" * 60)
+    return results
+
+
 def test_search():
     """초기화 후 검색 테스트"""
     from app.services.llm.vector_search import get_vector_search_service
@@ -230,7 +597,29 @@ def main():
         "--batch-size",
         type=int,
         default=500,
-        help="배치 처리 크기 (기본: 500)"
+        help="upsert 배치 크기 (기본: 500)"
+    )
+    parser.add_argument(
+        "--encode-batch-size",
+        type=int,
+        default=4096,
+        help="임베딩 배치 크기 (기본: 4096)"
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="체크포인트를 무시하고 처음부터 적재"
+    )
+    parser.add_argument(
+        "--sync-db",
+        action="store_true",
+        help="MariaDB tracks 테이블에서 신규/변경 곡만 동기화"
+    )
+    parser.add_argument(
+        "--compare-legacy",
+        type=int,
+        metavar="N",
+        help="N곡으로 기존 방식과 처리량 비교 (임시 컬렉션 사용)"
     )
     parser.add_argument(
         "--clear",
@@ -247,10 +636,16 @@ def main():
 
     if args.test_only:
         test_search()
+    elif args.compare_legacy:
+        compare_with_legacy(args.compare_legacy, batch_size=args.batch_size)
+    elif args.sync_db:
+        sync_from_db(batch_size=args.batch_size, encode_batch_size=args.encode_batch_size)
     else:
         init_vector_db(
             batch_size=args.batch_size,
-            clear_existing=args.clear
+            clear_existing=args.clear,
+            encode_batch_size=args.encode_batch_size,
+            restart=args.restart
         )
         # 초기화 후 테스트
         test_search()
@@ -0,0 +1,189 @@
+"""
+M1 공유 피처 파이프라인 저장소
+사용자별 M1 모델에서 공통 부분(genre_encoder, artist/album TF-IDF)을 분리
+
+- 파이프라인은 내용 해시(joblib.hash, mmap 로드 여부 무관)로 주소 지정해 user_models/_pipelines/에 1번만 저장
+- 사용자 모델 파일에는 Ridge 헤드 + 스케일러 + 파이프라인 해시만 저장
+- 같은 해시의 파이프라인은 프로세스당 1번만 로드해서 모든 사용자 모델이 공유
+
+마이그레이션 (FAST_API 디렉토리에서):
+    python -m M1.feature_pipeline_store migrate          # 기존 사용자 폴더 변환 + 절감 리포트
+    python -m M1.feature_pipeline_store migrate --dry-run
+"""
+import argparse
+import os
+import pickle
+import threading
+from typing import Dict, Tuple
+
+import joblib
+
+from model_artifacts import load_artifact, save_artifact
+
+BASE_DIR = os.path.dirname(__file__)
+USER_MODELS_DIR = os.path.join(BASE_DIR, "user_models")
+PIPELINE_DIR = os.path.join(USER_MODELS_DIR, "_pipelines")
+
+USER_MODEL_FORMAT = "m1-user-heads-v1"
+
+_pipelines: Dict[str, Tuple] = {}
+_pipelines_lock = threading.Lock()
+
+
+def pipeline_digest(genre_encoder, artist_vectorizer, album_vectorizer) -> str:
+    """
+    피처 파이프라인 내용 해시 (같은 학습 결과면 같은 해시)
+
+    pickle 바이트는 배열 로드 방식에 따라 달라지므로(np.memmap vs ndarray)
+    joblib.hash(coerce_mmap=True)로 배열 내용 기준 해시
+    """
+    return joblib.hash(
+        (genre_encoder, artist_vectorizer, album_vectorizer),
+        hash_name="sha1",
+        coerce_mmap=True,
+    )
+
+
+def _pipeline_path(digest: str) -> str:
+    return os.path.join(PIPELINE_DIR, f"pipeline_{digest[:16]}.pkl")
+
+
+def store_pipeline(genre_encoder, artist_vectorizer, album_vectorizer) -> str:
+    """파이프라인을 공유 저장소에 저장 (이미 있으면 건너뜀) 후 해시 반환"""
+    digest = pipeline_digest(genre_encoder, artist_vectorizer, album_vectorizer)
+    path = _pipeline_path(digest)
+    if not os.path.exists(path):
+        os.makedirs(PIPELINE_DIR, exist_ok=True)
+        save_artifact({
+            "digest": digest,
+            "genre_encoder": genre_encoder,
+            "artist_vectorizer": artist_vectorizer,
+            "album_vectorizer": album_vectorizer,
+        }, path)
+        print(f"[M1] 공유 피처 파이프라인 저장: {path}")
+    with _pipelines_lock:
+        _pipelines.setdefault(digest, (genre_encoder, artist_vectorizer, album_vectorizer))
+    return digest
+
+
+def load_pipeline(digest: str) -> Tuple:
+    """(genre_encoder, artist_vectorizer, album_vectorizer) - 프로세스당 1번만 로드"""
+    with _pipelines_lock:
+        cached = _pipelines.get(digest)
+    if cached is not None:
+        return cached
+
+    path = _pipeline_path(digest)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"공유 피처 파이프라인 없음: {path}")
+    data = load_artifact(path)
+    pipeline = (data["genre_encoder"], data["artist_vectorizer"], data["album_vectorizer"])
+    with _pipelines_lock:
+        return _pipelines.setdefault(digest, pipeline)
+
+
+def stats() -> Dict[str, int]:
+    return {"loaded_pipelines": len(_pipelines)}
+
+
+# ==================== 마이그레이션 ====================
+
+def _iter_user_model_files():
+    if not os.path.isdir(USER_MODELS_DIR):
+        return
+    for name in sorted(os.listdir(USER_MODELS_DIR)):
+        folder = os.path.join(USER_MODELS_DIR, name)
+        if name.startswith("_") or not os.path.isdir(folder):
+            continue
+        for filename in sorted(os.listdir(folder)):
+            if filename.endswith(".pkl"):
+                yield os.path.join(folder, filename)
+
+
+def migrate_user_models(dry_run: bool = False) -> Dict[str, object]:
+    """
+    기존 사용자 폴더의 전체 AudioFeaturePredictor 파일을 헤드 전용 포맷으로 변환
+
+    사용자별로 다시 학습된 어휘 사전은 해시가 달라 각자의 파이프라인으로 저장되고
+    (예측 결과 동일), 기본 모델을 그대로 복사한 파일들은 파이프라인 1개를 공유합니다.
+    """
+    report = {
+        "files": 0, "migrated": 0, "skipped": 0,
+        "bytes_before": 0, "bytes_after": 0,
+        "pipeline_bytes_before": 0,  # 사용자별로 중복 보관되던 파이프라인 크기 합
+        "pipelines": set(),
+    }
+    for path in _iter_user_model_files():
+        data = load_artifact(path, mmap=False)
+        if not isinstance(data, dict) or "artist_vectorizer" not in data:
+            report["skipped"] += 1  # 이미 변환됐거나 다른 종류의 모델 (선호도 분류기 등)
+            continue
+
+        report["files"] += 1
+        report["bytes_before"] += os.path.getsize(path)
+        parts = (data["genre_encoder"], data["artist_vectorizer"], data["album_vectorizer"])
+        report["pipeline_bytes_before"] += len(pickle.dumps(parts, protocol=4))
+
+        if dry_run:
+            report["pipelines"].add(pipeline_digest(*parts))
+            continue
+
+        digest = store_pipeline(*parts)
+        report["pipelines"].add(digest)
+        save_artifact({
+            "format": USER_MODEL_FORMAT,
+            "pipeline_ref": digest,
+            "model_type": data.get("model_type", "LightGBM"),
+            "models": data["models"],
+            "scalers": data.get("scalers", {}),
+            "audio_features": data["audio_features"],
+        }, path)
+        report["bytes_after"] += os.path.getsize(path)
+        report["migrated"] += 1
+
+    if dry_run:
+        report["pipeline_bytes_after"] = None
+    else:
+        report["bytes_after"] += sum(os.path.getsize(_pipeline_path(d)) for d in report["pipelines"])
+        report["pipeline_bytes_after"] = sum(
+            len(pickle.dumps(load_pipeline(d), protocol=4)) for d in report["pipelines"]
+        )
+    report["pipelines"] = len(report["pipelines"])
+    return report
+
+
+def _print_report(report: Dict[str, object], dry_run: bool) -> None:
+    mb = 1024 * 1024
+    print("\n" + "=" * 60)
+    print(f"[M1] 사용자 모델 파이프라인 분리 {'(dry-run)' if dry_run else ''}")
+    print("=" * 60)
+    print(f"  대상 파일: {report['files']}개 (건너뜀 {report['skipped']}개)")
+    print(f"  고유 파이프라인: {report['pipelines']}개")
+    print(f"  디스크: {report['bytes_before'] / mb:.2f}MB", end="")
+    if not dry_run:
+        saved = report["bytes_before"] - report["bytes_after"]
+        print(f" → {report['bytes_after'] / mb:.2f}MB (절감 {saved / mb:.2f}MB)")
+    else:
+        print()
+    # 메모리: 사용자 모델을 모두 로드했을 때 파이프라인이 차지하는 크기 (직렬화 크기 기준 근사)
+    print(f"  파이프라인 메모리(근사): 사용자별 {report['pipeline_bytes_before'] / mb:.2f}MB", end="")
+    if report["pipeline_bytes_after"] is not None:
+        print(f" → 공유 {report['pipeline_bytes_after'] / mb:.2f}MB")
+    else:
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="M1 사용자 모델 공유 파이프라인 마이그레이션")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate")
+    migrate.add_argument("--dry-run", action="store_true", help="변환 없이 리포트만")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        report = migrate_user_models(dry_run=args.dry_run)
+        _print_report(report, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
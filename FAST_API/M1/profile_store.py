@@ -0,0 +1,383 @@
+"""
+M1 사용자 취향 프로필 저장소
+PMS 전체 재조회 + 전곡 재예측 없이 프로필을 증분 갱신
+
+- 사용자별 충분통계(개수, 합, 제곱합, 장르/아티스트 카운트)와
+  특성별 고정 구간 히스토그램(분위수 스케치)을 SQLite에 영구 저장
+- 트랙별 예측값을 함께 보관하여 PMS에서 빠진 곡은 통계에서 차감
+- playlist_tracks 지문(COUNT/MAX/SUM map_id)이 같으면 O(1)로 캐시된 프로필 반환,
+  바뀌었으면 추가된 곡만 예측해서 반영
+"""
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .spotify_recommender import AudioFeaturePredictor, UserPreferenceProfile
+
+PROFILE_DB_PATH = os.path.join(os.path.dirname(__file__), "user_models", "profile_store.db")
+TRACK_COLUMNS = ['track_id', 'title', 'artist', 'album', 'duration', 'external_metadata']
+
+# 분위수 스케치 구간 (범위를 벗어난 값은 양 끝 구간에 포함)
+SKETCH_BINS = 512
+FEATURE_RANGES = {
+    'tempo': (0.0, 250.0),
+    'loudness': (-60.0, 5.0),
+}
+DEFAULT_RANGE = (0.0, 1.0)
+
+
+def extract_metadata(external_metadata) -> dict:
+    """external_metadata JSON 파싱"""
+    if pd.isna(external_metadata) or not external_metadata:
+        return {'genre': 'unknown', 'popularity': 50}
+    try:
+        if isinstance(external_metadata, str):
+            return json.loads(external_metadata)
+        return external_metadata
+    except:
+        return {'genre': 'unknown', 'popularity': 50}
+
+
+def prepare_tracks_frame(rows) -> pd.DataFrame:
+    """DB 결과 행을 ML 모델 형식으로 변환"""
+    df = pd.DataFrame(rows, columns=TRACK_COLUMNS)
+
+    # 컬럼명 변환 (모델이 기대하는 형식)
+    df = df.rename(columns={
+        'title': 'track_name',
+        'artist': 'artists',
+        'album': 'album_name'
+    })
+
+    # duration: 초 → 밀리초
+    df['duration_ms'] = df['duration'] * 1000
+
+    # external_metadata에서 장르, popularity 추출
+    metadata = df['external_metadata'].apply(extract_metadata)
+    df['track_genre'] = metadata.apply(lambda x: x.get('genre', 'unknown'))
+    df['popularity'] = metadata.apply(lambda x: x.get('popularity', 50))
+
+    return df
+
+
+class _ProfileState:
+    """한 사용자의 충분통계 (트랙별 기여분 포함)"""
+
+    def __init__(self, features: List[str]):
+        self.features = list(features)
+        k = len(self.features)
+        self.fingerprint: Tuple[int, int, int] = (0, 0, 0)
+        self.model_tag = ""
+        # track_id -> [중복 수, 아티스트, 장르 목록, 예측값 목록]
+        self.tracks: Dict[int, list] = {}
+        self.n = np.zeros(k)
+        self.sum = np.zeros(k)
+        self.sumsq = np.zeros(k)
+        self.hist = np.zeros((k, SKETCH_BINS))
+        self.genres: Counter = Counter()
+        self.artists: Dict[str, int] = {}
+        self.profile: Optional[UserPreferenceProfile] = None
+
+    # ---------- 증분 갱신 ----------
+
+    def _bin_index(self, values: np.ndarray) -> np.ndarray:
+        idx = np.empty(len(values), dtype=int)
+        for i, feature in enumerate(self.features):
+            lo, hi = FEATURE_RANGES.get(feature, DEFAULT_RANGE)
+            pos = (values[i] - lo) / (hi - lo) * SKETCH_BINS
+            idx[i] = int(min(SKETCH_BINS - 1, max(0, math.floor(pos)))) if not math.isnan(values[i]) else -1
+        return idx
+
+    def apply(self, track_id: int, delta: int) -> None:
+        """트랙 기여분을 delta배 만큼 더함 (음수면 차감)"""
+        entry = self.tracks[track_id]
+        _, artist, genres, values = entry
+        values = np.array(values, dtype=float)
+        valid = ~np.isnan(values)
+        safe = np.where(valid, values, 0.0)
+
+        self.n += delta * valid
+        self.sum += delta * safe
+        self.sumsq += delta * safe * safe
+        for i, b in enumerate(self._bin_index(values)):
+            if b >= 0:
+                self.hist[i, b] += delta
+
+        for genre in genres:
+            self.genres[genre] += delta
+            if self.genres[genre] <= 0:
+                del self.genres[genre]
+
+        if artist is not None:
+            count = self.artists.get(artist, 0) + delta
+            if count > 0:
+                self.artists[artist] = count
+            else:
+                self.artists.pop(artist, None)
+
+        entry[0] += delta
+        if entry[0] <= 0:
+            del self.tracks[track_id]
+        self.profile = None
+
+    # ---------- 프로필 생성 ----------
+
+    def _quantile(self, i: int, q: float) -> float:
+        counts = self.hist[i]
+        total = counts.sum()
+        if total <= 0:
+            return float('nan')
+        lo, hi = FEATURE_RANGES.get(self.features[i], DEFAULT_RANGE)
+        width = (hi - lo) / SKETCH_BINS
+        target = q * total
+        cumulative = np.cumsum(counts)
+        b = int(np.searchsorted(cumulative, target, side='left'))
+        b = min(b, SKETCH_BINS - 1)
+        before = cumulative[b - 1] if b > 0 else 0.0
+        inside = (target - before) / counts[b] if counts[b] else 0.5
+        return float(lo + (b + inside) * width)
+
+    def to_profile(self) -> UserPreferenceProfile:
+        """UserPreferenceProfile.build_profile과 같은 형태의 프로필"""
+        if self.profile is not None:
+            return self.profile
+
+        profile = UserPreferenceProfile()
+        for i, feature in enumerate(self.features):
+            n = self.n[i]
+            if n <= 0:
+                continue
+            mean = self.sum[i] / n
+            var = (self.sumsq[i] - n * mean * mean) / (n - 1) if n > 1 else float('nan')
+            profile.feature_stats[f'predicted_{feature}'] = {
+                'mean': float(mean),
+                'std': float(math.sqrt(max(var, 0.0))) if not math.isnan(var) else float('nan'),
+                'median': self._quantile(i, 0.5),
+                'q25': self._quantile(i, 0.25),
+                'q75': self._quantile(i, 0.75),
+            }
+
+        total = sum(self.genres.values())
+        if total:
+            profile.genre_distribution = {
+                genre: count / total for genre, count in self.genres.most_common()
+            }
+        profile.artist_list = list(self.artists.keys())
+        profile.num_tracks = int(sum(entry[0] for entry in self.tracks.values()))
+        self.profile = profile
+        return profile
+
+    def track_frame(self) -> pd.DataFrame:
+        """트랙별 예측값 (중복 수만큼 반복) - PreferenceClassifier 학습용"""
+        rows = []
+        for track_id, (count, artist, _, values) in self.tracks.items():
+            for _ in range(count):
+                rows.append([track_id, artist] + list(values))
+        columns = ['track_id', 'artists'] + [f'predicted_{f}' for f in self.features]
+        return pd.DataFrame(rows, columns=columns)
+
+    # ---------- 직렬화 ----------
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "features": self.features,
+            "fingerprint": list(self.fingerprint),
+            "model_tag": self.model_tag,
+            "tracks": {str(k): v for k, v in self.tracks.items()},
+            "n": self.n.tolist(),
+            "sum": self.sum.tolist(),
+            "sumsq": self.sumsq.tolist(),
+            "hist": self.hist.tolist(),
+            "genres": dict(self.genres),
+            "artists": self.artists,
+        }, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "_ProfileState":
+        data = json.loads(raw)
+        state = cls(data["features"])
+        state.fingerprint = tuple(data["fingerprint"])
+        state.model_tag = data["model_tag"]
+        state.tracks = {int(k): v for k, v in data["tracks"].items()}
+        state.n = np.array(data["n"], dtype=float)
+        state.sum = np.array(data["sum"], dtype=float)
+        state.sumsq = np.array(data["sumsq"], dtype=float)
+        state.hist = np.array(data["hist"], dtype=float)
+        state.genres = Counter(data["genres"])
+        state.artists = dict(data["artists"])
+        return state
+
+
+class UserProfileStore:
+    """사용자별 PMS 취향 프로필 저장소 (메모리 + SQLite)"""
+
+    def __init__(self, predictor: AudioFeaturePredictor, model_tag: str, db_path: str = PROFILE_DB_PATH):
+        self.predictor = predictor
+        self.model_tag = model_tag
+        self.features = [f for f in predictor.audio_features if f in predictor.models]
+        self._states: Dict[int, _ProfileState] = {}
+        self._user_locks: Dict[int, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.updates = 0
+        self.predicted_tracks = 0
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS profile_state ("
+            "user_id INTEGER PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _fingerprint(self, db: Session, user_id: int) -> Tuple[int, int, int]:
+        """PMS 매핑 변경 감지용 지문 (tracks 조인 없음)"""
+        row = db.execute(text("""
+            SELECT COUNT(*), COALESCE(MAX(pt.map_id), 0), COALESCE(SUM(pt.map_id), 0)
+            FROM playlists p
+            JOIN playlist_tracks pt ON pt.playlist_id = p.playlist_id
+            WHERE p.user_id = :user_id AND p.space_type = 'PMS'
+        """), {"user_id": user_id}).fetchone()
+        return tuple(int(v or 0) for v in row)
+
+    def _load_state(self, user_id: int) -> _ProfileState:
+        state = self._states.get(user_id)
+        if state is not None:
+            return state
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM profile_state WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        if row is not None:
+            state = _ProfileState.from_json(row[0])
+            if state.model_tag != self.model_tag or state.features != self.features:
+                state = None
+        if state is None:
+            state = _ProfileState(self.features)
+            state.model_tag = self.model_tag
+        self._states[user_id] = state
+        return state
+
+    def _save_state(self, user_id: int, state: _ProfileState) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profile_state (user_id, state, updated_at) VALUES (?, ?, ?)",
+                (user_id, state.to_json(), time.time())
+            )
+            self._conn.commit()
+
+    def _sync(self, db: Session, user_id: int) -> _ProfileState:
+        """지문이 바뀌었으면 추가/삭제된 PMS 트랙만 반영"""
+        fingerprint = self._fingerprint(db, user_id)
+        state = self._load_state(user_id)
+        if state.fingerprint == fingerprint:
+            self.hits += 1
+            return state
+
+        rows = db.execute(text("""
+            SELECT pt.track_id, COUNT(*)
+            FROM playlists p
+            JOIN playlist_tracks pt ON pt.playlist_id = p.playlist_id
+            WHERE p.user_id = :user_id AND p.space_type = 'PMS'
+            GROUP BY pt.track_id
+        """), {"user_id": user_id}).fetchall()
+        current = {int(tid): int(count) for tid, count in rows}
+
+        # 삭제/중복 수 감소분 차감
+        for track_id in list(state.tracks.keys()):
+            delta = current.get(track_id, 0) - state.tracks[track_id][0]
+            if delta < 0:
+                state.apply(track_id, delta)
+
+        # 새로 추가된 곡만 예측
+        new_ids = [tid for tid in current if tid not in state.tracks]
+        if new_ids:
+            placeholders = ','.join([f':id_{i}' for i in range(len(new_ids))])
+            result = db.execute(text(f"""
+                SELECT track_id, title, artist, album, duration, external_metadata
+                FROM tracks WHERE track_id IN ({placeholders})
+            """), {f'id_{i}': tid for i, tid in enumerate(new_ids)})
+            new_df = prepare_tracks_frame(result.fetchall())
+            if not new_df.empty:
+                predicted = self.predictor.predict(new_df)
+                genres = new_df['track_genre'].fillna('unknown').str.split(',')
+                for idx, row in predicted.iterrows():
+                    track_id = int(row['track_id'])
+                    values = [float(row.get(f'predicted_{f}', float('nan'))) for f in self.features]
+                    track_genres = genres.loc[idx] if isinstance(genres.loc[idx], list) else []
+                    state.tracks[track_id] = [0, row['artists'], track_genres, values]
+                    state.apply(track_id, current[track_id])
+                self.predicted_tracks += len(new_df)
+
+        # 기존 곡 중복 수 증가분
+        for track_id, count in current.items():
+            if track_id in state.tracks:
+                delta = count - state.tracks[track_id][0]
+                if delta > 0:
+                    state.apply(track_id, delta)
+
+        state.fingerprint = fingerprint
+        self._save_state(user_id, state)
+        self.updates += 1
+        return state
+
+    def _user_lock(self, user_id: int) -> threading.Lock:
+        with self._lock:
+            return self._user_locks.setdefault(user_id, threading.Lock())
+
+    def get_profile(self, db: Session, user_id: int) -> Optional[UserPreferenceProfile]:
+        """사용자 PMS 프로필 (PMS가 비어 있으면 None)"""
+        with self._user_lock(user_id):
+            state = self._sync(db, user_id)
+        if not state.tracks:
+            return None
+        return state.to_profile()
+
+    def get_track_frame(self, db: Session, user_id: int) -> pd.DataFrame:
+        """사용자 PMS 트랙별 예측 오디오 특성"""
+        with self._user_lock(user_id):
+            return self._sync(db, user_id).track_frame()
+
+    def invalidate(self, user_id: int) -> None:
+        """메모리 상태 제거 (다음 조회 시 SQLite에서 다시 읽고 지문 비교)"""
+        self._states.pop(user_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "cached_users": len(self._states),
+            "hits": self.hits,
+            "updates": self.updates,
+            "predicted_tracks": self.predicted_tracks,
+        }
+
+
+# 모델 경로별 싱글톤
+_profile_stores: Dict[str, UserProfileStore] = {}
+_profile_stores_lock = threading.Lock()
+
+
+def get_profile_store(model_path: str, predictor: AudioFeaturePredictor = None) -> Optional[UserProfileStore]:
+    """모델 경로별 프로필 저장소 싱글톤 (모델 파일이 없으면 None)"""
+    if not model_path or not os.path.exists(model_path):
+        return None
+    model_tag = f"{os.path.abspath(model_path)}:{os.path.getmtime(model_path):.0f}"
+    with _profile_stores_lock:
+        store = _profile_stores.get(model_path)
+        if store is None or store.model_tag != model_tag:
+            if predictor is None:
+                predictor = AudioFeaturePredictor(model_type='Ridge')
+                predictor.load(model_path)
+            store = UserProfileStore(predictor, model_tag)
+            _profile_stores[model_path] = store
+        return store
@@ -4,14 +4,17 @@ DB 연동 및 추천 로직 통합 서비스
 """
 from .spotify_recommender import AudioFeaturePredictor, UserPreferenceProfile, HybridRecommender, PreferenceClassifier
 from .search_enhancer import SearchBasedEnhancer, IntegratedRecommender
+from .profile_store import get_profile_store, extract_metadata, prepare_tracks_frame
 import pandas as pd
 import numpy as np
 import os
 import json
-import shutil
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from datetime import datetime
+from owned_tracks import get_owned_track_index, drop_duplicate_tracks
+from recommendation_cache import get_recommendation_cache
+from metrics import stage
 
 
 class M1RecommendationService:
@@ -20,12 +23,14 @@ class M1RecommendationService:
     def __init__(self, model_path: str = None):
         self.predictor = AudioFeaturePredictor(model_type='Ridge')
         self.model_loaded = False
+        self.profile_store = None
         
         if model_path and os.path.exists(model_path):
             try:
                 self.predictor.load(model_path)
                 self.model_loaded = True
                 print(f"[M1] 모델 로드 완료: {model_path}")
+                self.profile_store = get_profile_store(model_path, self.predictor)
             except Exception as e:
                 print(f"[M1] 모델 로드 실패: {e}")
         
@@ -77,7 +82,7 @@ class M1RecommendationService:
     # ==================== 2단계: 모델 파일 복사 ====================
     
     def copy_base_model_to_user(self, email: str) -> str:
-        """기본 모델을 사용자 폴더로 복사"""
+        """기본 모델의 헤드를 사용자 폴더에 저장 (피처 파이프라인은 공유 저장소 참조)"""
         email_prefix = self.get_email_prefix(email)
         base_path = os.path.dirname(__file__)
         
@@ -90,11 +95,13 @@ class M1RecommendationService:
         # 사용자 모델 경로 (이메일 앞자리 이름)
         user_model_path = os.path.join(user_folder, f"{email_prefix}.pkl")
         
-        # 복사 (이미 있으면 스킵)
+        # 헤드만 저장 (이미 있으면 스킵)
         if not os.path.exists(user_model_path):
             if os.path.exists(source_model):
-                shutil.copy2(source_model, user_model_path)
-                print(f"[M1] 모델 복사 완료: {user_model_path}")
+                base_predictor = AudioFeaturePredictor(model_type='Ridge')
+                base_predictor.load(source_model)
+                base_predictor.save(user_model_path, share_pipeline=True)
+                print(f"[M1] 기본 모델 헤드 저장 완료: {user_model_path}")
             else:
                 print(f"[M1] 원본 모델 없음: {source_model}")
                 return None
@@ -153,11 +160,15 @@ class M1RecommendationService:
             print(f"[M1] 기본 모델 로드: {user_model_path}")
 
         # 4. PMS 트랙으로 실제 학습 수행
+        #    기본 모델이 있으면 공유 피처 파이프라인은 그대로 두고 헤드만 학습
         if len(trainable_tracks) >= 10:
             # audio features가 충분하면 실제 학습
             print(f"[M1] PMS 트랙으로 모델 학습 시작 ({len(trainable_tracks)}곡)")
             try:
-                user_predictor.train(trainable_tracks, test_size=0.2)
+                user_predictor.train(
+                    trainable_tracks, test_size=0.2,
+                    fit_features=not os.path.exists(user_model_path)
+                )
                 print(f"[M1] 모델 학습 완료!")
             except Exception as e:
                 print(f"[M1] 학습 중 오류 (프로필 기반으로 대체): {e}")
@@ -169,8 +180,8 @@ class M1RecommendationService:
         user_profile = UserPreferenceProfile()
         user_profile.build_profile(pms_with_features)
 
-        # 6. 학습된 모델 저장 (파일명에 _ 붙임)
-        user_predictor.save(trained_model_path)
+        # 6. 학습된 모델 저장 (파일명에 _ 붙임, 헤드만 + 공유 파이프라인 참조)
+        user_predictor.save(trained_model_path, share_pipeline=True)
         print(f"[M1] 모델 저장 완료: {trained_model_path}")
 
         # 사용자 프로필도 저장
@@ -187,6 +198,7 @@ class M1RecommendationService:
             }, f, ensure_ascii=False, indent=2)
 
         print(f"[M1] 모델 추가학습 완료: {trained_model_path}")
+        get_recommendation_cache().invalidate_user(user_id)
 
         return {
             "success": True,
@@ -342,35 +354,28 @@ class M1RecommendationService:
     
     def _extract_metadata(self, external_metadata) -> dict:
         """external_metadata JSON 파싱"""
-        if pd.isna(external_metadata) or not external_metadata:
-            return {'genre': 'unknown', 'popularity': 50}
-        try:
-            if isinstance(external_metadata, str):
-                return json.loads(external_metadata)
-            return external_metadata
-        except:
-            return {'genre': 'unknown', 'popularity': 50}
+        return extract_metadata(external_metadata)
     
     def _prepare_tracks_df(self, result) -> pd.DataFrame:
         """DB 결과를 ML 모델 형식으로 변환"""
-        df = pd.DataFrame(result.fetchall(), columns=['track_id', 'title', 'artist', 'album', 'duration', 'external_metadata'])
-        
-        # 컬럼명 변환 (모델이 기대하는 형식)
-        df = df.rename(columns={
-            'title': 'track_name',
-            'artist': 'artists',
-            'album': 'album_name'
-        })
-        
-        # duration: 초 → 밀리초
-        df['duration_ms'] = df['duration'] * 1000
-        
-        # external_metadata에서 장르, popularity 추출
-        metadata = df['external_metadata'].apply(self._extract_metadata)
-        df['track_genre'] = metadata.apply(lambda x: x.get('genre', 'unknown'))
-        df['popularity'] = metadata.apply(lambda x: x.get('popularity', 50))
-        
-        return df
+        return prepare_tracks_frame(result.fetchall())
+    
+    def _get_pms_profile(self, db: Session, user_id: int):
+        """
+        PMS 기반 사용자 프로필 (PMS가 비어 있으면 None)
+
+        프로필 저장소가 있으면 증분 갱신된 프로필을 바로 사용하고,
+        없으면 PMS 전체를 예측해서 새로 만듭니다.
+        """
+        if self.profile_store is not None:
+            return self.profile_store.get_profile(db, user_id)
+
+        pms_df = self.get_user_preferences_from_db(db, user_id)
+        if pms_df.empty:
+            return None
+        user_profile = UserPreferenceProfile()
+        user_profile.build_profile(self.predictor.predict(pms_df))
+        return user_profile
     
     def get_user_preferences_from_db(self, db: Session, user_id: int) -> pd.DataFrame:
         """PMS에서 사용자 선호 트랙 조회"""
@@ -388,104 +393,53 @@ class M1RecommendationService:
         """
         EMS에서 후보 트랙 조회 (PMS/GMS에 이미 있는 곡 제외)
 
+        limit이 있으면 OwnedTrackIndex로 'EMS 풀 - 보유 집합'에서 무작위 추출 후
+        track_id(PK)로 조회합니다. (NOT IN 서브쿼리 + ORDER BY RAND() 대체)
+
         Args:
             db: 데이터베이스 세션
             user_id: 사용자 ID (PMS/GMS 중복 제외용)
             limit: 최대 곡 수 (None이면 전체 조회)
         """
-        if user_id and limit:
-            # PMS와 GMS에 이미 있는 곡 제외 (아티스트+제목 기준 중복도 체크)
-            query = text("""
-                SELECT DISTINCT t.track_id, t.title, t.artist, t.album, t.duration, t.external_metadata
-                FROM tracks t
-                JOIN playlist_tracks pt ON t.track_id = pt.track_id
-                JOIN playlists p ON pt.playlist_id = p.playlist_id
-                WHERE p.space_type = 'EMS'
-                AND t.track_id NOT IN (
-                    SELECT t2.track_id FROM tracks t2
-                    JOIN playlist_tracks pt2 ON t2.track_id = pt2.track_id
-                    JOIN playlists p2 ON pt2.playlist_id = p2.playlist_id
-                    WHERE p2.user_id = :user_id AND p2.space_type IN ('PMS', 'GMS')
-                )
-                AND CONCAT(LOWER(t.artist), '|', LOWER(t.title)) NOT IN (
-                    SELECT CONCAT(LOWER(t3.artist), '|', LOWER(t3.title)) FROM tracks t3
-                    JOIN playlist_tracks pt3 ON t3.track_id = pt3.track_id
-                    JOIN playlists p3 ON pt3.playlist_id = p3.playlist_id
-                    WHERE p3.user_id = :user_id AND p3.space_type IN ('PMS', 'GMS')
-                )
-                ORDER BY RAND()
-                LIMIT :limit
-            """)
-            result = db.execute(query, {"user_id": user_id, "limit": limit})
-            print(f"[M1] EMS 조회: user_id={user_id}, PMS/GMS 중복 제외")
-        elif limit:
-            query = text("""
-                SELECT DISTINCT t.track_id, t.title, t.artist, t.album, t.duration, t.external_metadata
-                FROM tracks t
-                JOIN playlist_tracks pt ON t.track_id = pt.track_id
-                JOIN playlists p ON pt.playlist_id = p.playlist_id
-                WHERE p.space_type = 'EMS'
-                ORDER BY RAND()
-                LIMIT :limit
-            """)
-            result = db.execute(query, {"limit": limit})
-        else:
-            query = text("""
-                SELECT DISTINCT t.track_id, t.title, t.artist, t.album, t.duration, t.external_metadata
-                FROM tracks t
-                JOIN playlist_tracks pt ON t.track_id = pt.track_id
-                JOIN playlists p ON pt.playlist_id = p.playlist_id
-                WHERE p.space_type = 'EMS'
-            """)
-            result = db.execute(query)
+        if limit:
+            track_ids = get_owned_track_index().sample_ems_track_ids(db, limit, user_id=user_id)
+            if user_id:
+                print(f"[M1] EMS 조회: user_id={user_id}, PMS/GMS 중복 제외")
+            return self._get_tracks_in_order(db, track_ids)
+
+        query = text("""
+            SELECT DISTINCT t.track_id, t.title, t.artist, t.album, t.duration, t.external_metadata
+            FROM tracks t
+            JOIN playlist_tracks pt ON t.track_id = pt.track_id
+            JOIN playlists p ON pt.playlist_id = p.playlist_id
+            WHERE p.space_type = 'EMS'
+        """)
+        result = db.execute(query)
         return self._prepare_tracks_df(result)
     
     def get_random_ems_tracks(self, db: Session, limit: int = 100, user_id: int = None) -> pd.DataFrame:
         """
         EMS 전체에서 랜덤하게 트랙 추출 (중복 제거, PMS/GMS 제외)
-        - SQL RAND()로 DB에서 직접 랜덤 추출
+        - 캐시된 EMS 풀에서 균등 추출 후 track_id로 조회
         - 아티스트별 편중 없이 균등 분포
         - user_id가 있으면 해당 사용자의 PMS/GMS 곡 제외
         """
+        track_ids = get_owned_track_index().sample_ems_track_ids(db, limit, user_id=user_id)
         if user_id:
-            query = text("""
-                SELECT DISTINCT t.track_id, t.title, t.artist, t.album, t.duration, t.external_metadata
-                FROM tracks t
-                JOIN playlist_tracks pt ON t.track_id = pt.track_id
-                JOIN playlists p ON pt.playlist_id = p.playlist_id
-                WHERE p.space_type = 'EMS'
-                AND t.track_id NOT IN (
-                    SELECT t2.track_id FROM tracks t2
-                    JOIN playlist_tracks pt2 ON t2.track_id = pt2.track_id
-                    JOIN playlists p2 ON pt2.playlist_id = p2.playlist_id
-                    WHERE p2.user_id = :user_id AND p2.space_type IN ('PMS', 'GMS')
-                )
-                AND CONCAT(LOWER(t.artist), '|', LOWER(t.title)) NOT IN (
-                    SELECT CONCAT(LOWER(t3.artist), '|', LOWER(t3.title)) FROM tracks t3
-                    JOIN playlist_tracks pt3 ON t3.track_id = pt3.track_id
-                    JOIN playlists p3 ON pt3.playlist_id = p3.playlist_id
-                    WHERE p3.user_id = :user_id AND p3.space_type IN ('PMS', 'GMS')
-                )
-                ORDER BY RAND()
-                LIMIT :limit
-            """)
-            result = db.execute(query, {"user_id": user_id, "limit": limit})
             print(f"[M1] EMS 랜덤 추출: user_id={user_id}, PMS/GMS 중복 제외")
-        else:
-            query = text("""
-                SELECT DISTINCT t.track_id, t.title, t.artist, t.album, t.duration, t.external_metadata
-                FROM tracks t
-                JOIN playlist_tracks pt ON t.track_id = pt.track_id
-                JOIN playlists p ON pt.playlist_id = p.playlist_id
-                WHERE p.space_type = 'EMS'
-                ORDER BY RAND()
-                LIMIT :limit
-            """)
-            result = db.execute(query, {"limit": limit})
-        df = self._prepare_tracks_df(result)
+        df = self._get_tracks_in_order(db, track_ids)
         print(f"[M1] EMS 랜덤 {len(df)}곡 추출 완료")
         return df
     
+    def _get_tracks_in_order(self, db: Session, track_ids: list) -> pd.DataFrame:
+        """track_id 목록 순서를 유지하여 조회 (무작위 추출 순서 보존)"""
+        df = self.get_tracks_by_ids(db, track_ids)
+        if df.empty:
+            return df
+        order = {tid: i for i, tid in enumerate(track_ids)}
+        df = df.sort_values(by='track_id', key=lambda col: col.map(order)).reset_index(drop=True)
+        return df
+    
     def get_tracks_by_ids(self, db: Session, track_ids: list) -> pd.DataFrame:
         """특정 track_id 목록으로 트랙 조회"""
         if not track_ids:
@@ -519,51 +473,80 @@ class M1RecommendationService:
             ems_limit: EMS에서 분석할 곡 수 (기본값: 100)
             track_ids: 특정 트랙 ID 목록 (데모 페이지에서 동일 트랙 비교용)
         """
+        recommender, ems_df = self.prepare_candidates(db, user_id, ems_limit=ems_limit, track_ids=track_ids)
+        if recommender is None:
+            return pd.DataFrame()
+
+        # 3. 통합 추천 파이프라인 실행
+        recommendations = self.score_candidates(recommender, ems_df)
+
+        # 4. GMS 품질 필터링 + 중복 제거
+        return self.select_gms_tracks(recommendations, user_id, len(ems_df))
+
+    def prepare_candidates(self, db: Session, user_id: int, ems_limit: int = 100, track_ids: list = None):
+        """
+        추천 파이프라인 1~2단계: 사용자 프로필 + EMS 후보 조회
+
+        Returns:
+            (IntegratedRecommender, 후보 DataFrame) - 데이터 없으면 (None, 빈 DataFrame)
+        """
         has_pms = True
-        
-        # 1. 사용자 프로필 생성 (PMS 기반)
-        pms_df = self.get_user_preferences_from_db(db, user_id)
-        if pms_df.empty:
+
+        # 1. 사용자 프로필 (PMS 기반, 프로필 저장소에서 증분 갱신)
+        with stage("M1", "pms_profile"):
+            user_profile = self._get_pms_profile(db, user_id)
+        if user_profile is None:
             print(f"[M1] 사용자 {user_id}의 PMS 데이터 없음 - 전체 EMS 기반 프로필 생성")
             has_pms = False
             # PMS 없으면 전체 EMS에서 랜덤 샘플링하여 프로필 생성
             pms_df = self.get_random_ems_tracks(db, limit=50)
             if pms_df.empty:
                 print(f"[M1] EMS 데이터도 없음")
-                return pd.DataFrame()
-        
-        # 오디오 특성 예측 및 프로필 생성
-        pms_enhanced = self.predictor.predict(pms_df)
-        user_profile = UserPreferenceProfile()
-        user_profile.build_profile(pms_enhanced)
+                return None, pd.DataFrame()
+            
+            # 오디오 특성 예측 및 프로필 생성
+            pms_enhanced = self.predictor.predict(pms_df)
+            user_profile = UserPreferenceProfile()
+            user_profile.build_profile(pms_enhanced)
         
         # 2. EMS 후보 트랙 조회 (track_ids가 제공되면 해당 트랙만, 아니면 ems_limit 적용)
-        if track_ids and len(track_ids) > 0:
-            # 데모 페이지에서 특정 트랙 ID로 조회 (동일 트랙 비교용)
-            ems_df = self.get_tracks_by_ids(db, track_ids)
-            print(f"[M1] 특정 트랙 ID로 조회: {len(ems_df)}곡 (요청: {len(track_ids)}개)")
-        else:
-            ems_df = self.get_ems_tracks_from_db(db, user_id, limit=ems_limit)
-            if ems_df.empty:
-                # 사용자 EMS 없으면 전체 EMS에서 추출
-                print(f"[M1] 사용자 {user_id}의 EMS 데이터 없음 - 전체 EMS 사용")
-                ems_df = self.get_random_ems_tracks(db, limit=ems_limit)
-            print(f"[M1] EMS에서 {len(ems_df)}곡 분석 (설정: {ems_limit}곡)")
+        with stage("M1", "ems_sql"):
+            if track_ids and len(track_ids) > 0:
+                # 데모 페이지에서 특정 트랙 ID로 조회 (동일 트랙 비교용)
+                ems_df = self.get_tracks_by_ids(db, track_ids)
+                print(f"[M1] 특정 트랙 ID로 조회: {len(ems_df)}곡 (요청: {len(track_ids)}개)")
+            else:
+                ems_df = self.get_ems_tracks_from_db(db, user_id, limit=ems_limit)
+                if ems_df.empty:
+                    # 사용자 EMS 없으면 전체 EMS에서 추출
+                    print(f"[M1] 사용자 {user_id}의 EMS 데이터 없음 - 전체 EMS 사용")
+                    ems_df = self.get_random_ems_tracks(db, limit=ems_limit)
+                print(f"[M1] EMS에서 {len(ems_df)}곡 분석 (설정: {ems_limit}곡)")
 
         if ems_df.empty:
             print(f"[M1] EMS 데이터 없음")
-            return pd.DataFrame()
-        
-        # 3. 통합 추천 파이프라인 실행
+            return None, ems_df
+
         recommender = IntegratedRecommender(
             self.predictor, 
             user_profile, 
             self.enhancer,
             self.preference_classifier if self.preference_classifier.is_trained else None
         )
-        recommendations = recommender.recommend_with_search(ems_df)
-        
-        # 4. GMS 품질 필터링
+        return recommender, ems_df
+
+    def score_candidates(self, recommender: IntegratedRecommender, ems_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        추천 파이프라인 3단계: 4-Factor 점수 계산
+
+        곡별 점수가 서로 독립(배치 정규화 없음)이라 후보를 나눠 계산해 합쳐도 결과가 같음
+        (스트리밍 추천은 청크 단위로 호출)
+        """
+        with stage("M1", "inference"):
+            return recommender.recommend_with_search(ems_df)
+
+    def select_gms_tracks(self, recommendations: pd.DataFrame, user_id: int, n_candidates: int) -> pd.DataFrame:
+        """추천 파이프라인 4단계: GMS threshold 필터링 (최소 20곡 보완) + 중복 제거"""
         threshold = 0.7
         gms_pass = recommendations[recommendations['final_score'] >= threshold].sort_values(
             by='final_score', ascending=False
@@ -576,22 +559,17 @@ class M1RecommendationService:
 
         gms_pass['recommendation_score'] = gms_pass['final_score']
 
-        # 중복 제거 (track_id 기준)
-        before_dedup = len(gms_pass)
-        gms_pass = gms_pass.drop_duplicates(subset=['track_id'], keep='first')
-        
-        # 아티스트+제목 기준 중복 제거 (같은 곡이 다른 track_id로 존재할 수 있음)
+        # 중복 제거 (track_id, 아티스트+제목 기준 - 같은 곡이 다른 track_id로 존재할 수 있음)
         # 컬럼명: artist 또는 artists (DB 조회 후 rename됨)
+        before_dedup = len(gms_pass)
         artist_col = 'artists' if 'artists' in gms_pass.columns else 'artist'
-        gms_pass['artist_title_key'] = gms_pass[artist_col].str.lower() + '|' + gms_pass['track_name'].str.lower()
-        gms_pass = gms_pass.drop_duplicates(subset=['artist_title_key'], keep='first')
-        gms_pass = gms_pass.drop(columns=['artist_title_key'])
+        gms_pass = drop_duplicate_tracks(gms_pass, artist_col, 'track_name')
         
         after_dedup = len(gms_pass)
         if before_dedup != after_dedup:
             print(f"[M1] 중복 제거: {before_dedup}곡 → {after_dedup}곡")
 
-        print(f"[M1] 사용자 {user_id}: {len(ems_df)}개 후보 중 {len(gms_pass)}개 GMS 통과 (threshold: {threshold})")
+        print(f"[M1] 사용자 {user_id}: {n_candidates}개 후보 중 {len(gms_pass)}개 GMS 통과 (threshold: {threshold})")
 
         # NaN/Infinity 처리 (JSON Serialization Error 방지)
         gms_pass = gms_pass.fillna(0)
@@ -637,6 +615,7 @@ class M1RecommendationService:
                 """), {"track_id": track_id, "user_id": user_id, "score": score})
             
             db.commit()
+            get_owned_track_index().invalidate(user_id)
             print(f"[M1] GMS 플레이리스트 생성: ID={playlist_id}, 트랙={order_idx}개")
             
             return playlist_id
@@ -674,13 +653,15 @@ class M1RecommendationService:
         if not deleted_track_ids:
             return {"status": "skipped", "message": "삭제된 트랙 없음"}
         
-        # 1. 좋아요 트랙 (PMS)
-        likes_df = self.get_user_preferences_from_db(db, user_id)
-        if likes_df.empty:
+        # 1. 좋아요 트랙 (PMS, 프로필 저장소에 캐시된 예측값 재사용)
+        if self.profile_store is not None:
+            likes_enhanced = self.profile_store.get_track_frame(db, user_id)
+        else:
+            likes_df = self.get_user_preferences_from_db(db, user_id)
+            likes_enhanced = self.predictor.predict(likes_df)
+        if likes_enhanced.empty:
             return {"status": "skipped", "message": "PMS 데이터 없음"}
         
-        likes_enhanced = self.predictor.predict(likes_df)
-        
         # 2. 싫어요 트랙 (삭제된 트랙)
         query = text("""
             SELECT track_id, title, artist, album, duration, external_metadata 
@@ -706,13 +687,9 @@ class M1RecommendationService:
     
     def get_user_profile(self, db: Session, user_id: int) -> dict:
         """사용자 음악 취향 프로필 조회"""
-        pms_df = self.get_user_preferences_from_db(db, user_id)
+        user_profile = self._get_pms_profile(db, user_id)
         
-        if pms_df.empty:
+        if user_profile is None:
             return {"status": "no_data", "message": "PMS 데이터 없음"}
         
-        pms_enhanced = self.predictor.predict(pms_df)
-        user_profile = UserPreferenceProfile()
-        user_profile.build_profile(pms_enhanced)
-        
         return user_profile.get_summary()
@@ -22,7 +22,10 @@ from sklearn.linear_model import LinearRegression, Ridge
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, GradientBoostingClassifier
 from sklearn.svm import SVR
 import lightgbm as lgb
-import pickle
+from model_artifacts import load_artifact, save_artifact
+from thread_budget import get_thread_budget
+from .feature_pipeline_store import USER_MODEL_FORMAT, load_pipeline, store_pipeline
+import copy
 import json
 from typing import List, Dict, Tuple, Optional
 import warnings
@@ -55,6 +58,7 @@ class AudioFeaturePredictor:
         self.genre_encoder = MultiLabelBinarizer()
         self.artist_vectorizer = TfidfVectorizer(max_features=500)
         self.album_vectorizer = TfidfVectorizer(max_features=300)
+        self.pipeline_ref = None  # 공유 피처 파이프라인 해시 (feature_pipeline_store)
 
         # Audio features to predict
         self.audio_features = [
@@ -132,7 +136,7 @@ class AudioFeaturePredictor:
         if self.model_type == 'LightGBM':
             return lgb.LGBMRegressor(
                 n_estimators=100, max_depth=5, learning_rate=0.1,
-                random_state=42, n_jobs=-1, verbose=-1
+                random_state=42, n_jobs=get_thread_budget().train_threads, verbose=-1
             )
         elif self.model_type == 'LinearRegression':
             return LinearRegression()
@@ -140,7 +144,8 @@ class AudioFeaturePredictor:
             return Ridge(alpha=1.0)
         elif self.model_type == 'RandomForest':
             return RandomForestRegressor(
-                n_estimators=50, max_depth=10, random_state=42, n_jobs=-1
+                n_estimators=50, max_depth=10, random_state=42,
+                n_jobs=get_thread_budget().train_threads
             )
         elif self.model_type == 'GradientBoosting':
             return GradientBoostingRegressor(
@@ -156,9 +161,10 @@ class AudioFeaturePredictor:
         """
         return self.model_type in ['LinearRegression', 'Ridge', 'SVR']
 
-    def train(self, df: pd.DataFrame, test_size: float = 0.2):
+    def train(self, df: pd.DataFrame, test_size: float = 0.2, fit_features: bool = True):
         """
         Train prediction models for each audio feature
+        fit_features=False면 기존 피처 파이프라인(인코더/TF-IDF)을 유지하고 헤드만 학습
         """
         print(f"[INFO] Training Audio Feature Prediction Models ({self.model_type})...")
         print(f" Training data: {len(df)} tracks")
@@ -169,7 +175,13 @@ class AudioFeaturePredictor:
             print(f" StandardScaler 미적용 ({self.model_type}은 트리 기반 모델)")
 
         # Prepare features
-        X = self.prepare_features(df, fit=True)
+        if fit_features and self.pipeline_ref is not None:
+            # 공유 파이프라인 객체를 다시 학습하지 않도록 분리
+            self.genre_encoder = copy.deepcopy(self.genre_encoder)
+            self.artist_vectorizer = copy.deepcopy(self.artist_vectorizer)
+            self.album_vectorizer = copy.deepcopy(self.album_vectorizer)
+            self.pipeline_ref = None
+        X = self.prepare_features(df, fit=fit_features)
 
         results = {}
 
@@ -249,31 +261,51 @@ class AudioFeaturePredictor:
 
         return predictions
     
-    def save(self, path: str):
-        """Save trained models"""
-        with open(path, 'wb') as f:
-            pickle.dump({
+    def save(self, path: str, share_pipeline: bool = False):
+        """
+        Save trained models
+        share_pipeline=True면 피처 파이프라인은 공유 저장소에 두고 헤드만 저장
+        """
+        if share_pipeline:
+            if self.pipeline_ref is None:
+                self.pipeline_ref = store_pipeline(self.genre_encoder, self.artist_vectorizer, self.album_vectorizer)
+            save_artifact({
+                'format': USER_MODEL_FORMAT,
+                'pipeline_ref': self.pipeline_ref,
                 'model_type': self.model_type,
                 'models': self.models,
                 'scalers': self.scalers,
-                'genre_encoder': self.genre_encoder,
-                'artist_vectorizer': self.artist_vectorizer,
-                'album_vectorizer': self.album_vectorizer,
                 'audio_features': self.audio_features
-            }, f)
+            }, path)
+            print(f" Models saved to {path} (model_type: {self.model_type}, pipeline: {self.pipeline_ref[:16]})")
+            return
+
+        save_artifact({
+            'model_type': self.model_type,
+            'models': self.models,
+            'scalers': self.scalers,
+            'genre_encoder': self.genre_encoder,
+            'artist_vectorizer': self.artist_vectorizer,
+            'album_vectorizer': self.album_vectorizer,
+            'audio_features': self.audio_features
+        }, path)
         print(f" Models saved to {path} (model_type: {self.model_type})")
 
     def load(self, path: str):
         """Load trained models"""
-        with open(path, 'rb') as f:
-            data = pickle.load(f)
-            self.model_type = data.get('model_type', 'LightGBM')
-            self.models = data['models']
-            self.scalers = data.get('scalers', {})
+        data = load_artifact(path)
+        self.model_type = data.get('model_type', 'LightGBM')
+        self.models = data['models']
+        self.scalers = data.get('scalers', {})
+        if data.get('pipeline_ref'):
+            self.pipeline_ref = data['pipeline_ref']
+            self.genre_encoder, self.artist_vectorizer, self.album_vectorizer = load_pipeline(self.pipeline_ref)
+        else:
+            self.pipeline_ref = None
             self.genre_encoder = data['genre_encoder']
             self.artist_vectorizer = data['artist_vectorizer']
             self.album_vectorizer = data['album_vectorizer']
-            self.audio_features = data['audio_features']
+        self.audio_features = data['audio_features']
         print(f" Models loaded from {path} (model_type: {self.model_type})")
 
 
@@ -287,6 +319,7 @@ class UserPreferenceProfile:
         self.feature_stats = {}
         self.genre_distribution = {}
         self.artist_list = []
+        self.num_tracks = 0
         
     def build_profile(self, df: pd.DataFrame):
         """
@@ -295,6 +328,7 @@ class UserPreferenceProfile:
         print(f" Building user preference profile from {len(df)} tracks...")
         
         self.preference_tracks = df.copy()
+        self.num_tracks = len(df)
         
         # Audio feature statistics
         audio_cols = [col for col in df.columns if col in [
@@ -331,7 +365,7 @@ class UserPreferenceProfile:
     def get_summary(self) -> Dict:
         """Get profile summary"""
         return {
-            'num_tracks': len(self.preference_tracks),
+            'num_tracks': self.num_tracks,
             'feature_stats': self.feature_stats,
             'top_genres': dict(list(self.genre_distribution.items())[:10]),
             'num_artists': len(self.artist_list)
@@ -435,25 +469,23 @@ class PreferenceClassifier:
         if not self.is_trained:
             print(" Model not trained yet. Nothing to save.")
             return
-        with open(path, 'wb') as f:
-            pickle.dump({
-                'model': self.model,
-                'scaler': self.scaler,
-                'is_trained': self.is_trained,
-                'metrics': self.metrics,
-                'feature_names': self.feature_names
-            }, f)
+        save_artifact({
+            'model': self.model,
+            'scaler': self.scaler,
+            'is_trained': self.is_trained,
+            'metrics': self.metrics,
+            'feature_names': self.feature_names
+        }, path)
         print(f" Preference model saved to {path}")
 
     def load(self, path: str):
         """Load preference model"""
-        with open(path, 'rb') as f:
-            data = pickle.load(f)
-            self.model = data['model']
-            self.scaler = data['scaler']
-            self.is_trained = data['is_trained']
-            self.metrics = data.get('metrics', {})
-            self.feature_names = data.get('feature_names', [])
+        data = load_artifact(path)
+        self.model = data['model']
+        self.scaler = data['scaler']
+        self.is_trained = data['is_trained']
+        self.metrics = data.get('metrics', {})
+        self.feature_names = data.get('feature_names', [])
         print(f" Preference model loaded from {path}")
 
 
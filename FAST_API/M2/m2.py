@@ -202,7 +202,9 @@ from sqlalchemy.sql import func
 from contextlib import contextmanager
 
 # 머신러닝/임베딩
-from sentence_transformers import SentenceTransformer
+from embedding_service import get_embedding_service as get_shared_embedding_service
+from model_artifacts import load_artifact, save_artifact
+from metrics import record_external
 import numpy as np
 from sklearn.svm import SVC
 from sklearn.pipeline import Pipeline
@@ -221,6 +223,10 @@ import json
 import csv
 import io
 import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from datetime import datetime
@@ -256,6 +262,8 @@ class Settings(BaseSettings):
     # Last.fm API
     lastfm_api_key: str = ""
     lastfm_api_secret: str = ""
+    lastfm_cache_ttl_days: int = 30  # 태그 캐시 유효 기간
+    lastfm_cache_memory_size: int = 10000  # 메모리 LRU 크기
 
     # Backend 연동
     backend_url: str = "http://localhost:8089"
@@ -402,8 +410,8 @@ class EmbeddingService:
     def load_model(self):
         """모델 로드 (Lazy Loading)"""
         if self.model is None:
-            logger.info(f"Loading embedding model: {self.model_name}")
-            self.model = SentenceTransformer(self.model_name)
+            logger.info(f"Using shared embedding model: {self.model_name}")
+            self.model = get_shared_embedding_service()
 
     def encode_track(self, track: TrackBase) -> np.ndarray:
         """단일 트랙 임베딩"""
@@ -443,11 +451,155 @@ def get_embedding_service() -> EmbeddingService:
 Last.fm API로 아티스트/트랙 태그(장르) 수집
 - 시스템 B: SVM 학습 시 태그 정보 필요
 - CSV 캐시 활용으로 API 호출 최소화
+- API 응답은 단일 SQLite 파일(인덱스 + TTL)에 저장, 앞단에 메모리 LRU
 """
 
 LASTFM_API_URL = "https://ws.audioscrobbler.com/2.0/"
 
 
+def _normalize_artist(artist: str) -> str:
+    """아티스트명 정규화 (대소문자/공백 차이 무시)"""
+    return " ".join(str(artist).split()).lower()
+
+
+def _safe_cache_key(cache_key: str) -> str:
+    """캐시 키 정규화 (기존 JSON 파일명 규칙과 동일 + 소문자)"""
+    key = " ".join(cache_key.split()).lower()
+    return "".join(c if c.isalnum() or c in "._-" else "_" for c in key)
+
+
+class LastFmTagCache:
+    """
+    Last.fm 응답 캐시 (SQLite 단일 파일 + 메모리 LRU)
+
+    - 키는 PRIMARY KEY 인덱스로 O(1) 조회
+    - 저장 시각 기준 TTL 만료
+    - 기존 {safe_key}.json 캐시 디렉토리는 최초 1회만 가져옴 (migrate_json_dir)
+    """
+
+    def __init__(self, db_path: Path, ttl_seconds: Optional[float] = None, memory_size: int = 10000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.memory_size = memory_size
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS lastfm_cache ("
+            "cache_key TEXT PRIMARY KEY, data TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds
+
+    def _remember(self, key: str, data: Dict, stored_at: float):
+        self._memory[key] = (data, stored_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, cache_key: str) -> Optional[Dict]:
+        """캐시 조회 (없거나 만료되면 None)"""
+        key = _safe_cache_key(cache_key)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[1]):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            row = self._conn.execute(
+                "SELECT data, stored_at FROM lastfm_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None or self._expired(row[1]):
+                self._memory.pop(key, None)
+                self.misses += 1
+                return None
+
+            data = json.loads(row[0])
+            self._remember(key, data, row[1])
+            self.hits += 1
+            return data
+
+    def set(self, cache_key: str, data: Dict, stored_at: Optional[float] = None):
+        """캐시 저장"""
+        key = _safe_cache_key(cache_key)
+        stored_at = stored_at or time.time()
+        with self._lock:
+            self._remember(key, data, stored_at)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lastfm_cache (cache_key, data, stored_at) VALUES (?, ?, ?)",
+                (key, json.dumps(data, ensure_ascii=False, separators=(",", ":")), stored_at)
+            )
+            self._conn.commit()
+
+    def migrate_json_dir(self, json_dir: Path, force: bool = False) -> int:
+        """
+        기존 JSON 파일 캐시 디렉토리를 SQLite로 가져오기
+
+        완료 여부를 cache_meta에 기록하므로 이후 시작 시에는 디렉토리를 스캔하지 않습니다.
+        파일 수정 시각을 저장 시각으로 사용하여 TTL을 이어갑니다.
+
+        Returns:
+            가져온 항목 수
+        """
+        with self._lock:
+            done = self._conn.execute(
+                "SELECT value FROM cache_meta WHERE name = 'json_migrated'"
+            ).fetchone()
+        if done and not force:
+            return 0
+
+        rows = []
+        if json_dir.exists():
+            for path in json_dir.glob("*.json"):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    rows.append((
+                        path.stem.lower(),
+                        json.dumps(data, ensure_ascii=False, separators=(",", ":")),
+                        path.stat().st_mtime
+                    ))
+                except Exception as e:
+                    logger.warning(f"Last.fm 캐시 마이그레이션 건너뜀 ({path.name}): {e}")
+
+        with self._lock:
+            # 이미 SQLite에 있는 최신 항목은 덮어쓰지 않음
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO lastfm_cache (cache_key, data, stored_at) VALUES (?, ?, ?)",
+                rows
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_meta (name, value) VALUES ('json_migrated', ?)",
+                (datetime.now().isoformat(),)
+            )
+            self._conn.commit()
+
+        if rows:
+            logger.info(f"Last.fm JSON 캐시 {len(rows)}개 → {self.db_path.name} 마이그레이션 완료")
+        return len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM lastfm_cache").fetchone()[0]
+        return {
+            "entries": size,
+            "memory_entries": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+
 class LastFmService:
     """Last.fm API 클라이언트"""
 
@@ -455,41 +607,44 @@ class LastFmService:
         settings = get_settings()
         self.api_key = settings.lastfm_api_key
         self.cache_dir = settings.metadata_cache_dir / "lastfm"
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
 
         if not self.api_key:
             logger.warning("Last.fm API key not configured")
 
-        # CSV 캐시
+        # API 응답 캐시 (SQLite + LRU), 기존 JSON 캐시는 최초 1회 가져옴
+        self.cache = LastFmTagCache(
+            settings.metadata_cache_dir / "lastfm_cache.db",
+            ttl_seconds=settings.lastfm_cache_ttl_days * 86400,
+            memory_size=settings.lastfm_cache_memory_size
+        )
+        self.cache.migrate_json_dir(self.cache_dir)
+
+        # CSV 캐시 (정규화 아티스트명 → 태그 해시 인덱스)
         self.csv_data = None
+        self._csv_index: Dict[str, str] = {}
         self._load_csv_cache()
 
     def _load_csv_cache(self):
-        """CSV 캐시 로드"""
+        """CSV 캐시 로드 + 아티스트 인덱스 생성"""
         csv_path = BASE_DIR.parent / "data" / "lastfm_artist_info.csv"
         if csv_path.exists():
             try:
                 self.csv_data = pd.read_csv(csv_path)
-                logger.info(f"Last.fm CSV 캐시: {len(self.csv_data)}개")
+                # 같은 아티스트가 여러 행이면 첫 행 사용 (기존 조회 방식과 동일)
+                indexed = self.csv_data.assign(
+                    _artist_key=self.csv_data['artist'].astype(str).map(_normalize_artist)
+                ).drop_duplicates('_artist_key', keep='first')
+                indexed = indexed[indexed['lfm_tags'].notna()]
+                self._csv_index = dict(zip(indexed['_artist_key'], indexed['lfm_tags']))
+                logger.info(f"Last.fm CSV 캐시: {len(self.csv_data)}개 (인덱스 {len(self._csv_index)}개)")
             except Exception as e:
                 logger.warning(f"CSV 로드 실패: {e}")
 
     def get_tags_from_csv(self, artist: str) -> Optional[str]:
-        """CSV에서 아티스트 태그 조회"""
-        if self.csv_data is None:
+        """CSV에서 아티스트 태그 조회 (해시 인덱스, O(1))"""
+        if not artist:
             return None
-
-        try:
-            match = self.csv_data[
-                self.csv_data['artist'].str.lower() == artist.lower()
-            ]
-
-            if not match.empty and pd.notna(match.iloc[0]['lfm_tags']):
-                return match.iloc[0]['lfm_tags']
-        except Exception as e:
-            logger.warning(f"CSV 조회 에러: {e}")
-
-        return None
+        return self._csv_index.get(_normalize_artist(artist))
 
     async def get_tags_from_api(self, artist: str, save_to_csv: bool = True) -> Optional[str]:
         """Last.fm API에서 아티스트 태그 조회"""
@@ -499,31 +654,49 @@ class LastFmService:
             return ' | '.join(tag_names)
         return None
 
-    def _get_cache_path(self, cache_key: str) -> Path:
-        """캐시 파일 경로"""
-        safe_key = "".join(c if c.isalnum() or c in "._-" else "_" for c in cache_key)
-        return self.cache_dir / f"{safe_key}.json"
-
     def _get_cached(self, cache_key: str) -> Optional[Dict]:
         """캐시 조회"""
-        cache_path = self._get_cache_path(cache_key)
-        if cache_path.exists():
-            try:
-                with open(cache_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except Exception:
-                pass
-        return None
+        try:
+            return self.cache.get(cache_key)
+        except Exception as e:
+            logger.warning(f"Cache read error: {e}")
+            return None
 
     def _set_cache(self, cache_key: str, data: Dict):
         """캐시 저장"""
-        cache_path = self._get_cache_path(cache_key)
         try:
-            with open(cache_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self.cache.set(cache_key, data)
         except Exception as e:
             logger.warning(f"Cache write error: {e}")
 
+    async def _fetch_top_tags(self, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Last.fm getTopTags 호출 (결과/지연시간은 /metrics에 기록)"""
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(LASTFM_API_URL, params=params, timeout=10.0)
+                response.raise_for_status()
+                data = response.json()
+            outcome = "success"
+        except httpx.TimeoutException:
+            outcome = "timeout"
+            raise
+        except httpx.HTTPStatusError as e:
+            outcome = "not_found" if e.response.status_code == 404 else "error"
+            raise
+        finally:
+            record_external("lastfm", outcome, time.perf_counter() - started)
+
+        tags = []
+        if "toptags" in data and "tag" in data["toptags"]:
+            raw_tags = data["toptags"]["tag"]
+            if isinstance(raw_tags, list):
+                tags = [{"name": t["name"], "count": int(t.get("count", 0))} for t in raw_tags]
+            elif isinstance(raw_tags, dict):
+                tags = [{"name": raw_tags["name"], "count": int(raw_tags.get("count", 0))}]
+        return tags
+
     async def get_track_tags(self, artist: str, title: str) -> List[Dict[str, Any]]:
         """트랙 태그 조회"""
         if not self.api_key:
@@ -543,21 +716,9 @@ class LastFmService:
         }
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(LASTFM_API_URL, params=params, timeout=10.0)
-                response.raise_for_status()
-                data = response.json()
-
-                tags = []
-                if "toptags" in data and "tag" in data["toptags"]:
-                    raw_tags = data["toptags"]["tag"]
-                    if isinstance(raw_tags, list):
-                        tags = [{"name": t["name"], "count": int(t.get("count", 0))} for t in raw_tags]
-                    elif isinstance(raw_tags, dict):
-                        tags = [{"name": raw_tags["name"], "count": int(raw_tags.get("count", 0))}]
-
-                self._set_cache(cache_key, {"tags": tags})
-                return tags
+            tags = await self._fetch_top_tags(params)
+            self._set_cache(cache_key, {"tags": tags})
+            return tags
 
         except Exception as e:
             logger.error(f"Last.fm API error: {e}")
@@ -582,21 +743,9 @@ class LastFmService:
         }
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(LASTFM_API_URL, params=params, timeout=10.0)
-                response.raise_for_status()
-                data = response.json()
-
-                tags = []
-                if "toptags" in data and "tag" in data["toptags"]:
-                    raw_tags = data["toptags"]["tag"]
-                    if isinstance(raw_tags, list):
-                        tags = [{"name": t["name"], "count": int(t.get("count", 0))} for t in raw_tags]
-                    elif isinstance(raw_tags, dict):
-                        tags = [{"name": raw_tags["name"], "count": int(raw_tags.get("count", 0))}]
-
-                self._set_cache(cache_key, {"tags": tags})
-                return tags
+            tags = await self._fetch_top_tags(params)
+            self._set_cache(cache_key, {"tags": tags})
+            return tags
 
         except Exception as e:
             logger.error(f"Artist tags error: {e}")
@@ -675,7 +824,7 @@ class AudioPredictionService:
             raise FileNotFoundError(f"모델 파일 없음: {self.model_path}")
 
         logger.info(f"오디오 예측 모델 로드: {self.model_path}")
-        data = joblib.load(self.model_path)
+        data = load_artifact(self.model_path)
 
         self.models = data['models']
         self.vectorizers = data['vectorizers']
@@ -833,10 +982,10 @@ class SVMRecommendationService:
             raise FileNotFoundError(f"SVM 모델 없음: {self.model_path}")
 
         logger.info(f"SVM 모델 로드: {self.model_path}")
-        self.svm_pipeline = joblib.load(self.model_path)
+        self.svm_pipeline = load_artifact(self.model_path)
 
         logger.info(f"임베딩 모델 로드: {self.embedding_model_name}")
-        self.embedding_model = SentenceTransformer(self.embedding_model_name)
+        self.embedding_model = get_shared_embedding_service()
 
         self.audio_service = get_audio_prediction_service()
 
@@ -1421,7 +1570,7 @@ async def enrich_with_lastfm(tracks: List[Dict]) -> List[Dict]:
 
 def create_features_for_training(
     df: pd.DataFrame,
-    embedding_model: SentenceTransformer,
+    embedding_model,
     audio_service
 ) -> np.ndarray:
     """393D 피처 생성 (SVM 학습용)"""
@@ -1547,7 +1696,7 @@ async def train_from_csv(
         # 피처 생성
         logger.info("피처 생성 (393D)...")
         settings = get_settings()
-        embedding_model = SentenceTransformer(settings.embedding_model)
+        embedding_model = get_shared_embedding_service()
         audio_service = get_audio_prediction_service()
 
         X = create_features_for_training(full_df, embedding_model, audio_service)
@@ -1592,7 +1741,7 @@ async def train_from_csv(
             'metrics': metrics,
             'user_id': user_id
         }
-        joblib.dump(model_data, model_path)
+        save_artifact(model_data, model_path)
 
         return TrainingResponse(
             user_id=user_id,
@@ -1711,7 +1860,7 @@ async def retrain_with_feedback(
 
         # 피처 생성
         settings = get_settings()
-        embedding_model = SentenceTransformer(settings.embedding_model)
+        embedding_model = get_shared_embedding_service()
         audio_service = get_audio_prediction_service()
 
         if not pos_df.empty:
@@ -1772,7 +1921,7 @@ async def retrain_with_feedback(
         y_proba = pipeline.predict_proba(X_test)[:, 1]
         auc_score = roc_auc_score(y_test, y_proba)
 
-        old_model = joblib.load(model_path)
+        old_model = load_artifact(model_path)
         old_metrics = old_model.get('metrics', {})
 
         metrics = {
@@ -1790,7 +1939,7 @@ async def retrain_with_feedback(
         logger.info(f"재학습 완료: Train={train_score:.4f}, Test={test_score:.4f}, AUC={auc_score:.4f}")
 
         # 저장
-        joblib.dump({
+        save_artifact({
             'pipeline': pipeline,
             'embedding_model_name': settings.embedding_model,
             'metrics': metrics,
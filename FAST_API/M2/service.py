@@ -8,20 +8,22 @@ m2.py의 핵심 로직을 서비스 클래스로 정리
 - Last.fm 태그 활용
 """
 import os
+import importlib.util
 import logging
 import numpy as np
 import pandas as pd
-import joblib
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 
 # sentence_transformers는 optional (없으면 TF-IDF fallback)
-try:
-    from sentence_transformers import SentenceTransformer
-    HAS_SENTENCE_TRANSFORMERS = True
-except ImportError:
-    HAS_SENTENCE_TRANSFORMERS = False
-    SentenceTransformer = None
+# import 자체가 무거워서(torch) 설치 여부만 확인하고 실제 로드는 공유 임베딩 서비스가 담당
+HAS_SENTENCE_TRANSFORMERS = importlib.util.find_spec("sentence_transformers") is not None
+
+from embedding_service import get_embedding_service
+from thread_budget import get_thread_budget
+from metrics import record_cache, stage
+from model_artifacts import load_artifact, save_artifact
+from recommendation_cache import get_recommendation_cache
 
 from sklearn.svm import SVC
 from sklearn.pipeline import Pipeline
@@ -58,7 +60,7 @@ class AudioPredictionService:
         if self.model_path and self.model_path.exists():
             try:
                 logger.info(f"오디오 예측 모델 로드: {self.model_path}")
-                data = joblib.load(self.model_path)
+                data = load_artifact(self.model_path)
                 self.models = data.get('models', {})
                 self.vectorizers = data.get('vectorizers', {})
                 self._loaded = True
@@ -158,32 +160,22 @@ class AudioPredictionService:
 
 
 class EmbeddingService:
-    """텍스트 임베딩 서비스 (Sentence-Transformers 384D - 원래 M2 설계)"""
+    """텍스트 임베딩 서비스 (Sentence-Transformers 384D - 원래 M2 설계, 공유 인스턴스 사용)"""
 
     def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
         self.model_name = model_name
-        self.model = None
         self.embedding_dim = 384  # SentenceTransformer all-MiniLM-L6-v2 = 384D
-        self._loaded = False
 
-    def load_model(self) -> bool:
-        """SentenceTransformer 모델 로드 (원래 M2 설계: 384D)"""
-        if self._loaded and self.model is not None:
-            return True
+    @property
+    def model(self):
+        return get_embedding_service().model
 
+    def load_model(self) -> bool:
+        """공유 SentenceTransformer 로드 (원래 M2 설계: 384D)"""
         if not HAS_SENTENCE_TRANSFORMERS:
             logger.error("sentence-transformers 미설치! pip install sentence-transformers 필요")
             return False
-
-        try:
-            logger.info(f"SentenceTransformer 로드: {self.model_name}")
-            self.model = SentenceTransformer(self.model_name)
-            self._loaded = True
-            logger.info(f"SentenceTransformer 로드 완료 (384D)")
-            return True
-        except Exception as e:
-            logger.error(f"SentenceTransformer 로드 실패: {e}")
-            return False
+        return get_embedding_service().load()
 
     def encode_track(self, artist: str, track_name: str, album_name: str = "", tags: str = "") -> np.ndarray:
         """단일 트랙 임베딩 (384D)"""
@@ -196,7 +188,7 @@ class EmbeddingService:
         if tags:
             text += f" {tags.replace('|', ' ')}"
 
-        return self.model.encode([text])[0]
+        return get_embedding_service().encode([text])[0]
 
     def encode_tracks(self, tracks: List[Dict]) -> np.ndarray:
         """여러 트랙 임베딩 (N x 384D)"""
@@ -212,7 +204,7 @@ class EmbeddingService:
                 text += f" {t.get('tags', '').replace('|', ' ')}"
             texts.append(text)
 
-        return self.model.encode(texts, show_progress_bar=False)
+        return get_embedding_service().encode(texts)
 
 
 class M2RecommendationService:
@@ -272,13 +264,14 @@ class M2RecommendationService:
         model = self._load_user_model(user_id)
 
         # 393D 피처 생성
-        features = self._create_features(
-            artist=artist,
-            track_name=track_name,
-            album_name=album_name,
-            tags=tags,
-            duration_ms=duration_ms
-        )
+        with stage("M2", "features"):
+            features = self._create_features(
+                artist=artist,
+                track_name=track_name,
+                album_name=album_name,
+                tags=tags,
+                duration_ms=duration_ms
+            )
 
         X = features.reshape(1, -1)
 
@@ -293,8 +286,9 @@ class M2RecommendationService:
             }
 
         try:
-            prediction = model.predict(X)[0]
-            probability = model.predict_proba(X)[0]
+            with stage("M2", "inference"):
+                prediction = model.predict(X)[0]
+                probability = model.predict_proba(X)[0]
 
             return {
                 'probability': float(probability[1]) if len(probability) > 1 else 0.5,
@@ -319,8 +313,20 @@ class M2RecommendationService:
         threshold: float = 0.5
     ) -> List[Dict]:
         """후보 트랙 중 추천 선정"""
-        results = []
+        results = self.score_candidates(user_id, candidate_tracks)
+
+        # threshold 이상만 필터링
+        filtered = [r for r in results if r['probability'] >= threshold]
+        
+        # 확률 높은 순 정렬
+        sorted_results = sorted(filtered, key=lambda x: x['probability'], reverse=True)
         
+        return sorted_results[:top_k]
+
+    def score_candidates(self, user_id: int, candidate_tracks: List[Dict]) -> List[Dict]:
+        """후보 트랙별 SVM 확률 (입력 순서, 스트리밍 추천은 청크 단위로 호출)"""
+        results = []
+
         for track in candidate_tracks:
             result = self.predict_single(
                 user_id=user_id,
@@ -335,19 +341,15 @@ class M2RecommendationService:
             result['track_name'] = track.get('track_name', '')
             result['track_id'] = track.get('track_id')
             results.append(result)
-        
-        # threshold 이상만 필터링
-        filtered = [r for r in results if r['probability'] >= threshold]
-        
-        # 확률 높은 순 정렬
-        sorted_results = sorted(filtered, key=lambda x: x['probability'], reverse=True)
-        
-        return sorted_results[:top_k]
+
+        return results
     
     def _load_user_model(self, user_id: int) -> Optional[Any]:
         """사용자 SVM 모델 로드"""
         if user_id in self.user_models:
+            record_cache("m2_user_model", True)
             return self.user_models[user_id]
+        record_cache("m2_user_model", False)
 
         model_path = self.models_dir / f"user_{user_id}_svm.pkl"
 
@@ -356,7 +358,7 @@ class M2RecommendationService:
             return None
 
         try:
-            model = joblib.load(model_path)
+            model = load_artifact(model_path)
             self.user_models[user_id] = model
             logger.info(f"사용자 {user_id} SVM 모델 로드 완료 (393D)")
             return model
@@ -463,14 +465,16 @@ class M2RecommendationService:
                 ('svm', SVC(kernel='rbf', C=10, gamma='scale', probability=True, random_state=42))
             ])
 
-            pipeline.fit(X, y)
+            with get_thread_budget().training("m2"):
+                pipeline.fit(X, y)
 
             # 모델 저장
             model_path = self.models_dir / f"user_{user_id}_svm.pkl"
-            joblib.dump(pipeline, model_path)
+            save_artifact(pipeline, model_path)
 
-            # 캐시 업데이트
+            # 캐시 업데이트 (모델 캐시 + 이 사용자의 추천 결과 캐시 무효화)
             self.user_models[user_id] = pipeline
+            get_recommendation_cache().invalidate_user(user_id)
 
             logger.info(f"[M2] 사용자 {user_id} SVM 모델 학습 완료: {model_path}")
 
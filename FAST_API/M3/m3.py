@@ -12,6 +12,7 @@ from sqlalchemy import text
 from scipy.spatial.distance import cdist
 from catboost import CatBoostRegressor, Pool
 from sklearn.model_selection import train_test_split
+from thread_budget import get_thread_budget
 
 # [주의] 이 부분은 실제 프로젝트 환경에 맞게 DB 엔진 설정을 가져와야 합니다.
 # 만약 별도의 database.py가 있다면 아래 주석을 풀고 사용하세요.
@@ -98,8 +99,9 @@ def train_user_model(user_id, playlist_title, temp_df):
     train_pool = Pool(data=train_df[features], label=train_df[target_columns], cat_features=features)
     eval_pool = Pool(data=eval_df[features], label=eval_df[target_columns], cat_features=features)
     
-    new_model = CatBoostRegressor(iterations=500, learning_rate=0.05, depth=6, loss_function='MultiRMSE', random_seed=42, verbose=False)
-    new_model.fit(train_pool, eval_set=eval_pool, early_stopping_rounds=50)
+    with get_thread_budget().training("m3") as threads:
+        new_model = CatBoostRegressor(iterations=500, learning_rate=0.05, depth=6, loss_function='MultiRMSE', random_seed=42, verbose=False, thread_count=threads)
+        new_model.fit(train_pool, eval_set=eval_pool, early_stopping_rounds=50)
     
     new_path = generate_new_model_path(user_id, playlist_title)
     os.makedirs(MODEL_DIR, exist_ok=True)
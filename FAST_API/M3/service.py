@@ -9,6 +9,7 @@ m3.py의 핵심 로직을 서비스 클래스로 정리
 """
 import os
 import glob
+import threading
 import json
 import logging
 import numpy as np
@@ -18,6 +19,11 @@ from pathlib import Path
 from typing import Dict, List, Optional, Any
 from scipy.spatial.distance import cdist
 
+from owned_tracks import get_owned_track_index, drop_duplicate_tracks
+from thread_budget import get_thread_budget
+from metrics import stage
+from recommendation_cache import get_recommendation_cache
+
 logger = logging.getLogger(__name__)
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -41,9 +47,11 @@ class M3RecommendationService:
         self.model = None
         self.df = None  # EMS 데이터셋
         self._model_loaded = False
+        # self.model / self.df 교체만 보호 (학습 / 추천은 지역 참조로 진행하므로 락 밖)
+        self._lock = threading.Lock()
     
     def _load_dataset(self) -> bool:
-        """EMS 데이터셋 로드"""
+        """EMS 데이터셋 로드 (로드 후에는 읽기 전용으로 공유)"""
         if self.df is not None:
             return True
         
@@ -52,14 +60,16 @@ class M3RecommendationService:
             return False
         
         try:
-            self.df = pd.read_csv(DATASET_PATH)
+            df = pd.read_csv(DATASET_PATH)
             for col in FEATURES:
-                self.df[col] = self.df[col].fillna('unknown').astype(str)
+                df[col] = df[col].fillna('unknown').astype(str)
             for col in TARGET_COLUMNS:
-                if col in self.df.columns:
-                    self.df[col] = self.df[col].fillna(0)
+                if col in df.columns:
+                    df[col] = df[col].fillna(0)
             
-            logger.info(f"데이터셋 로드 완료: {len(self.df)} 곡")
+            with self._lock:
+                self.df = df
+            logger.info(f"데이터셋 로드 완료: {len(df)} 곡")
             return True
         except Exception as e:
             logger.error(f"데이터셋 로드 실패: {e}")
@@ -100,19 +110,28 @@ class M3RecommendationService:
         
         return model_files[0]
     
-    def _load_model(self, model_path: str) -> bool:
-        """CatBoost 모델 로드"""
+    def _read_model(self, model_path: str):
+        """CatBoost 모델 파일 읽기 (인스턴스 상태는 바꾸지 않음, 실패 시 None)"""
         try:
             from catboost import CatBoostRegressor
             
-            self.model = CatBoostRegressor()
-            self.model.load_model(model_path)
-            self._model_loaded = True
+            model = CatBoostRegressor()
+            model.load_model(model_path)
             logger.info(f"CatBoost 모델 로드 완료: {model_path}")
-            return True
+            return model
         except Exception as e:
             logger.error(f"CatBoost 모델 로드 실패: {e}")
+            return None
+
+    def _load_model(self, model_path: str) -> bool:
+        """CatBoost 모델 로드 후 현재 모델로 교체"""
+        model = self._read_model(model_path)
+        if model is None:
             return False
+        with self._lock:
+            self.model = model
+            self._model_loaded = True
+        return True
     
     def train_user_model(
         self,
@@ -161,13 +180,13 @@ class M3RecommendationService:
 
         # 3. 데이터프레임 생성 (PMS만 사용 - M1과 동일)
         columns = ['track_id', 'track_name', 'artists', 'album_name', 'track_genre', 'duration']
-        self.df = pd.DataFrame(pms_result, columns=columns)
+        pms_df = pd.DataFrame(pms_result, columns=columns)
         print(f"[M3] 학습 데이터: PMS {len(pms_result)}곡 (M1과 동일하게 PMS만 사용)")
-        self.df['duration_ms'] = self.df['duration'] * 1000
-        self.df['popularity'] = 50
+        pms_df['duration_ms'] = pms_df['duration'] * 1000
+        pms_df['popularity'] = 50
 
         for col in FEATURES:
-            self.df[col] = self.df[col].fillna('unknown').astype(str)
+            pms_df[col] = pms_df[col].fillna('unknown').astype(str)
 
         # 5. M1 AudioFeaturePredictor로 audio features 예측
         try:
@@ -180,7 +199,7 @@ class M3RecommendationService:
                 predictor.load(str(m1_model_path))
                 print(f"[M3] M1 모델 로드 완료: {m1_model_path}")
 
-            predicted_df = predictor.predict(self.df)
+            predicted_df = predictor.predict(pms_df)
 
             feature_mapping = {
                 'danceability': 'predicted_danceability',
@@ -198,22 +217,22 @@ class M3RecommendationService:
                     if np.std(values) < 0.01:
                         noise = np.random.normal(0, 0.1, len(values))
                         values = np.clip(values + noise, 0, 1)
-                    self.df[target_col] = values
+                    pms_df[target_col] = values
                 else:
-                    self.df[target_col] = 0.5
+                    pms_df[target_col] = 0.5
 
             # key, mode 다양성 부여
-            self.df['key'] = self.df.apply(
+            pms_df['key'] = pms_df.apply(
                 lambda x: (hash(str(x['artists']) + str(x['track_genre'])) % 12), axis=1
             )
-            self.df['mode'] = self.df.apply(
+            pms_df['mode'] = pms_df.apply(
                 lambda x: (hash(str(x['artists'])) % 2), axis=1
             )
 
             # 다양성 추가
             for col in TARGET_COLUMNS:
-                if col in self.df.columns:
-                    values = self.df[col].values.astype(float)
+                if col in pms_df.columns:
+                    values = pms_df[col].values.astype(float)
                     noise = np.random.normal(0, 0.15, len(values))
                     if col == 'key':
                         values = (values + np.random.randint(0, 3, len(values))) % 12
@@ -221,19 +240,19 @@ class M3RecommendationService:
                         values = values + np.random.normal(0, 2, len(values))
                     elif col != 'mode':
                         values = np.clip(values + noise, 0, 1)
-                    self.df[col] = values
+                    pms_df[col] = values
 
-            print(f"[M3] M1 audio features 예측 완료: {len(self.df)}곡")
+            print(f"[M3] M1 audio features 예측 완료: {len(pms_df)}곡")
 
         except Exception as e:
             logger.error(f"M1 예측 실패, 기본값 사용: {e}")
             for col in TARGET_COLUMNS:
-                if col not in self.df.columns:
-                    self.df[col] = 0.5 if col not in ['key', 'loudness', 'mode'] else 0
+                if col not in pms_df.columns:
+                    pms_df[col] = 0.5 if col not in ['key', 'loudness', 'mode'] else 0
 
         for col in TARGET_COLUMNS:
-            if col in self.df.columns:
-                self.df[col] = self.df[col].fillna(0)
+            if col in pms_df.columns:
+                pms_df[col] = pms_df[col].fillna(0)
 
         # 6. CatBoost 모델 학습
         try:
@@ -241,7 +260,7 @@ class M3RecommendationService:
             from sklearn.model_selection import train_test_split
 
             # 학습 데이터 준비
-            train_df, eval_df = train_test_split(self.df, test_size=0.3, random_state=42)
+            train_df, eval_df = train_test_split(pms_df, test_size=0.3, random_state=42)
 
             train_pool = Pool(
                 data=train_df[FEATURES],
@@ -254,23 +273,27 @@ class M3RecommendationService:
                 cat_features=FEATURES
             )
 
-            # 모델 학습
-            new_model = CatBoostRegressor(
-                iterations=500,
-                learning_rate=0.05,
-                depth=6,
-                loss_function='MultiRMSE',
-                random_seed=42,
-                verbose=False
-            )
-            new_model.fit(train_pool, eval_set=eval_pool, early_stopping_rounds=50)
+            # 모델 학습 (학습 스레드 예산 안에서 - 서빙 추론과 코어 경합 방지)
+            with get_thread_budget().training("m3") as threads:
+                new_model = CatBoostRegressor(
+                    iterations=500,
+                    learning_rate=0.05,
+                    depth=6,
+                    loss_function='MultiRMSE',
+                    random_seed=42,
+                    verbose=False,
+                    thread_count=threads
+                )
+                new_model.fit(train_pool, eval_set=eval_pool, early_stopping_rounds=50)
 
             # 모델 저장 (이메일 기반 경로)
             new_model.save_model(str(model_path))
 
-            # 현재 모델 업데이트
-            self.model = new_model
-            self._model_loaded = True
+            # 현재 모델 교체 (락은 교체에만) + 이 사용자의 추천 결과 캐시 무효화
+            with self._lock:
+                self.model = new_model
+                self._model_loaded = True
+            get_recommendation_cache().invalidate_user(user_id)
 
             logger.info(f"사용자 {user_id} 모델 학습 완료: {model_path}")
 
@@ -312,7 +335,10 @@ class M3RecommendationService:
         from sqlalchemy import text
 
         # 데이터셋 로드 (없으면 DB에서 EMS 트랙 사용)
-        if not self._load_dataset():
+        # 공유 데이터셋 / 모델은 지역 참조로만 사용 (다른 사용자의 학습 / 추천과 동시 실행)
+        if self._load_dataset():
+            df = self.df
+        else:
             logger.warning("외부 데이터셋 없음, DB EMS 트랙 + M1 Audio Predictor 사용")
 
             # track_ids가 제공되면 해당 트랙만 조회 (데모 페이지용)
@@ -351,14 +377,14 @@ class M3RecommendationService:
 
             # 데이터프레임 생성
             columns = ['track_id', 'track_name', 'artists', 'album_name', 'track_genre', 'duration']
-            self.df = pd.DataFrame(ems_result, columns=columns)
-            self.df['duration_ms'] = self.df['duration'] * 1000
-            self.df['popularity'] = 50  # M1이 필요로 하는 popularity 컬럼
+            df = pd.DataFrame(ems_result, columns=columns)
+            df['duration_ms'] = df['duration'] * 1000
+            df['popularity'] = 50  # M1이 필요로 하는 popularity 컬럼
 
             for col in FEATURES:
-                self.df[col] = self.df[col].fillna('unknown').astype(str)
+                df[col] = df[col].fillna('unknown').astype(str)
 
-            logger.info(f"DB에서 EMS 트랙 {len(self.df)}곡 로드, M1으로 audio features 예측 시작")
+            logger.info(f"DB에서 EMS 트랙 {len(df)}곡 로드, M1으로 audio features 예측 시작")
 
             # M1 AudioFeaturePredictor로 audio features 예측
             try:
@@ -374,7 +400,7 @@ class M3RecommendationService:
                     logger.warning(f"M1 모델 없음: {m1_model_path}, 기본 예측 사용")
 
                 # M1으로 audio features 예측
-                predicted_df = predictor.predict(self.df)
+                predicted_df = predictor.predict(df)
 
                 # 예측된 audio features를 TARGET_COLUMNS에 매핑
                 feature_mapping = {
@@ -395,23 +421,23 @@ class M3RecommendationService:
                             logger.info(f"{target_col} 분산 부족, 다양성 추가")
                             noise = np.random.normal(0, 0.1, len(values))
                             values = np.clip(values + noise, 0, 1)
-                        self.df[target_col] = values
+                        df[target_col] = values
                     else:
-                        self.df[target_col] = 0.5  # 기본값
+                        df[target_col] = 0.5  # 기본값
 
                 # key, mode 다양성 부여
-                self.df['key'] = self.df.apply(
+                df['key'] = df.apply(
                     lambda x: (hash(str(x['artists']) + str(x['track_genre'])) % 12), axis=1
                 )
-                self.df['mode'] = self.df.apply(
+                df['mode'] = df.apply(
                     lambda x: (hash(str(x['artists'])) % 2), axis=1
                 )
 
                 # 모든 target에 강제 다양성 추가
                 logger.info("M3 추천용: 모든 target에 다양성 추가 중...")
                 for col in TARGET_COLUMNS:
-                    if col in self.df.columns:
-                        values = self.df[col].values.astype(float)
+                    if col in df.columns:
+                        values = df[col].values.astype(float)
                         noise = np.random.normal(0, 0.15, len(values))
                         if col in ['key']:
                             values = (values + np.random.randint(0, 3, len(values))) % 12
@@ -421,20 +447,20 @@ class M3RecommendationService:
                             values = values + np.random.normal(0, 2, len(values))
                         else:
                             values = np.clip(values + noise, 0, 1)
-                        self.df[col] = values
+                        df[col] = values
 
-                logger.info(f"M1 audio features 예측 완료: {len(self.df)}곡")
+                logger.info(f"M1 audio features 예측 완료: {len(df)}곡")
 
             except Exception as e:
                 logger.error(f"M1 예측 실패, 기본값 사용: {e}")
                 # M1 실패 시 기본값 사용
                 for col in TARGET_COLUMNS:
-                    if col not in self.df.columns:
-                        self.df[col] = 0.5 if col not in ['key', 'loudness', 'mode'] else 0
+                    if col not in df.columns:
+                        df[col] = 0.5 if col not in ['key', 'loudness', 'mode'] else 0
 
             for col in TARGET_COLUMNS:
-                if col in self.df.columns:
-                    self.df[col] = self.df[col].fillna(0)
+                if col in df.columns:
+                    df[col] = df[col].fillna(0)
         
         # 모델 로드
         model_path = self._get_latest_model_path(user_id)
@@ -448,7 +474,9 @@ class M3RecommendationService:
                 "recommendations": []
             }
         
-        if not self._load_model(model_path):
+        with stage("M3", "model_load"):
+            model = self._read_model(model_path)
+        if model is None:
             return {
                 "success": False,
                 "message": "모델 로드 실패",
@@ -464,7 +492,8 @@ class M3RecommendationService:
                 JOIN playlists p ON pt.playlist_id = p.playlist_id
                 WHERE p.user_id = :uid AND p.space_type = 'PMS'
             """)
-            result = db.execute(query, {"uid": user_id}).fetchall()
+            with stage("M3", "pms_sql"):
+                result = db.execute(query, {"uid": user_id}).fetchall()
             
             if not result:
                 return {
@@ -487,8 +516,8 @@ class M3RecommendationService:
             pms_tracks['track_genre'] = pms_tracks['external_metadata'].apply(safe_get_genre)
             
             # EMS 트랙의 실제 오디오 피처 확인
-            ems_has_audio = (self.df[TARGET_COLUMNS].notna().sum(axis=1) > 3).sum()
-            logger.info(f"EMS 트랙 중 오디오 피처 보유: {ems_has_audio}/{len(self.df)}")
+            ems_has_audio = (df[TARGET_COLUMNS].notna().sum(axis=1) > 3).sum()
+            logger.info(f"EMS 트랙 중 오디오 피처 보유: {ems_has_audio}/{len(df)}")
             
             # 오디오 피처 기반 추천 (PMS 오디오 프로파일 생성)
             # PMS 오디오 피처 평균 계산 (DB에서 조회)
@@ -531,42 +560,36 @@ class M3RecommendationService:
                 # PMS 오디오 피처가 없으면 M1 Audio Predictor로 예측
                 logger.info("PMS 오디오 피처 없음, M1 Audio Predictor로 예측")
                 try:
-                    from M1.spotify_recommender import AudioFeaturePredictor
+                    from M1.profile_store import get_profile_store
 
+                    # M1 프로필 저장소 (PMS 변경분만 증분 예측, 나머지는 캐시된 통계)
                     m1_model_path = BASE_DIR.parent / "M1" / "audio_predictor.pkl"
-                    predictor = AudioFeaturePredictor(model_type='Ridge')
-
-                    if m1_model_path.exists():
-                        predictor.load(str(m1_model_path))
+                    profile_store = get_profile_store(str(m1_model_path))
+                    m1_profile = profile_store.get_profile(db, user_id) if profile_store else None
 
-                        # PMS 트랙으로 데이터프레임 생성
-                        pms_df = pms_tracks[['track_title', 'artist', 'album']].copy()
-                        pms_df.columns = ['track_name', 'artists', 'album_name']
-                        pms_df['duration_ms'] = 200000
-                        pms_df['popularity'] = 50
-                        pms_df['track_genre'] = pms_tracks['track_genre']
+                    if m1_profile is not None:
+                        def predicted_mean(feature: str, default: float) -> float:
+                            stats = m1_profile.feature_stats.get(f'predicted_{feature}')
+                            return stats['mean'] if stats else default
 
-                        # M1로 예측
-                        predicted_pms = predictor.predict(pms_df)
-
-                        # 평균 벡터 계산
+                        # 평균 벡터
                         user_taste_vector = np.array([
-                            predicted_pms['predicted_danceability'].mean() if 'predicted_danceability' in predicted_pms else 0.5,
-                            predicted_pms['predicted_energy'].mean() if 'predicted_energy' in predicted_pms else 0.5,
+                            predicted_mean('danceability', 0.5),
+                            predicted_mean('energy', 0.5),
                             hash(str(pms_tracks['artist'].iloc[0])) % 12,  # key
-                            predicted_pms['predicted_loudness'].mean() if 'predicted_loudness' in predicted_pms else -6.0,
+                            predicted_mean('loudness', -6.0),
                             hash(str(pms_tracks['artist'].iloc[0])) % 2,   # mode
-                            predicted_pms['predicted_speechiness'].mean() if 'predicted_speechiness' in predicted_pms else 0.1,
-                            predicted_pms['predicted_acousticness'].mean() if 'predicted_acousticness' in predicted_pms else 0.3,
-                            predicted_pms['predicted_instrumentalness'].mean() if 'predicted_instrumentalness' in predicted_pms else 0.1,
-                            predicted_pms['predicted_liveness'].mean() if 'predicted_liveness' in predicted_pms else 0.2,
+                            predicted_mean('speechiness', 0.1),
+                            predicted_mean('acousticness', 0.3),
+                            predicted_mean('instrumentalness', 0.1),
+                            predicted_mean('liveness', 0.2),
                         ])
                         logger.info(f"PMS 오디오 프로파일 (M1 예측): {user_taste_vector}")
                     else:
                         # M1 모델 없으면 CatBoost 사용
                         pms_input = pms_tracks[['artist', 'album', 'track_genre']].fillna('unknown').astype(str)
                         pms_input.columns = FEATURES
-                        pms_predictions = self.model.predict(pms_input)
+                        pms_predictions = model.predict(pms_input)
                         user_taste_vector = pms_predictions.mean(axis=0)
                         logger.info(f"PMS 오디오 프로파일 (CatBoost): {user_taste_vector}")
 
@@ -574,37 +597,33 @@ class M3RecommendationService:
                     logger.error(f"PMS M1 예측 실패, CatBoost 사용: {e}")
                     pms_input = pms_tracks[['artist', 'album', 'track_genre']].fillna('unknown').astype(str)
                     pms_input.columns = FEATURES
-                    pms_predictions = self.model.predict(pms_input)
+                    pms_predictions = model.predict(pms_input)
                     user_taste_vector = pms_predictions.mean(axis=0)
             
             # EMS 오디오 피처 행렬
-            ems_audio_matrix = self.df[TARGET_COLUMNS].values.astype(float)
-            
-            # 유클리드 거리 계산
-            distances = cdist([user_taste_vector], ems_audio_matrix, metric='euclidean')[0]
+            ems_audio_matrix = df[TARGET_COLUMNS].values.astype(float)
             
-            # PMS 아티스트 목록 (아티스트 유사도 보너스)
-            pms_artists = set(pms_tracks['artist'].str.lower().tolist())
-            
-            # 아티스트 보너스 적용 (동일 아티스트면 거리 감소)
-            for i, row in self.df.iterrows():
-                ems_artist = str(row.get('artists', '')).lower()
-                if ems_artist in pms_artists:
-                    distances[i] *= 0.5  # 동일 아티스트는 50% 거리 감소
+            with stage("M3", "scoring"):
+                # 유클리드 거리 계산
+                distances = cdist([user_taste_vector], ems_audio_matrix, metric='euclidean')[0]
+
+                # PMS 아티스트 목록 (아티스트 유사도 보너스)
+                pms_artists = set(pms_tracks['artist'].str.lower().tolist())
+
+                # 아티스트 보너스 적용 (동일 아티스트면 거리 감소)
+                for i, row in df.iterrows():
+                    ems_artist = str(row.get('artists', '')).lower()
+                    if ems_artist in pms_artists:
+                        distances[i] *= 0.5  # 동일 아티스트는 50% 거리 감소
             
             # 상위 N개 선택 (중복 제거 후 top_k 보장을 위해 여유분 조회)
             top_indices = np.argsort(distances)[:top_k * 2]
-            recommended_tracks = self.df.iloc[top_indices].copy()
+            recommended_tracks = df.iloc[top_indices].copy()
             recommended_tracks['distance'] = distances[top_indices]
 
-            # 중복 제거 (track_id 기준)
+            # 중복 제거 (track_id, 아티스트+제목 기준 - 같은 곡이 다른 track_id로 존재할 수 있음)
             before_dedup = len(recommended_tracks)
-            recommended_tracks = recommended_tracks.drop_duplicates(subset=['track_id'], keep='first')
-
-            # 아티스트+제목 기준 중복 제거 (같은 곡이 다른 track_id로 존재할 수 있음)
-            recommended_tracks['artist_title_key'] = recommended_tracks['artists'].str.lower() + '|' + recommended_tracks['track_name'].str.lower()
-            recommended_tracks = recommended_tracks.drop_duplicates(subset=['artist_title_key'], keep='first')
-            recommended_tracks = recommended_tracks.drop(columns=['artist_title_key'])
+            recommended_tracks = drop_duplicate_tracks(recommended_tracks, 'artists', 'track_name')
 
             after_dedup = len(recommended_tracks)
             if before_dedup != after_dedup:
@@ -732,6 +751,7 @@ class M3RecommendationService:
                 """), {"pid": gms_id, "tid": tid})
             
             db.commit()
+            get_owned_track_index().invalidate(user_id)
             
             return {
                 "success": True,
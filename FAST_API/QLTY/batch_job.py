@@ -0,0 +1,436 @@
+"""
+QLTY Batch Update Job — tracks 테이블 오디오 피처 일괄 보강 작업
+
+/api/qlty/batch-update가 요청 수명 동안 DB 세션을 잡고 전체 대상을
+메모리에 올리던 방식을 백그라운드 작업으로 분리한다.
+
+- keyset 페이지네이션 (track_id > 마지막 처리 ID) 으로 청크 단위 조회
+- 청크마다 새 세션으로 보강 → executemany 일괄 UPDATE → 커밋 → 세션 반환
+- 청크 커밋 후 체크포인트 저장, 재시작 시 이어서 처리
+- SSE 진행 피드는 요청이 아니라 작업 상태(이벤트 버퍼)를 구독
+
+멀티 워커 (gunicorn WEB_WORKERS>1) — 작업 상태는 워커마다 따로라서 파일로 공유:
+- 실행 락: batch_update.lock (fcntl.flock) → 같은 호스트에서 1개 워커만 실행
+- 실행 중인 워커가 상태 / 이벤트를 batch_update.state.json / batch_update.events.jsonl에 기록
+  → 다른 워커의 /status, /stream은 이 파일을 읽음
+- 다른 워커의 /cancel은 batch_update.cancel 파일 생성 → 실행 중인 워커가 청크 사이에 확인 후 중단
+- fcntl이 없는 환경(Windows 개발 서버, 단일 프로세스)에서는 프로세스 내 확인만
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .model import ALL_FEATURES
+from .pipeline import TrackInput, enrich_batch
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_PATH = Path(__file__).resolve().parent / "batch_update.checkpoint.json"
+LOCK_PATH = CHECKPOINT_PATH.with_name("batch_update.lock")
+STATE_PATH = CHECKPOINT_PATH.with_name("batch_update.state.json")
+EVENTS_PATH = CHECKPOINT_PATH.with_name("batch_update.events.jsonl")
+CANCEL_PATH = CHECKPOINT_PATH.with_name("batch_update.cancel")
+CHUNK_SIZE = 20
+EVENT_BUFFER_SIZE = 1000
+
+SELECT_CHUNK = text("""
+    SELECT track_id, title, artist, album, genre, duration, popularity, isrc
+    FROM tracks
+    WHERE danceability IS NULL AND track_id > :after
+    ORDER BY track_id
+    LIMIT :limit
+""")
+
+COUNT_REMAINING = text("""
+    SELECT COUNT(*) FROM tracks WHERE danceability IS NULL AND track_id > :after
+""")
+
+# 누락된 피처는 NULL 파라미터 → 기존 값 유지 (모든 행이 같은 SQL로 executemany 가능)
+UPDATE_FEATURES = text(
+    "UPDATE tracks SET "
+    + ", ".join(f"{col} = COALESCE(:{col}, {col})" for col in ALL_FEATURES)
+    + " WHERE track_id = :tid"
+)
+
+
+def _load_checkpoint() -> Dict:
+    if CHECKPOINT_PATH.exists():
+        try:
+            return json.loads(CHECKPOINT_PATH.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"[QLTY Job] 체크포인트 읽기 실패, 처음부터 시작: {e}")
+    return {}
+
+
+def _write_json(path: Path, data: Dict) -> None:
+    """원자적 저장 (임시 파일 → rename)"""
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def _save_checkpoint(state: Dict) -> None:
+    _write_json(CHECKPOINT_PATH, state)
+
+
+# ==================== 워커 간 공유 ====================
+
+def _open_run_lock():
+    """실행 락 획득 (다른 프로세스가 잡고 있으면 None, 반환한 파일을 닫으면 해제)"""
+    handle = open(LOCK_PATH, "a+")
+    if fcntl is None:
+        return handle
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def _running_elsewhere() -> bool:
+    """다른 프로세스(워커)가 작업을 실행 중인지"""
+    if fcntl is None or not LOCK_PATH.exists():
+        return False
+    handle = _open_run_lock()
+    if handle is None:
+        return True
+    handle.close()
+    return False
+
+
+def _read_shared_state() -> Optional[Dict]:
+    try:
+        return json.loads(STATE_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _read_shared_events(offset: int) -> tuple:
+    """offset 이후의 완성된 이벤트 줄 → ([(seq, event)], 새 offset)"""
+    try:
+        with open(EVENTS_PATH, "rb") as f:
+            if offset > os.fstat(f.fileno()).st_size:
+                offset = 0  # 새 작업이 파일을 비움
+            f.seek(offset)
+            data = f.read()
+    except OSError:
+        return [], offset
+    end = data.rfind(b"\n") + 1  # 쓰는 중인 마지막 줄은 다음에
+    events = []
+    for line in data[:end].splitlines():
+        try:
+            record = json.loads(line)
+            events.append((record["seq"], record["event"]))
+        except (ValueError, KeyError):
+            continue
+    return events, offset + end
+
+
+class BatchUpdateJob:
+    """단일 인스턴스 백그라운드 일괄 보강 작업 (실행 락으로 워커 간에도 1개)"""
+
+    def __init__(self):
+        self.status = "idle"          # idle | running | done | failed | cancelled (공유 상태는 + interrupted)
+        self.total = 0
+        self.processed = 0
+        self.updated = 0
+        self.failed = 0
+        self.source_stats: Dict[str, int] = {}
+        self.last_track_id = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self._events: deque = deque(maxlen=EVENT_BUFFER_SIZE)
+        self._seq = 0
+        self._start_processed = 0
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._run_lock = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ==================== 이벤트 ====================
+
+    def _emit(self, event: Dict) -> None:
+        self._seq += 1
+        self._events.append((self._seq, event))
+        try:
+            with open(EVENTS_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"seq": self._seq, "event": event}, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning(f"[QLTY Job] 이벤트 공유 기록 실패: {e}")
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _publish_state(self) -> None:
+        """다른 워커의 /status용 상태 기록"""
+        try:
+            _write_json(STATE_PATH, {**self._local_state(), "worker_pid": os.getpid()})
+        except OSError as e:
+            logger.warning(f"[QLTY Job] 상태 공유 기록 실패: {e}")
+
+    async def events(self, after: int = 0):
+        """seq > after 인 이벤트를 순서대로 내보낸다 (작업 종료 시 끝남)"""
+        if not self.running and _running_elsewhere():
+            async for event in self._shared_events(after):
+                yield event
+            return
+        while True:
+            for seq, event in list(self._events):
+                if seq > after:
+                    after = seq
+                    yield event
+            if not self.running:
+                return
+            self._wakeup = self._wakeup or asyncio.Event()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=5.0)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _shared_events(self, after: int):
+        """다른 워커가 실행 중인 작업의 이벤트 파일 구독"""
+        offset = 0
+        while True:
+            running = _running_elsewhere()  # 읽기 전에 확인 → 종료 직전 이벤트까지 읽음
+            events, offset = await asyncio.to_thread(_read_shared_events, offset)
+            for seq, event in events:
+                if seq > after:
+                    after = seq
+                    yield event
+            if not running:
+                return
+            await asyncio.sleep(1.0)
+
+    def state(self) -> Dict:
+        """
+        작업 상태
+
+        이 워커에서 실행 중이 아니면 마지막으로 실행한 워커가 기록한 상태
+        (다른 워커에서 실행 중이거나 끝난 작업 포함)
+        """
+        if not self.running:
+            shared = _read_shared_state()
+            if shared is not None:
+                if shared.get("status") == "running" and not _running_elsewhere():
+                    shared["status"] = "interrupted"  # 실행하던 워커가 종료됨 (체크포인트부터 재개 가능)
+                return shared
+        return self._local_state()
+
+    def _local_state(self) -> Dict:
+        elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0
+        run_processed = self.processed - self._start_processed
+        return {
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "updated": self.updated,
+            "failed": self.failed,
+            "last_track_id": self.last_track_id,
+            "source_stats": self.source_stats,
+            "tracks_per_sec": round(run_processed / elapsed, 2) if elapsed else 0.0,
+            "error": self.error,
+        }
+
+    # ==================== 실행 ====================
+
+    def start(self, limit: int = 0, restart: bool = False) -> bool:
+        """작업 시작 (이 워커나 다른 워커에서 이미 실행 중이면 False)"""
+        if self.running:
+            return False
+        run_lock = _open_run_lock()
+        if run_lock is None:
+            return False
+        run_lock.seek(0)
+        run_lock.truncate()
+        run_lock.write(str(os.getpid()))
+        run_lock.flush()
+        self._run_lock = run_lock
+        CANCEL_PATH.unlink(missing_ok=True)
+        EVENTS_PATH.write_text("", encoding="utf-8")
+
+        checkpoint = {} if restart else _load_checkpoint()
+        if restart and CHECKPOINT_PATH.exists():
+            CHECKPOINT_PATH.unlink()
+
+        self.last_track_id = int(checkpoint.get("last_track_id", 0))
+        self.processed = int(checkpoint.get("processed", 0))
+        self.updated = int(checkpoint.get("updated", 0))
+        self.failed = int(checkpoint.get("failed", 0))
+        self.source_stats = dict(checkpoint.get("source_stats", {}))
+        self._start_processed = self.processed
+        self.status = "running"
+        self.error = None
+        self.started_at = time.time()
+        self.finished_at = None
+        self._events.clear()
+        self._publish_state()
+        self._task = asyncio.create_task(self._run(limit))
+        return True
+
+    def cancel(self) -> bool:
+        if self.running:
+            self._task.cancel()
+            return True
+        if _running_elsewhere():
+            # 실행 중인 워커가 다음 청크 전에 확인
+            CANCEL_PATH.touch()
+            return True
+        return False
+
+    async def _run(self, limit: int) -> None:
+        from database import SessionLocal
+
+        processed_this_run = 0
+        try:
+            db = SessionLocal()
+            try:
+                remaining = db.execute(COUNT_REMAINING, {"after": self.last_track_id}).scalar() or 0
+            finally:
+                db.close()
+            self.total = self.processed + (min(remaining, limit) if limit > 0 else remaining)
+            self._emit({"event": "start", "total": self.total, "resumed_from": self.last_track_id})
+
+            while True:
+                chunk_size = CHUNK_SIZE
+                if limit > 0:
+                    chunk_size = min(chunk_size, limit - processed_this_run)
+                    if chunk_size <= 0:
+                        break
+
+                if CANCEL_PATH.exists():
+                    raise asyncio.CancelledError  # 다른 워커의 /cancel
+                done = await self._run_chunk(chunk_size)
+                if done == 0:
+                    break
+                processed_this_run += done
+                self._publish_state()
+                await asyncio.sleep(0)  # 이벤트 루프 양보
+
+            self.status = "done"
+            if limit <= 0 and CHECKPOINT_PATH.exists():
+                # 전체 완료 → 다음 실행은 처음부터 (새로 NULL이 된 트랙 포함)
+                CHECKPOINT_PATH.unlink()
+            self._emit({
+                "event": "done", "total": self.total, "updated": self.updated,
+                "failed": self.failed, "source_stats": self.source_stats,
+            })
+        except asyncio.CancelledError:
+            self.status = "cancelled"
+            self._emit({"event": "cancelled", "processed": self.processed, "last_track_id": self.last_track_id})
+        except Exception as e:
+            logger.error(f"[QLTY Job] 작업 실패: {e}")
+            self.status = "failed"
+            self.error = str(e)
+            self._emit({"event": "failed", "error": str(e), "last_track_id": self.last_track_id})
+        finally:
+            self.finished_at = time.time()
+            self._publish_state()
+            CANCEL_PATH.unlink(missing_ok=True)
+            if self._run_lock is not None:
+                self._run_lock.close()
+                self._run_lock = None
+
+    async def _run_chunk(self, chunk_size: int) -> int:
+        """한 청크 조회 → 보강 → 일괄 UPDATE → 커밋 → 체크포인트 (처리 곡 수 반환)"""
+        from database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            rows = db.execute(SELECT_CHUNK, {"after": self.last_track_id, "limit": chunk_size}).fetchall()
+            if not rows:
+                return 0
+
+            track_inputs = [
+                TrackInput(
+                    title=row[1],
+                    artist=row[2],
+                    album=row[3] or "",
+                    genre=row[4] or "",
+                    duration_ms=(row[5] or 0) * 1000,
+                    popularity=row[6] or 0,
+                    isrc=row[7] or "",
+                )
+                for row in rows
+            ]
+
+            try:
+                results: List = await enrich_batch(track_inputs, db=db)
+            except Exception as e:
+                results = [e] * len(rows)
+
+            params = []
+            events = []
+            for offset, (row, result) in enumerate(zip(rows, results)):
+                current = self.processed + offset + 1
+                track_id, title, artist = row[0], row[1], row[2]
+                label = f"{artist} - {title}"
+
+                if isinstance(result, Exception):
+                    self.failed += 1
+                    events.append({"event": "error", "current": current, "total": self.total, "track": label, "error": str(result)})
+                elif result.features:
+                    param = {"tid": track_id}
+                    for col in ALL_FEATURES:
+                        param[col] = result.features.get(col)
+                    params.append(param)
+                    for src in result.sources.values():
+                        self.source_stats[src] = self.source_stats.get(src, 0) + 1
+                    events.append({"event": "progress", "current": current, "total": self.total, "updated": self.updated + len(params), "track": label, "sources": list(set(result.sources.values()))})
+                else:
+                    self.failed += 1
+                    events.append({"event": "skip", "current": current, "total": self.total, "track": label, "reason": "no features"})
+
+            if params:
+                db.execute(UPDATE_FEATURES, params)
+            db.commit()
+            if params:
+                # 트랙 피처가 바뀌면 추천 결과도 달라짐
+                from recommendation_cache import get_recommendation_cache
+                get_recommendation_cache().bump_catalog()
+        finally:
+            db.close()
+
+        self.updated += len(params)
+        self.processed += len(rows)
+        self.last_track_id = int(rows[-1][0])
+        _save_checkpoint({
+            "last_track_id": self.last_track_id,
+            "processed": self.processed,
+            "updated": self.updated,
+            "failed": self.failed,
+            "source_stats": self.source_stats,
+            "saved_at": time.time(),
+        })
+
+        for event in events:
+            self._emit(event)
+        return len(rows)
+
+
+# 싱글톤 인스턴스
+_job: Optional[BatchUpdateJob] = None
+
+
+def get_batch_update_job() -> BatchUpdateJob:
+    """일괄 보강 작업 싱글톤"""
+    global _job
+    if _job is None:
+        _job = BatchUpdateJob()
+    return _job
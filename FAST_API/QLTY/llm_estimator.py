@@ -13,14 +13,18 @@ Gemini + Google Search를 활용하여 웹에서 실제 오디오 피처를
 사용 모델: gemini-2.0-flash + Google Search Grounding
 Temperature: 0.1 (검색 기반이므로 더 결정적으로)
 """
+import asyncio
 import os
 import json
 import logging
+import time
 from typing import Optional, Dict
 
 from google import genai
 from google.genai import types
 
+from metrics import record_external
+
 logger = logging.getLogger(__name__)
 
 # Gemini Client 인스턴스 (모듈 수명 동안 유지)
@@ -170,6 +174,29 @@ def _parse_response(text: str) -> Optional[Dict]:
     return features
 
 
+async def _generate(client, prompt: str, config):
+    """
+    Gemini 호출 + 결과/지연시간 기록
+
+    client.aio의 비동기 HTTP 클라이언트는 처음 사용한 이벤트 루프에 묶이는데,
+    전역 Client를 uvicorn 루프와 audio_enrichment 전용 루프가 함께 쓰므로
+    동기 클라이언트를 asyncio.to_thread로 호출한다 (루프를 막지 않음).
+    """
+    started = time.perf_counter()
+    try:
+        response = await asyncio.to_thread(
+            client.models.generate_content,
+            model="gemini-2.0-flash",
+            contents=prompt,
+            config=config,
+        )
+    except Exception:
+        record_external("gemini", "error", time.perf_counter() - started)
+        raise
+    record_external("gemini", "success", time.perf_counter() - started)
+    return response
+
+
 async def estimate(
     title: str,
     artist: str,
@@ -199,21 +226,18 @@ async def estimate(
 
     client = _get_client()
     if client is None:
+        record_external("gemini", "skipped")
         return None
 
     # ========== 1차: Google Search Grounding ==========
     try:
         prompt = SEARCH_PROMPT.format(artist=artist, title=title)
 
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                tools=[types.Tool(google_search=types.GoogleSearch())],
-                max_output_tokens=500,
-                temperature=0.1,
-            ),
-        )
+        response = await _generate(client, prompt, types.GenerateContentConfig(
+            tools=[types.Tool(google_search=types.GoogleSearch())],
+            max_output_tokens=500,
+            temperature=0.1,
+        ))
 
         features = _parse_response(response.text)
 
@@ -243,14 +267,10 @@ async def estimate(
             duration_sec=duration_sec or "Unknown",
         )
 
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                max_output_tokens=300,
-                temperature=0.2,
-            ),
-        )
+        response = await _generate(client, prompt, types.GenerateContentConfig(
+            max_output_tokens=300,
+            temperature=0.2,
+        ))
 
         features = _parse_response(response.text)
 
@@ -9,7 +9,7 @@ M1 모델 파일: /app/M1/audio_predictor.pkl
 import logging
 import os
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 
 import pandas as pd
 import numpy as np
@@ -70,34 +70,69 @@ def predict(
     Returns:
         {"danceability": 0.65, "energy": 0.72, ...} 또는 None
     """
+    return _predict_rows([{
+        "title": title,
+        "artists": artist,
+        "album_name": album,
+        "track_genre": genre,
+        "duration_ms": duration_ms,
+        "popularity": popularity,
+    }])[0]
+
+
+def predict_batch(tracks: List) -> List[Optional[Dict]]:
+    """
+    여러 트랙을 하나의 DataFrame으로 묶어 M1 피처별 모델을 한 번씩만 실행한다.
+
+    Args:
+        tracks: TrackInput 리스트
+
+    Returns:
+        입력과 같은 순서의 예측 dict 리스트 (실패 시 각 항목 None)
+    """
+    return _predict_rows([
+        {
+            "title": t.title,
+            "artists": t.artist,
+            "album_name": t.album,
+            "track_genre": t.genre,
+            "duration_ms": t.duration_ms,
+            "popularity": t.popularity,
+        }
+        for t in tracks
+    ])
+
+
+def _predict_rows(rows: List[Dict]) -> List[Optional[Dict]]:
+    if not rows:
+        return []
+
     predictor = _get_predictor()
     if predictor is None:
-        return None
+        return [None] * len(rows)
 
     try:
-        df = pd.DataFrame([{
-            "title": title,
-            "artists": artist,
-            "album_name": album,
-            "track_genre": genre,
-            "duration_ms": duration_ms,
-            "popularity": popularity,
-        }])
-
-        predictions = predictor.predict(df)
-
-        result = {}
-        for feat in M1_FEATURES:
-            col = f"predicted_{feat}"
-            if col in predictions.columns:
-                val = float(predictions.iloc[0][col])
+        predictions = predictor.predict(pd.DataFrame(rows))
+
+        columns = [
+            (feat, f"predicted_{feat}") for feat in M1_FEATURES
+            if f"predicted_{feat}" in predictions.columns
+        ]
+        if not columns:
+            return [None] * len(rows)
+
+        values = predictions[[col for _, col in columns]].to_numpy(dtype=float)
+        results = []
+        for row in values:
+            result = {}
+            for (feat, _), val in zip(columns, row):
                 # 0~1 범위 피처 클리핑
                 if feat not in ("tempo", "loudness"):
                     val = max(0.0, min(1.0, val))
-                result[feat] = round(val, 3)
-
-        return result if result else None
+                result[feat] = round(float(val), 3)
+            results.append(result)
+        return results
 
     except Exception as e:
         logger.error(f"[QLTY M1] 예측 실패: {e}")
-        return None
+        return [None] * len(rows)
@@ -15,10 +15,11 @@ Audio Feature Prediction Model — 3순위
 import os
 import logging
 import numpy as np
-import joblib
 from pathlib import Path
 from typing import Optional, Dict, List, Tuple
 
+from model_artifacts import load_artifact, save_artifact
+
 logger = logging.getLogger(__name__)
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -38,6 +39,9 @@ HEAD_B_FEATURES = [
 
 ALL_FEATURES = HEAD_A_FEATURES + HEAD_B_FEATURES
 
+# 배치 예측 시 SentenceTransformer encode 배치 크기
+EMBED_BATCH_SIZE = 64
+
 # 피처별 값 범위 (예측값 클리핑용)
 FEATURE_RANGES = {
     "danceability": (0.0, 1.0),
@@ -70,22 +74,22 @@ class AudioFeatureModel:
 
     def __init__(self, model_dir: Optional[str] = None):
         self.model_dir = Path(model_dir) if model_dir else BASE_DIR
-        self.embedder = None       # SentenceTransformer 인스턴스
+        self.embedder = None       # 공유 임베딩 서비스 (embedding_service)
         self.models = {}           # {feature_name: trained_lgbm_model}
         self._loaded = False
 
     def _load_embedder(self):
-        """MiniLM-L6-v2 임베딩 모델 로드 (M2와 동일)"""
+        """MiniLM-L6-v2 임베딩 모델 연결 (M2와 같은 공유 인스턴스)"""
         if self.embedder is not None:
             return
 
-        try:
-            from sentence_transformers import SentenceTransformer
-            self.embedder = SentenceTransformer("all-MiniLM-L6-v2")
-            logger.info("[QLTY Model] SentenceTransformer 로드 완료")
-        except Exception as e:
-            logger.error(f"[QLTY Model] SentenceTransformer 로드 실패: {e}")
-            raise
+        from embedding_service import get_embedding_service
+
+        service = get_embedding_service()
+        if not service.load():
+            raise RuntimeError("[QLTY Model] SentenceTransformer 로드 실패")
+        self.embedder = service
+        logger.info("[QLTY Model] 공유 SentenceTransformer 연결 완료")
 
     def load(self) -> bool:
         """저장된 모델 파일 로드"""
@@ -95,7 +99,7 @@ class AudioFeatureModel:
             return False
 
         try:
-            data = joblib.load(model_path)
+            data = load_artifact(model_path)
             self.models = data.get("models", {})
             self._loaded = bool(self.models)
             logger.info(
@@ -109,7 +113,7 @@ class AudioFeatureModel:
     def save(self) -> str:
         """학습된 모델을 파일로 저장"""
         model_path = self.model_dir / "qlty_models.pkl"
-        joblib.dump({"models": self.models}, model_path)
+        save_artifact({"models": self.models}, model_path)
         logger.info(f"[QLTY Model] 저장 완료: {model_path}")
         return str(model_path)
 
@@ -130,19 +134,49 @@ class AudioFeatureModel:
         3. popularity를 0-1로 정규화
         4. 최종: 384D + 2D = 386D 벡터
         """
-        self._load_embedder()
+        return self._make_input_batch([
+            (title, artist, album, genre, duration_ms, popularity)
+        ])
 
-        # 텍스트 임베딩 (384D)
-        text = f"{artist} | {title} | {album} | {genre}"
-        embedding = self.embedder.encode([text])[0]  # shape: (384,)
+    def _make_input_batch(self, rows: List[Tuple]) -> np.ndarray:
+        """
+        여러 트랙의 입력 행렬 (N × 386).
 
-        # 수치 피처 (2D)
-        duration_min = duration_ms / 60000.0 if duration_ms else 0.0
-        pop_norm = popularity / 100.0 if popularity else 0.0
-        numeric = np.array([duration_min, pop_norm])
+        rows: (title, artist, album, genre, duration_ms, popularity) 튜플 목록
+        텍스트는 한 번의 encode 호출로 배치 임베딩한다.
+        """
+        self._load_embedder()
 
-        # 결합 (386D)
-        return np.concatenate([embedding, numeric]).reshape(1, -1)
+        # 텍스트 임베딩 (N × 384)
+        texts = [
+            f"{artist} | {title} | {album} | {genre}"
+            for title, artist, album, genre, _, _ in rows
+        ]
+        embeddings = self.embedder.encode(texts, batch_size=EMBED_BATCH_SIZE)
+
+        # 수치 피처 (N × 2)
+        numeric = np.array([
+            [
+                duration_ms / 60000.0 if duration_ms else 0.0,
+                popularity / 100.0 if popularity else 0.0,
+            ]
+            for _, _, _, _, duration_ms, popularity in rows
+        ])
+
+        # 결합 (N × 386)
+        return np.hstack([np.asarray(embeddings), numeric])
+
+    @staticmethod
+    def _finalize(feature_name: str, raw_pred: float):
+        """값 범위 클리핑 + 정수형 피처 반올림"""
+        lo, hi = FEATURE_RANGES.get(feature_name, (None, None))
+        if lo is not None and hi is not None:
+            raw_pred = np.clip(raw_pred, lo, hi)
+
+        # key, mode, time_signature는 정수로 반올림
+        if feature_name in ("music_key", "mode", "time_signature"):
+            return int(round(raw_pred))
+        return round(float(raw_pred), 3)
 
     def predict(
         self,
@@ -159,34 +193,47 @@ class AudioFeatureModel:
         Returns:
             {"danceability": 0.65, ...} 또는 None (모델 미로드 시)
         """
+        results = self._predict_rows([
+            (title, artist, album, genre, duration_ms, popularity)
+        ])
+        return results[0]
+
+    def predict_batch(self, tracks: List) -> List[Optional[Dict]]:
+        """
+        여러 트랙의 오디오 피처를 한 번에 예측한다.
+
+        임베딩은 배치로 한 번 계산하고, 피처별 LightGBM은
+        N × 386 행렬에 한 번씩만 호출한다.
+
+        Args:
+            tracks: TrackInput 리스트 (title, artist, album, genre, duration_ms, popularity)
+
+        Returns:
+            입력과 같은 순서의 예측 dict 리스트 (실패 시 각 항목 None)
+        """
+        return self._predict_rows([
+            (t.title, t.artist, t.album, t.genre, t.duration_ms, t.popularity)
+            for t in tracks
+        ])
+
+    def _predict_rows(self, rows: List[Tuple]) -> List[Optional[Dict]]:
+        if not rows:
+            return []
         if not self._loaded or not self.models:
             logger.warning("[QLTY Model] 모델이 로드되지 않음")
-            return None
+            return [None] * len(rows)
 
         try:
-            X = self._make_input(
-                title, artist, album, genre, duration_ms, popularity
-            )
+            X = self._make_input_batch(rows)
 
-            predictions = {}
+            predictions = [{} for _ in rows]
             for feature_name, model in self.models.items():
-                raw_pred = model.predict(X)[0]
-
-                # 값 범위 클리핑
-                lo, hi = FEATURE_RANGES.get(feature_name, (None, None))
-                if lo is not None and hi is not None:
-                    raw_pred = np.clip(raw_pred, lo, hi)
-
-                # key, mode, time_signature는 정수로 반올림
-                if feature_name in ("music_key", "mode", "time_signature"):
-                    raw_pred = int(round(raw_pred))
-                else:
-                    raw_pred = round(float(raw_pred), 3)
-
-                predictions[feature_name] = raw_pred
+                raw_preds = model.predict(X)
+                for i, raw_pred in enumerate(raw_preds):
+                    predictions[i][feature_name] = self._finalize(feature_name, raw_pred)
 
             return predictions
 
         except Exception as e:
             logger.error(f"[QLTY Model] 예측 실패: {e}")
-            return None
+            return [None] * len(rows)
@@ -18,11 +18,17 @@ Divergence-Based Routing (3순위 이후 적용):
   - div < 0.05 → 평균 (두 모델 합의)
   - default → M1 (안전)
 """
+import asyncio
 import logging
+import threading
+import time
+from collections import deque
 from typing import Optional, Dict, List
 from dataclasses import dataclass, field
 from sqlalchemy.orm import Session
 
+from metrics import stage
+
 from . import reccobeats, db_matcher, llm_estimator, m1_predictor
 from .model import AudioFeatureModel, ALL_FEATURES
 
@@ -73,10 +79,14 @@ class EnrichResult:
     features: 최종 오디오 피처 dict
     sources: 각 피처가 어디서 왔는지 기록
     attempted: 시도한 소스 목록
+    tiers: 실제로 피처를 채운 tier 목록
+    timings: tier별 소요 시간(ms, 배치 tier는 트랙당 평균)
     """
     features: Dict = field(default_factory=dict)
     sources: Dict = field(default_factory=dict)
     attempted: List[str] = field(default_factory=list)
+    tiers: List[str] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
 
     @property
     def is_complete(self) -> bool:
@@ -196,186 +206,411 @@ def _merge_features(
     return added
 
 
-async def enrich_track(
-    track: TrackInput,
-    db: Optional[Session] = None,
-    skip_api: bool = False,
-    skip_llm: bool = False,
-) -> EnrichResult:
+# ==================== 배치 스케줄러 ====================
+
+# 소스별 동시 실행 한도 (프로세스 전체, 동시에 도는 배치들이 공유)
+RECCOBEATS_CONCURRENCY = 5
+LLM_CONCURRENCY = 4
+
+# ReccoBeats 호출 시작 간격 (reccobeats.py 문서의 rate limit: 5건 / 0.5초)
+# 동시 실행 한도와 별개로, 프로세스 전체에서 RECCOBEATS_RATE_WINDOW초마다 최대 RECCOBEATS_RATE_LIMIT건 시작
+RECCOBEATS_RATE_LIMIT = 5
+RECCOBEATS_RATE_WINDOW = 0.5
+
+
+class _StartRateLimiter:
     """
-    단일 트랙의 오디오 피처를 보강한다.
+    슬라이딩 윈도우 시작 횟수 제한 (window초 안에 최대 limit건 시작)
 
-    4단계 우선순위로 시도하며, 모든 피처가 채워지면 즉시 중단.
-    각 단계에서 이미 채워진 피처는 건드리지 않는다.
+    시작 시각을 락 안에서 예약하고 그때까지 asyncio.sleep으로 기다리므로
+    여러 이벤트 루프 / 스레드의 배치가 같은 한도를 공유합니다.
+    """
 
-    Args:
-        track: TrackInput 데이터
-        db: SQLAlchemy Session (2순위 DB매칭 + 3순위 DL모델에 필요)
-        skip_api: True면 ReccoBeats API 호출 스킵 (테스트용)
-        skip_llm: True면 LLM 호출 스킵 (비용/속도 절감)
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._starts: deque = deque()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """다음 시작 시각 예약 후 대기 시간(초) 반환"""
+        with self._lock:
+            now = time.monotonic()
+            start = now
+            if len(self._starts) >= self.limit:
+                start = max(now, self._starts[-self.limit] + self.window)
+            self._starts.append(start)
+            while len(self._starts) > self.limit:
+                self._starts.popleft()
+            return start - now
+
+    async def acquire(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class _SharedLimit:
+    """
+    여러 이벤트 루프가 공유하는 동시 실행 한도
 
-    Returns:
-        EnrichResult (features, sources, attempted)
+    asyncio.Semaphore는 처음 대기한 루프에 묶이므로 uvicorn 루프와
+    audio_enrichment 전용 루프가 함께 쓸 수 없습니다.
+    카운터는 스레드 락으로 보호하고, 대기자는 자기 루프의 Future로 깨웁니다.
     """
-    result = EnrichResult()
 
-    # ========== 1순위: ReccoBeats API (ISRC 필요) ==========
-    if not skip_api and track.isrc:
-        result.attempted.append("reccobeats")
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._free = limit
+        self._waiters: deque = deque()  # (loop, future)
+        self._lock = threading.Lock()
+
+    async def __aenter__(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
         try:
-            features = await reccobeats.fetch_by_isrc(track.isrc)
-            if features:
-                added = _merge_features(result, features, "reccobeats")
-                logger.info(
-                    f"[QLTY] 1순위 ReccoBeats: +{added} 피처 "
-                    f"(ISRC={track.isrc})"
-                )
-                if result.is_complete:
-                    return result
-        except Exception as e:
-            logger.warning(f"[QLTY] ReccoBeats 실패: {e}")
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove((loop, waiter))
+                    queued = True
+                except ValueError:
+                    queued = False
+            # 이미 자리를 넘겨받은 뒤 취소됨 → 반납 (넘겨주는 중이면 _grant가 반납)
+            if not queued and waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+
+    async def __aexit__(self, *exc) -> None:
+        self._release()
+
+    def _release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                if loop.is_closed():
+                    continue
+                loop.call_soon_threadsafe(self._grant, waiter)
+                return
+            self._free += 1
+
+    def _grant(self, waiter: asyncio.Future) -> None:
+        """대기자 루프에서 실행: 취소된 대기자에게 넘긴 자리는 다음 대기자에게"""
+        if waiter.cancelled():
+            self._release()
+        else:
+            waiter.set_result(None)
+
+
+_reccobeats_rate = _StartRateLimiter(RECCOBEATS_RATE_LIMIT, RECCOBEATS_RATE_WINDOW)
+_reccobeats_limit = _SharedLimit(RECCOBEATS_CONCURRENCY)
+_llm_limit = _SharedLimit(LLM_CONCURRENCY)
+
+# LLM tier가 채울 수 있는 피처 (ReccoBeats와 같은 9개, M1/DL 전용 피처는 없음)
+LLM_FEATURES = frozenset(llm_estimator.FEATURE_RANGES)
 
-    # ========== 2순위: spotify_reference DB 매칭 ==========
-    if db is not None:
-        result.attempted.append("db_match")
+
+@dataclass
+class _TrackState:
+    """배치 스케줄러 내부의 트랙별 중간 결과"""
+    reccobeats: Optional[Dict] = None
+    db_match: Optional[Dict] = None
+    llm: Optional[Dict] = None
+    m1: Optional[Dict] = None
+    dl: Optional[Dict] = None
+    attempted: set = field(default_factory=set)
+    cancelled: set = field(default_factory=set)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    def covered(self, *tiers: str) -> int:
+        """지정한 tier들의 결과를 합쳤을 때 채워지는 피처 수"""
+        return len(self._keys(tiers))
+
+    def covers(self, features: frozenset, *tiers: str) -> bool:
+        """지정한 tier들의 결과가 features를 모두 채우는지"""
+        return features <= self._keys(tiers)
+
+    def _keys(self, tiers) -> set:
+        keys = set()
+        for tier in tiers:
+            keys.update(getattr(self, tier) or {})
+        return keys
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+async def _limited(limit: _SharedLimit, coro, rate: Optional[_StartRateLimiter] = None):
+    try:
+        async with limit:
+            if rate is not None:
+                await rate.acquire()
+            return await coro
+    finally:
+        coro.close()  # 자리를 얻기 전에 취소된 경우 (never awaited 경고 방지)
+
+
+def _match_in_db(tracks: List[TrackInput], states: List[_TrackState], db: Session) -> None:
+    """2순위 DB매칭 (동기, 스레드에서 실행 - 한 세션을 순차 사용)"""
+    for track, state in zip(tracks, states):
+        started = time.perf_counter()
+        state.attempted.add("db_match")
         try:
-            features = db_matcher.match_track(track.title, track.artist, db)
-            if features:
-                added = _merge_features(result, features, "db_match")
-                logger.info(
-                    f"[QLTY] 2순위 DB매칭: +{added} 피처 "
-                    f"('{track.artist} - {track.title}')"
-                )
-                if result.is_complete:
-                    return result
+            state.db_match = db_matcher.match_track(track.title, track.artist, db)
         except Exception as e:
             logger.warning(f"[QLTY] DB매칭 실패: {e}")
+        state.timings["db_match"] = _elapsed_ms(started)
+
+
+def _finalize(track: TrackInput, state: _TrackState) -> EnrichResult:
+    """
+    tier 결과를 원래 우선순위(ReccoBeats → DB → LLM+Routing → DL)로 병합한다.
+
+    상위 소스가 이미 채운 피처는 덮어쓰지 않고,
+    완전해지면 그 아래 tier는 반영하지 않는다.
+    """
+    result = EnrichResult(timings=dict(state.timings))
+
+    def merge(tier: str, features: Optional[Dict], source_name: str) -> None:
+        added = _merge_features(result, features, source_name) if features else 0
+        if added:
+            result.tiers.append(tier)
 
-    # ========== 3순위: Gemini + Google Search + Divergence Routing ==========
-    if not skip_llm and not result.is_complete:
+    if "reccobeats" in state.attempted:
+        result.attempted.append("reccobeats")
+        merge("reccobeats", state.reccobeats, "reccobeats")
+
+    if not result.is_complete and "db_match" in state.attempted:
+        result.attempted.append("db_match")
+        merge("db_match", state.db_match, "db_match")
+
+    if not result.is_complete and "llm_search" in state.attempted:
         result.attempted.append("llm_search")
-        try:
-            qlty_features = await llm_estimator.estimate(
-                title=track.title,
-                artist=track.artist,
-                album=track.album,
-                genre=track.genre,
-                duration_ms=track.duration_ms,
-            )
-            if qlty_features:
-                # M1 예측을 받아 Divergence-Based Routing 적용
-                m1_features = m1_predictor.predict(
-                    title=track.title,
-                    artist=track.artist,
-                    album=track.album,
-                    genre=track.genre,
-                    duration_ms=track.duration_ms,
+        if state.llm:
+            if state.m1:
+                result.attempted.append("divergence_routing")
+                routed = _apply_divergence_routing(
+                    state.llm, state.m1,
+                    genre=track.genre.lower(),
                     popularity=track.popularity,
                 )
-                if m1_features:
-                    result.attempted.append("divergence_routing")
-                    routed = _apply_divergence_routing(
-                        qlty_features, m1_features,
-                        genre=track.genre.lower(),
-                        popularity=track.popularity,
-                    )
-                    routed_count = sum(
-                        1 for f in _ROUTING_FEATURES
-                        if routed.get(f) != qlty_features.get(f)
-                    )
-                    added = _merge_features(result, routed, "divergence_routed")
-                    logger.info(
-                        f"[QLTY] 3순위 LLM+Routing: +{added} 피처 "
-                        f"({routed_count}개 M1 라우팅) "
-                        f"('{track.artist} - {track.title}')"
-                    )
-                else:
-                    # M1 모델 없음 → QLTY 단독
-                    added = _merge_features(result, qlty_features, "llm_search")
-                    logger.info(
-                        f"[QLTY] 3순위 LLM+Search: +{added} 피처 "
-                        f"(M1 없음, QLTY 단독) "
-                        f"('{track.artist} - {track.title}')"
-                    )
-                if result.is_complete:
-                    return result
-        except Exception as e:
-            logger.warning(f"[QLTY] LLM+Search 실패: {e}")
+                merge("llm_search", routed, "divergence_routed")
+            else:
+                # M1 모델 없음 → QLTY 단독
+                merge("llm_search", state.llm, "llm_search")
 
-    # ========== 4순위: DL 모델 예측 (최후 수단) ==========
-    if not result.is_complete:
-        dl_model = _get_dl_model()
-        if dl_model is not None:
-            result.attempted.append("dl_model")
-            try:
-                features = dl_model.predict(
-                    title=track.title,
-                    artist=track.artist,
-                    album=track.album,
-                    genre=track.genre,
-                    duration_ms=track.duration_ms,
-                    popularity=track.popularity,
-                )
-                if features:
-                    added = _merge_features(result, features, "dl_model")
-                    logger.info(
-                        f"[QLTY] 4순위 DL모델: +{added} 피처 "
-                        f"('{track.artist} - {track.title}')"
-                    )
-            except Exception as e:
-                logger.warning(f"[QLTY] DL모델 실패: {e}")
+    if not result.is_complete and "dl_model" in state.attempted:
+        result.attempted.append("dl_model")
+        merge("dl_model", state.dl, "dl_model")
 
-    # 최종 로그
-    logger.info(
-        f"[QLTY] 완료: '{track.artist} - {track.title}' → "
-        f"{len(result.features)}/{len(ALL_FEATURES)} 피처 "
-        f"({', '.join(result.attempted)})"
-    )
+    for tier in sorted(state.cancelled):
+        result.attempted.append(f"{tier}:cancelled")
 
     return result
 
 
+async def enrich_track(
+    track: TrackInput,
+    db: Optional[Session] = None,
+    skip_api: bool = False,
+    skip_llm: bool = False,
+    deadline: Optional[float] = None,
+) -> EnrichResult:
+    """
+    단일 트랙의 오디오 피처를 보강한다.
+
+    4단계 우선순위로 결과를 병합하며, 상위 tier로 완전해지면
+    하위 tier 작업은 취소하거나 반영하지 않는다.
+
+    Args:
+        track: TrackInput 데이터
+        db: SQLAlchemy Session (2순위 DB매칭에 필요)
+        skip_api: True면 ReccoBeats API 호출 스킵 (테스트용)
+        skip_llm: True면 LLM 호출 스킵 (비용/속도 절감)
+        deadline: 네트워크 tier 최대 대기 시간(초), None이면 무제한
+
+    Returns:
+        EnrichResult (features, sources, attempted, tiers, timings)
+    """
+    return (await enrich_batch(
+        [track], db=db, skip_api=skip_api, skip_llm=skip_llm, deadline=deadline
+    ))[0]
+
+
 async def enrich_batch(
     tracks: List[TrackInput],
     db: Optional[Session] = None,
     skip_api: bool = False,
     skip_llm: bool = False,
+    deadline: Optional[float] = None,
 ) -> List[EnrichResult]:
     """
-    여러 트랙을 순차적으로 보강한다.
-
-    배치 처리이지만 각 트랙은 순차 실행한다.
-    (ReccoBeats rate limit 보호 + DB 세션 안전성)
+    여러 트랙을 보강한다.
+
+    1. 로컬 tier(DB매칭, M1, DL 모델)를 배치 전체에 대해 먼저 실행
+       - DB매칭은 같은 세션으로 순차 실행 (세션 안전성)
+       - M1/DL은 미완성 트랙을 모아 predict_batch 한 번씩
+       - 모두 블로킹 작업이므로 asyncio.to_thread로 실행 (같은 루프의 다른 배치 네트워크 I/O를 막지 않음)
+    2. 네트워크 tier(ReccoBeats, LLM)를 트랙별로 동시에 시작
+       - 소스별 동시 호출 수 제한 (프로세스 전체 공유)
+       - ReccoBeats는 시작 간격도 제한 (RECCOBEATS_RATE_LIMIT건 / RECCOBEATS_RATE_WINDOW초, 프로세스 공유)
+       - LLM은 ReccoBeats를 기다리지 않고 추측 실행, LLM이 채울 수 있는 피처(LLM_FEATURES)를
+         ReccoBeats+DB가 모두 채우면 해당 트랙의 LLM 작업 취소
+    3. deadline(초)이 지나면 남은 네트워크 작업을 취소하고 그때까지의 결과로 마감
+    4. 원래 우선순위대로 병합 (DL은 최후 수단)
 
     Args:
         tracks: TrackInput 리스트
         db: SQLAlchemy Session
         skip_api: API 호출 스킵 여부
         skip_llm: LLM 호출 스킵 여부
+        deadline: 네트워크 tier 최대 대기 시간(초)
 
     Returns:
         EnrichResult 리스트 (입력과 같은 순서)
     """
-    results = []
+    if not tracks:
+        return []
+
+    batch_started = time.perf_counter()
+    states = [_TrackState() for _ in tracks]
+    full = len(ALL_FEATURES)
+
+    # ========== 2순위: DB매칭 (로컬, 순차) ==========
+    if db is not None:
+        with stage("QLTY", "db_match"):
+            await asyncio.to_thread(_match_in_db, tracks, states, db)
 
-    for i, track in enumerate(tracks):
+    # DB매칭만으로 완전한 트랙은 LLM/M1/DL 불필요
+    local_pending = [i for i, st in enumerate(states) if st.covered("db_match") < full]
+
+    # ========== M1 (Divergence Routing용) 배치 예측 ==========
+    if not skip_llm and local_pending:
+        started = time.perf_counter()
+        try:
+            with stage("QLTY", "m1"):
+                m1_batch = await asyncio.to_thread(
+                    m1_predictor.predict_batch, [tracks[i] for i in local_pending]
+                )
+        except Exception as e:
+            logger.warning(f"[QLTY] M1 배치 예측 실패: {e}")
+            m1_batch = [None] * len(local_pending)
+        share = _elapsed_ms(started) / len(local_pending)
+        for i, features in zip(local_pending, m1_batch):
+            states[i].m1 = features
+            states[i].timings["m1"] = round(share, 1)
+
+    # ========== 4순위: DL 모델 배치 예측 (병합은 최후 수단) ==========
+    if local_pending:
+        dl_model = _get_dl_model()
+        if dl_model is not None:
+            started = time.perf_counter()
+            try:
+                with stage("QLTY", "dl_model"):
+                    dl_batch = await asyncio.to_thread(
+                        dl_model.predict_batch, [tracks[i] for i in local_pending]
+                    )
+            except Exception as e:
+                logger.warning(f"[QLTY] DL모델 실패: {e}")
+                dl_batch = [None] * len(local_pending)
+            share = _elapsed_ms(started) / len(local_pending)
+            for i, features in zip(local_pending, dl_batch):
+                states[i].attempted.add("dl_model")
+                states[i].dl = features
+                states[i].timings["dl_model"] = round(share, 1)
+
+    # ========== 1순위 ReccoBeats + 3순위 LLM (네트워크, 동시 실행) ==========
+    def needs_llm(i: int) -> bool:
+        return not skip_llm and not states[i].covers(LLM_FEATURES, "db_match")
+
+    async def run_network(i: int) -> None:
+        track, state = tracks[i], states[i]
+        rb_task = llm_task = None
+        launched = time.perf_counter()
+
+        if not skip_api and track.isrc:
+            state.attempted.add("reccobeats")
+            rb_task = asyncio.create_task(
+                _limited(_reccobeats_limit, reccobeats.fetch_by_isrc(track.isrc), _reccobeats_rate)
+            )
+        if needs_llm(i):
+            state.attempted.add("llm_search")
+            llm_task = asyncio.create_task(_limited(_llm_limit, llm_estimator.estimate(
+                title=track.title,
+                artist=track.artist,
+                album=track.album,
+                genre=track.genre,
+                duration_ms=track.duration_ms,
+            )))
+
+        try:
+            if rb_task is not None:
+                try:
+                    state.reccobeats = await rb_task
+                except Exception as e:
+                    logger.warning(f"[QLTY] ReccoBeats 실패: {e}")
+                state.timings["reccobeats"] = _elapsed_ms(launched)
+
+                # 조기 종료: LLM이 더할 피처가 없으면 취소
+                if llm_task is not None and state.covers(LLM_FEATURES, "reccobeats", "db_match"):
+                    llm_task.cancel()
+                    state.attempted.discard("llm_search")
+                    state.cancelled.add("llm_search")
+
+            if llm_task is not None and "llm_search" in state.attempted:
+                try:
+                    state.llm = await llm_task
+                except Exception as e:
+                    logger.warning(f"[QLTY] LLM+Search 실패: {e}")
+                state.timings["llm_search"] = _elapsed_ms(launched)
+        finally:
+            for task in (rb_task, llm_task):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    network_tasks = {
+        i: asyncio.create_task(run_network(i))
+        for i in range(len(tracks))
+        if (not skip_api and tracks[i].isrc)
+        or needs_llm(i)
+    }
+    if network_tasks:
+        with stage("QLTY", "network"):
+            done, pending = await asyncio.wait(network_tasks.values(), timeout=deadline)
+            if pending:
+                logger.warning(f"[QLTY] deadline {deadline}s 초과: {len(pending)}곡 네트워크 작업 취소")
+                for i, task in network_tasks.items():
+                    if task in pending:
+                        task.cancel()
+                        states[i].cancelled.add("deadline")
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    results = [_finalize(track, state) for track, state in zip(tracks, states)]
+
+    for track, result in zip(tracks, results):
         logger.info(
-            f"[QLTY Batch] [{i+1}/{len(tracks)}] "
-            f"'{track.artist} - {track.title}'"
+            f"[QLTY] 완료: '{track.artist} - {track.title}' → "
+            f"{len(result.features)}/{len(ALL_FEATURES)} 피처 "
+            f"({', '.join(result.attempted)})"
         )
-        result = await enrich_track(
-            track, db=db, skip_api=skip_api, skip_llm=skip_llm
-        )
-        results.append(result)
 
     # 배치 요약
-    total_features = sum(len(r.features) for r in results)
-    complete = sum(1 for r in results if r.is_complete)
-    logger.info(
-        f"[QLTY Batch] 완료: {len(tracks)}곡 처리, "
-        f"{complete}곡 완전, "
-        f"평균 {total_features/len(tracks):.1f} 피처/곡"
-    )
+    if len(tracks) > 1:
+        total_features = sum(len(r.features) for r in results)
+        complete = sum(1 for r in results if r.is_complete)
+        logger.info(
+            f"[QLTY Batch] 완료: {len(tracks)}곡 처리, "
+            f"{complete}곡 완전, "
+            f"평균 {total_features/len(tracks):.1f} 피처/곡, "
+            f"{_elapsed_ms(batch_started):.0f}ms"
+        )
 
     return results
 
@@ -10,8 +10,11 @@ Rate Limit: 과도한 요청 시 차단 가능 → batch 5건, 0.5초 간격
 import httpx
 import asyncio
 import logging
+import time
 from typing import Optional, Dict, List
 
+from metrics import record_external
+
 logger = logging.getLogger(__name__)
 
 BASE_URL = "https://api.reccobeats.com/v1/track/audio-features"
@@ -40,11 +43,14 @@ async def fetch_by_isrc(isrc: str, timeout: float = 10.0) -> Optional[Dict]:
     if not isrc or not isrc.strip():
         return None
 
+    started = time.perf_counter()
+    outcome = "error"
     try:
         async with httpx.AsyncClient(timeout=timeout) as client:
             resp = await client.get(BASE_URL, params={"isrc": isrc.strip()})
 
             if resp.status_code == 200:
+                outcome = "success"
                 data = resp.json()
                 # 응답에서 우리가 필요한 피처만 추출
                 features = {}
@@ -59,6 +65,7 @@ async def fetch_by_isrc(isrc: str, timeout: float = 10.0) -> Optional[Dict]:
 
             elif resp.status_code == 404:
                 # DB에 해당 ISRC가 없음 — 정상적인 miss
+                outcome = "not_found"
                 logger.debug(f"[ReccoBeats] ISRC={isrc} → not found (404)")
             else:
                 logger.warning(
@@ -66,9 +73,13 @@ async def fetch_by_isrc(isrc: str, timeout: float = 10.0) -> Optional[Dict]:
                 )
 
     except httpx.TimeoutException:
+        outcome = "timeout"
         logger.warning(f"[ReccoBeats] ISRC={isrc} → timeout")
     except Exception as e:
+        outcome = "error"
         logger.error(f"[ReccoBeats] ISRC={isrc} → error: {e}")
+    finally:
+        record_external("reccobeats", outcome, time.perf_counter() - started)
 
     return None
 
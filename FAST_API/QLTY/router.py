@@ -5,21 +5,21 @@ QLTY Router — FastAPI 엔드포인트
 
 엔드포인트:
 - POST /api/qlty/enrich        : 단일/배치 트랙 오디오 피처 보강
-- POST /api/qlty/batch-update  : DB tracks 테이블 일괄 업데이트
+- POST /api/qlty/batch-update  : DB tracks 테이블 일괄 업데이트 (백그라운드 작업 + SSE)
+- GET  /api/qlty/batch-update/status : 일괄 업데이트 작업 상태
 - POST /api/qlty/train         : DL 모델 학습 (spotify_reference 기반)
 - GET  /api/qlty/health        : 모듈 상태 확인
 """
 import json
 import logging
-import asyncio
 from typing import List, Optional, AsyncGenerator
 from fastapi import APIRouter, Depends, Query
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 
-from .pipeline import TrackInput, enrich_track, enrich_batch, reload_dl_model
+from .pipeline import TrackInput, enrich_batch, reload_dl_model
+from .batch_job import get_batch_update_job
 from .train import train_models
 
 logger = logging.getLogger(__name__)
@@ -46,6 +46,7 @@ class EnrichRequest(BaseModel):
     tracks: List[TrackRequest] = Field(..., description="보강할 트랙 목록")
     skip_api: bool = Field(False, description="ReccoBeats API 스킵")
     skip_llm: bool = Field(False, description="LLM 추정 스킵")
+    deadline_seconds: Optional[float] = Field(None, description="네트워크 tier 최대 대기 시간(초)")
 
 
 class TrackResult(BaseModel):
@@ -55,6 +56,8 @@ class TrackResult(BaseModel):
     features: dict = Field(default_factory=dict)
     sources: dict = Field(default_factory=dict)
     attempted: List[str] = Field(default_factory=list)
+    tiers: List[str] = Field(default_factory=list)
+    timings: dict = Field(default_factory=dict)
     feature_count: int = 0
     coverage: float = 0.0
 
@@ -127,6 +130,7 @@ async def enrich_tracks(request: EnrichRequest, db: Session = Depends(get_db)):
         db=db,
         skip_api=request.skip_api,
         skip_llm=request.skip_llm,
+        deadline=request.deadline_seconds,
     )
 
     # 응답 조립
@@ -139,6 +143,8 @@ async def enrich_tracks(request: EnrichRequest, db: Session = Depends(get_db)):
                 features=result.features,
                 sources=result.sources,
                 attempted=result.attempted,
+                tiers=result.tiers,
+                timings=result.timings,
                 feature_count=len(result.features),
                 coverage=round(result.coverage, 3),
             )
@@ -157,81 +163,43 @@ async def enrich_tracks(request: EnrichRequest, db: Session = Depends(get_db)):
 @router.post("/batch-update")
 async def batch_update_tracks(
     limit: int = Query(default=0, description="최대 처리 곡 수 (0=전체)"),
-    db: Session = Depends(get_db),
+    restart: bool = Query(default=False, description="체크포인트 무시하고 처음부터"),
 ):
     """
     DB tracks 테이블의 피처 누락 트랙을 일괄 보강 + UPDATE.
-    SSE 스트리밍으로 실시간 진행상황을 출력한다.
-    """
-    if db is None:
-        return {"success": False, "error": "DB 연결 없음"}
-
-    # 누락 트랙 조회
-    query = "SELECT track_id, title, artist, album, genre, duration, popularity, isrc FROM tracks WHERE danceability IS NULL ORDER BY track_id"
-    if limit > 0:
-        query += f" LIMIT {limit}"
-
-    rows = db.execute(text(query)).fetchall()
-    total = len(rows)
-
-    if total == 0:
-        return {"success": True, "message": "업데이트 대상 없음", "total": 0}
 
-    async def stream_progress() -> AsyncGenerator[str, None]:
-        updated = 0
-        failed = 0
-        source_stats = {}
-
-        yield f"data: {json.dumps({'event': 'start', 'total': total})}\n\n"
-
-        for i, row in enumerate(rows):
-            track_id, title, artist = row[0], row[1], row[2]
-            track_input = TrackInput(
-                title=title,
-                artist=artist,
-                album=row[3] or "",
-                genre=row[4] or "",
-                duration_ms=(row[5] or 0) * 1000,
-                popularity=row[6] or 0,
-                isrc=row[7] or "",
-            )
-
-            try:
-                result = await enrich_track(track_input, db=db)
-                features = result.features
+    백그라운드 작업(BatchUpdateJob)을 시작하고, SSE 스트리밍으로
+    작업 상태의 진행상황을 출력한다. 연결이 끊겨도 작업은 계속되며
+    중단 후 다시 호출하면 체크포인트부터 이어서 처리한다.
+    이미 실행 중이면(다른 워커 포함) 새로 시작하지 않고 진행 피드에 연결한다.
+    """
+    job = get_batch_update_job()
+    job.start(limit=limit, restart=restart)
+    return _stream_job(job)
 
-                if features:
-                    set_clauses = []
-                    params = {"tid": track_id}
-                    for col in ["danceability", "energy", "valence", "tempo", "acousticness", "instrumentalness", "liveness", "speechiness", "loudness", "music_key", "mode", "time_signature"]:
-                        if col in features:
-                            set_clauses.append(f"{col} = :{col}")
-                            params[col] = features[col]
 
-                    if set_clauses:
-                        db.execute(text(f"UPDATE tracks SET {', '.join(set_clauses)} WHERE track_id = :tid"), params)
-                        updated += 1
+@router.get("/batch-update/stream")
+async def batch_update_stream():
+    """실행 중인 일괄 보강 작업의 SSE 진행 피드"""
+    return _stream_job(get_batch_update_job())
 
-                    for src in result.sources.values():
-                        source_stats[src] = source_stats.get(src, 0) + 1
 
-                    yield f"data: {json.dumps({'event': 'progress', 'current': i+1, 'total': total, 'updated': updated, 'track': f'{artist} - {title}', 'sources': list(set(result.sources.values()))})}\n\n"
-                else:
-                    failed += 1
-                    yield f"data: {json.dumps({'event': 'skip', 'current': i+1, 'total': total, 'track': f'{artist} - {title}', 'reason': 'no features'})}\n\n"
+@router.get("/batch-update/status")
+async def batch_update_status():
+    """일괄 보강 작업 상태 (체크포인트 위치, 처리량 포함)"""
+    return get_batch_update_job().state()
 
-            except Exception as e:
-                failed += 1
-                yield f"data: {json.dumps({'event': 'error', 'current': i+1, 'total': total, 'track': f'{artist} - {title}', 'error': str(e)})}\n\n"
 
-            # 20곡마다 커밋
-            if (i + 1) % 20 == 0:
-                db.commit()
+@router.post("/batch-update/cancel")
+async def batch_update_cancel():
+    """일괄 보강 작업 중단 (마지막 커밋된 청크까지 체크포인트 유지, 다른 워커의 작업은 다음 청크 전에 중단)"""
+    return {"cancelled": get_batch_update_job().cancel()}
 
-            await asyncio.sleep(0)  # 이벤트 루프 양보
 
-        db.commit()
-        yield f"data: {json.dumps({'event': 'done', 'total': total, 'updated': updated, 'failed': failed, 'source_stats': source_stats})}\n\n"
+def _stream_job(job) -> StreamingResponse:
+    async def stream_progress() -> AsyncGenerator[str, None]:
+        async for event in job.events():
+            yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
 
     return StreamingResponse(
         stream_progress(),
@@ -11,6 +11,7 @@ import asyncio
 import json
 import logging
 import threading
+import time
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -32,11 +33,11 @@ _enrichment_status = {
 }
 
 
-async def _qlty_predict(track: dict, db=None) -> Optional[Dict]:
-    """QLTY 파이프라인으로 단일 트랙 오디오 피처 예측 (Divergence-Based Routing 포함)"""
-    from QLTY.pipeline import enrich_track, TrackInput
+def _to_track_input(track: dict):
+    """tracks 행(dict) → QLTY TrackInput"""
+    from QLTY.pipeline import TrackInput
 
-    track_input = TrackInput(
+    return TrackInput(
         title=track.get('title') or '',
         artist=track.get('artist') or '',
         album=track.get('album') or '',
@@ -44,48 +45,11 @@ async def _qlty_predict(track: dict, db=None) -> Optional[Dict]:
         duration_ms=(track.get('duration') or 0) * 1000,
         popularity=track.get('popularity') or 0,
     )
-    result = await enrich_track(track_input, db=db)
-    return result.features if result.features else None
 
 
-def save_audio_features_to_db(db, track_id: int, features: Dict[str, float], existing_metadata=None):
-    """
-    오디오 특성을 DB에 저장
-    - 개별 컬럼 (danceability, energy 등) 업데이트
-    - external_metadata JSON에 audio_features 키로 병합
-    """
-    metadata = {}
-    if existing_metadata:
-        try:
-            metadata = json.loads(existing_metadata) if isinstance(existing_metadata, str) else existing_metadata
-            if not isinstance(metadata, dict):
-                metadata = {}
-        except (json.JSONDecodeError, TypeError):
-            metadata = {}
-
-    metadata['audio_features'] = features
-    metadata['audio_features_source'] = 'qlty_pipeline'
-    metadata['audio_features_updated_at'] = datetime.now().isoformat()
-
-    update_query = text("""
-        UPDATE tracks SET
-            danceability = :danceability,
-            energy = :energy,
-            speechiness = :speechiness,
-            acousticness = :acousticness,
-            instrumentalness = :instrumentalness,
-            liveness = :liveness,
-            valence = :valence,
-            tempo = :tempo,
-            loudness = :loudness,
-            music_key = :music_key,
-            mode = :mode,
-            time_signature = :time_signature,
-            external_metadata = :metadata
-        WHERE track_id = :track_id
-    """)
-
-    db.execute(update_query, {
+def _feature_params(track_id: int, features: Dict[str, float]) -> Dict:
+    """UPDATE 파라미터 (컬럼별 반올림/기본값 + external_metadata 병합용 JSON)"""
+    return {
         "track_id": track_id,
         "danceability": round(features.get('danceability', 0), 4),
         "energy": round(features.get('energy', 0), 4),
@@ -99,8 +63,75 @@ def save_audio_features_to_db(db, track_id: int, features: Dict[str, float], exi
         "music_key": int(features.get('music_key', 0)),
         "mode": int(features.get('mode', 0)),
         "time_signature": int(features.get('time_signature', 4)),
-        "metadata": json.dumps(metadata, ensure_ascii=False)
-    })
+        "features_json": json.dumps(features, ensure_ascii=False),
+        "updated_at": datetime.now().isoformat(),
+    }
+
+
+# external_metadata는 DB에서 JSON_SET으로 병합 (객체가 아니면 {}에서 시작)
+UPDATE_AUDIO_FEATURES = text("""
+    UPDATE tracks SET
+        danceability = :danceability,
+        energy = :energy,
+        speechiness = :speechiness,
+        acousticness = :acousticness,
+        instrumentalness = :instrumentalness,
+        liveness = :liveness,
+        valence = :valence,
+        tempo = :tempo,
+        loudness = :loudness,
+        music_key = :music_key,
+        mode = :mode,
+        time_signature = :time_signature,
+        external_metadata = JSON_SET(
+            IF(JSON_VALID(external_metadata) AND JSON_TYPE(external_metadata) = 'OBJECT',
+               external_metadata, '{}'),
+            '$.audio_features', JSON_EXTRACT(:features_json, '$'),
+            '$.audio_features_source', 'qlty_pipeline',
+            '$.audio_features_updated_at', :updated_at
+        )
+    WHERE track_id = :track_id
+""")
+
+
+class AudioFeatureWriter:
+    """
+    오디오 특성 저장 버퍼
+
+    add()로 모아 두었다가 flush()에서 executemany 한 번으로 UPDATE 합니다.
+    커밋은 호출자가 청크 단위로 수행합니다.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._pending: List[Dict] = []
+        self.written = 0
+
+    def add(self, track_id: int, features: Dict[str, float]) -> None:
+        self._pending.append(_feature_params(track_id, features))
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> int:
+        if not self._pending:
+            return 0
+        self.db.execute(UPDATE_AUDIO_FEATURES, self._pending)
+        count = len(self._pending)
+        self._pending = []
+        self.written += count
+        return count
+
+    def discard(self) -> int:
+        """저장 실패 시 버퍼 비우기 (버린 건수 반환)"""
+        count = len(self._pending)
+        self._pending = []
+        return count
+
+
+def _flush_and_commit(writer: AudioFeatureWriter, db) -> None:
+    writer.flush()
+    db.commit()
 
 
 async def _enrich_tracks_async(track_rows: list, db, commit_interval: int = 20) -> dict:
@@ -110,48 +141,81 @@ async def _enrich_tracks_async(track_rows: list, db, commit_interval: int = 20)
     Args:
         track_rows: [{'track_id', 'title', 'artist', 'album', 'duration', ...}, ...]
         db: SQLAlchemy session
-        commit_interval: N곡마다 커밋
+        commit_interval: N곡마다 일괄 UPDATE + 커밋
     """
-    success = 0
+    from QLTY.pipeline import enrich_batch
+
+    writer = AudioFeatureWriter(db)
     failed = 0
 
-    for i, track in enumerate(track_rows):
+    # commit_interval 단위로 묶어 QLTY 배치 보강 → 일괄 UPDATE → 커밋
+    for chunk_start in range(0, len(track_rows), commit_interval):
+        chunk = track_rows[chunk_start:chunk_start + commit_interval]
         try:
-            features = await _qlty_predict(track, db=db)
-            if features:
-                save_audio_features_to_db(
-                    db, track['track_id'], features,
-                    track.get('external_metadata'),
-                )
-                success += 1
+            results = await enrich_batch([_to_track_input(t) for t in chunk], db=db)
+        except Exception as e:
+            logger.error(f"[Enrich] Batch {chunk_start}-{chunk_start + len(chunk)} failed: {e}")
+            failed += len(chunk)
+            continue
+
+        for track, result in zip(chunk, results):
+            if result.features:
+                writer.add(track['track_id'], result.features)
             else:
                 failed += 1
+
+        try:
+            # 일괄 UPDATE + 커밋은 블로킹 → 스레드에서 (공유 루프의 다른 보강 작업 네트워크 I/O 보호)
+            await asyncio.to_thread(_flush_and_commit, writer, db)
         except Exception as e:
-            logger.error(f"[Enrich] Track {track['track_id']} failed: {e}")
-            failed += 1
+            await asyncio.to_thread(db.rollback)
+            logger.error(f"[Enrich] Chunk {chunk_start}-{chunk_start + len(chunk)} 저장 실패: {e}")
+            failed += writer.discard()
+
+        _enrichment_status["processed"] = writer.written
+        logger.info(
+            f"[Enrich] Progress: {chunk_start + len(chunk)}/{len(track_rows)} "
+            f"({writer.written} success, {failed} failed)"
+        )
 
-        if (i + 1) % commit_interval == 0:
-            db.commit()
-            _enrichment_status["processed"] = success
-            logger.info(
-                f"[Enrich] Progress: {i+1}/{len(track_rows)} "
-                f"({success} success, {failed} failed)"
-            )
+    if writer.written:
+        # 트랙 피처가 바뀌면 추천 결과도 달라짐
+        from recommendation_cache import get_recommendation_cache
+        get_recommendation_cache().bump_catalog()
 
-    db.commit()
-    _enrichment_status["processed"] = success
-    return {"success": success, "failed": failed}
+    return {"success": writer.written, "failed": failed}
+
+
+# ==================== 장기 실행 이벤트 루프 ====================
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _get_enrichment_loop() -> asyncio.AbstractEventLoop:
+    """
+    sync context에서 보강 코루틴을 실행할 전용 이벤트 루프 (데몬 스레드 1개, 재사용)
+
+    여러 호출자(동시 회원가입 등)가 이 루프를 공유하므로 루프 위에서는 네트워크 대기만 하고,
+    DB매칭 / M1·DL 예측 / UPDATE·커밋은 asyncio.to_thread로 실행합니다.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="audio-enrichment-loop", daemon=True
+            ).start()
+        return _loop
 
 
 def enrich_tracks_batch(track_rows: list, db, commit_interval: int = 20) -> dict:
     """sync wrapper — 별도 스레드/sync context용 (회원가입, 백그라운드 배치)"""
-    loop = asyncio.new_event_loop()
-    try:
-        return loop.run_until_complete(
-            _enrich_tracks_async(track_rows, db, commit_interval)
-        )
-    finally:
-        loop.close()
+    future = asyncio.run_coroutine_threadsafe(
+        _enrich_tracks_async(track_rows, db, commit_interval),
+        _get_enrichment_loop(),
+    )
+    return future.result()
 
 
 def enrich_user_tracks(user_id: int, db) -> dict:
@@ -184,9 +248,18 @@ def enrich_user_tracks(user_id: int, db) -> dict:
         for r in rows
     ]
 
+    started = time.time()
     result = enrich_tracks_batch(track_rows, db)
-    logger.info(f"[Enrich] User {user_id}: {result['success']}/{len(track_rows)} PMS 트랙 enriched")
-    return {"success": True, "enriched": result["success"], "failed": result["failed"]}
+    elapsed = time.time() - started
+    tracks_per_sec = round(len(track_rows) / elapsed, 2) if elapsed > 0 else 0.0
+    logger.info(
+        f"[Enrich] User {user_id}: {result['success']}/{len(track_rows)} PMS 트랙 enriched "
+        f"({elapsed:.1f}s, {tracks_per_sec} tracks/s)"
+    )
+    return {
+        "success": True, "enriched": result["success"], "failed": result["failed"],
+        "elapsed_sec": round(elapsed, 2), "tracks_per_sec": tracks_per_sec,
+    }
 
 
 # ==================== API Endpoints ====================
@@ -0,0 +1,13 @@
+"""
+성능 벤치마크 스위트 (지연시간 / 처리량)
+
+MariaDB와 외부 API 없이 재현 가능한 환경을 만들어 컴포넌트별 마이크로 벤치마크를 돌립니다.
+
+- synthetic:    규모 조절 가능한 합성 카탈로그 / 사용자 (10k ~ 1M 트랙, 시드 고정)
+- sqlite_db:    tracks / playlists / playlist_tracks 스키마의 SQLite 대체 DB
+                (서비스 코드의 MySQL 전용 구문을 실행 시점에 SQLite 구문으로 변환)
+- mock_servers: Gemini / ReccoBeats / Last.fm 로컬 모의 서버 (지연시간 주입)
+- components:   M1 예측, M2 점수, M3 순위, Kuka KNN/text/hybrid, QLTY 배치, GMS 저장
+
+실행은 FAST_API/bench_suite.py 참고 (결과 JSON을 이전 실행과 비교해 회귀 검출)
+"""
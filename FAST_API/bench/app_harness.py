@@ -0,0 +1,254 @@
+"""
+부하 테스트용 앱 부팅 (프로세스 내 uvicorn + SQLite 대체 DB + 모의 외부 API)
+
+main.app을 수정 없이 띄우되, import 전에 연결 대상만 바꿉니다.
+
+- DB:     database.engine / SessionLocal → sqlite_db 엔진 (get_db, 지연 import 모두 적용)
+- Gemini: google.generativeai.configure → REST + 모의 서버 엔드포인트 (L2 쿼리 분석 / 설명)
+          google.genai Client (Kuka 설명, QLTY 추정) → 모의 서버 base_url
+- 기타:   ReccoBeats / Last.fm URL → 모의 서버
+- Kuka:   합성 카탈로그로 인덱스 구성 (요청의 아티스트명이 카탈로그와 맞도록)
+
+프로파일링: X-Bench-Profile 헤더가 붙은 요청만 프로파일러로 감싸 파일로 저장
+(pyinstrument 있으면 HTML + speedscope 플레임 그래프, 없으면 cProfile .prof)
+"""
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from typing import Optional
+
+from bench import sqlite_db
+from bench.mock_servers import MockServers
+from bench.synthetic import SyntheticCatalog
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PROFILE_HEADER = b"x-bench-profile"
+
+
+# ==================== 연결 대상 교체 ====================
+
+def install_database(db_path: str):
+    """database 모듈의 엔진/세션을 SQLite 대체 DB로 교체 (main import 전에 호출)"""
+    import database
+
+    engine = sqlite_db.create_engine(db_path)
+    database.engine = engine
+    database.SessionLocal = sqlite_db.session_factory(engine)
+    return database.SessionLocal
+
+
+def redirect_gemini(gemini_base_url: str) -> None:
+    """
+    google.generativeai 호출을 모의 서버로 (main import 전에 호출)
+
+    L2 모듈들이 import 시점 / 지연 초기화 시점에 genai.configure(api_key=...)를 다시 부르므로
+    configure 자체를 감싸 매번 REST 전송 + 모의 엔드포인트가 붙도록 합니다.
+    """
+    os.environ.setdefault("GOOGLE_API_KEY", "bench")
+    os.environ.setdefault("GEMINI_API_KEY", "bench")
+    try:
+        import google.generativeai as legacy_genai
+    except ImportError:
+        return
+    if getattr(legacy_genai.configure, "_bench_redirect", False):
+        return
+
+    original = legacy_genai.configure
+    endpoint = gemini_base_url.rstrip("/")
+
+    def configure(*args, **kwargs):
+        kwargs["transport"] = "rest"
+        kwargs["client_options"] = {"api_endpoint": endpoint}
+        return original(*args, **kwargs)
+
+    configure._bench_redirect = True
+    legacy_genai.configure = configure
+    legacy_genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
+
+
+def _genai_client(gemini_base_url: str):
+    from google import genai
+    from google.genai import types
+
+    return genai.Client(api_key="bench", http_options=types.HttpOptions(base_url=gemini_base_url))
+
+
+def _redirect_services(main_module, catalog: SyntheticCatalog, mocks: MockServers) -> None:
+    """import된 서비스 모듈의 외부 URL / 클라이언트 교체 + Kuka 합성 데이터"""
+    qlty_reccobeats = sys.modules.get("QLTY.reccobeats")
+    if qlty_reccobeats is not None:
+        qlty_reccobeats.BASE_URL = mocks.reccobeats_url
+    qlty_llm = sys.modules.get("QLTY.llm_estimator")
+    if qlty_llm is not None:
+        try:
+            qlty_llm._client = _genai_client(mocks.gemini_base_url)
+        except ImportError:
+            pass
+    m2_module = sys.modules.get("M2.m2")
+    if m2_module is not None:
+        m2_module.LASTFM_API_URL = mocks.lastfm_url
+
+    spotify_service = getattr(main_module, "spotify_service", None)
+    if spotify_service is not None:
+        from bench.components import prepare_kuka_service
+
+        # _loaded=True가 되므로 오케스트레이터의 load()는 바로 반환
+        prepare_kuka_service(spotify_service, catalog)
+        try:
+            spotify_service.gemini_client = _genai_client(mocks.gemini_base_url)
+        except ImportError:
+            pass
+
+
+# ==================== 프로파일링 ====================
+
+class ProfilingMiddleware:
+    """
+    X-Bench-Profile: <이름> 헤더가 있는 요청만 프로파일링 (ASGI)
+
+    요청 하나를 단독으로 재생할 때 쓰므로(동시 요청 없음) 이벤트 루프 스레드의
+    호출 스택이 곧 그 요청의 비용입니다.
+    """
+
+    def __init__(self, app, out_dir: Path):
+        self.app = app
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.saved = []
+
+    async def __call__(self, scope, receive, send):
+        name = None
+        if scope["type"] == "http":
+            name = dict(scope.get("headers") or []).get(PROFILE_HEADER)
+        if not name:
+            await self.app(scope, receive, send)
+            return
+
+        name = "".join(c if c.isalnum() or c in "._-" else "_" for c in name.decode("latin-1"))
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            Profiler = None
+
+        if Profiler is not None:
+            profiler = Profiler(async_mode="enabled")
+            profiler.start()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                profiler.stop()
+                self._save_pyinstrument(profiler, name)
+        else:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                profiler.disable()
+                path = self.out_dir / f"{name}.prof"
+                profiler.dump_stats(str(path))
+                self.saved.append(str(path))
+
+    def _save_pyinstrument(self, profiler, name: str) -> None:
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        html_path = self.out_dir / f"{name}.html"
+        html_path.write_text(profiler.output_html(), encoding="utf-8")
+        speedscope_path = self.out_dir / f"{name}.speedscope.json"
+        speedscope_path.write_text(profiler.output(SpeedscopeRenderer()), encoding="utf-8")
+        self.saved.extend([str(html_path), str(speedscope_path)])
+
+
+# ==================== 서버 ====================
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class AppServer:
+    """별도 스레드의 uvicorn 서버 (lifespan 포함, 워커 1개)"""
+
+    def __init__(self, app, port: Optional[int] = None):
+        import uvicorn
+
+        class _ThreadServer(uvicorn.Server):
+            def install_signal_handlers(self):
+                pass  # 메인 스레드가 아니므로 시그널 처리는 부하 생성기 쪽에서
+
+        self.port = port or _free_port()
+        config = uvicorn.Config(
+            app, host="127.0.0.1", port=self.port,
+            log_level="warning", access_log=False, lifespan="on",
+        )
+        self._server = _ThreadServer(config)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 60.0) -> "AppServer":
+        self._thread = threading.Thread(target=self._server.run, name="bench-uvicorn", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("uvicorn 시작 실패")
+            time.sleep(0.05)
+        return self
+
+    def wait_ready(self, timeout: float = 300.0) -> bool:
+        """/ready가 200이 될 때까지 대기 (서브시스템 백그라운드 로드 + 워밍업)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with urllib.request.urlopen(f"{self.base_url}/ready", timeout=5) as resp:
+                    if resp.status == 200:
+                        return True
+            except Exception:
+                pass
+            time.sleep(1.0)
+        return False
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+
+
+def boot_app(
+    catalog: SyntheticCatalog,
+    db_path: str,
+    mocks: MockServers,
+    profile_dir: Optional[Path] = None,
+):
+    """
+    SQLite 대체 DB + 모의 외부 API로 main.app 부팅
+
+    Returns:
+        (AppServer, ProfilingMiddleware 또는 None)
+    """
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+
+    install_database(db_path)
+    redirect_gemini(mocks.gemini_base_url)
+
+    import main as main_module
+
+    _redirect_services(main_module, catalog, mocks)
+
+    app = main_module.app
+    profiler = None
+    if profile_dir is not None:
+        profiler = ProfilingMiddleware(app, profile_dir)
+        app = profiler
+    return AppServer(app).start(), profiler
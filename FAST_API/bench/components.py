@@ -0,0 +1,385 @@
+"""
+컴포넌트별 마이크로 벤치마크
+
+각 함수는 BenchContext를 받아 {케이스 이름: 지연시간 통계}를 반환합니다.
+서비스 코드는 그대로 호출하고, 파일 경로 / DB / 외부 API만 벤치마크 환경으로 바꿉니다.
+필요한 라이브러리가 없으면 SkipBenchmark로 건너뛰고 결과 JSON에 사유를 남깁니다.
+
+- m1_predict:  AudioFeaturePredictor 배치 예측 + M1 추천 전체 경로 (프로필 → EMS 추출 → 통합 추천)
+- m2_score:    사용자 SVM(393D) 단건 예측 + 후보 N곡 점수 (MiniLM 인코딩 포함)
+- m3_rank:     CatBoost 모델 로드 + PMS 프로필 + EMS 전체 거리 계산 순위
+- kuka:        KNN / KNN+MMR / 텍스트 FAISS / 하이브리드
+- qlty_batch:  enrich_batch (DB 매칭 + M1/DL + 모의 ReccoBeats/Gemini)
+- gms_save:    GMS 플레이리스트 + 점수 저장 (M1 save_gms_playlist)
+- lastfm_tags: Last.fm 태그 조회 (캐시 미스 → 모의 서버 / 캐시 적중)
+"""
+import asyncio
+import importlib.util
+import itertools
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from bench.mock_servers import MockServers
+from bench.synthetic import SyntheticCatalog, genre_embeddings, kuka_frame, model_frame
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+TRAIN_SAMPLE = 20000  # 벤치마크용 기본 모델 학습 샘플 수 (카탈로그가 커도 학습 시간은 고정)
+
+
+class SkipBenchmark(Exception):
+    """의존성/모델이 없어 실행할 수 없는 벤치마크"""
+
+
+@dataclass
+class BenchContext:
+    catalog: SyntheticCatalog
+    workdir: Path
+    session_factory: Callable
+    mocks: MockServers
+    repeat: int = 20
+    warmup: int = 2
+    batch_sizes: Tuple[int, ...] = (1, 64, 1000)
+    shared: Dict[str, object] = field(default_factory=dict)
+
+    @contextmanager
+    def session(self):
+        db = self.session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @property
+    def user(self):
+        return self.catalog.users[0]
+
+    def measure(self, fn: Callable[[], object], items: int = 1, repeat: int = None) -> Dict[str, float]:
+        return measure(fn, repeat or self.repeat, self.warmup, items)
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 1, items: int = 1) -> Dict[str, float]:
+    """warmup회 버린 뒤 repeat회 실행 시간 통계 (ms, items_per_sec = 초당 처리 항목 수)"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    ms = np.array(samples)
+    mean = float(ms.mean())
+    return {
+        "n": repeat,
+        "items": items,
+        "mean_ms": round(mean, 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "min_ms": round(float(ms.min()), 3),
+        "max_ms": round(float(ms.max()), 3),
+        "items_per_sec": round(items * 1000 / mean, 2) if mean > 0 else None,
+    }
+
+
+def _installed(module: str) -> bool:
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ModuleNotFoundError:  # 상위 패키지 없음 (google.genai 등)
+        return False
+
+
+def _require(*modules: str) -> None:
+    missing = [m for m in modules if not _installed(m)]
+    if missing:
+        raise SkipBenchmark(f"미설치: {', '.join(missing)}")
+
+
+def _train_sample(ctx: BenchContext) -> pd.DataFrame:
+    tracks = ctx.catalog.tracks
+    if len(tracks) > TRAIN_SAMPLE:
+        tracks = tracks.sample(TRAIN_SAMPLE, random_state=ctx.catalog.seed)
+    return model_frame(tracks)
+
+
+def _ems_frame(ctx: BenchContext) -> pd.DataFrame:
+    tracks = ctx.catalog.tracks
+    return model_frame(tracks[tracks["track_id"].isin(ctx.catalog.ems_track_ids)]).reset_index(drop=True)
+
+
+def _m1_predictor(ctx: BenchContext):
+    """합성 카탈로그로 학습한 M1 기본 모델 (Ridge, 컴포넌트 간 공유)"""
+    if "m1_predictor" not in ctx.shared:
+        from M1.spotify_recommender import AudioFeaturePredictor
+
+        predictor = AudioFeaturePredictor(model_type='Ridge')
+        predictor.train(_train_sample(ctx))
+        path = ctx.workdir / "m1_audio_predictor.pkl"
+        predictor.save(str(path))
+        ctx.shared["m1_predictor"] = predictor
+        ctx.shared["m1_model_path"] = path
+    return ctx.shared["m1_predictor"]
+
+
+def _m1_service(ctx: BenchContext):
+    """M1 서비스 (모델/프로필 저장소를 작업 디렉토리로)"""
+    if "m1_service" not in ctx.shared:
+        from M1.profile_store import UserProfileStore
+        from M1.service import M1RecommendationService
+
+        predictor = _m1_predictor(ctx)
+        service = M1RecommendationService(model_path=None)
+        service.predictor = predictor
+        service.model_loaded = True
+        service.profile_store = UserProfileStore(
+            predictor, f"bench:{ctx.catalog.seed}", db_path=str(ctx.workdir / "profile_store.db")
+        )
+        ctx.shared["m1_service"] = service
+    return ctx.shared["m1_service"]
+
+
+def prepare_kuka_service(service, catalog: SyntheticCatalog):
+    """load()와 같은 전처리를 합성 카탈로그에 적용 (텍스트 임베딩은 합성 벡터)"""
+    from sklearn.preprocessing import MinMaxScaler
+    from app.services.Kuka.service import AUDIO_FEATURES
+
+    service.df = kuka_frame(catalog.tracks)
+    service.audio_features = MinMaxScaler().fit_transform(
+        service.df[AUDIO_FEATURES].values
+    ).astype(np.float32)
+    service.text_embeddings = genre_embeddings(catalog.tracks, seed=catalog.seed)
+    service._build_faiss_indices()
+    service._loaded = True
+    return service
+
+
+# ==================== 컴포넌트 ====================
+
+def bench_m1_predict(ctx: BenchContext) -> Dict[str, Dict]:
+    _require("sklearn", "sqlalchemy")
+    predictor = _m1_predictor(ctx)
+    frame = model_frame(ctx.catalog.tracks)
+
+    results = {}
+    for n in ctx.batch_sizes:
+        batch = frame.head(n)
+        results[f"predict_batch{n}"] = ctx.measure(lambda: predictor.predict(batch), items=len(batch))
+
+    service = _m1_service(ctx)
+    user_id = ctx.user.user_id
+
+    def recommend():
+        with ctx.session() as db:
+            service.get_recommendations(db, user_id, ems_limit=100)
+
+    results["recommend_ems100"] = ctx.measure(recommend, items=100)
+    return results
+
+
+def bench_m2_score(ctx: BenchContext) -> Dict[str, Dict]:
+    _require("sklearn", "sentence_transformers", "sqlalchemy")
+    from M2.service import M2RecommendationService
+
+    service = M2RecommendationService()
+    service.models_dir = ctx.workdir / "m2_user_models"
+    service.models_dir.mkdir(parents=True, exist_ok=True)
+    user_id = ctx.user.user_id
+    with ctx.session() as db:
+        trained = service.train_user_model(db, user_id)
+    if not trained.get("success"):
+        raise SkipBenchmark(f"SVM 학습 실패: {trained.get('message')}")
+
+    ems = _ems_frame(ctx)
+    candidates = [
+        {
+            "track_id": int(row.track_id),
+            "artist": row.artists,
+            "track_name": row.track_name,
+            "album_name": row.album_name,
+            "tags": row.track_genre,
+            "duration_ms": int(row.duration_ms),
+        }
+        for row in ems.head(max(ctx.batch_sizes)).itertuples()
+    ]
+    first = candidates[0]
+
+    results = {
+        "predict_single": ctx.measure(lambda: service.predict_single(
+            user_id=user_id, artist=first["artist"], track_name=first["track_name"],
+            album_name=first["album_name"], tags=first["tags"], duration_ms=first["duration_ms"],
+        )),
+    }
+    for n in ctx.batch_sizes:
+        batch = candidates[:n]
+        results[f"score_batch{n}"] = ctx.measure(
+            lambda: service.get_recommendations(user_id, batch, top_k=10, threshold=0.0),
+            items=len(batch), repeat=max(3, ctx.repeat // max(1, n // 64)),
+        )
+    return results
+
+
+def bench_m3_rank(ctx: BenchContext) -> Dict[str, Dict]:
+    _require("catboost", "scipy", "sqlalchemy")
+    from catboost import CatBoostRegressor
+    from M3.service import FEATURES, TARGET_COLUMNS, M3RecommendationService
+    from thread_budget import get_thread_budget
+
+    train = _train_sample(ctx)
+    for col in FEATURES:
+        train[col] = train[col].fillna('unknown').astype(str)
+    model_path = ctx.workdir / "m3_base.cbm"
+    with get_thread_budget().training("bench_m3") as threads:
+        model = CatBoostRegressor(
+            iterations=100, depth=6, loss_function='MultiRMSE',
+            random_seed=42, verbose=False, thread_count=threads,
+        )
+        model.fit(train[FEATURES], train[TARGET_COLUMNS], cat_features=FEATURES)
+    model.save_model(str(model_path))
+
+    service = M3RecommendationService()
+    service.df = _ems_frame(ctx)
+    for col in FEATURES:
+        service.df[col] = service.df[col].fillna('unknown').astype(str)
+    # 사용자 모델 조회는 MariaDB(database.SessionLocal)를 직접 쓰므로 기본 모델로 고정
+    service._get_latest_model_path = lambda user_id: None
+    service._get_any_model_path = lambda: str(model_path)
+    user_id = ctx.user.user_id
+
+    def rank():
+        with ctx.session() as db:
+            result = service.get_recommendations(db, user_id, top_k=50)
+        if not result.get("success"):
+            raise RuntimeError(result.get("message"))
+
+    return {
+        "model_load": ctx.measure(lambda: service._load_model(str(model_path))),
+        "recommend_top50": ctx.measure(rank, items=len(service.df)),
+    }
+
+
+def bench_kuka(ctx: BenchContext) -> Dict[str, Dict]:
+    _require("faiss", "sklearn")
+    l1_path = str(BASE_DIR / "LLM" / "L1")
+    if l1_path not in sys.path:
+        sys.path.insert(0, l1_path)
+    from app.services.Kuka.service import SpotifyRecommendService
+
+    service = prepare_kuka_service(SpotifyRecommendService(), ctx.catalog)
+
+    liked = [tid - 1 for tid in ctx.user.pms_track_ids[:20]]
+    items = len(service.df)
+    return {
+        "knn": ctx.measure(lambda: service.recommend_knn(liked, k=10), items=items),
+        "knn_mmr": ctx.measure(lambda: service.recommend_knn(liked, k=10, diversity=0.3), items=items),
+        "text": ctx.measure(lambda: service.recommend_text(liked, k=10), items=items),
+        "hybrid": ctx.measure(lambda: service.recommend_hybrid(liked, k=10, alpha=0.4), items=items),
+    }
+
+
+def bench_qlty_batch(ctx: BenchContext) -> Dict[str, Dict]:
+    _require("httpx", "google.genai", "sqlalchemy")
+    from google import genai
+    from google.genai import types
+    from QLTY import llm_estimator, reccobeats
+    from QLTY.pipeline import TrackInput, enrich_batch
+
+    reccobeats.BASE_URL = ctx.mocks.reccobeats_url
+    llm_estimator._client = genai.Client(
+        api_key="bench", http_options=types.HttpOptions(base_url=ctx.mocks.gemini_base_url)
+    )
+
+    # 뒤쪽 트랙일수록 spotify_reference에 없음 → DB 매칭 적중/미스 혼합
+    tracks = ctx.catalog.tracks
+    sample = tracks.iloc[np.linspace(0, len(tracks) - 1, max(ctx.batch_sizes)).astype(int)]
+    inputs = [
+        TrackInput(
+            title=row.title, artist=row.artist, album=row.album, genre=row.genre,
+            duration_ms=float(row.duration * 1000), popularity=float(row.popularity), isrc=row.isrc,
+        )
+        for row in sample.itertuples()
+    ]
+
+    results = {}
+    for n in ctx.batch_sizes:
+        if n > 64:
+            continue  # 대량 보강은 batch_job 경로 (외부 호출 수 제한)
+        batch = inputs[:n]
+
+        def run():
+            with ctx.session() as db:
+                asyncio.run(enrich_batch(batch, db=db))
+
+        results[f"enrich_batch{n}"] = ctx.measure(run, items=n, repeat=max(3, ctx.repeat // 4))
+    results["mock_calls"] = dict(ctx.mocks.counts)
+    return results
+
+
+def bench_gms_save(ctx: BenchContext) -> Dict[str, Dict]:
+    _require("sklearn", "sqlalchemy")
+    service = _m1_service(ctx)
+    ems = _ems_frame(ctx)
+    rng = np.random.default_rng(ctx.catalog.seed)
+    user_id = ctx.user.user_id
+
+    results = {}
+    for n in (20, 100):
+        picked = ems.sample(min(n, len(ems)), random_state=int(rng.integers(1 << 31)))
+        recommendations = pd.DataFrame({
+            "track_id": picked["track_id"].values,
+            "recommendation_score": rng.uniform(0.7, 1.0, len(picked)),
+        })
+
+        def save():
+            with ctx.session() as db:
+                service.save_gms_playlist(db, user_id, recommendations)
+
+        results[f"save_{n}"] = ctx.measure(save, items=len(recommendations))
+    return results
+
+
+def bench_lastfm_tags(ctx: BenchContext) -> Dict[str, Dict]:
+    _require("httpx", "fastapi", "pydantic_settings")
+    os.environ.setdefault("LASTFM_API_KEY", "bench")
+    os.environ["METADATA_CACHE_DIR"] = str(ctx.workdir / "metadata_cache")
+    from M2 import m2
+
+    m2.LASTFM_API_URL = ctx.mocks.lastfm_url
+    service = m2.LastFmService()
+    counter = itertools.count()
+    tracks = ctx.catalog.tracks
+
+    def cold():
+        row = tracks.iloc[next(counter) % len(tracks)]
+        asyncio.run(service.get_combined_tags(f"{row.artist} #{next(counter)}", row.title))
+
+    warm_row = tracks.iloc[0]
+
+    def warm():
+        asyncio.run(service.get_combined_tags(warm_row.artist, warm_row.title))
+
+    return {
+        "combined_cold": ctx.measure(cold),
+        "combined_warm": ctx.measure(warm),
+    }
+
+
+COMPONENTS: Dict[str, Callable[[BenchContext], Dict[str, Dict]]] = {
+    "m1_predict": bench_m1_predict,
+    "m2_score": bench_m2_score,
+    "m3_rank": bench_m3_rank,
+    "kuka": bench_kuka,
+    "qlty_batch": bench_qlty_batch,
+    "gms_save": bench_gms_save,
+    "lastfm_tags": bench_lastfm_tags,
+}
+
+
+def component_names() -> List[str]:
+    return list(COMPONENTS)
@@ -0,0 +1,164 @@
+"""
+외부 API 모의 서버 (Gemini / ReccoBeats / Last.fm)
+
+127.0.0.1의 빈 포트에 HTTP 서버 하나를 띄우고 경로 접두사로 서비스를 나눕니다.
+응답은 요청 값의 해시로 정해지므로 실행마다 같고, 서비스별 고정 지연시간을
+주입해 실제 네트워크 대기가 파이프라인 지연시간에 미치는 영향을 재현합니다.
+
+    GET  /reccobeats/v1/track/audio-features?isrc=...   (isrc 해시 기준 hit_rate만 200, 나머지 404)
+    GET  /lastfm/2.0/?method=track.getTopTags|artist.getTopTags
+    POST /gemini/v1beta/models/{model}:generateContent  (프롬프트에 오디오 피처 요청이 있으면 JSON)
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_LATENCY_MS = {"reccobeats": 40.0, "lastfm": 30.0, "gemini": 300.0}
+
+_TAGS = ["k-pop", "pop", "dance", "indie", "rock", "jazz", "chill", "acoustic", "electronic", "ballad"]
+
+
+def _unit(value: str, salt: str = "") -> float:
+    """문자열 → [0, 1) 결정적 값"""
+    digest = hashlib.md5(f"{salt}:{value}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") / 2 ** 32
+
+
+def _audio_features(key: str) -> Dict[str, float]:
+    return {
+        "danceability": round(_unit(key, "danceability"), 3),
+        "energy": round(_unit(key, "energy"), 3),
+        "valence": round(_unit(key, "valence"), 3),
+        "tempo": round(60 + 120 * _unit(key, "tempo"), 3),
+        "acousticness": round(_unit(key, "acousticness"), 3),
+        "instrumentalness": round(_unit(key, "instrumentalness") * 0.5, 3),
+        "liveness": round(_unit(key, "liveness") * 0.4, 3),
+        "speechiness": round(_unit(key, "speechiness") * 0.3, 3),
+        "loudness": round(-14 + 10 * _unit(key, "loudness"), 2),
+    }
+
+
+class MockServers:
+    """
+    Gemini / ReccoBeats / Last.fm 모의 서버
+
+    with MockServers(latency_ms={"gemini": 200}) as mocks:
+        reccobeats.BASE_URL = mocks.reccobeats_url
+    """
+
+    def __init__(self, latency_ms: Optional[Dict[str, float]] = None, reccobeats_hit_rate: float = 0.7):
+        self.latency_ms = {**DEFAULT_LATENCY_MS, **(latency_ms or {})}
+        self.reccobeats_hit_rate = reccobeats_hit_rate
+        self.counts: Dict[str, int] = {name: 0 for name in DEFAULT_LATENCY_MS}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ==================== 주소 ====================
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def reccobeats_url(self) -> str:
+        return f"{self.base_url}/reccobeats/v1/track/audio-features"
+
+    @property
+    def lastfm_url(self) -> str:
+        return f"{self.base_url}/lastfm/2.0/"
+
+    @property
+    def gemini_base_url(self) -> str:
+        return f"{self.base_url}/gemini/"
+
+    # ==================== 수명 ====================
+
+    def start(self) -> "MockServers":
+        mocks = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, payload) -> None:
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if url.path.startswith("/reccobeats/"):
+                    mocks._wait("reccobeats")
+                    isrc = query.get("isrc", "")
+                    if _unit(isrc, "hit") < mocks.reccobeats_hit_rate:
+                        self._reply(200, {"isrc": isrc, **_audio_features(isrc)})
+                    else:
+                        self._reply(404, {"error": "not found"})
+                elif url.path.startswith("/lastfm/"):
+                    mocks._wait("lastfm")
+                    key = f"{query.get('artist', '')}|{query.get('track', '')}"
+                    start = int(_unit(key, "tags") * len(_TAGS))
+                    tags = [
+                        {"name": _TAGS[(start + i) % len(_TAGS)], "count": 100 - 15 * i}
+                        for i in range(5)
+                    ]
+                    self._reply(200, {"toptags": {"tag": tags}})
+                else:
+                    self._reply(404, {"error": "unknown path"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length).decode("utf-8", errors="replace")
+                if self.path.startswith("/gemini/") and ":generateContent" in self.path:
+                    mocks._wait("gemini")
+                    if "danceability" in raw:
+                        text = json.dumps(_audio_features(raw))
+                    else:
+                        text = "사용자 평균 energy와 비슷한 곡이라 취향에 맞을 거예요."
+                    self._reply(200, {
+                        "candidates": [{
+                            "content": {"role": "model", "parts": [{"text": text}]},
+                            "finishReason": "STOP",
+                            "index": 0,
+                        }],
+                        "usageMetadata": {"promptTokenCount": len(raw) // 4, "candidatesTokenCount": len(text) // 4},
+                    })
+                else:
+                    self._reply(404, {"error": "unknown path"})
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "MockServers":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _wait(self, service: str) -> None:
+        with self._lock:
+            self.counts[service] += 1
+        delay = self.latency_ms.get(service, 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000)
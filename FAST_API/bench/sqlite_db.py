@@ -0,0 +1,269 @@
+"""
+MariaDB 대체 SQLite DB (벤치마크용)
+
+서비스 코드가 쓰는 테이블만 dbSchema.sql에서 옮겨 만들고, MySQL 전용 구문은
+커서 실행 직전에 SQLite 구문으로 바꿔서 서비스 코드를 수정 없이 그대로 실행합니다.
+
+    INSERT IGNORE               → INSERT OR IGNORE
+    ON DUPLICATE KEY UPDATE     → ON CONFLICT DO UPDATE SET  (SQLite 3.35+)
+    LAST_INSERT_ID()            → last_insert_rowid()
+    SHOW COLUMNS FROM t LIKE x  → pragma_table_xinfo 조회
+    RAND(), NOW(), CONCAT(), IF()  → 파이썬 함수 등록
+
+절대 시간은 MariaDB와 다르므로 같은 DB 백엔드끼리의 실행 간 비교(회귀 검출)에만 씁니다.
+"""
+import random
+import re
+import sqlite3
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, List, Sequence, Tuple
+
+from bench.synthetic import CURATOR_USER_ID, EMS_PLAYLIST_SIZE, SyntheticCatalog
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email VARCHAR(255) NOT NULL UNIQUE,
+    password_hash VARCHAR(255) NOT NULL DEFAULT '',
+    nickname VARCHAR(100) NOT NULL DEFAULT '',
+    user_role VARCHAR(10) NOT NULL DEFAULT 'USER',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS playlists (
+    playlist_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id BIGINT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    title VARCHAR(200) NOT NULL,
+    description TEXT,
+    space_type VARCHAR(3) NOT NULL DEFAULT 'EMS',
+    status_flag VARCHAR(3) NOT NULL DEFAULT 'PTP',
+    source_type VARCHAR(10) NOT NULL DEFAULT 'Platform',
+    external_id VARCHAR(255),
+    cover_image VARCHAR(500),
+    ai_score DECIMAL(5,2) DEFAULT 0.00,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_playlists_space_type ON playlists (space_type);
+CREATE INDEX IF NOT EXISTS idx_playlists_user_space ON playlists (user_id, space_type);
+
+CREATE TABLE IF NOT EXISTS tracks (
+    track_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title VARCHAR(255) NOT NULL,
+    artist VARCHAR(255) NOT NULL,
+    album VARCHAR(255),
+    duration INT,
+    isrc VARCHAR(50),
+    external_metadata TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    genre VARCHAR(500),
+    audio_features TEXT,
+    popularity TINYINT,
+    tempo DECIMAL(6,3),
+    music_key TINYINT,
+    mode TINYINT,
+    time_signature TINYINT,
+    danceability DECIMAL(4,3),
+    energy DECIMAL(4,3),
+    valence DECIMAL(4,3),
+    acousticness DECIMAL(4,3),
+    instrumentalness DECIMAL(4,3),
+    liveness DECIMAL(4,3),
+    speechiness DECIMAL(4,3),
+    loudness DECIMAL(5,2),
+    artist_title_key VARCHAR(511) GENERATED ALWAYS AS (LOWER(artist) || '|' || LOWER(title)) VIRTUAL
+);
+CREATE INDEX IF NOT EXISTS idx_tracks_artist ON tracks (artist);
+CREATE INDEX IF NOT EXISTS idx_tracks_genre ON tracks (genre);
+
+CREATE TABLE IF NOT EXISTS playlist_tracks (
+    map_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    playlist_id BIGINT NOT NULL REFERENCES playlists(playlist_id) ON DELETE CASCADE,
+    track_id BIGINT NOT NULL REFERENCES tracks(track_id) ON DELETE CASCADE,
+    order_index INT NOT NULL DEFAULT 0,
+    added_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_playlist_order ON playlist_tracks (playlist_id, order_index);
+
+CREATE TABLE IF NOT EXISTS track_scored_id (
+    track_id BIGINT NOT NULL,
+    user_id BIGINT NOT NULL,
+    ai_score DECIMAL(5,2) DEFAULT 0.00,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (track_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS spotify_reference (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    track_name VARCHAR(255),
+    artist_name VARCHAR(255),
+    popularity INT,
+    danceability REAL, energy REAL, valence REAL, tempo REAL,
+    acousticness REAL, instrumentalness REAL, liveness REAL,
+    speechiness REAL, loudness REAL, music_key INT, mode INT,
+    time_signature INT
+);
+CREATE INDEX IF NOT EXISTS idx_reference_title ON spotify_reference (track_name);
+"""
+
+_REWRITES: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r"\bINSERT\s+IGNORE\b", re.I), "INSERT OR IGNORE"),
+    (re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.I), "ON CONFLICT DO UPDATE SET"),
+    (re.compile(r"\bLAST_INSERT_ID\(\)", re.I), "last_insert_rowid()"),
+    (
+        re.compile(r"SHOW\s+COLUMNS\s+FROM\s+(\w+)\s+LIKE\s+'([^']*)'", re.I),
+        r"SELECT name FROM pragma_table_xinfo('\1') WHERE name LIKE '\2'",
+    ),
+]
+
+
+@lru_cache(maxsize=1024)
+def translate(statement: str) -> str:
+    """MySQL 전용 구문 → SQLite 구문"""
+    for pattern, replacement in _REWRITES:
+        statement = pattern.sub(replacement, statement)
+    return statement
+
+
+def _concat(*parts):
+    # MySQL CONCAT은 인자 중 NULL이 있으면 NULL
+    if any(p is None for p in parts):
+        return None
+    return "".join(str(p) for p in parts)
+
+
+def register_functions(conn: sqlite3.Connection) -> None:
+    """MySQL 함수 대체 (RAND, NOW, CONCAT, IF)"""
+    conn.create_function("RAND", 0, random.random)
+    conn.create_function("IF", 3, lambda cond, then, other: then if cond else other)
+    conn.create_function("NOW", 0, lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    conn.create_function("CONCAT", -1, _concat)
+
+
+# ==================== 데이터 적재 ====================
+
+def _chunks(rows: Sequence, size: int = 50000) -> Iterable[Sequence]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def populate(conn: sqlite3.Connection, catalog: SyntheticCatalog, reference_fraction: float = 0.5) -> None:
+    """
+    합성 카탈로그 적재
+
+    - tracks: 전체 카탈로그
+    - EMS: 큐레이터(user_id=1) 소유 플레이리스트에 EMS_PLAYLIST_SIZE곡씩
+    - PMS: 사용자별 플레이리스트 1개
+    - spotify_reference: 카탈로그 앞쪽 reference_fraction 비율 (QLTY DB 매칭 적중/미스가 섞이도록)
+    """
+    conn.executescript(SCHEMA)
+    tracks = catalog.tracks
+
+    conn.execute(
+        "INSERT INTO users (user_id, email, nickname) VALUES (?, ?, ?)",
+        (CURATOR_USER_ID, "curator@example.com", "curator"),
+    )
+    conn.executemany(
+        "INSERT INTO users (user_id, email, nickname) VALUES (?, ?, ?)",
+        [(u.user_id, u.email, f"bench{u.user_id}") for u in catalog.users],
+    )
+
+    track_cols = [
+        "track_id", "title", "artist", "album", "duration", "isrc", "external_metadata", "genre",
+        "popularity", "tempo", "music_key", "mode", "time_signature", "danceability", "energy",
+        "valence", "acousticness", "instrumentalness", "liveness", "speechiness", "loudness",
+    ]
+    insert_tracks = (
+        f"INSERT INTO tracks ({', '.join(track_cols)}) VALUES ({', '.join('?' * len(track_cols))})"
+    )
+    rows = list(tracks[track_cols].itertuples(index=False, name=None))
+    for chunk in _chunks(rows):
+        conn.executemany(insert_tracks, [tuple(_plain(v) for v in row) for row in chunk])
+
+    # EMS 플레이리스트
+    ems_ids = [int(t) for t in catalog.ems_track_ids]
+    mappings = []
+    for n, start in enumerate(range(0, len(ems_ids), EMS_PLAYLIST_SIZE)):
+        cur = conn.execute(
+            "INSERT INTO playlists (user_id, title, space_type, source_type) VALUES (?, ?, 'EMS', 'System')",
+            (CURATOR_USER_ID, f"EMS {n + 1}"),
+        )
+        playlist_id = cur.lastrowid
+        mappings.extend(
+            (playlist_id, tid, i) for i, tid in enumerate(ems_ids[start:start + EMS_PLAYLIST_SIZE])
+        )
+
+    # PMS 플레이리스트
+    for user in catalog.users:
+        cur = conn.execute(
+            "INSERT INTO playlists (user_id, title, space_type) VALUES (?, ?, 'PMS')",
+            (user.user_id, f"{' & '.join(user.genres)} favorites"),
+        )
+        mappings.extend((cur.lastrowid, tid, i) for i, tid in enumerate(user.pms_track_ids))
+
+    for chunk in _chunks(mappings):
+        conn.executemany(
+            "INSERT INTO playlist_tracks (playlist_id, track_id, order_index) VALUES (?, ?, ?)", chunk
+        )
+
+    reference = tracks.head(int(len(tracks) * reference_fraction))
+    ref_cols = [
+        "title", "artist", "popularity", "danceability", "energy", "valence", "tempo",
+        "acousticness", "instrumentalness", "liveness", "speechiness", "loudness",
+        "music_key", "mode", "time_signature",
+    ]
+    ref_rows = list(reference[ref_cols].itertuples(index=False, name=None))
+    for chunk in _chunks(ref_rows):
+        conn.executemany(
+            "INSERT INTO spotify_reference (track_name, artist_name, popularity, danceability, energy, "
+            "valence, tempo, acousticness, instrumentalness, liveness, speechiness, loudness, "
+            "music_key, mode, time_signature) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [tuple(_plain(v) for v in row) for row in chunk],
+        )
+    conn.commit()
+
+
+def _plain(value):
+    """numpy 스칼라 → 파이썬 기본형 (sqlite3 바인딩용)"""
+    return value.item() if hasattr(value, "item") else value
+
+
+def build_database(path: str, catalog: SyntheticCatalog, reference_fraction: float = 0.5) -> None:
+    """SQLite 파일 생성 + 합성 데이터 적재"""
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        populate(conn, catalog, reference_fraction)
+    finally:
+        conn.close()
+
+
+# ==================== SQLAlchemy ====================
+
+def create_engine(path: str):
+    """서비스 코드에 넘길 SQLAlchemy 엔진 (MySQL 구문 변환 + 함수 등록)"""
+    from sqlalchemy import create_engine as sa_create_engine, event
+
+    # 부하 테스트에서 동시 쓰기(GMS 저장)가 겹치면 잠금 해제를 기다림 (기본 5초)
+    engine = sa_create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30}
+    )
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        register_functions(dbapi_conn)
+        dbapi_conn.execute("PRAGMA foreign_keys=ON")
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def _on_execute(_conn, _cursor, statement, parameters, _context, _executemany):
+        return translate(statement), parameters
+
+    return engine
+
+
+def session_factory(engine):
+    from sqlalchemy.orm import sessionmaker
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -0,0 +1,220 @@
+"""
+합성 카탈로그 / 사용자 생성기
+
+실제 데이터 없이 규모(10k ~ 1M 트랙)만 바꿔 가며 벤치마크할 수 있도록
+시드 고정 합성 데이터를 만듭니다. 모델이 학습할 신호가 있도록
+오디오 피처는 장르별 중심값 + 노이즈, 아티스트는 장르 하나에 묶고
+아티스트별 곡 수는 롱테일(파레토) 분포를 따릅니다.
+
+- tracks: tracks 테이블 컬럼 (title, artist, album, genre, duration(초), isrc,
+  external_metadata, popularity, 오디오 피처)
+- users:  사용자별 선호 장르 2개 + PMS 트랙 (선호 장르에서 추출)
+- EMS:    카탈로그 일부를 큐레이터 사용자(user_id=1)의 EMS 플레이리스트로 배치
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+GENRES = [
+    "k-pop", "pop", "dance", "edm", "house", "techno", "hip-hop", "r-n-b",
+    "rock", "alternative", "indie", "metal", "punk", "jazz", "blues", "soul",
+    "funk", "disco", "classical", "piano", "ambient", "acoustic", "folk",
+    "country", "latin", "reggae", "j-pop", "ballad", "lo-fi", "soundtrack",
+]
+
+# 0~1 범위 피처 (tempo, loudness는 별도 범위)
+UNIT_FEATURES = [
+    "danceability", "energy", "valence", "acousticness",
+    "instrumentalness", "speechiness", "liveness",
+]
+AUDIO_FEATURES = UNIT_FEATURES + ["tempo", "loudness"]
+
+_WORDS = [
+    "blue", "night", "summer", "neon", "river", "echo", "golden", "silent",
+    "paper", "moon", "city", "wild", "glass", "velvet", "storm", "honey",
+    "midnight", "ocean", "fire", "dream", "shadow", "electric", "violet",
+    "sugar", "winter", "highway", "garden", "crystal", "rain", "starlight",
+    "봄날", "밤편지", "바람", "하늘", "별빛", "노을", "첫눈", "여름밤",
+]
+
+CURATOR_USER_ID = 1
+EMS_PLAYLIST_SIZE = 500
+
+
+@dataclass
+class SyntheticUser:
+    user_id: int
+    email: str
+    genres: List[str]
+    pms_track_ids: List[int] = field(default_factory=list)
+
+
+@dataclass
+class SyntheticCatalog:
+    tracks: pd.DataFrame
+    users: List[SyntheticUser]
+    ems_track_ids: np.ndarray
+    seed: int
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "tracks": len(self.tracks),
+            "artists": int(self.tracks["artist"].nunique()),
+            "users": len(self.users),
+            "ems_tracks": int(len(self.ems_track_ids)),
+            "pms_tracks": int(sum(len(u.pms_track_ids) for u in self.users)),
+        }
+
+
+def _phrases(rng: np.random.Generator, n: int, words: int) -> pd.Series:
+    """단어 words개를 이어 붙인 제목 n개 (벡터화)"""
+    vocab = np.array(_WORDS, dtype=object)
+    result = pd.Series(vocab[rng.integers(0, len(vocab), n)])
+    for _ in range(words - 1):
+        result = result + " " + pd.Series(vocab[rng.integers(0, len(vocab), n)])
+    return result.str.title()
+
+
+def _genre_centroids(rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    centroids = {}
+    for genre in GENRES:
+        unit = rng.uniform(0.05, 0.95, len(UNIT_FEATURES))
+        tempo = rng.uniform(70, 170)
+        loudness = rng.uniform(-14, -4)
+        centroids[genre] = np.concatenate([unit, [tempo, loudness]])
+    return centroids
+
+
+def generate_catalog(
+    n_tracks: int = 10000,
+    n_users: int = 50,
+    pms_size: int = 50,
+    ems_fraction: float = 0.5,
+    seed: int = 42,
+) -> SyntheticCatalog:
+    """
+    합성 카탈로그 + 사용자 생성 (같은 인자 → 같은 결과)
+
+    Args:
+        n_tracks: 트랙 수
+        n_users: 일반 사용자 수 (user_id 2부터, 1은 EMS 큐레이터)
+        pms_size: 사용자당 PMS 트랙 수
+        ems_fraction: EMS에 배치할 트랙 비율
+        seed: 난수 시드
+    """
+    rng = np.random.default_rng(seed)
+    centroids = _genre_centroids(rng)
+
+    # 아티스트: 장르 하나에 소속, 곡 수는 롱테일
+    n_artists = max(50, n_tracks // 25)
+    artist_names = _phrases(rng, n_artists, 2) + " " + pd.Series(np.arange(n_artists)).astype(str)
+    artist_genre_idx = rng.integers(0, len(GENRES), n_artists)
+    artist_idx = (rng.pareto(1.2, n_tracks) * n_artists / 20).astype(np.int64) % n_artists
+
+    genre_idx = artist_genre_idx[artist_idx]
+    genre_names = np.array(GENRES, dtype=object)
+    genre = pd.Series(genre_names[genre_idx])
+    # 20%는 보조 장르를 쉼표로 덧붙임 (tracks.genre 형식)
+    secondary = rng.random(n_tracks) < 0.2
+    genre[secondary] = genre[secondary] + "," + genre_names[rng.integers(0, len(GENRES), int(secondary.sum()))]
+
+    album_no = rng.integers(1, 9, n_tracks)
+    artists = artist_names.values[artist_idx]
+
+    # 오디오 피처: 장르 중심값 + 노이즈
+    centroid_matrix = np.stack([centroids[g] for g in GENRES])[genre_idx]
+    noise_scale = np.array([0.12] * len(UNIT_FEATURES) + [12.0, 2.0])
+    features = centroid_matrix + rng.standard_normal((n_tracks, len(AUDIO_FEATURES))) * noise_scale
+    features[:, :len(UNIT_FEATURES)] = np.clip(features[:, :len(UNIT_FEATURES)], 0, 1)
+    features[:, -2] = np.clip(features[:, -2], 40, 250)
+    features[:, -1] = np.clip(features[:, -1], -60, 5)
+
+    popularity = np.clip(rng.normal(45, 20, n_tracks), 0, 100).astype(int)
+    track_ids = np.arange(1, n_tracks + 1)
+
+    tracks = pd.DataFrame({
+        "track_id": track_ids,
+        "title": _phrases(rng, n_tracks, 3) + " " + pd.Series(track_ids).astype(str),
+        "artist": artists,
+        "album": pd.Series(artists) + " Vol. " + pd.Series(album_no).astype(str),
+        "genre": genre,
+        "duration": np.clip(rng.normal(210, 45, n_tracks), 60, 600).astype(int),
+        "isrc": [f"KRBEN{i:07d}" for i in track_ids],
+        "popularity": popularity,
+        "music_key": rng.integers(0, 12, n_tracks),
+        "mode": rng.integers(0, 2, n_tracks),
+        "time_signature": np.where(rng.random(n_tracks) < 0.9, 4, 3),
+    })
+    for i, name in enumerate(AUDIO_FEATURES):
+        tracks[name] = np.round(features[:, i], 3)
+    tracks["external_metadata"] = [
+        json.dumps({"genre": g.split(",")[0], "popularity": int(p)})
+        for g, p in zip(tracks["genre"], popularity)
+    ]
+
+    # EMS: 카탈로그 일부 (큐레이터 소유 플레이리스트)
+    n_ems = int(n_tracks * ems_fraction)
+    ems_track_ids = np.sort(rng.choice(track_ids, n_ems, replace=False))
+
+    # 사용자: 선호 장르 2개에서 PMS 추출
+    by_genre = {g: track_ids[genre_idx == i] for i, g in enumerate(GENRES)}
+    users = []
+    for n in range(n_users):
+        user_id = CURATOR_USER_ID + 1 + n
+        liked = [GENRES[i] for i in rng.choice(len(GENRES), 2, replace=False)]
+        pool = np.concatenate([by_genre[g] for g in liked])
+        if len(pool) == 0:
+            pool = track_ids
+        picked = rng.choice(pool, min(pms_size, len(pool)), replace=False)
+        users.append(SyntheticUser(
+            user_id=user_id,
+            email=f"bench{user_id}@example.com",
+            genres=liked,
+            pms_track_ids=sorted(int(t) for t in picked),
+        ))
+
+    return SyntheticCatalog(tracks=tracks, users=users, ems_track_ids=ems_track_ids, seed=seed)
+
+
+# ==================== 모델 입력 형식 ====================
+
+def model_frame(tracks: pd.DataFrame) -> pd.DataFrame:
+    """M1 AudioFeaturePredictor / M3 데이터셋 형식 (prepare_tracks_frame과 같은 컬럼명)"""
+    df = tracks.rename(columns={
+        "title": "track_name",
+        "artist": "artists",
+        "album": "album_name",
+        "genre": "track_genre",
+        "music_key": "key",
+    })
+    df["duration_ms"] = df["duration"] * 1000
+    return df
+
+
+def kuka_frame(tracks: pd.DataFrame) -> pd.DataFrame:
+    """Kuka spotify_cleaned.parquet 형식 (genres = 리스트)"""
+    return pd.DataFrame({
+        "track_name": tracks["title"].values,
+        "artists": tracks["artist"].values,
+        "genres": tracks["genre"].str.split(",").values,
+        **{name: tracks[name].values for name in AUDIO_FEATURES},
+    })
+
+
+def genre_embeddings(tracks: pd.DataFrame, dim: int = 384, seed: int = 42) -> np.ndarray:
+    """
+    MiniLM 대신 쓰는 합성 텍스트 임베딩 (장르 중심 벡터 + 노이즈, 단위 벡터)
+
+    1M 곡을 실제로 인코딩하지 않고 FAISS 검색 비용만 재기 위한 것으로,
+    인코딩 비용은 M2 벤치마크에서 따로 측정합니다.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((len(GENRES), dim)).astype(np.float32)
+    index = {g: i for i, g in enumerate(GENRES)}
+    primary = tracks["genre"].str.split(",").str[0].map(index).fillna(0).astype(int).values
+    emb = centers[primary] + 0.8 * rng.standard_normal((len(tracks), dim)).astype(np.float32)
+    emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+    return emb
@@ -0,0 +1,503 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP 부하 테스트 (프로세스 내 앱 + SQLite 대체 DB + 모의 LLM / 외부 API)
+
+합성 카탈로그로 만든 SQLite DB와 모의 서버 위에 main.app을 uvicorn으로 띄우고(bench/app_harness.py),
+엔드포인트 혼합 비율과 사용자 id를 섞어 목표 RPS(개방 루프) 또는 동시성(폐쇄 루프)으로 요청합니다.
+
+- 엔드포인트별 p50/p95/p99, 오류율(HTTP 오류 / 예외), success=false 비율, 처리량
+- --ramp: 단계별 RPS를 올리며 포화점 탐지 (처리량 < 목표의 90%, 오류율 초과, p99 SLO 초과)
+- --profile-top N: 가장 느렸던 요청 N개를 단독 재생하며 프로파일 저장
+  (pyinstrument 있으면 HTML + speedscope 플레임 그래프, 없으면 cProfile .prof)
+- 개방 루프 지연시간은 예정 전송 시각 기준 (부하 생성기가 밀려도 대기 시간이 빠지지 않음)
+
+엔드포인트: recommend_m1/m2/m3 (POST /api/recommend), spotify (GET /api/spotify/recommend),
+spotify_explain (explain=true), llm_search (POST /api/llm/search), evaluation (POST /api/v1/evaluation/start)
+
+사용법 (FAST_API 디렉토리에서):
+    python bench_load.py --rps 10 --duration 30
+    python bench_load.py --concurrency 16 --duration 60 --mix recommend_m1=3,spotify=5,llm_search=2
+    python bench_load.py --ramp 2,5,10,20,40 --step-duration 20 --slo-p99-ms 2000 --json load.json
+    python bench_load.py --rps 5 --duration 30 --profile-top 5
+"""
+# 서빙과 같은 스레드 예산 (numpy import 전에 설정해야 적용됨)
+import thread_budget
+thread_budget.configure_env()
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from bench import sqlite_db
+from bench.app_harness import PROFILE_HEADER, boot_app
+from bench.mock_servers import DEFAULT_LATENCY_MS, MockServers
+from bench.synthetic import SyntheticCatalog, generate_catalog
+
+ENDPOINTS = (
+    "recommend_m1", "recommend_m2", "recommend_m3",
+    "spotify", "spotify_explain", "llm_search", "evaluation",
+)
+DEFAULT_MIX = "recommend_m1=3,recommend_m2=2,recommend_m3=2,spotify=4,llm_search=2,evaluation=1"
+
+SEARCH_QUERIES = [
+    "비오는 날 카페에서 들을 잔잔한 재즈",
+    "신나는 운동 음악",
+    "우울할 때 듣는 감성 발라드",
+    "새벽에 듣기 좋은 로파이",
+    "드라이브할 때 듣는 시티팝",
+    "upbeat dance pop for a party",
+    "calm acoustic songs for studying",
+    "energetic rock workout",
+]
+
+
+@dataclass
+class RequestSpec:
+    endpoint: str
+    method: str
+    path: str
+    user_id: int
+    params: Optional[Dict] = None
+    json: Optional[Dict] = None
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    status: int
+    latency_ms: float  # 예정 전송 시각 → 응답 완료
+    service_ms: float  # 실제 전송 → 응답 완료
+    error: Optional[str] = None
+    soft_fail: bool = False
+    spec: Optional[RequestSpec] = field(default=None, repr=False)
+
+
+# ==================== 요청 생성 ====================
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """"recommend_m1=3,spotify=5" → {"recommend_m1": 3.0, "spotify": 5.0}"""
+    mix = {}
+    for part in filter(None, (p.strip() for p in value.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"알 수 없는 엔드포인트: {name} ({', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    if not mix:
+        raise argparse.ArgumentTypeError("혼합 비율이 비어 있음")
+    return mix
+
+
+def parse_latency(value: str) -> Dict[str, float]:
+    latency = {}
+    for part in filter(None, (p.strip() for p in value.split(","))):
+        name, _, ms = part.partition("=")
+        if name not in DEFAULT_LATENCY_MS:
+            raise argparse.ArgumentTypeError(f"알 수 없는 서비스: {name}")
+        latency[name] = float(ms)
+    return latency
+
+
+class RequestFactory:
+    """혼합 비율에 따라 엔드포인트 / 사용자 / 파라미터를 고르는 요청 생성기 (시드 고정)"""
+
+    def __init__(self, catalog: SyntheticCatalog, db_path: str, mix: Dict[str, float], seed: int = 42):
+        self.catalog = catalog
+        self.db_path = db_path
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.rng = random.Random(seed)
+        self._artists = catalog.tracks["artist"].drop_duplicates().tolist()
+
+    def next(self) -> RequestSpec:
+        return self.build(self.rng.choices(self.names, self.weights)[0])
+
+    def build(self, endpoint: str) -> RequestSpec:
+        user = self.rng.choice(self.catalog.users)
+        uid = user.user_id
+        if endpoint.startswith("recommend_"):
+            model = endpoint.split("_")[1].upper()
+            return RequestSpec(endpoint, "POST", "/api/recommend", uid, json={
+                "user_id": uid, "model": model, "top_k": 20, "ems_track_limit": 300,
+            })
+        if endpoint in ("spotify", "spotify_explain"):
+            params = {
+                "artist": self.rng.choice(self._artists),
+                "k": 10,
+                "model": self.rng.choice(["ensemble", "knn", "text", "hybrid"]),
+            }
+            if endpoint == "spotify_explain":
+                params["explain"] = "true"
+            return RequestSpec(endpoint, "GET", "/api/spotify/recommend", uid, params=params)
+        if endpoint == "llm_search":
+            return RequestSpec(endpoint, "POST", "/api/llm/search", uid, json={
+                "query": self.rng.choice(SEARCH_QUERIES),
+                "page": self.rng.choice([1, 1, 1, 2]),
+            })
+        if endpoint == "evaluation":
+            spec = RequestSpec(endpoint, "POST", "/api/v1/evaluation/start", uid, json={
+                "userId": uid, "model": self.rng.choice(["M1", "M2", "M3"]),
+            })
+            self.prepare(spec)
+            return spec
+        raise ValueError(f"알 수 없는 엔드포인트: {endpoint}")
+
+    def prepare(self, spec: RequestSpec) -> None:
+        """요청 전에 필요한 DB 상태 준비 (evaluation: 분석 요청 장바구니 플레이리스트)"""
+        if spec.endpoint != "evaluation":
+            return
+        user = next(u for u in self.catalog.users if u.user_id == spec.user_id)
+        tracks = self.rng.sample(user.pms_track_ids, min(10, len(user.pms_track_ids)))
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            cur = conn.execute(
+                "INSERT INTO playlists (user_id, title, space_type, status_flag) VALUES (?, ?, 'EMS', 'PTP')",
+                (spec.user_id, "분석 요청 (bench)"),
+            )
+            conn.executemany(
+                "INSERT INTO playlist_tracks (playlist_id, track_id, order_index) VALUES (?, ?, ?)",
+                [(cur.lastrowid, tid, i) for i, tid in enumerate(tracks)],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+
+# ==================== 부하 생성 ====================
+
+async def _send(client, spec: RequestSpec, intended: float, samples: List[Sample],
+                headers: Optional[Dict] = None) -> None:
+    start = time.perf_counter()
+    status, error, soft_fail = 0, None, False
+    try:
+        resp = await client.request(spec.method, spec.path, params=spec.params, json=spec.json, headers=headers)
+        status = resp.status_code
+        if status >= 400:
+            error = f"HTTP {status}"
+        else:
+            try:
+                body = resp.json()
+                soft_fail = isinstance(body, dict) and body.get("success") is False
+            except ValueError:
+                pass
+    except Exception as e:
+        error = type(e).__name__
+    end = time.perf_counter()
+    samples.append(Sample(
+        endpoint=spec.endpoint,
+        status=status,
+        latency_ms=(end - intended) * 1000,
+        service_ms=(end - start) * 1000,
+        error=error,
+        soft_fail=soft_fail,
+        spec=spec,
+    ))
+
+
+async def run_open_loop(client, factory: RequestFactory, rps: float, duration: float,
+                        max_inflight: int, poisson: bool, drain_timeout: float):
+    """개방 루프: 응답과 무관하게 목표 RPS로 전송 (포화 시 대기열이 지연시간에 그대로 반영)"""
+    samples: List[Sample] = []
+    inflight = set()
+    arrivals = random.Random(factory.rng.random())
+    started = time.perf_counter()
+    next_at = started
+    while next_at - started < duration:
+        now = time.perf_counter()
+        if next_at > now:
+            await asyncio.sleep(next_at - now)
+        spec = factory.next()
+        if len(inflight) >= max_inflight:
+            samples.append(Sample(spec.endpoint, 0, 0.0, 0.0, error="client_overload", spec=spec))
+        else:
+            task = asyncio.create_task(_send(client, spec, next_at, samples))
+            inflight.add(task)
+            task.add_done_callback(inflight.discard)
+        next_at += arrivals.expovariate(rps) if poisson else 1.0 / rps
+    if inflight:
+        await asyncio.wait(inflight, timeout=drain_timeout)
+    return samples, time.perf_counter() - started
+
+
+async def run_closed_loop(client, factory: RequestFactory, concurrency: int, duration: float):
+    """폐쇄 루프: 가상 사용자 concurrency명이 응답을 받으면 바로 다음 요청"""
+    samples: List[Sample] = []
+    started = time.perf_counter()
+    deadline = started + duration
+
+    async def user_loop():
+        while time.perf_counter() < deadline:
+            await _send(client, factory.next(), time.perf_counter(), samples)
+
+    await asyncio.gather(*(user_loop() for _ in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+# ==================== 집계 ====================
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, Dict]:
+    """엔드포인트별 + 전체(all) 통계"""
+    groups = defaultdict(list)
+    for s in samples:
+        groups[s.endpoint].append(s)
+    groups["all"] = list(samples)
+
+    summary = {}
+    for name, group in groups.items():
+        if not group:
+            continue
+        completed = [s for s in group if s.error != "client_overload"]
+        latency = np.array([s.latency_ms for s in completed]) if completed else np.zeros(1)
+        errors = [s for s in group if s.error]
+        summary[name] = {
+            "requests": len(group),
+            "errors": len(errors),
+            "error_rate": round(len(errors) / len(group), 4),
+            "soft_fail_rate": round(sum(s.soft_fail for s in group) / len(group), 4),
+            "throughput_rps": round(len(completed) / elapsed, 2) if elapsed > 0 else 0.0,
+            "p50_ms": round(float(np.percentile(latency, 50)), 1),
+            "p95_ms": round(float(np.percentile(latency, 95)), 1),
+            "p99_ms": round(float(np.percentile(latency, 99)), 1),
+            "max_ms": round(float(latency.max()), 1),
+            "service_p50_ms": round(float(np.median([s.service_ms for s in completed])), 1) if completed else 0.0,
+            "top_errors": dict(Counter(s.error for s in errors).most_common(3)),
+        }
+    return summary
+
+
+def step_saturated(summary: Dict, target_rps: Optional[float], max_error_rate: float,
+                   slo_p99_ms: Optional[float]) -> List[str]:
+    """단계 포화 사유 목록 (빈 목록이면 정상)"""
+    total = summary["all"]
+    reasons = []
+    if target_rps and total["throughput_rps"] < 0.9 * target_rps:
+        reasons.append(f"처리량 {total['throughput_rps']:.1f} < 목표의 90%")
+    if total["error_rate"] > max_error_rate:
+        reasons.append(f"오류율 {total['error_rate']:.1%}")
+    if slo_p99_ms and total["p99_ms"] > slo_p99_ms:
+        reasons.append(f"p99 {total['p99_ms']:.0f}ms > SLO")
+    return reasons
+
+
+def saturation_points(steps: List[Dict], max_error_rate: float, slo_p99_ms: Optional[float]) -> Dict:
+    """엔드포인트별로 처음 오류율 / p99 SLO를 넘은 단계의 목표 RPS"""
+    points = {}
+    for step in steps:
+        for name, stats in step["summary"].items():
+            if name in points:
+                continue
+            if stats["error_rate"] > max_error_rate or (slo_p99_ms and stats["p99_ms"] > slo_p99_ms):
+                points[name] = step["target_rps"]
+    return points
+
+
+def print_summary(title: str, summary: Dict) -> None:
+    print(f"\n[LOAD] {title}")
+    print(f"  {'endpoint':16s} {'req':>6s} {'rps':>7s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'max':>8s} "
+          f"{'err%':>6s} {'fail%':>6s}  top errors")
+    for name in sorted(summary, key=lambda n: (n == "all", n)):
+        s = summary[name]
+        print(
+            f"  {name:16s} {s['requests']:6d} {s['throughput_rps']:7.2f} {s['p50_ms']:8.1f} {s['p95_ms']:8.1f} "
+            f"{s['p99_ms']:8.1f} {s['max_ms']:8.1f} {s['error_rate'] * 100:6.1f} {s['soft_fail_rate'] * 100:6.1f}  "
+            f"{s['top_errors'] or ''}"
+        )
+
+
+# ==================== 프로파일 ====================
+
+async def profile_slowest(client, factory: RequestFactory, samples: List[Sample], top: int, profiler) -> List[Dict]:
+    """가장 느린 요청 top개(엔드포인트 + 파라미터 기준 중복 제거)를 단독 재생하며 프로파일"""
+    picked, seen = [], set()
+    for s in sorted(samples, key=lambda s: s.latency_ms, reverse=True):
+        if s.spec is None or s.error == "client_overload":
+            continue
+        key = (s.spec.endpoint, s.spec.path, json.dumps(s.spec.params, sort_keys=True),
+               json.dumps(s.spec.json, sort_keys=True, ensure_ascii=False))
+        if key in seen:
+            continue
+        seen.add(key)
+        picked.append(s)
+        if len(picked) >= top:
+            break
+
+    replays = []
+    for rank, s in enumerate(picked, 1):
+        factory.prepare(s.spec)
+        name = f"{rank:02d}_{s.endpoint}_{int(s.latency_ms)}ms"
+        replay: List[Sample] = []
+        before = len(profiler.saved)
+        await _send(client, s.spec, time.perf_counter(), replay, headers={PROFILE_HEADER.decode(): name})
+        replays.append({
+            "endpoint": s.endpoint,
+            "under_load_ms": round(s.latency_ms, 1),
+            "replay_ms": round(replay[0].service_ms, 1),
+            "files": profiler.saved[before:],
+        })
+    return replays
+
+
+# ==================== 실행 ====================
+
+async def drive(args, base_url: str, factory: RequestFactory, profiler) -> Dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        steps = []
+        all_samples: List[Sample] = []
+        if args.ramp:
+            for rps in args.ramp:
+                samples, elapsed = await run_open_loop(
+                    client, factory, rps, args.step_duration, args.max_inflight, args.poisson, args.timeout,
+                )
+                steps.append(_step(f"open {rps:g} rps", rps, samples, elapsed, args))
+                all_samples.extend(samples)
+                if steps[-1]["saturated"] and not args.ramp_past_saturation:
+                    break
+        elif args.concurrency:
+            samples, elapsed = await run_closed_loop(client, factory, args.concurrency, args.duration)
+            steps.append(_step(f"closed {args.concurrency} users", None, samples, elapsed, args))
+            all_samples.extend(samples)
+        else:
+            samples, elapsed = await run_open_loop(
+                client, factory, args.rps, args.duration, args.max_inflight, args.poisson, args.timeout,
+            )
+            steps.append(_step(f"open {args.rps:g} rps", args.rps, samples, elapsed, args))
+            all_samples.extend(samples)
+
+        report = {"steps": steps}
+        if args.ramp:
+            first = next((s for s in steps if s["saturated"]), None)
+            report["saturation"] = {
+                "overall_rps": first["target_rps"] if first else None,
+                "max_sustained_rps": max(
+                    (s["target_rps"] for s in steps if not s["saturated"]), default=None
+                ),
+                "per_endpoint_rps": saturation_points(steps, args.max_error_rate, args.slo_p99_ms),
+            }
+
+        if profiler is not None and args.profile_top:
+            report["profiles"] = await profile_slowest(client, factory, all_samples, args.profile_top, profiler)
+
+        try:
+            resp = await client.get("/metrics")
+            if resp.status_code == 200:
+                report["server_metrics"] = resp.text
+        except Exception:
+            pass
+    return report
+
+
+def _step(label: str, target_rps: Optional[float], samples: List[Sample], elapsed: float, args) -> Dict:
+    summary = summarize(samples, elapsed) if samples else {}
+    reasons = step_saturated(summary, target_rps, args.max_error_rate, args.slo_p99_ms) if summary else ["요청 없음"]
+    print_summary(f"{label} ({elapsed:.1f}s){'  ← 포화: ' + ', '.join(reasons) if reasons else ''}", summary)
+    return {
+        "label": label,
+        "target_rps": target_rps,
+        "elapsed_sec": round(elapsed, 2),
+        "saturated": bool(reasons),
+        "reasons": reasons,
+        "summary": summary,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="프로세스 내 앱 대상 HTTP 부하 테스트")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--rps", type=float, default=5.0, help="개방 루프 목표 RPS")
+    load.add_argument("--concurrency", type=int, help="폐쇄 루프 동시 사용자 수")
+    load.add_argument("--ramp", type=lambda s: [float(x) for x in s.split(",")],
+                      help="포화점 탐지용 단계별 RPS (예: 2,5,10,20)")
+    parser.add_argument("--duration", type=float, default=30.0, help="측정 시간 (초)")
+    parser.add_argument("--step-duration", type=float, default=20.0, help="--ramp 단계별 시간 (초)")
+    parser.add_argument("--ramp-past-saturation", action="store_true", help="포화 이후 단계도 계속 실행")
+    parser.add_argument("--poisson", action="store_true", help="도착 간격을 지수 분포로 (기본: 일정 간격)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"엔드포인트=가중치 (기본 {DEFAULT_MIX})")
+    parser.add_argument("--tracks", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mock-latency-ms", type=parse_latency, default={},
+                        help="예: reccobeats=40,lastfm=30,gemini=300")
+    parser.add_argument("--max-inflight", type=int, default=1000, help="개방 루프 동시 요청 상한 (초과분은 오류로 집계)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="요청 타임아웃 (초)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="포화 판정 오류율")
+    parser.add_argument("--slo-p99-ms", type=float, help="포화 판정 p99 (ms)")
+    parser.add_argument("--ready-timeout", type=float, default=300.0, help="/ready 대기 시간 (초)")
+    parser.add_argument("--profile-top", type=int, default=0, help="가장 느린 요청 N개 프로파일")
+    parser.add_argument("--workdir", help="SQLite / 프로파일 / 메트릭 저장 위치 (기본: 임시 디렉토리)")
+    parser.add_argument("--json", help="결과 저장 경로")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="bench_load_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    catalog = generate_catalog(n_tracks=args.tracks, n_users=args.users, seed=args.seed)
+    db_path = workdir / f"catalog_{args.tracks}_{args.seed}.db"
+    if db_path.exists():
+        db_path.unlink()
+    sqlite_db.build_database(str(db_path), catalog)
+    factory = RequestFactory(catalog, str(db_path), args.mix, seed=args.seed)
+
+    with MockServers(latency_ms=args.mock_latency_ms) as mocks:
+        profile_dir = workdir / "profiles" if args.profile_top else None
+        server, profiler = boot_app(catalog, str(db_path), mocks, profile_dir=profile_dir)
+        try:
+            print(f"[LOAD] 앱 시작: {server.base_url} → /ready 대기")
+            if not server.wait_ready(args.ready_timeout):
+                print(f"[LOAD] [경고] {args.ready_timeout:.0f}초 안에 준비되지 않음 (준비 전 경로는 503으로 집계)")
+            report = asyncio.run(drive(args, server.base_url, factory, profiler))
+        finally:
+            server.stop()
+        mock_calls = dict(mocks.counts)
+
+    metrics_text = report.pop("server_metrics", None)
+    if metrics_text:
+        (workdir / "metrics.prom").write_text(metrics_text, encoding="utf-8")
+
+    if "saturation" in report:
+        sat = report["saturation"]
+        print("\n[LOAD] 포화점")
+        print(f"  전체: {sat['overall_rps']} rps (최대 유지 {sat['max_sustained_rps']} rps)")
+        for name, rps in sorted(sat["per_endpoint_rps"].items()):
+            print(f"  {name:16s} {rps:g} rps")
+    for item in report.get("profiles", []):
+        print(f"[LOAD] 프로파일 {item['endpoint']}: 부하 중 {item['under_load_ms']}ms, 단독 {item['replay_ms']}ms → {item['files']}")
+    print(f"\n[LOAD] 모의 API 호출: {mock_calls}  작업 디렉토리: {workdir}")
+
+    if args.json:
+        report["meta"] = {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "scale": catalog.summary(),
+            "seed": args.seed,
+            "mix": args.mix,
+            "mock_latency_ms": mocks.latency_ms,
+            "mock_calls": mock_calls,
+            "cpu_count": os.cpu_count(),
+            "workdir": str(workdir),
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+재현 가능한 성능 벤치마크 스위트 (지연시간 / 처리량)
+
+합성 카탈로그(시드 고정) + SQLite 대체 DB + 외부 API 모의 서버 위에서
+M1 예측, M2 점수, M3 순위, Kuka KNN/text/hybrid, QLTY 배치 보강, GMS 저장,
+Last.fm 태그 조회를 컴포넌트별로 측정합니다. 구성은 bench/ 패키지 참고.
+
+- 결과는 p50/p95/p99/평균(ms)과 초당 처리 항목 수
+- --json으로 저장한 결과를 --compare로 넘기면 p50 기준 회귀를 표시하고
+  --threshold를 넘는 회귀가 있으면 종료 코드 1 (CI 게이트용)
+- 절대값은 같은 머신 / 같은 규모 / 같은 모의 지연시간 사이에서만 비교
+
+사용법 (FAST_API 디렉토리에서):
+    python bench_suite.py --tracks 10000 --json bench_10k.json
+    python bench_suite.py --tracks 1000000 --components kuka,m3_rank
+    python bench_suite.py --tracks 10000 --compare bench_10k.json --threshold 0.2
+"""
+# 서빙과 같은 스레드 예산으로 측정 (numpy import 전에 설정해야 적용됨)
+import thread_budget
+thread_budget.configure_env()
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from bench.components import COMPONENTS, BenchContext, SkipBenchmark
+from bench.mock_servers import DEFAULT_LATENCY_MS, MockServers
+from bench.synthetic import generate_catalog
+from bench import sqlite_db
+
+
+def _parse_latency(value: str) -> dict:
+    """"reccobeats=40,gemini=300" → {"reccobeats": 40.0, "gemini": 300.0}"""
+    latency = {}
+    for part in filter(None, (p.strip() for p in value.split(","))):
+        name, _, ms = part.partition("=")
+        if name not in DEFAULT_LATENCY_MS:
+            raise argparse.ArgumentTypeError(f"알 수 없는 서비스: {name}")
+        latency[name] = float(ms)
+    return latency
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR, capture_output=True, text=True, timeout=5,
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_suite(args) -> dict:
+    timings = {}
+    start = time.perf_counter()
+    catalog = generate_catalog(
+        n_tracks=args.tracks, n_users=args.users, pms_size=args.pms, seed=args.seed,
+    )
+    timings["generate_sec"] = round(time.perf_counter() - start, 3)
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="bench_suite_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    db_path = workdir / f"catalog_{args.tracks}_{args.seed}.db"
+    if db_path.exists():
+        db_path.unlink()
+    start = time.perf_counter()
+    sqlite_db.build_database(str(db_path), catalog)
+    timings["sqlite_build_sec"] = round(time.perf_counter() - start, 3)
+
+    try:
+        session_factory = sqlite_db.session_factory(sqlite_db.create_engine(str(db_path)))
+    except ImportError:
+        session_factory = None  # sqlalchemy 미설치: DB를 쓰는 컴포넌트는 건너뜀
+
+    selected = [c.strip() for c in args.components.split(",") if c.strip()]
+    results = {}
+    with MockServers(latency_ms=args.mock_latency_ms) as mocks:
+        ctx = BenchContext(
+            catalog=catalog,
+            workdir=workdir,
+            session_factory=session_factory,
+            mocks=mocks,
+            repeat=args.repeat,
+            warmup=args.warmup,
+            batch_sizes=tuple(args.batch_sizes),
+        )
+        for name in selected:
+            print(f"[BENCH] {name} ...", flush=True)
+            start = time.perf_counter()
+            # 서비스 로그 출력은 --verbose일 때만
+            sink = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            try:
+                with sink:
+                    cases = COMPONENTS[name](ctx)
+                results[name] = {"status": "ok", "cases": cases}
+            except SkipBenchmark as e:
+                results[name] = {"status": "skipped", "reason": str(e)}
+            except Exception as e:
+                if args.verbose:
+                    traceback.print_exc()
+                results[name] = {"status": "error", "reason": f"{type(e).__name__}: {e}"}
+            results[name]["total_sec"] = round(time.perf_counter() - start, 2)
+        mock_calls = dict(mocks.counts)
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "threads": thread_budget.get_thread_budget().settings(),
+            "seed": args.seed,
+            "scale": catalog.summary(),
+            "repeat": args.repeat,
+            "batch_sizes": list(args.batch_sizes),
+            "mock_latency_ms": mocks.latency_ms,
+            "mock_calls": mock_calls,
+            "setup": timings,
+            "workdir": str(workdir),
+        },
+        "results": results,
+    }
+
+
+def _iter_cases(report: dict):
+    for component, result in report["results"].items():
+        for case, stats in result.get("cases", {}).items():
+            if isinstance(stats, dict) and "p50_ms" in stats:
+                yield component, case, stats
+
+
+def print_report(report: dict) -> None:
+    meta = report["meta"]
+    scale = meta["scale"]
+    print("\n" + "=" * 96)
+    print(
+        f"[BENCH] tracks={scale['tracks']:,} users={scale['users']} seed={meta['seed']} "
+        f"commit={meta['git_commit']} cpu={meta['cpu_count']}"
+    )
+    print(f"        setup: {meta['setup']}  mock latency(ms): {meta['mock_latency_ms']}")
+    print("=" * 96)
+    print(f"  {'component':12s} {'case':20s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'mean':>9s} {'items/s':>11s}")
+    for component, result in report["results"].items():
+        if result["status"] != "ok":
+            print(f"  {component:12s} {result['status']}: {result['reason']}")
+            continue
+        for case, stats in result["cases"].items():
+            if not isinstance(stats, dict) or "p50_ms" not in stats:
+                continue
+            per_sec = stats["items_per_sec"]
+            print(
+                f"  {component:12s} {case:20s} {stats['p50_ms']:9.2f} {stats['p95_ms']:9.2f} "
+                f"{stats['p99_ms']:9.2f} {stats['mean_ms']:9.2f} {per_sec if per_sec is not None else '-':>11}"
+            )
+    print("  (단위: ms)")
+
+
+def compare_reports(report: dict, baseline: dict, threshold: float) -> list:
+    """p50 기준 비교, threshold(비율)를 넘게 느려진 케이스 목록 반환"""
+    if report["meta"]["scale"] != baseline["meta"]["scale"]:
+        print(f"  [경고] 규모가 다름: 기준 {baseline['meta']['scale']} / 현재 {report['meta']['scale']}")
+    if report["meta"]["mock_latency_ms"] != baseline["meta"]["mock_latency_ms"]:
+        print("  [경고] 모의 지연시간 설정이 다름")
+
+    base = {(c, k): s for c, k, s in _iter_cases(baseline)}
+    regressions = []
+    print("\n" + "=" * 96)
+    print(f"[COMPARE] 기준 {baseline['meta']['git_commit']} → 현재 {report['meta']['git_commit']} (임계값 +{threshold:.0%})")
+    print("=" * 96)
+    print(f"  {'component':12s} {'case':20s} {'base p50':>10s} {'p50':>10s} {'change':>9s}")
+    for component, case, stats in _iter_cases(report):
+        old = base.get((component, case))
+        if old is None or old["p50_ms"] <= 0:
+            continue
+        change = stats["p50_ms"] / old["p50_ms"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  ← 회귀"
+            regressions.append({"component": component, "case": case, "change": round(change, 3)})
+        print(f"  {component:12s} {case:20s} {old['p50_ms']:10.2f} {stats['p50_ms']:10.2f} {change:+9.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="컴포넌트별 지연시간 / 처리량 벤치마크")
+    parser.add_argument("--tracks", type=int, default=10000, help="합성 카탈로그 트랙 수 (10k ~ 1M)")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--pms", type=int, default=50, help="사용자당 PMS 트랙 수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--components", default=",".join(COMPONENTS),
+                        help=f"쉼표 구분 ({', '.join(COMPONENTS)})")
+    parser.add_argument("--repeat", type=int, default=20, help="케이스당 측정 횟수")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--batch-sizes", type=lambda s: [int(x) for x in s.split(",")], default=[1, 64, 1000])
+    parser.add_argument("--mock-latency-ms", type=_parse_latency, default={},
+                        help="예: reccobeats=40,lastfm=30,gemini=300")
+    parser.add_argument("--workdir", help="모델 / SQLite 파일 위치 (기본: 임시 디렉토리)")
+    parser.add_argument("--json", help="결과 저장 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 회귀 임계값 (0.2 = 20%%)")
+    parser.add_argument("--verbose", action="store_true", help="서비스 로그 출력")
+    args = parser.parse_args()
+
+    unknown = [c for c in args.components.split(",") if c.strip() and c.strip() not in COMPONENTS]
+    if unknown:
+        parser.error(f"알 수 없는 컴포넌트: {', '.join(unknown)}")
+
+    report = run_suite(args)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.json}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n회귀 {len(regressions)}건")
+            sys.exit(1)
+        print("\n회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+학습 + 서빙 혼합 부하에서 스레드 예산 효과 측정
+
+모드별로 새 프로세스를 띄워 (스레드 환경변수는 import 전에만 적용되므로)
+서빙 추론을 고정 속도로 보내면서 중간에 학습 작업을 돌리고,
+학습이 없을 때 / 겹칠 때의 추론 지연시간 p50, p99를 비교합니다.
+
+- default: 라이브러리 기본값 (모두 코어 수만큼, CatBoost thread_count=-1)
+- budget:  thread_budget 적용 (서빙 THREADS_SERVE, 학습 THREADS_TRAIN)
+
+서빙 추론: SVC 커널 형태의 BLAS 연산 (393D) + 설치돼 있으면 MiniLM 인코딩, FAISS 검색
+학습 작업: CatBoost MultiRMSE (M3와 같은 형태) → 없으면 LightGBM → RandomForest
+
+사용법 (FAST_API 디렉토리에서):
+    python bench_thread_budget.py
+    python bench_thread_budget.py --rate 30 --idle 5 --train-rounds 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODES = ("default", "budget")
+
+
+# ==================== 작업 (자식 프로세스) ====================
+
+def _make_serving(np):
+    """요청 1건 분량의 추론 함수 목록"""
+    rng = np.random.default_rng(42)
+    support_vectors = rng.standard_normal((2000, 393)).astype(np.float32)
+    catalog = rng.standard_normal((50000, 384)).astype(np.float32)
+    catalog /= np.linalg.norm(catalog, axis=1, keepdims=True)
+
+    def svc_kernel():
+        x = rng.standard_normal((50, 393)).astype(np.float32)
+        np.exp(-0.01 * (x @ support_vectors.T))
+
+    steps = {"svc_kernel": svc_kernel}
+
+    try:
+        import faiss
+        index = faiss.IndexFlatIP(384)
+        index.add(catalog)
+        steps["faiss_search"] = lambda: index.search(catalog[:8], 20)
+    except ImportError:
+        steps["numpy_search"] = lambda: np.argpartition(-(catalog @ catalog[:8].T), 20, axis=0)
+
+    try:
+        from embedding_service import get_embedding_service
+        service = get_embedding_service()
+        if service.load():
+            counter = iter(range(10 ** 9))
+            steps["minilm_encode"] = lambda: service._encode_unique(
+                [f"IU | Blueming {next(counter)} | Love poem | k-pop"], 64, False
+            )
+    except Exception:
+        pass
+    return steps
+
+
+def _make_training(np, threads):
+    """학습 1회 함수 (threads=-1이면 라이브러리 기본값)"""
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    n = 20000
+    df = pd.DataFrame({
+        "artists": rng.integers(0, 2000, n).astype(str),
+        "album_name": rng.integers(0, 5000, n).astype(str),
+        "track_genre": rng.integers(0, 100, n).astype(str),
+    })
+    targets = rng.random((n, 9))
+
+    try:
+        from catboost import CatBoostRegressor
+
+        def train():
+            CatBoostRegressor(
+                iterations=300, depth=6, loss_function="MultiRMSE", verbose=False,
+                thread_count=threads, cat_features=list(df.columns),
+            ).fit(df, targets)
+        return "catboost", train
+    except ImportError:
+        pass
+
+    X = rng.standard_normal((n, 393))
+    try:
+        import lightgbm as lgb
+        return "lightgbm", lambda: lgb.LGBMRegressor(n_estimators=300, n_jobs=threads, verbose=-1).fit(X, targets[:, 0])
+    except ImportError:
+        from sklearn.ensemble import RandomForestRegressor
+        return "random_forest", lambda: RandomForestRegressor(n_estimators=50, n_jobs=threads).fit(X[:5000], targets[:5000, 0])
+
+
+def run_mode(mode: str, rate: float, idle: float, train_rounds: int) -> dict:
+    sys.path.insert(0, BASE_DIR)
+    import thread_budget
+    if mode == "budget":
+        thread_budget.configure_env()
+
+    import numpy as np
+    budget = thread_budget.get_thread_budget()
+
+    serving = _make_serving(np)
+    if mode == "budget":
+        budget.apply_serving()
+    for step in serving.values():  # 첫 호출 비용 제외
+        step()
+
+    trainer_name, train = _make_training(np, budget.train_threads if mode == "budget" else -1)
+    if mode == "budget":
+        def train_once():
+            with budget.training("bench"):
+                train()
+    else:
+        train_once = train
+
+    training = threading.Event()
+    samples = {"idle": [], "mixed": []}
+    stop = threading.Event()
+
+    def serve_loop():
+        interval = 1.0 / rate
+        next_at = time.perf_counter()
+        while not stop.is_set():
+            overlapped = training.is_set()
+            start = time.perf_counter()
+            for step in serving.values():
+                step()
+            samples["mixed" if overlapped else "idle"].append((time.perf_counter() - start) * 1000)
+            next_at += interval
+            time.sleep(max(0.0, next_at - time.perf_counter()))
+
+    server = threading.Thread(target=serve_loop, daemon=True)
+    server.start()
+    time.sleep(idle)
+
+    train_times = []
+    training.set()
+    for _ in range(train_rounds):
+        t0 = time.perf_counter()
+        train_once()
+        train_times.append(time.perf_counter() - t0)
+    training.clear()
+    stop.set()
+    server.join()
+
+    def pct(values, q):
+        return float(np.percentile(values, q)) if values else 0.0
+
+    return {
+        "mode": mode,
+        "trainer": trainer_name,
+        "steps": list(serving),
+        "idle_n": len(samples["idle"]),
+        "idle_p50": pct(samples["idle"], 50),
+        "idle_p99": pct(samples["idle"], 99),
+        "mixed_n": len(samples["mixed"]),
+        "mixed_p50": pct(samples["mixed"], 50),
+        "mixed_p99": pct(samples["mixed"], 99),
+        "train_sec": sum(train_times) / len(train_times),
+        "threads": budget.settings() if mode == "budget" else {"cpu_count": thread_budget.CPU_COUNT},
+    }
+
+
+# ==================== 실행 ====================
+
+def main():
+    parser = argparse.ArgumentParser(description="스레드 예산 혼합 부하 벤치마크")
+    parser.add_argument("--rate", type=float, default=20.0, help="초당 서빙 추론 수")
+    parser.add_argument("--idle", type=float, default=5.0, help="학습 시작 전 측정 시간 (초)")
+    parser.add_argument("--train-rounds", type=int, default=2, help="학습 반복 수")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("_run", nargs="?", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._run:
+        print(json.dumps(run_mode(args._run, args.rate, args.idle, args.train_rounds)))
+        return
+
+    print("\n" + "=" * 90)
+    print(f"[BENCH] 학습 + 서빙 혼합 부하 - 서빙 {args.rate:.0f} req/s, 학습 {args.train_rounds}회")
+    print("=" * 90)
+    print(f"  {'mode':8s} {'idle p50':>9s} {'idle p99':>9s} {'mixed p50':>10s} {'mixed p99':>10s} {'train(s)':>9s}  trainer / steps")
+
+    for mode in args.modes.split(","):
+        env = {k: v for k, v in os.environ.items() if mode == "budget" or k not in (
+            "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+            "NUMEXPR_NUM_THREADS", "VECLIB_MAXIMUM_THREADS",
+        )}
+        out = subprocess.run(
+            [sys.executable, __file__, mode, "--rate", str(args.rate), "--idle", str(args.idle),
+             "--train-rounds", str(args.train_rounds)],
+            capture_output=True, text=True, cwd=BASE_DIR, env=env,
+        )
+        if out.returncode != 0:
+            print(f"  {mode:8s} 실패: {out.stderr.strip()[-300:]}")
+            continue
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(
+            f"  {mode:8s} {r['idle_p50']:9.2f} {r['idle_p99']:9.2f} {r['mixed_p50']:10.2f} "
+            f"{r['mixed_p99']:10.2f} {r['train_sec']:9.2f}  {r['trainer']} / {', '.join(r['steps'])}"
+        )
+        if mode == "budget":
+            t = r["threads"]
+            print(f"  {'':8s} serve={t['serve_threads']} train={t['train_threads']} cpu={t['cpu_count']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+멀티 워커 스케일링 측정 (1 → N 코어)
+
+워커 수별로 gunicorn(gunicorn.conf.py, 선로드 모드)을 띄우고 /ready가 200이 될 때까지
+기다린 뒤, CPU 바운드 엔드포인트에 고정 시간 동안 동시 요청을 보내 처리량을 잽니다.
+워커별 메모리는 /proc/<pid>/smaps_rollup 기준으로
+- Private: 워커 전용 (워커마다 복제되는 양)
+- Shared:  마스터/다른 워커와 공유 중인 페이지 (copy-on-write 선로드 효과)
+- PSS:     공유 페이지를 프로세스 수로 나눠 합산한 실제 점유량
+
+사용법 (FAST_API 디렉토리에서):
+    python bench_workers.py                          # 1, 2, 4, ... CPU 수까지
+    python bench_workers.py --workers 1,2,4 --duration 30
+    python bench_workers.py --path "/api/spotify/recommend?artist=IU&model=knn"
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = "/api/spotify/recommend?artist=BTS&song=Dynamite&model=ensemble"
+
+
+def _default_worker_counts() -> List[int]:
+    cpus = multiprocessing.cpu_count()
+    counts, n = [], 1
+    while n < cpus:
+        counts.append(n)
+        n *= 2
+    counts.append(cpus)
+    return counts
+
+
+# ==================== 서버 ====================
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, WEB_WORKERS=str(workers), PORT=str(port))
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        cwd=BASE_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def stop_server(proc: subprocess.Popen) -> None:
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=30)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(proc.pid, signal.SIGKILL)
+
+
+def wait_ready(base_url: str, timeout: float) -> bool:
+    """워커가 여러 개면 응답하는 워커가 달라지므로 연속 몇 번 200이어야 준비 완료로 봄"""
+    deadline = time.time() + timeout
+    streak = 0
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/ready", timeout=5) as r:
+                streak = streak + 1 if r.status == 200 else 0
+        except (urllib.error.URLError, ConnectionError, OSError):
+            streak = 0
+        if streak >= 5:
+            return True
+        time.sleep(0.5 if streak == 0 else 0.05)
+    return False
+
+
+# ==================== 부하 ====================
+
+def run_load(url: str, concurrency: int, duration: float) -> Dict[str, float]:
+    """concurrency개 클라이언트가 duration초 동안 연속 요청 (closed loop)"""
+    deadline = time.perf_counter() + duration
+
+    def client(_):
+        latencies, errors = [], 0
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=30) as r:
+                    r.read()
+                latencies.append(time.perf_counter() - t0)
+            except Exception:
+                errors += 1
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(client, range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [l for lat, _ in results for l in lat]
+    errors = sum(e for _, e in results)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000) if latencies else 0.0,
+        "p99_ms": float(np.percentile(latencies, 99) * 1000) if latencies else 0.0,
+    }
+
+
+# ==================== 메모리 ====================
+
+def _children(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                if int(f.read().rsplit(")", 1)[1].split()[1]) == pid:
+                    children.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return children
+
+
+def _smaps_kb(pid: int) -> Dict[str, int]:
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"):
+                    values[key] = int(rest.split()[0])
+    except OSError:
+        pass
+    return values
+
+
+def memory_report(master_pid: int) -> Dict[str, float]:
+    """마스터 + 워커 PSS 합계, 워커 1개당 평균 private/shared (MB)"""
+    workers = _children(master_pid)
+    master = _smaps_kb(master_pid)
+    stats = [_smaps_kb(pid) for pid in workers]
+    mb = 1024
+    private = [s.get("Private_Clean", 0) + s.get("Private_Dirty", 0) for s in stats]
+    shared = [s.get("Shared_Clean", 0) + s.get("Shared_Dirty", 0) for s in stats]
+    return {
+        "workers": len(workers),
+        "total_pss_mb": (master.get("Pss", 0) + sum(s.get("Pss", 0) for s in stats)) / mb,
+        "worker_private_mb": (sum(private) / len(private) / mb) if private else 0.0,
+        "worker_shared_mb": (sum(shared) / len(shared) / mb) if shared else 0.0,
+    }
+
+
+# ==================== 실행 ====================
+
+def main():
+    parser = argparse.ArgumentParser(description="멀티 워커 처리량 스케일링 측정")
+    parser.add_argument("--workers", default=None, help="워커 수 목록 (기본: 1,2,4,...,CPU 수)")
+    parser.add_argument("--path", default=DEFAULT_PATH, help="부하 대상 경로")
+    parser.add_argument("--duration", type=float, default=20.0, help="워커 수별 측정 시간 (초)")
+    parser.add_argument("--clients-per-worker", type=int, default=4, help="워커당 동시 클라이언트 수")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ready-timeout", type=float, default=600.0)
+    parser.add_argument("--json", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    counts = [int(x) for x in args.workers.split(",")] if args.workers else _default_worker_counts()
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    print("\n" + "=" * 100)
+    print(f"[BENCH] 워커 수별 처리량 - {args.path} ({args.duration:.0f}s, 워커당 클라이언트 {args.clients_per_worker})")
+    print("=" * 100)
+    print(
+        f"  {'workers':>7s} {'req/s':>9s} {'speedup':>8s} {'eff':>6s} {'p50(ms)':>9s} {'p99(ms)':>9s} "
+        f"{'err':>5s} {'PSS(MB)':>9s} {'priv/w':>8s} {'shared/w':>9s} {'ready(s)':>9s}"
+    )
+
+    results = []
+    baseline = None
+    for n in counts:
+        proc = start_server(n, args.port)
+        try:
+            t0 = time.time()
+            if not wait_ready(base_url, args.ready_timeout):
+                print(f"  {n:7d} /ready 타임아웃 ({args.ready_timeout:.0f}s)")
+                continue
+            ready_sec = time.time() - t0
+
+            load = run_load(base_url + args.path, n * args.clients_per_worker, args.duration)
+            memory = memory_report(proc.pid)
+        finally:
+            stop_server(proc)
+
+        baseline = baseline or load["rps"]
+        speedup = load["rps"] / baseline if baseline else 0.0
+        row = {"workers": n, "ready_sec": ready_sec, "speedup": speedup, **load, **memory}
+        results.append(row)
+        print(
+            f"  {n:7d} {load['rps']:9.1f} {speedup:7.2f}x {speedup / n:6.0%} "
+            f"{load['p50_ms']:9.1f} {load['p99_ms']:9.1f} {load['errors']:5d} "
+            f"{memory['total_pss_mb']:9.1f} {memory['worker_private_mb']:8.1f} "
+            f"{memory['worker_shared_mb']:9.1f} {ready_sec:9.1f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n[BENCH] 결과 저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+공유 텍스트 임베딩 서비스 (all-MiniLM-L6-v2, 프로세스당 1개)
+
+M2, QLTY, Kuka(L1), L2 Chroma가 각자 SentenceTransformer를 로드하던 것을
+하나의 인스턴스로 통합합니다.
+
+- 동시 encode 호출을 요청 큐에 모아 micro-batch로 처리
+  (최대 배치 크기 / 최대 대기 시간 설정 가능)
+- 한 배치 안의 동일 텍스트는 한 번만 인코딩
+- 배치 크기 / 큐 대기 시간 히스토그램 제공 (stats)
+- 큰 입력(오프라인 임베딩 생성 등)은 큐를 거치지 않고 바로 인코딩
+- 백엔드 선택 (EMBEDDING_BACKEND): torch(기본) | onnx | onnx-int8
+  ONNX 파일은 export_embedding_onnx.py로 생성 (없으면 torch로 대체)
+"""
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from metrics import Histogram
+from thread_budget import get_thread_budget
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_DIM = 384
+MAX_BATCH_SIZE = int(os.getenv("EMBED_MAX_BATCH_SIZE", "64"))
+MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))
+MAX_SEQ_LENGTH = 256  # all-MiniLM-L6-v2 SentenceTransformer 기본값
+
+# 인코더 백엔드
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+ONNX_DIR = Path(os.getenv("EMBEDDING_ONNX_DIR", Path(__file__).resolve().parent / "models" / "embedding"))
+ONNX_FILES = {
+    "onnx": "minilm.onnx",
+    "onnx-int8": "minilm.int8.onnx",
+}
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+QUEUE_LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+
+class OnnxMiniLMEncoder:
+    """
+    ONNX Runtime MiniLM 인코더 (SentenceTransformer.encode 호환)
+
+    토큰화 → ONNX 트랜스포머 → attention mask 평균 풀링 → L2 정규화
+    (all-MiniLM-L6-v2의 Pooling + Normalize 모듈과 동일)
+    """
+
+    def __init__(self, model_path: Path, tokenizer_dir: Path = None, max_seq_length: int = MAX_SEQ_LENGTH):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_path = Path(model_path)
+        self.max_seq_length = max_seq_length
+        self.tokenizer = AutoTokenizer.from_pretrained(str(tokenizer_dir or self.model_path.parent))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            str(self.model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        tokens = self.tokenizer(
+            texts, padding=True, truncation=True,
+            max_length=self.max_seq_length, return_tensors="np",
+        )
+        feeds = {
+            name: tokens[name].astype(np.int64)
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in self._input_names and name in tokens
+        }
+        hidden = self.session.run(None, feeds)[0]  # (B, T, 384)
+
+        mask = tokens["attention_mask"].astype(np.float32)[..., None]
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+    def encode(self, texts: Sequence[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+
+        # 길이순 정렬 후 배치 → 패딩 낭비 감소, 결과는 원래 순서로 복원
+        order = np.argsort([len(t) for t in texts])
+        out = np.empty((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            out[idx] = self._encode_batch([texts[i] for i in idx])
+        return out
+
+
+def create_encoder(backend: str = EMBEDDING_BACKEND, model_name: str = DEFAULT_MODEL):
+    """
+    백엔드별 인코더 생성 (encode(texts, batch_size, show_progress_bar) 인터페이스 공통)
+
+    ONNX 파일이 없거나 로드에 실패하면 torch SentenceTransformer로 대체합니다.
+    """
+    if backend in ONNX_FILES:
+        model_path = ONNX_DIR / ONNX_FILES[backend]
+        if model_path.exists():
+            try:
+                encoder = OnnxMiniLMEncoder(model_path)
+                logger.info(f"[Embedding] ONNX 백엔드 로드: {model_path.name}")
+                return encoder, backend
+            except Exception as e:
+                logger.warning(f"[Embedding] ONNX 로드 실패, torch 사용: {e}")
+        else:
+            logger.warning(f"[Embedding] ONNX 파일 없음 ({model_path}), torch 사용 - export_embedding_onnx.py 실행 필요")
+    elif backend != "torch":
+        logger.warning(f"[Embedding] 알 수 없는 백엔드 '{backend}', torch 사용")
+
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name), "torch"
+
+
+class _EncodeRequest:
+    __slots__ = ("texts", "future", "enqueued_at")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class SharedEmbeddingService:
+    """프로세스 공유 MiniLM 임베딩 + 동적 micro-batching"""
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait_ms: float = MAX_WAIT_MS,
+        backend: str = EMBEDDING_BACKEND,
+    ):
+        self.model_name = model_name
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.embedding_dim = EMBEDDING_DIM
+        self.model = None
+        self._load_failed = False
+        self._load_lock = threading.Lock()
+        self._queue: "queue.Queue[_EncodeRequest]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self.batch_size_hist = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_latency_hist = Histogram(QUEUE_LATENCY_BUCKETS_MS)
+        self.batches = 0
+        self.texts_requested = 0
+        self.texts_encoded = 0
+
+    # ==================== 모델 로드 ====================
+
+    def load(self) -> bool:
+        """인코더 로드 (최초 1회, 실패 시 재시도하지 않음)"""
+        if self.model is not None:
+            return True
+        if self._load_failed:
+            return False
+
+        with self._load_lock:
+            if self.model is not None:
+                return True
+            try:
+                logger.info(f"[Embedding] 인코더 로드: {self.model_name} (backend={self.backend})")
+                self.model, self.backend = create_encoder(self.backend, self.model_name)
+                logger.info(f"[Embedding] 로드 완료 ({self.embedding_dim}D, backend={self.backend})")
+                return True
+            except Exception as e:
+                logger.error(f"[Embedding] 인코더 로드 실패: {e}")
+                self._load_failed = True
+                return False
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.model is not None
+
+    # ==================== 인코딩 ====================
+
+    def encode(
+        self,
+        texts: Sequence[str],
+        batch_size: Optional[int] = None,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        """
+        텍스트 목록 → (N, 384) float32 배열 (입력 순서 유지)
+
+        max_batch_size 이하 요청은 큐에 넣어 다른 동시 요청과 합쳐 인코딩하고,
+        그보다 큰 요청은 호출 스레드에서 바로 인코딩합니다.
+        모델 로드 실패 시 RuntimeError.
+        """
+        texts = [str(t) for t in texts]
+        if not texts:
+            return np.zeros((0, self.embedding_dim), dtype=np.float32)
+        if not self.load():
+            raise RuntimeError(f"임베딩 모델 로드 실패: {self.model_name}")
+
+        self.texts_requested += len(texts)
+        if len(texts) > self.max_batch_size:
+            return self._encode_unique(texts, batch_size or self.max_batch_size, show_progress_bar)
+
+        return self.submit(texts).result()
+
+    async def aencode(self, texts: Sequence[str]) -> np.ndarray:
+        """async 컨텍스트용 encode (이벤트 루프를 막지 않음)"""
+        texts = [str(t) for t in texts]
+        if not texts:
+            return np.zeros((0, self.embedding_dim), dtype=np.float32)
+        if not self.load():
+            raise RuntimeError(f"임베딩 모델 로드 실패: {self.model_name}")
+
+        self.texts_requested += len(texts)
+        if len(texts) > self.max_batch_size:
+            return await asyncio.to_thread(self._encode_unique, texts, self.max_batch_size, False)
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def submit(self, texts: List[str]) -> Future:
+        """요청을 큐에 넣고 Future 반환 (결과: (N, 384) 배열)"""
+        self._ensure_worker()
+        request = _EncodeRequest(texts)
+        self._queue.put(request)
+        return request.future
+
+    def _encode_unique(self, texts: List[str], batch_size: int, show_progress_bar: bool) -> np.ndarray:
+        """중복 텍스트는 한 번만 인코딩하고 원래 순서로 펼침"""
+        unique = list(dict.fromkeys(texts))
+        with get_thread_budget().inference("embedding"):
+            vectors = self.model.encode(
+                unique, batch_size=batch_size, show_progress_bar=show_progress_bar
+            )
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.texts_encoded += len(unique)
+        if len(unique) == len(texts):
+            return vectors
+        index = {text: i for i, text in enumerate(unique)}
+        return vectors[[index[t] for t in texts]]
+
+    # ==================== micro-batch 워커 ====================
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._load_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._worker_loop, name="embedding-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _collect_batch(self) -> List[_EncodeRequest]:
+        """첫 요청 도착 후 max_wait_ms 동안 또는 max_batch_size까지 요청을 모음"""
+        batch = [self._queue.get()]
+        size = len(batch[0].texts)
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    def _worker_loop(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            started = time.perf_counter()
+            for request in batch:
+                self.queue_latency_hist.observe((started - request.enqueued_at) * 1000)
+
+            texts = [t for request in batch for t in request.texts]
+            try:
+                vectors = self._encode_unique(texts, self.max_batch_size, False)
+            except Exception as e:
+                logger.error(f"[Embedding] 배치 인코딩 실패 ({len(texts)}건): {e}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.batch_size_hist.observe(len(texts))
+            offset = 0
+            for request in batch:
+                n = len(request.texts)
+                request.future.set_result(vectors[offset:offset + n])
+                offset += n
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "model": self.model_name,
+            "backend": self.backend,
+            "loaded": self.is_loaded,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "queue_depth": self._queue.qsize(),
+            "batches": self.batches,
+            "texts_requested": self.texts_requested,
+            "texts_encoded": self.texts_encoded,
+            "batch_size": self.batch_size_hist.snapshot(),
+            "queue_latency_ms": self.queue_latency_hist.snapshot(),
+        }
+
+
+# 싱글톤 인스턴스
+_embedding_service: Optional[SharedEmbeddingService] = None
+_singleton_lock = threading.Lock()
+
+
+def get_embedding_service() -> SharedEmbeddingService:
+    """공유 임베딩 서비스 싱글톤"""
+    global _embedding_service
+    if _embedding_service is None:
+        with _singleton_lock:
+            if _embedding_service is None:
+                _embedding_service = SharedEmbeddingService()
+    return _embedding_service
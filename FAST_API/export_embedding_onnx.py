@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+MiniLM 텍스트 인코더 ONNX 변환 + 검증 + 벤치마크
+
+1. all-MiniLM-L6-v2 트랜스포머를 ONNX로 export (models/embedding/minilm.onnx)
+2. 동적 양자화 INT8 변형 생성 (minilm.int8.onnx)
+3. 카탈로그 샘플(tracks 테이블)로 PyTorch 벡터와 코사인 일치도 검증
+4. 단건 / 배치 호출 sentences/sec, p99 지연시간 비교
+
+사용법 (FAST_API 디렉토리에서):
+    python export_embedding_onnx.py                # export + 검증 + 벤치마크
+    python export_embedding_onnx.py --skip-export  # 기존 파일로 검증/벤치마크만
+    python export_embedding_onnx.py --sample 2000 --no-bench
+
+서버 적용: EMBEDDING_BACKEND=onnx 또는 onnx-int8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from embedding_service import (
+    DEFAULT_MODEL, MAX_SEQ_LENGTH, ONNX_DIR, ONNX_FILES, OnnxMiniLMEncoder,
+)
+
+# 검증 기준: 최소 코사인 유사도
+MIN_COSINE = {
+    "onnx": 0.999,
+    "onnx-int8": 0.97,
+}
+
+FALLBACK_TEXTS = [
+    "IU | Blueming | Love poem | k-pop",
+    "Radiohead | Karma Police | OK Computer | alternative rock",
+    "Daft Punk | Get Lucky | Random Access Memories | disco",
+    "BTS | Dynamite | BE | k-pop",
+    "Miles Davis | So What | Kind of Blue | jazz",
+    "Billie Eilish | bad guy | WHEN WE ALL FALL ASLEEP, WHERE DO WE GO? | pop",
+    "Nujabes | Aruarian Dance | Samurai Champloo | hip hop",
+    "아이유 | 밤편지 | Palette | 발라드",
+]
+
+
+# ==================== Export ====================
+
+def export_onnx(model_name: str = DEFAULT_MODEL) -> None:
+    """SentenceTransformer의 트랜스포머 부분을 ONNX로 export + 토크나이저 저장 + INT8 양자화"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    ONNX_DIR.mkdir(parents=True, exist_ok=True)
+    fp32_path = ONNX_DIR / ONNX_FILES["onnx"]
+    int8_path = ONNX_DIR / ONNX_FILES["onnx-int8"]
+
+    print("\n" + "=" * 70)
+    print(f"[EXPORT] {model_name} → {fp32_path}")
+    print("=" * 70)
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+    tokenizer.save_pretrained(str(ONNX_DIR))
+
+    dummy = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[n] for n in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            do_constant_folding=True,
+        )
+    print(f"[EXPORT] FP32 저장: {fp32_path} ({fp32_path.stat().st_size / 1e6:.1f}MB)")
+
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    print(f"[EXPORT] INT8 저장: {int8_path} ({int8_path.stat().st_size / 1e6:.1f}MB)")
+
+
+# ==================== 검증 ====================
+
+def load_catalog_sample(n: int) -> list:
+    """tracks 테이블에서 QLTY/M2와 같은 형식의 텍스트 샘플 (DB 불가 시 기본 문장)"""
+    try:
+        from sqlalchemy import text
+        from database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            rows = db.execute(text("""
+                SELECT artist, title, album, genre FROM tracks
+                ORDER BY RAND() LIMIT :n
+            """), {"n": n}).fetchall()
+        finally:
+            db.close()
+        texts = [f"{r[0] or ''} | {r[1] or ''} | {r[2] or ''} | {r[3] or ''}" for r in rows]
+        if texts:
+            print(f"[VERIFY] 카탈로그 샘플 {len(texts)}건 (tracks)")
+            return texts
+    except Exception as e:
+        print(f"[VERIFY] DB 샘플 실패 ({e}), 기본 문장 사용")
+    return FALLBACK_TEXTS
+
+
+def verify(texts: list, torch_model, encoders: dict) -> bool:
+    """ONNX 벡터와 PyTorch 벡터의 코사인 유사도 (정규화 벡터 → 내적)"""
+    print("\n" + "=" * 70)
+    print(f"[VERIFY] 코사인 일치도 ({len(texts)}건)")
+    print("=" * 70)
+
+    reference = torch_model.encode(texts, batch_size=64, normalize_embeddings=True)
+    ok = True
+    for backend, encoder in encoders.items():
+        vectors = encoder.encode(texts, batch_size=64)
+        cosine = np.sum(reference * vectors, axis=1)
+        passed = cosine.min() >= MIN_COSINE[backend]
+        ok = ok and passed
+        print(
+            f"  {backend:10s} mean={cosine.mean():.5f}  p01={np.percentile(cosine, 1):.5f}  "
+            f"min={cosine.min():.5f}  (기준 {MIN_COSINE[backend]})  {'PASS' if passed else 'FAIL'}"
+        )
+    return ok
+
+
+# ==================== 벤치마크 ====================
+
+def _bench(encode, texts: list, batch_size: int, rounds: int) -> dict:
+    latencies = []
+    sentences = 0
+    for i in range(rounds):
+        start = (i * batch_size) % max(len(texts) - batch_size, 1)
+        batch = texts[start:start + batch_size] or texts[:batch_size]
+        t0 = time.perf_counter()
+        encode(batch)
+        latencies.append(time.perf_counter() - t0)
+        sentences += len(batch)
+    total = sum(latencies)
+    return {
+        "sent_per_sec": sentences / total if total else 0.0,
+        "p50_ms": np.percentile(latencies, 50) * 1000,
+        "p99_ms": np.percentile(latencies, 99) * 1000,
+    }
+
+
+def benchmark(texts: list, torch_model, encoders: dict, rounds: int) -> None:
+    print("\n" + "=" * 70)
+    print("[BENCH] sentences/sec, p99 지연시간 (CPU)")
+    print("=" * 70)
+
+    backends = {"torch": lambda b: torch_model.encode(b, batch_size=64, show_progress_bar=False)}
+    backends.update({name: (lambda b, e=enc: e.encode(b, batch_size=64)) for name, enc in encoders.items()})
+    if len(texts) < 256:
+        texts = (texts * (256 // len(texts) + 1))[:256]
+
+    print(f"  {'backend':10s} {'mode':8s} {'sent/s':>10s} {'p50(ms)':>10s} {'p99(ms)':>10s}")
+    for name, encode in backends.items():
+        encode(texts[:8])  # warmup
+        for mode, batch_size in (("single", 1), ("batch64", 64)):
+            r = _bench(encode, texts, batch_size, rounds if batch_size == 1 else max(rounds // 10, 5))
+            print(f"  {name:10s} {mode:8s} {r['sent_per_sec']:10.1f} {r['p50_ms']:10.2f} {r['p99_ms']:10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniLM ONNX export / verify / benchmark")
+    parser.add_argument("--skip-export", action="store_true", help="기존 ONNX 파일 사용")
+    parser.add_argument("--sample", type=int, default=1000, help="검증용 카탈로그 샘플 수")
+    parser.add_argument("--rounds", type=int, default=200, help="단건 벤치마크 반복 수")
+    parser.add_argument("--no-bench", action="store_true", help="벤치마크 생략")
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    if not args.skip_export:
+        export_onnx()
+
+    torch_model = SentenceTransformer(DEFAULT_MODEL, device="cpu")
+    encoders = {
+        backend: OnnxMiniLMEncoder(ONNX_DIR / filename, max_seq_length=MAX_SEQ_LENGTH)
+        for backend, filename in ONNX_FILES.items()
+    }
+
+    texts = load_catalog_sample(args.sample)
+    ok = verify(texts, torch_model, encoders)
+
+    if not args.no_bench:
+        benchmark(texts, torch_model, encoders, args.rounds)
+
+    print("\n[RESULT] 검증 " + ("통과" if ok else "실패 - 해당 백엔드를 사용하지 마세요"))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
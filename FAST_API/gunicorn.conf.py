@@ -0,0 +1,61 @@
+"""
+Gunicorn 설정 - 멀티 워커 서빙 (읽기 전용 자산 선로드 + copy-on-write 공유)
+
+채점 경로(SVC, Ridge, CatBoost, MiniLM, FAISS)가 CPU 바운드라서 프로세스 1개로는
+코어 1개 분량만 사용합니다. 워커를 단순히 늘리면 Kuka 카탈로그/FAISS 인덱스와
+모델이 워커 수만큼 메모리에 올라가므로,
+
+1. preload_app: 마스터가 main:app을 import (라우터 import 시 M1 기본 모델 로드)
+2. when_ready: 마스터가 Kuka 배열/인덱스, MiniLM 가중치, M3 카탈로그를 동기 로드
+3. fork: 워커는 위 페이지를 copy-on-write로 공유
+4. 워커 lifespan: DB 확인, QLTY/L2 등 나머지 로드 + 워밍업 (사용자별 캐시는 워커마다)
+
+워커마다 따로인 상태:
+- 추천 결과 캐시: 워커가 2개 이상이면 RECOMMEND_CACHE_BACKEND=redis 필요
+  (memory면 다른 워커의 재학습을 몰라 이전 결과를 돌려주므로 캐시를 끔)
+- QLTY 일괄 보강 작업: 실행 락 / 상태 파일로 워커 간 1개만 실행 (QLTY/batch_job.py)
+
+실행 (FAST_API 디렉토리에서):
+    WEB_WORKERS=4 gunicorn -c gunicorn.conf.py main:app
+
+스케일링 측정: python bench_workers.py --workers 1,2,4
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_WORKERS", "1")) or multiprocessing.cpu_count()  # 0이면 CPU 수
+# 앱(preload_app으로 마스터에서 import)이 실제 워커 수를 보도록 (recommendation_cache 백엔드 선택)
+os.environ["WEB_WORKERS"] = str(workers)
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WEB_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# 마스터에서 선로드할 읽기 전용 서브시스템 (startup.StartupOrchestrator 이름)
+# L2 Chroma(sqlite 연결)와 DB 연결은 fork에 안전하지 않아 워커에서 로드
+# Kuka 텍스트 임베딩 캐시(npy)가 없으면 마스터에서 torch 추론이 돌게 되므로
+# (fork 전 OpenMP 스레드 풀 생성) 배포 전에 단일 프로세스로 한 번 생성해 둘 것
+PRELOAD_SUBSYSTEMS = tuple(
+    s.strip() for s in os.getenv("PRELOAD_SUBSYSTEMS", "kuka,embedding,m3_catalog").split(",") if s.strip()
+)
+
+
+def when_ready(server):
+    """앱 import 후, 워커 fork 전 (마스터)"""
+    from startup import get_orchestrator
+
+    orchestrator = get_orchestrator()
+    orchestrator.preload(PRELOAD_SUBSYSTEMS)
+    loaded = [name for name in PRELOAD_SUBSYSTEMS if orchestrator.is_ready(name)]
+    server.log.info(f"[Preload] shared before fork: {', '.join(loaded) or '(none)'} → {workers} workers")
+
+
+def post_fork(server, worker):
+    """마스터에서 만들어진 DB 커넥션을 워커가 공유하지 않도록 풀을 비움 (소켓은 닫지 않음)"""
+    try:
+        from database import engine
+        engine.dispose(close=False)
+    except Exception as e:
+        server.log.warning(f"[Preload] engine dispose failed: {e}")
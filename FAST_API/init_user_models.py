@@ -81,6 +81,14 @@ def get_user_playlists(db: Session, user_id: int) -> list:
         return []
 
 
+def _save_m1_base_heads(user_model_path: Path) -> None:
+    """기본 M1 모델의 헤드만 사용자 경로에 저장 (피처 파이프라인은 공유 저장소 참조)"""
+    from M1.spotify_recommender import AudioFeaturePredictor
+    predictor = AudioFeaturePredictor(model_type='Ridge')
+    predictor.load(str(M1_BASE_MODEL))
+    predictor.save(str(user_model_path), share_pipeline=True)
+
+
 def train_m1_model(email: str, user_id: int, tracks: list, db: Session) -> dict:
     """M1 모델 학습: 사용자 플레이리스트 기반 Ridge 모델"""
     try:
@@ -98,7 +106,7 @@ def train_m1_model(email: str, user_id: int, tracks: list, db: Session) -> dict:
         if not tracks:
             print(f"[M1] 트랙 없음 - 기본 모델 복사")
             if M1_BASE_MODEL.exists():
-                shutil.copy2(M1_BASE_MODEL, user_model_path)
+                _save_m1_base_heads(user_model_path)
                 print(f"[M1] 기본 모델 복사 완료: {user_model_path}")
                 logger.info(f"[M1] 기본 모델 복사 (트랙 없음): {user_model_path}")
                 return {"success": True, "path": str(user_model_path), "status": "base_model_copied"}
@@ -130,7 +138,7 @@ def train_m1_model(email: str, user_id: int, tracks: list, db: Session) -> dict:
                 print(f"[M1] 학습 실패: {train_result.get('message')}")
                 logger.warning(f"[M1] 학습 실패: {train_result.get('message')}")
                 # 학습 실패시 기본 모델 복사
-                shutil.copy2(M1_BASE_MODEL, user_model_path)
+                _save_m1_base_heads(user_model_path)
                 return {"success": True, "path": str(user_model_path), "status": "base_model_copied"}
 
         except Exception as e:
@@ -139,7 +147,7 @@ def train_m1_model(email: str, user_id: int, tracks: list, db: Session) -> dict:
             traceback.print_exc()
             logger.warning(f"[M1] 학습 실패, 기본 모델 복사: {e}")
             if M1_BASE_MODEL.exists():
-                shutil.copy2(M1_BASE_MODEL, user_model_path)
+                _save_m1_base_heads(user_model_path)
                 return {"success": True, "path": str(user_model_path), "status": "base_model_copied"}
             return {"success": False, "error": str(e)}
 
@@ -7,6 +7,10 @@ Models:
 - M2: Content-based Recommendation (TF-IDF + GBR)
 - M3: Collaborative Filtering (CatBoost)
 """
+# 스레드 예산: BLAS/OpenMP 스레드 환경변수는 numpy/torch import 전에 설정해야 적용됨
+import thread_budget
+thread_budget.configure_env()
+
 from fastapi import FastAPI, HTTPException, Query
 import logging
 
@@ -17,7 +21,7 @@ logging.basicConfig(
 )
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any
 from contextlib import asynccontextmanager
 import uvicorn
 import os
@@ -27,6 +31,20 @@ import numpy as np
 # 현재 디렉토리를 path에 추가
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from fastapi import Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+import asyncio
+import time
+import metrics
+from metrics import stage
+from recommend_stream import STREAM_CHUNK_SIZE, RunningTopK, StreamResult, chunks, stream_recommendation
+from recommendation_cache import get_recommendation_cache
+from singleflight import all_stats as singleflight_stats, get_singleflight
+from startup import get_orchestrator
+
+# 라우터는 즉시 등록, 무거운 서브시스템은 lifespan에서 병렬 백그라운드 로드
+orchestrator = get_orchestrator()
+
 
 # ==================== Lifespan (시작/종료 이벤트) ====================
 
@@ -38,16 +56,6 @@ async def lifespan(app: FastAPI):
     print("[START] AI Music Analysis API")
     print("=" * 60)
     
-    # DB 연결 테스트
-    try:
-        from database import test_connection
-        if test_connection():
-            print("[OK] Database connected")
-        else:
-            print("[WARN] Database connection failed - API continues")
-    except Exception as e:
-        print(f"[WARN] Database module load failed: {e}")
-    
     # M1 모델 상태
     try:
         model_path = os.path.join(os.path.dirname(__file__), "M1", "audio_predictor.pkl")
@@ -57,12 +65,17 @@ async def lifespan(app: FastAPI):
             print(f"[WARN] M1 model not found: {model_path}")
     except Exception as e:
         print(f"[WARN] M1 model check failed: {e}")
+
+    # DB 확인 + 무거운 서브시스템 병렬 로드 → 워밍업 (기다리지 않음, 상태는 /ready)
+    orchestrator.start()
+    print(f"[OK] Background loading: {', '.join(orchestrator.subsystems)}")
     
     print("=" * 60)
     
     yield  # 앱 실행
     
     # 종료 시
+    await orchestrator.stop()
     print("[STOP] AI Music Analysis API")
 
 
@@ -107,7 +120,8 @@ app.add_middleware(
 # ==================== M1 Router 등록 ====================
 
 try:
-    from M1.router import router as m1_router
+    with orchestrator.timed_import("M1.router"):
+        from M1.router import router as m1_router
     app.include_router(m1_router)
     print("[OK] M1 Router registered")
 except Exception as e:
@@ -117,7 +131,8 @@ except Exception as e:
 # ==================== M2 Router 등록 ====================
 
 try:
-    from M2.router import router as m2_router
+    with orchestrator.timed_import("M2.router"):
+        from M2.router import router as m2_router
     app.include_router(m2_router)
     print("[OK] M2 Router registered")
 except Exception as e:
@@ -127,7 +142,8 @@ except Exception as e:
 # ==================== M3 Router 등록 ====================
 
 try:
-    from M3.router import router as m3_router
+    with orchestrator.timed_import("M3.router"):
+        from M3.router import router as m3_router
     app.include_router(m3_router)
     print("[OK] M3 Router registered")
 except Exception as e:
@@ -137,7 +153,8 @@ except Exception as e:
 # ==================== User Model Initialization Router 등록 ====================
 
 try:
-    from init_user_models import router as init_models_router
+    with orchestrator.timed_import("init_user_models"):
+        from init_user_models import router as init_models_router
     app.include_router(init_models_router, prefix="/api")
     print("[OK] User Model Initialization Router registered")
 except Exception as e:
@@ -147,7 +164,8 @@ except Exception as e:
 # ==================== Audio Enrichment Router 등록 ====================
 
 try:
-    from audio_enrichment import router as enrichment_router
+    with orchestrator.timed_import("audio_enrichment"):
+        from audio_enrichment import router as enrichment_router
     app.include_router(enrichment_router)
     print("[OK] Audio Enrichment Router registered")
 except Exception as e:
@@ -157,7 +175,8 @@ except Exception as e:
 # ==================== QLTY (Audio Feature Enrichment Pipeline) Router 등록 ====================
 
 try:
-    from QLTY.router import router as qlty_router
+    with orchestrator.timed_import("QLTY.router"):
+        from QLTY.router import router as qlty_router
     app.include_router(qlty_router)
     print("[OK] QLTY Router registered (/api/qlty)")
 except Exception as e:
@@ -172,11 +191,12 @@ try:
     if l1_path not in sys.path:
         sys.path.insert(0, l1_path)
 
-    from app.routers.Kuka.recommend import router as kuka_router
-    from app.services.Kuka.service import spotify_service
+    with orchestrator.timed_import("L1.Kuka.router"):
+        from app.routers.Kuka.recommend import router as kuka_router
+        from app.services.Kuka.service import spotify_service
 
-    # 데이터 로딩 (서버 시작 시)
-    spotify_service.load()
+    # 데이터 로딩 (parquet + FAISS 인덱스) → 백그라운드, 준비 전 /api/spotify 요청은 503
+    orchestrator.register("kuka", spotify_service.load, prefixes=("/api/spotify",))
 
     app.include_router(kuka_router)
     print("[OK] L1 Kuka Router registered (/api/spotify/recommend)")
@@ -192,7 +212,13 @@ try:
     if l2_path not in sys.path:
         sys.path.insert(0, l2_path)
 
-    from app.router.llm import router as l2_router
+    with orchestrator.timed_import("L2.llm.router"):
+        from app.router.llm import router as l2_router
+        from app.services.llm.vector_search import get_vector_search_service
+
+    # ChromaDB 클라이언트 + 컬렉션 → 백그라운드
+    orchestrator.register("l2_vector_search", get_vector_search_service, prefixes=("/api/llm",))
+
     app.include_router(l2_router)
     print("[OK] L2 Deep Dive Router registered (/api/llm)")
 except Exception as e:
@@ -201,6 +227,190 @@ except Exception as e:
     print(f"[WARN] L2 Deep Dive Router failed: {e}")
 
 
+# ==================== 백그라운드 서브시스템 등록 ====================
+
+def _check_database():
+    from database import test_connection
+    return test_connection()
+
+
+def _load_embedding():
+    from embedding_service import get_embedding_service
+    return get_embedding_service().load()
+
+
+def _load_qlty_dl_model():
+    # 모델 파일이 없어도 나머지 tier로 동작하므로 실패로 보지 않음
+    from QLTY.pipeline import _get_dl_model
+    _get_dl_model()
+
+
+def _load_m3_catalog():
+    # 데이터셋 파일이 없으면 M3는 DB EMS 트랙을 사용하므로 실패로 보지 않음
+    from M3.service import DATASET_PATH, get_m3_service
+    if DATASET_PATH.exists():
+        return get_m3_service()._load_dataset()
+
+
+orchestrator.register("database", _check_database, critical=True)
+orchestrator.register("embedding", _load_embedding, prefixes=("/api/m2",))
+orchestrator.register("qlty_dl_model", _load_qlty_dl_model, prefixes=("/api/qlty",))
+orchestrator.register("m3_catalog", _load_m3_catalog)
+
+# 로드 완료 후 라이브러리별 스레드 수를 서빙 예산으로 맞춘 뒤 (THREADS_SERVE / THREADS_TRAIN)
+# 합성 입력으로 첫 추론 경로 예열 (WARMUP_ENABLED / WARMUP_STEPS / WARMUP_BATCH_SIZES)
+from warmup import register_warmup_steps
+orchestrator.register_warmup("thread_budget", thread_budget.get_thread_budget().apply_serving)
+register_warmup_steps(orchestrator)
+
+
+@app.middleware("http")
+async def readiness_gate(request: Request, call_next):
+    """로드 중인 서브시스템의 경로는 503 + Retry-After"""
+    subsystem = orchestrator.blocking_subsystem(request.url.path)
+    if subsystem is not None:
+        return JSONResponse(
+            status_code=503,
+            content={
+                "detail": f"{subsystem.name} is {subsystem.state}",
+                "subsystem": subsystem.name,
+                "state": subsystem.state,
+                "error": subsystem.error,
+            },
+            headers={"Retry-After": "5"},
+        )
+    return await call_next(request)
+
+
+@app.get("/ready")
+async def readiness_check():
+    """서브시스템별 준비 상태 (critical 서브시스템이 모두 준비되면 200, 아니면 503)"""
+    await orchestrator.retry_failed()
+    report = orchestrator.report()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
+
+# ==================== 메트릭 (/metrics) ====================
+
+def _route_template(request: Request) -> str:
+    """레이블 폭증 방지: 실제 경로 대신 라우트 템플릿 (/api/user/{user_id}/model)"""
+    route = request.scope.get("route")
+    if route is not None:
+        return getattr(route, "path", "unmatched")
+    from starlette.routing import Match
+    for candidate in request.app.router.routes:
+        if candidate.matches(request.scope)[0] == Match.FULL:
+            return getattr(candidate, "path", "unmatched")
+    return "unmatched"
+
+
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    """요청 지연시간 + 요청 안의 단계(stage) 시간을 라우트 템플릿 레이블로 기록"""
+    buffer, token = metrics.begin_request()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.end_request(
+            buffer, token, _route_template(request), request.method, status,
+            time.perf_counter() - start,
+        )
+
+
+def _cache_samples():
+    """이미 만들어진 캐시의 hits/misses (새로 만들지 않음)"""
+    caches = {}
+    if "M2.m2" in sys.modules and sys.modules["M2.m2"]._lastfm_service is not None:
+        caches["lastfm_tags"] = sys.modules["M2.m2"]._lastfm_service.cache.stats()
+    if "M1.profile_store" in sys.modules:
+        for i, store in enumerate(list(sys.modules["M1.profile_store"]._profile_stores.values())):
+            caches["m1_profile" if i == 0 else f"m1_profile_{i}"] = store.stats()
+    if "app.services.llm.explainer" in sys.modules:
+        caches["l2_explanation"] = sys.modules["app.services.llm.explainer"].get_explanation_cache_stats()
+    if "app.services.llm.query_analyzer" in sys.modules:
+        caches["l2_query_analysis"] = sys.modules["app.services.llm.query_analyzer"].get_query_analyzer().cache.stats()
+    if orchestrator.is_ready("l2_vector_search"):
+        from app.services.llm.vector_search import get_vector_search_service
+        for name, cache_stats in get_vector_search_service().cache_stats().items():
+            caches[f"l2_{name}"] = cache_stats
+
+    caches["recommendation"] = get_recommendation_cache().stats()
+
+    hits = [({"cache": name}, s.get("hits", 0)) for name, s in caches.items()]
+    misses = [({"cache": name}, s["misses"]) for name, s in caches.items() if "misses" in s]
+    sizes = [({"cache": name}, s["bytes"]) for name, s in caches.items() if "bytes" in s]
+    return [
+        ("music_cache_hits_total", "counter", "Cache hits (from each cache's own stats)", hits),
+        ("music_cache_misses_total", "counter", "Cache misses (from each cache's own stats)", misses),
+        ("music_cache_bytes", "gauge", "Cache memory usage in bytes (Redis: whole instance)", sizes),
+    ]
+
+
+def _runtime_samples():
+    """서브시스템 상태, 임베딩 micro-batch, 스레드 예산"""
+    samples = [(
+        "music_subsystem_ready", "gauge", "1 if the startup subsystem is ready",
+        [({"subsystem": name}, int(s.state == "ready")) for name, s in orchestrator.subsystems.items()],
+    )]
+    from embedding_service import get_embedding_service
+    embedding = get_embedding_service().stats()
+    samples.append((
+        "music_embedding_texts_total", "counter", "Texts requested / actually encoded by the shared MiniLM",
+        [({"kind": "requested"}, embedding["texts_requested"]), ({"kind": "encoded"}, embedding["texts_encoded"])],
+    ))
+    flights = singleflight_stats()
+    samples.append((
+        "music_singleflight_calls_total", "counter",
+        "Identical concurrent calls: executed once vs coalesced onto an in-flight call",
+        [({"group": g, "outcome": o}, s[o]) for g, s in flights.items() for o in ("executed", "coalesced")],
+    ))
+    samples.append((
+        "music_singleflight_inflight", "gauge", "In-flight coalescable calls",
+        [({"group": g}, s["inflight"]) for g, s in flights.items()],
+    ))
+    budget = thread_budget.get_thread_budget().stats()
+    samples.append((
+        "music_thread_budget", "gauge", "Thread budget and live training/inference counts",
+        [({"kind": k}, budget[k]) for k in ("train_active", "inference_active", "oversubscription", "os_threads")],
+    ))
+    return samples
+
+
+def _attach_runtime_histograms():
+    """이미 값을 모으는 기존 히스토그램을 /metrics에 연결"""
+    from embedding_service import BATCH_SIZE_BUCKETS, QUEUE_LATENCY_BUCKETS_MS, get_embedding_service
+    embedding = get_embedding_service()
+    metrics.REGISTRY.histogram(
+        "music_embedding_batch_size", "Texts per MiniLM micro-batch", (), buckets=BATCH_SIZE_BUCKETS,
+    ).attach(embedding.batch_size_hist)
+    metrics.REGISTRY.histogram(
+        "music_embedding_queue_wait_seconds", "Wait time in the MiniLM micro-batch queue", (),
+        buckets=QUEUE_LATENCY_BUCKETS_MS, scale=0.001,
+    ).attach(embedding.queue_latency_hist)
+    budget = thread_budget.get_thread_budget()
+    inference = metrics.REGISTRY.histogram(
+        "music_inference_seconds", "Serving inference latency by training overlap", ("during_training",),
+        buckets=thread_budget.LATENCY_BUCKETS_MS, scale=0.001,
+    )
+    inference.attach(budget.inference_hist, "false")
+    inference.attach(budget.inference_during_train_hist, "true")
+
+
+_attach_runtime_histograms()
+metrics.register_collector("caches", _cache_samples)
+metrics.register_collector("runtime", _runtime_samples)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus 텍스트 포맷"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # ==================== Pydantic Models (공통) ====================
 
 class TrackFeatures(BaseModel):
@@ -310,7 +520,26 @@ async def health_check():
         health_status["models"]["M3"] = len(cbm_files) > 0
     except:
         pass
-    
+
+    # 공유 임베딩 서비스 (배치 크기 / 큐 대기 히스토그램)
+    try:
+        from embedding_service import get_embedding_service
+        health_status["embedding"] = get_embedding_service().stats()
+    except:
+        pass
+
+    # 스레드 예산 (라이브러리별 스레드 수, 학습/추론 경합 지표)
+    try:
+        health_status["threads"] = thread_budget.get_thread_budget().stats()
+    except:
+        pass
+
+    # 추천 결과 캐시 (적중률, 메모리 사용량)
+    try:
+        health_status["recommendation_cache"] = get_recommendation_cache().stats()
+    except:
+        pass
+
     return health_status
 
 
@@ -368,6 +597,7 @@ def save_recommendations_to_gms(db, user_id: int, recommendations: list, model_n
     """추천 결과를 GMS 플레이리스트로 저장"""
     from sqlalchemy import text
     from datetime import datetime
+    from owned_tracks import get_owned_track_index
     
     try:
         # 1. GMS 플레이리스트 생성
@@ -416,6 +646,7 @@ def save_recommendations_to_gms(db, user_id: int, recommendations: list, model_n
                 })
         
         db.commit()
+        get_owned_track_index().invalidate(user_id)
         return playlist_id
         
     except Exception as e:
@@ -440,19 +671,67 @@ async def unified_recommend(request: UnifiedRecommendRequest):
     - M1: Audio Feature Prediction (Ridge)
     - M2: SVM + Text Embedding (393D)
     - M3: CatBoost Collaborative Filtering
+
+    같은 사용자/모델/입력이고 사용자 모델, PMS/GMS, EMS 카탈로그가 그대로면
+    추천 결과 캐시에서 응답 (recommendation_cache.py)
+    같은 요청이 동시에 들어오면 한 번만 계산하고 결과를 함께 받음 (singleflight "score")
     """
+    key = (
+        request.user_id,
+        request.model.upper(),
+        tuple(sorted(request.track_ids)) if request.track_ids else None,
+        request.top_k,
+        request.ems_track_limit,
+    )
+    # 계산은 스레드에서 (이벤트 루프를 막지 않아야 뒤따르는 같은 요청이 합쳐짐)
+    return await get_singleflight("score").do_async(
+        key, lambda: asyncio.to_thread(_cached_recommend, request)
+    )
+
+
+def _cached_recommend(request: UnifiedRecommendRequest) -> Dict[str, Any]:
+    """결과 캐시 조회 → 미스면 계산 후 저장"""
     from database import SessionLocal
-    
+
+    model = request.model.upper()
+    cache = get_recommendation_cache()
+
+    db = SessionLocal()
+    try:
+        key = cache.make_key(
+            db, request.user_id, model, request.track_ids, request.top_k, request.ems_track_limit
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+        response = _unified_recommend(request, db)
+
+        # GMS 저장(+ M2 자동 학습) 이후 상태의 버전으로 저장 → 같은 요청 반복 시 적중
+        if response.get("success"):
+            cache.put(
+                cache.make_key(
+                    db, request.user_id, model, request.track_ids, request.top_k, request.ems_track_limit
+                ),
+                response,
+            )
+        return response
+    finally:
+        db.close()
+
+
+def _unified_recommend(request: UnifiedRecommendRequest, db) -> Dict[str, Any]:
+    """통합 추천 본체 (캐시 미스일 때)"""
     user_id = request.user_id
     model = request.model.upper()
     ems_limit = request.ems_track_limit
     
-    db = SessionLocal()
     try:
         if model == "M1":
             from M1.service import M1RecommendationService
             model_path = os.path.join(os.path.dirname(__file__), "M1", "audio_predictor.pkl")
-            service = M1RecommendationService(model_path=model_path)
+            with stage("M1", "model_load"):
+                service = M1RecommendationService(model_path=model_path)
 
             # EMS 곡 수 설정 적용하여 추천 생성 (track_ids 있으면 해당 트랙만 평가)
             results = service.get_recommendations(
@@ -470,7 +749,8 @@ async def unified_recommend(request: UnifiedRecommendRequest):
             
             # top_k 적용 후 GMS 저장
             results = results.head(request.top_k)
-            playlist_id = service.save_gms_playlist(db, user_id, results)
+            with stage("M1", "gms_persist"):
+                playlist_id = service.save_gms_playlist(db, user_id, results)
 
             recommendations = results.fillna(0).replace([np.inf, -np.inf], 0).to_dict(orient='records')
             
@@ -491,64 +771,28 @@ async def unified_recommend(request: UnifiedRecommendRequest):
             m2_service = get_m2_service()
 
             # EMS에서 후보 트랙 조회 (EMS는 공용)
-            from sqlalchemy import text
-
             # track_ids가 제공되면 해당 트랙만 조회 (데모 페이지에서 동일 트랙 비교용)
-            if request.track_ids and len(request.track_ids) > 0:
-                track_ids_str = ','.join(map(str, request.track_ids))
-                ems_query = text(f"""
-                    SELECT t.track_id, t.title, t.artist, t.album, t.duration, t.external_metadata
-                    FROM tracks t
-                    WHERE t.track_id IN ({track_ids_str})
-                """)
-                ems_result = db.execute(ems_query).fetchall()
-            else:
-                ems_query = text("""
-                    SELECT t.track_id, t.title, t.artist, t.album, t.duration, t.external_metadata
-                    FROM tracks t
-                    JOIN playlist_tracks pt ON t.track_id = pt.track_id
-                    JOIN playlists p ON pt.playlist_id = p.playlist_id
-                    WHERE p.space_type = 'EMS'
-                    ORDER BY RAND()
-                    LIMIT :limit
-                """)
-                ems_result = db.execute(ems_query, {"limit": ems_limit}).fetchall()
-            
-            if not ems_result:
+            with stage("M2", "ems_sql"):
+                candidate_tracks = _fetch_m2_candidates(db, request.track_ids, ems_limit)
+
+            if not candidate_tracks:
                 return {
                     "success": False,
                     "model": "M2",
                     "message": "EMS 데이터 없음",
                     "recommendations": []
                 }
-            
-            # 후보 트랙 변환
-            candidate_tracks = [
-                {
-                    'track_id': r[0],
-                    'track_name': r[1],
-                    'artist': r[2],
-                    'album_name': r[3] or '',
-                    'tags': '',
-                    'duration_ms': (r[4] or 200) * 1000
-                }
-                for r in ems_result
-            ]
-            
+
             # 사용자 모델 존재 여부 확인 → 없으면 자동 학습
-            user_model = m2_service._load_user_model(user_id)
-            if user_model is None:
-                print(f"[M2] 사용자 {user_id} 모델 없음 → 자동 학습 시작")
-                train_result = m2_service.train_user_model(db, user_id)
-                if not train_result.get("success"):
-                    return {
-                        "success": False,
-                        "model": "M2",
-                        "user_id": user_id,
-                        "message": f"M2 모델 자동 학습 실패: {train_result.get('message', 'PMS 데이터 부족')}",
-                        "recommendations": []
-                    }
-                print(f"[M2] 사용자 {user_id} 자동 학습 완료")
+            train_error = _ensure_m2_user_model(db, m2_service, user_id)
+            if train_error:
+                return {
+                    "success": False,
+                    "model": "M2",
+                    "user_id": user_id,
+                    "message": train_error,
+                    "recommendations": []
+                }
 
             # M2 추천 실행
             recommendations = m2_service.get_recommendations(
@@ -561,7 +805,8 @@ async def unified_recommend(request: UnifiedRecommendRequest):
             # GMS 플레이리스트에 저장
             playlist_id = None
             if recommendations:
-                playlist_id = save_recommendations_to_gms(db, user_id, recommendations, "M2")
+                with stage("M2", "gms_persist"):
+                    playlist_id = save_recommendations_to_gms(db, user_id, recommendations, "M2")
             
             return {
                 "success": True,
@@ -589,7 +834,8 @@ async def unified_recommend(request: UnifiedRecommendRequest):
             playlist_id = None
             recommendations = result.get("recommendations", [])
             if recommendations:
-                playlist_id = save_recommendations_to_gms(db, user_id, recommendations, "M3")
+                with stage("M3", "gms_persist"):
+                    playlist_id = save_recommendations_to_gms(db, user_id, recommendations, "M3")
             
             return {
                 "success": True,
@@ -615,8 +861,64 @@ async def unified_recommend(request: UnifiedRecommendRequest):
             "model": model,
             "error": str(e)
         }
-    finally:
-        db.close()
+
+
+def _fetch_m2_candidates(db, track_ids: Optional[List[int]], limit: int, shuffle: bool = True) -> List[Dict]:
+    """M2 후보 트랙 (track_ids가 있으면 해당 트랙만, 없으면 EMS에서 limit곡)"""
+    from sqlalchemy import text
+
+    if track_ids and len(track_ids) > 0:
+        track_ids_str = ','.join(map(str, track_ids))
+        ems_query = text(f"""
+            SELECT t.track_id, t.title, t.artist, t.album, t.duration, t.external_metadata
+            FROM tracks t
+            WHERE t.track_id IN ({track_ids_str})
+        """)
+        ems_result = db.execute(ems_query).fetchall()
+    else:
+        ems_query = text(f"""
+            SELECT t.track_id, t.title, t.artist, t.album, t.duration, t.external_metadata
+            FROM tracks t
+            JOIN playlist_tracks pt ON t.track_id = pt.track_id
+            JOIN playlists p ON pt.playlist_id = p.playlist_id
+            WHERE p.space_type = 'EMS'
+            {"ORDER BY RAND()" if shuffle else ""}
+            LIMIT :limit
+        """)
+        ems_result = db.execute(ems_query, {"limit": limit}).fetchall()
+
+    # 후보 트랙 변환
+    return [
+        {
+            'track_id': r[0],
+            'track_name': r[1],
+            'artist': r[2],
+            'album_name': r[3] or '',
+            'tags': '',
+            'duration_ms': (r[4] or 200) * 1000
+        }
+        for r in ems_result
+    ]
+
+
+def _ensure_m2_user_model(db, m2_service, user_id: int) -> Optional[str]:
+    """M2 사용자 모델이 없으면 자동 학습 (실패 시 오류 메시지)"""
+    if m2_service._load_user_model(user_id) is not None:
+        return None
+    print(f"[M2] 사용자 {user_id} 모델 없음 → 자동 학습 시작")
+    with stage("M2", "train"):
+        train_result = _train_once(
+            "M2", user_id, lambda: m2_service.train_user_model(db, user_id)
+        )
+    if not train_result.get("success"):
+        return f"M2 모델 자동 학습 실패: {train_result.get('message', 'PMS 데이터 부족')}"
+    print(f"[M2] 사용자 {user_id} 자동 학습 완료")
+    return None
+
+
+def _train_once(model: str, user_id: int, train: Callable[[], Dict]) -> Dict:
+    """같은 사용자/모델 학습이 이미 진행 중이면 새로 시작하지 않고 그 결과를 받음 (singleflight "train")"""
+    return get_singleflight("train").do((model, user_id), train)
 
 
 @app.post("/api/analyze")
@@ -625,15 +927,23 @@ async def unified_analyze(request: dict):
     통합 분석 API - 선택된 모델로 사용자 분석 및 학습
     
     Required: userid, model (M1/M2/M3)
+    같은 사용자/모델 분석이 진행 중이면 그 결과를 함께 받음 (singleflight "train")
     """
-    from database import SessionLocal
-    
     user_id = int(request.get("userid", 0))
     model = request.get("model", "M1").upper()
     
     if user_id == 0:
         return {"success": False, "message": "userid is required"}
-    
+
+    return await get_singleflight("train").do_async(
+        ("analyze", user_id, model), lambda: _unified_analyze(user_id, model)
+    )
+
+
+async def _unified_analyze(user_id: int, model: str) -> Dict[str, Any]:
+    """통합 분석 본체"""
+    from database import SessionLocal
+
     db = SessionLocal()
     try:
         if model == "M1":
@@ -647,8 +957,10 @@ async def unified_analyze(request: dict):
 
             m2_service = get_m2_service()
 
-            # M2 모델 학습 (내부에서 PMS/EMS 조회)
-            result = m2_service.train_user_model(db, user_id)
+            # M2 모델 학습 (내부에서 PMS/EMS 조회, 추천의 자동 학습과 같은 키)
+            result = await asyncio.to_thread(
+                _train_once, "M2", user_id, lambda: m2_service.train_user_model(db, user_id)
+            )
 
             return {
                 "success": result.get("success", False),
@@ -667,7 +979,9 @@ async def unified_analyze(request: dict):
             m3_service = get_m3_service()
 
             # 모델 학습
-            train_result = m3_service.train_user_model(db, user_id)
+            train_result = await asyncio.to_thread(
+                _train_once, "M3", user_id, lambda: m3_service.train_user_model(db, user_id)
+            )
 
             return {
                 "success": train_result.get("success", False),
@@ -722,15 +1036,25 @@ async def update_user_model_preference(user_id: int, request: UpdateModelRequest
     1. user_preferences 테이블에 모델 저장
     2. 선택한 모델 재학습 (모델 파일 갱신)
     3. 선택한 모델로 GMS 추천 재생성
-    """
-    from database import SessionLocal
-    from sqlalchemy import text
-    from init_user_models import generate_gms_recommendations
 
+    같은 사용자/모델 변경이 진행 중이면 그 결과를 함께 받음 (singleflight "train")
+    """
     model = request.model.upper()
     if model not in ["M1", "M2", "M3"]:
         return {"success": False, "error": f"Invalid model: {model}. Must be M1, M2, or M3"}
 
+    return await get_singleflight("train").do_async(
+        ("settings", user_id, model),
+        lambda: asyncio.to_thread(_update_user_model_preference, user_id, model),
+    )
+
+
+def _update_user_model_preference(user_id: int, model: str) -> Dict[str, Any]:
+    """모델 변경 본체 (스레드에서 실행)"""
+    from database import SessionLocal
+    from sqlalchemy import text
+    from init_user_models import generate_gms_recommendations
+
     db = SessionLocal()
     try:
         # 0. 유저 이메일 조회 (M1 학습에 필요)
@@ -765,7 +1089,9 @@ async def update_user_model_preference(user_id: int, request: UpdateModelRequest
         elif model == "M2":
             from M2.service import get_m2_service
             m2_service = get_m2_service()
-            retrain_result = m2_service.train_user_model(db, user_id, email)
+            retrain_result = _train_once(
+                "M2", user_id, lambda: m2_service.train_user_model(db, user_id, email)
+            )
             print(f"[Settings] M2 모델 재학습 완료: user_id={user_id}")
         elif model == "M3":
             from M3.m3_service import M3Service
@@ -809,7 +1135,6 @@ async def cart_analysis(request: CartAnalysisRequest):
     3. 추천 결과를 GMS 플레이리스트로 저장
     """
     from database import SessionLocal
-    from sqlalchemy import text
     
     user_id = request.userId
     model = request.model.upper()
@@ -817,26 +1142,14 @@ async def cart_analysis(request: CartAnalysisRequest):
     db = SessionLocal()
     try:
         # 1. 장바구니 플레이리스트 조회 (최근 생성된 "분석 요청" 플레이리스트)
-        playlist_query = text("""
-            SELECT p.playlist_id
-            FROM playlists p
-            WHERE p.user_id = :user_id
-              AND p.title LIKE '분석 요청%'
-              AND p.space_type = 'EMS'
-              AND p.status_flag = 'PTP'
-            ORDER BY p.created_at DESC
-            LIMIT 1
-        """)
-        playlist_result = db.execute(playlist_query, {"user_id": user_id}).fetchone()
+        playlist_id = _find_cart_playlist(db, user_id)
         
-        if not playlist_result:
+        if playlist_id is None:
             return {
                 "success": False,
                 "message": "장바구니 플레이리스트를 찾을 수 없습니다."
             }
         
-        playlist_id = playlist_result[0]
-        
         # 2. 해당 모델로 추천 생성
         if model == "M1":
             from M1.service import M1RecommendationService
@@ -856,13 +1169,7 @@ async def cart_analysis(request: CartAnalysisRequest):
             gms_playlist_id = service.save_gms_playlist(db, user_id, results)
             
             # 플레이리스트 상태 업데이트 (GMS로 이동)
-            update_status = text("""
-                UPDATE playlists 
-                SET status_flag = 'PRP', space_type = 'GMS'
-                WHERE playlist_id = :playlist_id
-            """)
-            db.execute(update_status, {"playlist_id": playlist_id})
-            db.commit()
+            _mark_cart_analyzed(db, playlist_id)
             
             return {
                 "success": True,
@@ -878,34 +1185,14 @@ async def cart_analysis(request: CartAnalysisRequest):
             m2_service = get_m2_service()
             
             # EMS 플레이리스트 트랙 조회 (EMS는 공용)
-            ems_query = text("""
-                SELECT t.track_id, t.title, t.artist, t.album, t.duration, t.external_metadata
-                FROM tracks t
-                JOIN playlist_tracks pt ON t.track_id = pt.track_id
-                JOIN playlists p ON pt.playlist_id = p.playlist_id
-                WHERE p.space_type = 'EMS'
-                LIMIT 1000
-            """)
-            ems_result = db.execute(ems_query).fetchall()
-            
-            if not ems_result:
+            candidate_tracks = _fetch_m2_candidates(db, None, 1000, shuffle=False)
+            
+            if not candidate_tracks:
                 return {
                     "success": False,
                     "message": "EMS 트랙이 없습니다."
                 }
             
-            candidate_tracks = [
-                {
-                    'track_id': r[0],
-                    'track_name': r[1],
-                    'artist': r[2],
-                    'album_name': r[3] or '',
-                    'tags': '',
-                    'duration_ms': (r[4] or 200) * 1000
-                }
-                for r in ems_result
-            ]
-            
             recommendations = m2_service.get_recommendations(
                 user_id=user_id,
                 candidate_tracks=candidate_tracks,
@@ -917,13 +1204,7 @@ async def cart_analysis(request: CartAnalysisRequest):
             gms_playlist_id = save_recommendations_to_gms(db, user_id, recommendations, "M2")
             
             # 플레이리스트 상태 업데이트
-            update_status = text("""
-                UPDATE playlists 
-                SET status_flag = 'PRP', space_type = 'GMS'
-                WHERE playlist_id = :playlist_id
-            """)
-            db.execute(update_status, {"playlist_id": playlist_id})
-            db.commit()
+            _mark_cart_analyzed(db, playlist_id)
             
             return {
                 "success": True,
@@ -949,13 +1230,7 @@ async def cart_analysis(request: CartAnalysisRequest):
                 gms_playlist_id = save_recommendations_to_gms(db, user_id, recommendations, "M3")
             
             # 플레이리스트 상태 업데이트
-            update_status = text("""
-                UPDATE playlists 
-                SET status_flag = 'PRP', space_type = 'GMS'
-                WHERE playlist_id = :playlist_id
-            """)
-            db.execute(update_status, {"playlist_id": playlist_id})
-            db.commit()
+            _mark_cart_analyzed(db, playlist_id)
             
             return {
                 "success": True,
@@ -981,6 +1256,276 @@ async def cart_analysis(request: CartAnalysisRequest):
     finally:
         db.close()
 
+def _find_cart_playlist(db, user_id: int) -> Optional[int]:
+    """최근 생성된 장바구니("분석 요청") 플레이리스트 ID"""
+    from sqlalchemy import text
+
+    playlist_query = text("""
+        SELECT p.playlist_id
+        FROM playlists p
+        WHERE p.user_id = :user_id
+          AND p.title LIKE '분석 요청%'
+          AND p.space_type = 'EMS'
+          AND p.status_flag = 'PTP'
+        ORDER BY p.created_at DESC
+        LIMIT 1
+    """)
+    playlist_result = db.execute(playlist_query, {"user_id": user_id}).fetchone()
+    return playlist_result[0] if playlist_result else None
+
+
+def _mark_cart_analyzed(db, playlist_id: int) -> None:
+    """장바구니 플레이리스트 상태 업데이트 (GMS로 이동)"""
+    from sqlalchemy import text
+
+    update_status = text("""
+        UPDATE playlists 
+        SET status_flag = 'PRP', space_type = 'GMS'
+        WHERE playlist_id = :playlist_id
+    """)
+    db.execute(update_status, {"playlist_id": playlist_id})
+    db.commit()
+
+
+# ==================== 스트리밍 추천 API (SSE) ====================
+
+def _score_records(results) -> List[Dict]:
+    """M1 결과 DataFrame → JSON 레코드 (NaN/Infinity 처리)"""
+    return results.fillna(0).replace([np.inf, -np.inf], 0).to_dict(orient='records')
+
+
+def _m1_stream_steps(db, user_id: int, ems_limit: int, track_ids: Optional[List[int]], top_k: int):
+    """M1 후보를 청크 단위로 점수 계산 → (service, GMS 선정 결과 DataFrame 또는 None)"""
+    import pandas as pd
+    from M1.service import M1RecommendationService
+
+    model_path = os.path.join(os.path.dirname(__file__), "M1", "audio_predictor.pkl")
+    with stage("M1", "model_load"):
+        service = M1RecommendationService(model_path=model_path)
+
+    recommender, ems_df = service.prepare_candidates(db, user_id, ems_limit=ems_limit, track_ids=track_ids)
+    if recommender is None:
+        return service, None
+
+    yield {"event": "start", "model": "M1", "candidates": len(ems_df), "chunk_size": STREAM_CHUNK_SIZE}
+    running = RunningTopK(top_k, "final_score")
+    scored = []
+    for chunk in chunks(ems_df):
+        chunk_scores = service.score_candidates(recommender, chunk)
+        scored.append(chunk_scores)
+        running.extend(_score_records(chunk_scores))
+        yield {
+            "event": "provisional",
+            "scored": sum(len(c) for c in scored),
+            "total": len(ems_df),
+            "recommendations": running.snapshot(),
+        }
+
+    # 최종 선정은 일괄 계산과 같은 규칙 (threshold, 최소 20곡 보완, 중복 제거)
+    return service, service.select_gms_tracks(pd.concat(scored), user_id, len(ems_df))
+
+
+def _m2_stream_steps(user_id: int, candidate_tracks: List[Dict], top_k: int, threshold: float = 0.5):
+    """M2 후보를 청크 단위로 SVM 확률 계산 → threshold 이상 상위 top_k (get_recommendations와 같은 결과)"""
+    from M2.service import get_m2_service
+
+    m2_service = get_m2_service()
+    yield {"event": "start", "model": "M2", "candidates": len(candidate_tracks), "chunk_size": STREAM_CHUNK_SIZE}
+    running = RunningTopK(top_k, "probability")
+    scored = 0
+    for chunk in chunks(candidate_tracks):
+        results = m2_service.score_candidates(user_id, chunk)
+        running.extend(r for r in results if r['probability'] >= threshold)
+        scored += len(chunk)
+        yield {
+            "event": "provisional",
+            "scored": scored,
+            "total": len(candidate_tracks),
+            "recommendations": running.snapshot(),
+        }
+    return running.snapshot()
+
+
+def _persist_after_final(save: Callable[[Any], Dict]) -> Callable[[], Dict]:
+    """final 이후 스레드에서 실행할 GMS 저장 (스트림의 세션은 이미 반환됐으므로 새 세션)"""
+    def persist() -> Dict:
+        from database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            return save(db)
+        finally:
+            db.close()
+    return persist
+
+
+@app.post("/api/recommend/stream")
+async def unified_recommend_stream(request: UnifiedRecommendRequest):
+    """
+    통합 추천 스트리밍 버전 (SSE, recommend_stream.py)
+
+    ems_track_limit이 클 때 후보를 청크 단위로 점수 계산하면서 누적 top-k를
+    provisional 이벤트로 먼저 보내고, /api/recommend와 같은 최종 결과를 final 이벤트로 보낸 뒤
+    GMS에 저장 (persisted 이벤트에 playlist_id). 결과 캐시는 /api/recommend와 공유
+    - M3는 데이터셋 전체를 한 번에 점수 계산하므로 provisional 없이 final만
+    """
+    return stream_recommendation("/api/recommend/stream", lambda: _recommend_stream_steps(request))
+
+
+def _recommend_stream_steps(request: UnifiedRecommendRequest):
+    from database import SessionLocal
+
+    user_id = request.user_id
+    model = request.model.upper()
+    ems_limit = request.ems_track_limit
+    cache = get_recommendation_cache()
+    cache_args = (request.track_ids, request.top_k, ems_limit)
+
+    db = SessionLocal()
+    try:
+        cached = cache.get(cache.make_key(db, user_id, model, *cache_args))
+        if cached is not None:
+            return StreamResult(cached)
+
+        if model == "M1":
+            service, results = yield from _m1_stream_steps(db, user_id, ems_limit, request.track_ids, request.top_k)
+            if results is None or results.empty:
+                return StreamResult({
+                    "success": False,
+                    "model": "M1",
+                    "message": "No recommendations found",
+                    "ems_track_limit": ems_limit,
+                    "recommendations": []
+                })
+            results = results.head(request.top_k)
+            recommendations = _score_records(results)
+            response = {"success": True, "model": "M1", "user_id": user_id, "ems_track_limit": ems_limit}
+            save_gms = lambda session: service.save_gms_playlist(session, user_id, results)
+
+        elif model == "M2":
+            from M2.service import get_m2_service
+
+            with stage("M2", "ems_sql"):
+                candidate_tracks = _fetch_m2_candidates(db, request.track_ids, ems_limit)
+            if not candidate_tracks:
+                return StreamResult({"success": False, "model": "M2", "message": "EMS 데이터 없음", "recommendations": []})
+
+            train_error = _ensure_m2_user_model(db, get_m2_service(), user_id)
+            if train_error:
+                return StreamResult({
+                    "success": False, "model": "M2", "user_id": user_id, "message": train_error, "recommendations": []
+                })
+
+            recommendations = yield from _m2_stream_steps(user_id, candidate_tracks, request.top_k)
+            response = {"success": True, "model": "M2", "user_id": user_id, "ems_track_limit": ems_limit}
+            save_gms = lambda session: save_recommendations_to_gms(session, user_id, recommendations, "M2")
+
+        elif model == "M3":
+            from M3.service import get_m3_service
+
+            result = get_m3_service().get_recommendations(db, user_id, top_k=request.top_k, track_ids=request.track_ids)
+            if not result.get("success"):
+                return StreamResult(result)
+            recommendations = result.get("recommendations", [])
+            response = {
+                "success": True, "model": "M3", "user_id": user_id, "model_used": result.get("model_used"),
+            }
+            save_gms = lambda session: save_recommendations_to_gms(session, user_id, recommendations, "M3")
+
+        else:
+            return StreamResult({"success": False, "message": f"Unknown model: {model}. Use M1, M2, or M3"})
+    finally:
+        db.close()
+
+    response.update({"count": len(recommendations), "recommendations": recommendations})
+
+    def save(session) -> Dict:
+        playlist_id = None
+        if recommendations:
+            with stage(model, "gms_persist"):
+                playlist_id = save_gms(session)
+        # /api/recommend와 같은 응답을 저장 후 버전으로 캐시
+        cache.put(
+            cache.make_key(session, user_id, model, *cache_args),
+            {**response, "playlist_id": playlist_id},
+        )
+        return {"playlist_id": playlist_id}
+
+    return StreamResult(response, _persist_after_final(save))
+
+
+@app.post("/api/v1/evaluation/start/stream")
+async def cart_analysis_stream(request: CartAnalysisRequest):
+    """
+    장바구니 분석 스트리밍 버전 (SSE)
+
+    /api/v1/evaluation/start와 같은 후보 (M1: EMS 1000곡, M2: EMS 1000곡 중 top 20, M3: top 20)를
+    청크 단위로 점수 계산하며 provisional 이벤트를 보내고, final 이후 GMS 저장 + 장바구니 상태 변경
+    (persisted 이벤트에 gmsPlaylistId)
+    """
+    return stream_recommendation("/api/v1/evaluation/start/stream", lambda: _cart_analysis_stream_steps(request))
+
+
+def _cart_analysis_stream_steps(request: CartAnalysisRequest):
+    from database import SessionLocal
+
+    user_id = request.userId
+    model = request.model.upper()
+
+    db = SessionLocal()
+    try:
+        playlist_id = _find_cart_playlist(db, user_id)
+        if playlist_id is None:
+            return StreamResult({"success": False, "message": "장바구니 플레이리스트를 찾을 수 없습니다."})
+
+        if model == "M1":
+            # 일반 API와 같이 GMS 선정 결과 전체를 저장 (provisional은 top 20)
+            service, results = yield from _m1_stream_steps(db, user_id, 1000, None, 20)
+            if results is None or results.empty:
+                return StreamResult({"success": False, "message": "추천할 트랙이 없습니다."})
+            recommendations = _score_records(results)
+            save_gms = lambda session: service.save_gms_playlist(session, user_id, results)
+
+        elif model == "M2":
+            candidate_tracks = _fetch_m2_candidates(db, None, 1000, shuffle=False)
+            if not candidate_tracks:
+                return StreamResult({"success": False, "message": "EMS 트랙이 없습니다."})
+            recommendations = yield from _m2_stream_steps(user_id, candidate_tracks, 20)
+            save_gms = lambda session: save_recommendations_to_gms(session, user_id, recommendations, "M2")
+
+        elif model == "M3":
+            from M3.service import get_m3_service
+
+            result = get_m3_service().get_recommendations(db, user_id, top_k=20)
+            if not result.get("success"):
+                return StreamResult(result)
+            recommendations = result.get("recommendations", [])
+            save_gms = (
+                (lambda session: save_recommendations_to_gms(session, user_id, recommendations, "M3"))
+                if recommendations else (lambda session: None)
+            )
+
+        else:
+            return StreamResult({"success": False, "message": f"Unknown model: {model}"})
+    finally:
+        db.close()
+
+    def save(session) -> Dict:
+        gms_playlist_id = save_gms(session)
+        _mark_cart_analyzed(session, playlist_id)
+        return {"gmsPlaylistId": gms_playlist_id, "message": "장바구니 분석 완료"}
+
+    response = {
+        "success": True,
+        "model": model,
+        "userId": user_id,
+        "playlistId": playlist_id,
+        "count": len(recommendations),
+        "recommendations": recommendations,
+    }
+    return StreamResult(response, _persist_after_final(save))
+
+
 # ==================== 서버 실행 ====================
 
 if __name__ == "__main__":
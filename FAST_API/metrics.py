@@ -0,0 +1,284 @@
+"""
+요청 단계별 지연시간 계측 + Prometheus 텍스트 포맷 (/metrics)
+
+외부 의존성 없이 고정 버킷 히스토그램과 카운터만 사용합니다.
+
+- stage(model, name): 요청 안의 단계(ems_sql, features, inference, gms_persist 등) 시간
+  → music_stage_duration_seconds{endpoint, model, stage}
+  endpoint는 미들웨어가 요청이 끝날 때 라우트 템플릿(/api/user/{user_id}/model)으로 채우고,
+  요청 밖(백그라운드 학습 등)에서 기록되면 endpoint="background"
+- record_external(service, outcome, seconds): 외부 호출 결과 (ReccoBeats, Last.fm, Gemini)
+- record_cache(cache, hit): 캐시 적중/미스
+- register_collector(fn): 기존 stats()가 있는 객체는 /metrics 요청 시점에 값을 읽어 노출
+- begin_stream / end_stream: SSE 스트리밍 응답 본문의 첫 결과 / 최종 결과 시간과 단계
+  → music_stream_duration_seconds{endpoint, phase}
+
+오버헤드: 단계당 perf_counter 2회 + 리스트 append, 히스토그램 반영은 요청 종료 시 한 번
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 초 단위 (Prometheus 관례)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histogram:
+    """고정 버킷 히스토그램 (버킷별 누적 개수, Prometheus le 방식)"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # 마지막 = +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def _raw(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+
+    def snapshot(self) -> Dict[str, object]:
+        counts, total, count = self._raw()
+        cumulative, running = {}, 0
+        for bound, c in zip(list(self.buckets) + ["+Inf"], counts):
+            running += c
+            cumulative[str(bound)] = running
+        return {"buckets": cumulative, "sum": round(total, 3), "count": count}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class LabeledHistogram:
+    """레이블 조합별 Histogram"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str],
+                 buckets: Sequence[float] = LATENCY_BUCKETS, scale: float = 1.0):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.scale = scale  # 기존 ms 히스토그램을 초 단위로 내보낼 때 0.001
+        self._children: Dict[Tuple[str, ...], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Histogram:
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, Histogram(self.buckets))
+        return child
+
+    def attach(self, histogram: Histogram, *values: str) -> None:
+        """이미 값을 모으고 있는 Histogram을 이 메트릭의 한 레이블 조합으로 노출"""
+        with self._lock:
+            self._children[values] = histogram
+
+    def observe(self, value: float, *values: str) -> None:
+        self.labels(*values).observe(value)
+
+    def render(self, lines: List[str]) -> None:
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} histogram")
+        with self._lock:
+            children = list(self._children.items())
+        for values, hist in children:
+            counts, total, count = hist._raw()
+            running = 0
+            for bound, c in zip(list(hist.buckets) + ["+Inf"], counts):
+                running += c
+                le = "+Inf" if bound == "+Inf" else _format_value(float(bound) * self.scale)
+                labels = _format_labels(self.labelnames, values, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {running}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, values)} {_format_value(total * self.scale)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, values)} {count}")
+
+
+class LabeledCounter:
+    """레이블 조합별 누적 카운터"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str]):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def render(self, lines: List[str]) -> None:
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} counter")
+        with self._lock:
+            items = list(self._values.items())
+        for values, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}")
+
+
+# (메트릭 이름, 타입, 설명, [(레이블 dict, 값), ...])
+Sample = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+class Registry:
+    """메트릭 목록 + 수집 함수 → Prometheus 텍스트 포맷"""
+
+    def __init__(self):
+        self._metrics: List[object] = []
+        self._collectors: Dict[str, Callable[[], Iterable[Sample]]] = {}
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str], **kwargs) -> LabeledHistogram:
+        metric = LabeledHistogram(name, help_text, labelnames, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str]) -> LabeledCounter:
+        metric = LabeledCounter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, key: str, collector: Callable[[], Iterable[Sample]]) -> None:
+        """/metrics 요청 시 호출되는 수집 함수 (같은 key로 다시 등록하면 교체)"""
+        self._collectors[key] = collector
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            metric.render(lines)
+
+        # 여러 수집 함수가 같은 메트릭 이름을 내면 한 블록으로 합침
+        collected: Dict[str, Tuple[str, str, List]] = {}
+        for key, collector in list(self._collectors.items()):
+            try:
+                for name, kind, help_text, samples in collector():
+                    collected.setdefault(name, (kind, help_text, []))[2].extend(samples)
+            except Exception as e:
+                logger.warning(f"[Metrics] collector {key} 실패: {e}")
+        for name, (kind, help_text, samples) in collected.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "music_http_request_duration_seconds", "HTTP request latency", ("endpoint", "method", "status"),
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "music_stage_duration_seconds", "Latency of one stage inside a request", ("endpoint", "model", "stage"),
+)
+EXTERNAL_CALLS = REGISTRY.counter(
+    "music_external_calls_total", "External API calls by outcome", ("service", "outcome"),
+)
+EXTERNAL_SECONDS = REGISTRY.histogram(
+    "music_external_call_duration_seconds", "External API call latency", ("service",),
+)
+CACHE_EVENTS = REGISTRY.counter(
+    "music_cache_events_total", "Cache lookups by result", ("cache", "result"),
+)
+STREAM_SECONDS = REGISTRY.histogram(
+    "music_stream_duration_seconds", "Streaming response latency to first result / to final result",
+    ("endpoint", "phase"),
+)
+
+
+# ==================== 요청 단위 계측 ====================
+
+_request_stages: ContextVar[Optional[List[Tuple[str, str, float]]]] = ContextVar("_request_stages", default=None)
+
+
+@contextmanager
+def stage(model: str, name: str):
+    """요청 안의 한 단계 소요 시간 기록 (요청 밖이면 endpoint="background")"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        buffer = _request_stages.get()
+        if buffer is None:
+            STAGE_SECONDS.observe(elapsed, "background", model, name)
+        else:
+            buffer.append((model, name, elapsed))
+
+
+def begin_request():
+    """미들웨어: 요청 시작 (단계 기록 버퍼를 컨텍스트에 설정)"""
+    buffer: List[Tuple[str, str, float]] = []
+    return buffer, _request_stages.set(buffer)
+
+
+def end_request(buffer, token, endpoint: str, method: str, status: int, elapsed: float) -> None:
+    """미들웨어: 요청 종료 (라우트 템플릿이 정해진 뒤 요청/단계 히스토그램 반영)"""
+    _request_stages.reset(token)
+    REQUEST_SECONDS.observe(elapsed, endpoint, method, str(status))
+    for model, name, seconds in buffer:
+        STAGE_SECONDS.observe(seconds, endpoint, model, name)
+
+
+def begin_stream() -> List[Tuple[str, str, float]]:
+    """
+    스트리밍 응답 본문: 새 단계 기록 버퍼 설정
+
+    본문은 미들웨어가 헤더 전송과 함께 end_request를 마친 뒤에 생성되므로
+    그 안의 단계는 따로 모아 end_stream에서 반영 (응답 Task 컨텍스트에만 설정되므로 reset 불필요)
+    """
+    buffer: List[Tuple[str, str, float]] = []
+    _request_stages.set(buffer)
+    return buffer
+
+
+def end_stream(buffer, endpoint: str, first_result: float, total: float) -> None:
+    """스트리밍 응답 종료: 첫 결과까지 / 최종 결과까지 시간 + 본문 안의 단계"""
+    STREAM_SECONDS.observe(first_result, endpoint, "first_result")
+    STREAM_SECONDS.observe(total, endpoint, "total")
+    for model, name, seconds in buffer:
+        STAGE_SECONDS.observe(seconds, endpoint, model, name)
+
+
+def record_external(service: str, outcome: str, seconds: Optional[float] = None) -> None:
+    """외부 호출 결과 (outcome: success / not_found / timeout / error / skipped)"""
+    EXTERNAL_CALLS.inc(service, outcome)
+    if seconds is not None:
+        EXTERNAL_SECONDS.observe(seconds, service)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_EVENTS.inc(cache, "hit" if hit else "miss")
+
+
+def register_collector(key: str, collector: Callable[[], Iterable[Sample]]) -> None:
+    REGISTRY.register_collector(key, collector)
+
+
+def render() -> str:
+    return REGISTRY.render()
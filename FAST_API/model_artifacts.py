@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+모델 아티팩트 저장/로드 (메모리 매핑 공유)
+
+pickle/joblib 압축 덤프는 워커 프로세스마다 배열을 각자 역직렬화해서
+같은 모델이 워커 수만큼 메모리에 올라갑니다.
+
+- 저장: 비압축 joblib 포맷 → numpy 배열(계수, support vector, scaler 파라미터,
+  idf 등)이 파일 안에 raw 바이트로 정렬 저장됨
+- 로드: mmap_mode='c' (copy-on-write) → 배열은 파일 페이지를 그대로 매핑하므로
+  여러 워커가 페이지 캐시를 공유하고, 로드 시 배열 복사가 없음
+  (쓰기가 발생하면 그 페이지만 해당 프로세스에 복사되므로 재학습 코드도 안전)
+- 기존 pickle 파일은 그대로 읽힘 (joblib 실패 시 pickle.load로 대체)
+
+파이썬 객체(dict 어휘 사전, LightGBM 부스터 등)는 배열이 아니라서
+기존처럼 역직렬화됩니다.
+
+변환 / 비교:
+    python model_artifacts.py convert --all        # 기존 아티팩트 일괄 변환
+    python model_artifacts.py convert M2/user_svm_models/user_1_svm.pkl
+    python model_artifacts.py bench --all          # 콜드 로드 시간 / RSS 비교
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import joblib
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# 변환 대상 (FAST_API 기준 glob)
+ARTIFACT_GLOBS = [
+    "M1/audio_predictor.pkl",
+    "M1/user_models/*/*.pkl",
+    "M2/tfidf_gbr_models.pkl",
+    "M2/user_svm_models/*.pkl",
+    "M2/user_models/*.pkl",
+    "QLTY/qlty_models.pkl",
+]
+
+_JOBLIB_MARKER = b"NumpyArrayWrapper"
+
+
+def save_artifact(obj: Any, path) -> None:
+    """비압축 joblib 포맷으로 원자적 저장 (임시 파일 → rename)"""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    joblib.dump(obj, tmp_path, compress=0)
+    os.replace(tmp_path, path)
+
+
+def load_artifact(path, mmap: bool = True) -> Any:
+    """
+    아티팩트 로드
+
+    mmap=True면 배열을 copy-on-write 메모리 매핑으로 로드합니다.
+    joblib으로 읽을 수 없는 파일은 pickle.load로 대체합니다.
+    """
+    try:
+        return joblib.load(path, mmap_mode="c" if mmap else None)
+    except Exception:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+def is_mmap_format(path) -> bool:
+    """배열이 raw 바이트로 저장된 joblib 포맷인지 (압축 파일/일반 pickle이면 False)"""
+    with open(path, "rb") as f:
+        head = f.read(2)
+        if head[:1] != b"\x80":  # pickle 프로토콜 헤더가 아니면 압축 파일
+            return False
+        f.seek(0)
+        return _JOBLIB_MARKER in f.read()
+
+
+def convert_artifact(path) -> Dict[str, Any]:
+    """기존 pickle/압축 joblib 파일을 mmap 포맷으로 변환 (이미 변환된 파일은 건너뜀)"""
+    path = Path(path)
+    if is_mmap_format(path):
+        return {"path": str(path), "converted": False, "reason": "already mmap format"}
+
+    size_before = path.stat().st_size
+    obj = load_artifact(path, mmap=False)
+    save_artifact(obj, path)
+    return {
+        "path": str(path),
+        "converted": True,
+        "size_before": size_before,
+        "size_after": path.stat().st_size,
+    }
+
+
+def find_artifacts() -> List[Path]:
+    paths = []
+    for pattern in ARTIFACT_GLOBS:
+        paths.extend(sorted(BASE_DIR.glob(pattern)))
+    return paths
+
+
+# ==================== 비교 (콜드 로드 / RSS) ====================
+
+def _rss_kb() -> Dict[str, int]:
+    """현재 프로세스 RSS (anon = 프로세스 전용, file = 공유 가능한 파일 매핑)"""
+    values = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "RssAnon:", "RssFile:")):
+                    key, value = line.split(":", 1)
+                    values[key] = int(value.split()[0])
+    except OSError:
+        import resource
+        values["VmRSS"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return values
+
+
+def _measure_load(path: str, mmap: bool) -> Dict[str, Any]:
+    """새 프로세스에서 1회 로드 (워커 1개가 모델을 처음 읽는 상황)"""
+    before = _rss_kb()
+    start = time.perf_counter()
+    load_artifact(path, mmap=mmap)
+    elapsed = time.perf_counter() - start
+    after = _rss_kb()
+    return {
+        "load_ms": round(elapsed * 1000, 2),
+        "rss_kb": after.get("VmRSS", 0) - before.get("VmRSS", 0),
+        "anon_kb": after.get("RssAnon", 0) - before.get("RssAnon", 0),
+        "file_kb": after.get("RssFile", 0) - before.get("RssFile", 0),
+    }
+
+
+def _label(path: Path) -> str:
+    return os.path.relpath(path, BASE_DIR)
+
+
+def bench(paths: List[Path]) -> None:
+    """
+    파일별로 private 로드(변환 전과 동일) vs mmap 로드를 각각 새 프로세스에서 비교
+
+    anon_kb가 워커마다 복제되는 메모리, file_kb는 워커 간 공유되는 페이지입니다.
+    """
+    print("\n" + "=" * 90)
+    print("[BENCH] 콜드 로드 시간 / 워커당 RSS 증가량 (KB)")
+    print("=" * 90)
+    print(f"  {'artifact':45s} {'mode':7s} {'load(ms)':>9s} {'RSS':>9s} {'anon':>9s} {'file':>9s}")
+
+    for path in paths:
+        if not is_mmap_format(path):
+            print(f"  {_label(path):45s} (미변환 - convert 먼저 실행)")
+            continue
+        for mode, mmap in (("pickle", False), ("mmap", True)):
+            out = subprocess.run(
+                [sys.executable, __file__, "_measure", str(path), "1" if mmap else "0"],
+                capture_output=True, text=True, cwd=str(BASE_DIR),
+            )
+            if out.returncode != 0:
+                print(f"  {_label(path):45s} {mode:7s} 실패: {out.stderr.strip()[-200:]}")
+                continue
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(
+                f"  {_label(path):45s} {mode:7s} {r['load_ms']:9.2f} "
+                f"{r['rss_kb']:9d} {r['anon_kb']:9d} {r['file_kb']:9d}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모델 아티팩트 mmap 변환 / 비교")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("convert", "bench"):
+        p = sub.add_parser(name)
+        p.add_argument("paths", nargs="*")
+        p.add_argument("--all", action="store_true", help="ARTIFACT_GLOBS 전체")
+    measure = sub.add_parser("_measure")
+    measure.add_argument("path")
+    measure.add_argument("mmap")
+    args = parser.parse_args()
+
+    if args.command == "_measure":
+        sys.path.insert(0, str(BASE_DIR))
+        # 모델 클래스 import 비용은 측정에서 제외
+        import sklearn  # noqa: F401
+        print(json.dumps(_measure_load(args.path, args.mmap == "1")))
+        return
+
+    paths = find_artifacts() if args.all else [Path(p).resolve() for p in args.paths]
+    if not paths:
+        parser.error("대상 파일이 없습니다 (paths 또는 --all)")
+
+    if args.command == "convert":
+        for path in paths:
+            try:
+                r = convert_artifact(path)
+                if r["converted"]:
+                    print(f"[CONVERT] {path}: {r['size_before']:,} → {r['size_after']:,} bytes")
+                else:
+                    print(f"[SKIP] {path}: {r['reason']}")
+            except Exception as e:
+                print(f"[FAIL] {path}: {e}")
+    else:
+        bench(paths)
+
+
+if __name__ == "__main__":
+    main()
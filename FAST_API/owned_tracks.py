@@ -0,0 +1,190 @@
+"""
+사용자 보유 트랙 인덱스
+EMS 후보 추출 시 PMS/GMS에 이미 있는 곡을 제외하기 위한 메모리 캐시
+
+- 사용자별 보유 집합(track_id + 아티스트|제목 키)을 캐시하고
+  playlist_tracks 지문(COUNT/MAX/SUM map_id)이 바뀔 때만 다시 읽음
+  (Spring 쪽에서 PMS/GMS를 수정해도 지문 비교로 감지)
+- EMS 후보 풀(track_id, 키)은 TTL 동안 공유
+- 후보 선택 = EMS 풀 - 보유 집합 에서 무작위 추출 (ORDER BY RAND() 대체)
+"""
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# tracks.artist_title_key 생성 컬럼과 동일한 식 (migration 009)
+ARTIST_TITLE_KEY_SQL = "CONCAT(LOWER({alias}.artist), '|', LOWER({alias}.title))"
+
+EMS_POOL_TTL = 300          # EMS 후보 풀 캐시 유지 시간 (초)
+MAX_CACHED_USERS = 5000     # 보유 집합을 캐시할 최대 사용자 수
+
+
+def artist_title_key(artist, title) -> str:
+    """아티스트+제목 정규 키 (같은 곡이 다른 track_id로 존재하는 경우 식별)"""
+    return f"{str(artist or '').lower()}|{str(title or '').lower()}"
+
+
+def drop_duplicate_tracks(df: pd.DataFrame, artist_col: str, title_col: str) -> pd.DataFrame:
+    """track_id, 아티스트+제목 기준 중복 제거 (먼저 나온 행 유지)"""
+    df = df.drop_duplicates(subset=['track_id'], keep='first')
+    keys = df[artist_col].str.lower() + '|' + df[title_col].str.lower()
+    return df[~keys.duplicated(keep='first')]
+
+
+class OwnedTrackIndex:
+    """사용자별 PMS/GMS 보유 집합 + EMS 후보 풀 캐시"""
+
+    def __init__(self, ems_pool_ttl: float = EMS_POOL_TTL, max_users: int = MAX_CACHED_USERS):
+        self.ems_pool_ttl = ems_pool_ttl
+        self.max_users = max_users
+        self._owned: "OrderedDict[int, Tuple[tuple, FrozenSet[int], FrozenSet[str]]]" = OrderedDict()
+        self._ems_pool: Optional[List[Tuple[int, str]]] = None
+        self._ems_loaded_at = 0.0
+        self._has_key_column: Optional[bool] = None
+        self._lock = threading.Lock()
+        self.owned_hits = 0
+        self.owned_loads = 0
+
+    # ==================== 키 컬럼 ====================
+
+    def _key_expr(self, db: Session, alias: str = "t") -> str:
+        """artist_title_key 컬럼이 있으면 사용, 없으면 동일한 식으로 계산"""
+        if self._has_key_column is None:
+            try:
+                row = db.execute(text("SHOW COLUMNS FROM tracks LIKE 'artist_title_key'")).fetchone()
+                self._has_key_column = row is not None
+            except Exception:
+                self._has_key_column = False
+        if self._has_key_column:
+            return f"{alias}.artist_title_key"
+        return ARTIST_TITLE_KEY_SQL.format(alias=alias)
+
+    # ==================== 사용자 보유 집합 ====================
+
+    def fingerprint(self, db: Session, user_id: int) -> tuple:
+        """PMS/GMS 매핑 변경 감지용 지문 (idx_playlists_user_space 사용, tracks 조인 없음)"""
+        row = db.execute(text("""
+            SELECT COUNT(*), COALESCE(MAX(pt.map_id), 0), COALESCE(SUM(pt.map_id), 0)
+            FROM playlists p
+            JOIN playlist_tracks pt ON pt.playlist_id = p.playlist_id
+            WHERE p.user_id = :user_id AND p.space_type IN ('PMS', 'GMS')
+        """), {"user_id": user_id}).fetchone()
+        return tuple(int(v or 0) for v in row)
+
+    def get_owned(self, db: Session, user_id: int) -> Tuple[FrozenSet[int], FrozenSet[str]]:
+        """사용자의 PMS/GMS 보유 (track_id 집합, 아티스트|제목 키 집합)"""
+        fingerprint = self.fingerprint(db, user_id)
+        with self._lock:
+            entry = self._owned.get(user_id)
+            if entry is not None and entry[0] == fingerprint:
+                self._owned.move_to_end(user_id)
+                self.owned_hits += 1
+                return entry[1], entry[2]
+
+        rows = db.execute(text(f"""
+            SELECT DISTINCT t.track_id, {self._key_expr(db)}
+            FROM playlists p
+            JOIN playlist_tracks pt ON pt.playlist_id = p.playlist_id
+            JOIN tracks t ON t.track_id = pt.track_id
+            WHERE p.user_id = :user_id AND p.space_type IN ('PMS', 'GMS')
+        """), {"user_id": user_id}).fetchall()
+        track_ids = frozenset(int(r[0]) for r in rows)
+        keys = frozenset(r[1] for r in rows if r[1] is not None)
+
+        with self._lock:
+            self._owned[user_id] = (fingerprint, track_ids, keys)
+            self._owned.move_to_end(user_id)
+            while len(self._owned) > self.max_users:
+                self._owned.popitem(last=False)
+            self.owned_loads += 1
+        return track_ids, keys
+
+    def invalidate(self, user_id: int) -> None:
+        """사용자 PMS/GMS 변경 시 호출"""
+        with self._lock:
+            self._owned.pop(user_id, None)
+
+    # ==================== EMS 후보 풀 ====================
+
+    def get_ems_pool(self, db: Session) -> List[Tuple[int, str]]:
+        """EMS 전체 (track_id, 아티스트|제목 키) 목록"""
+        with self._lock:
+            if self._ems_pool is not None and time.time() - self._ems_loaded_at < self.ems_pool_ttl:
+                return self._ems_pool
+
+        rows = db.execute(text(f"""
+            SELECT DISTINCT t.track_id, {self._key_expr(db)}
+            FROM playlists p
+            JOIN playlist_tracks pt ON pt.playlist_id = p.playlist_id
+            JOIN tracks t ON t.track_id = pt.track_id
+            WHERE p.space_type = 'EMS'
+        """)).fetchall()
+        pool = [(int(r[0]), r[1]) for r in rows]
+
+        with self._lock:
+            self._ems_pool = pool
+            self._ems_loaded_at = time.time()
+        return pool
+
+    def ems_fingerprint(self, db: Session) -> tuple:
+        """EMS 매핑 변경 감지용 지문 (추가/삭제/교체 시 바뀜)"""
+        row = db.execute(text("""
+            SELECT COUNT(*), COALESCE(MAX(pt.map_id), 0), COALESCE(SUM(pt.map_id), 0)
+            FROM playlists p
+            JOIN playlist_tracks pt ON pt.playlist_id = p.playlist_id
+            WHERE p.space_type = 'EMS'
+        """)).fetchone()
+        return tuple(int(v or 0) for v in row)
+
+    def invalidate_ems(self) -> None:
+        """EMS 변경 시 호출"""
+        with self._lock:
+            self._ems_pool = None
+
+    # ==================== 후보 선택 ====================
+
+    def sample_ems_track_ids(self, db: Session, limit: int, user_id: int = None) -> List[int]:
+        """
+        EMS 풀에서 limit개 무작위 추출 (user_id가 있으면 PMS/GMS 보유곡 제외)
+
+        기존 NOT IN 서브쿼리 2개 + ORDER BY RAND()와 같은 후보 집합에서
+        균등 추출합니다.
+        """
+        pool = self.get_ems_pool(db)
+        if user_id:
+            owned_ids, owned_keys = self.get_owned(db, user_id)
+            pool = [(tid, key) for tid, key in pool
+                    if tid not in owned_ids and key not in owned_keys]
+        if len(pool) <= limit:
+            picked = list(pool)
+            random.shuffle(picked)
+        else:
+            picked = random.sample(pool, limit)
+        return [tid for tid, _ in picked]
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "cached_users": len(self._owned),
+            "owned_hits": self.owned_hits,
+            "owned_loads": self.owned_loads,
+            "ems_pool_size": len(self._ems_pool) if self._ems_pool is not None else None,
+            "key_column": self._has_key_column,
+        }
+
+
+# 싱글톤 인스턴스
+_owned_track_index: Optional[OwnedTrackIndex] = None
+
+
+def get_owned_track_index() -> OwnedTrackIndex:
+    """보유 트랙 인덱스 싱글톤"""
+    global _owned_track_index
+    if _owned_track_index is None:
+        _owned_track_index = OwnedTrackIndex()
+    return _owned_track_index
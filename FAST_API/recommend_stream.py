@@ -0,0 +1,172 @@
+"""
+추천 결과 스트리밍 (SSE)
+
+ems_track_limit이 수백~수천 곡이면 /api/recommend, /api/v1/evaluation/start는
+모든 후보의 점수 계산 + 중복 제거 + GMS 저장이 끝날 때까지 아무것도 돌려주지 않습니다.
+스트리밍 버전은 후보를 청크(STREAM_CHUNK_SIZE곡) 단위로 계산하면서 누적 top-k를
+잠정 결과로 먼저 보내고, 마지막에 일반 API와 같은 선정 규칙의 최종 결과를 보냅니다.
+
+이벤트 (QLTY /batch-update와 같은 "data: {json}" 형식):
+    start        후보 수, 청크 크기
+    provisional  청크마다 누적 top-k (중복 제거 / threshold 보완 전 잠정 순위)
+    final        최종 결과 + time_to_first_result_ms / total_ms
+    persisted    GMS 저장 결과 (final 전송 후 스레드에서 저장)
+    error        실패
+
+- 점수 계산 함수는 동기 제너레이터: 이벤트를 yield하고 마지막에 StreamResult를 return
+  → 한 단계(청크)씩 asyncio.to_thread로 진행하므로 이벤트 루프를 막지 않고,
+    연결이 끊기면 남은 청크는 계산하지 않음
+- GMS 저장은 final 이후에 시작하고, 연결이 끊겨도 끝까지 진행
+  (final을 받은 클라이언트의 결과가 저장되지 않는 일이 없도록)
+- 첫 결과까지 / 최종 결과까지 시간은 final 이벤트와 /metrics (music_stream_duration_seconds)
+
+설정:
+    RECOMMEND_STREAM_CHUNK   청크 크기 (곡, 기본 100)
+"""
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Callable, Dict, Generator, Iterator, List, Optional, Set
+
+from fastapi.responses import StreamingResponse
+
+import metrics
+from recommendation_cache import _json_default
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = int(os.getenv("RECOMMEND_STREAM_CHUNK", "100"))
+
+
+class RunningTopK:
+    """
+    점수 상위 k개 유지 (최소 힙)
+
+    동점이면 먼저 들어온 항목이 남고 앞에 오므로, 전체를 모아 안정 정렬한 결과와 순서가 같음
+    """
+
+    def __init__(self, k: int, score_key: str):
+        self.k = k
+        self.score_key = score_key
+        self._heap: List[tuple] = []
+        self._seq = 0
+
+    def push(self, item: Dict) -> None:
+        entry = (float(item.get(self.score_key) or 0), -self._seq, item)
+        self._seq += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def extend(self, items) -> None:
+        for item in items:
+            self.push(item)
+
+    def snapshot(self) -> List[Dict]:
+        """현재 상위 k개 (점수 내림차순)"""
+        return [item for _, _, item in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+
+def chunks(items, size: int = STREAM_CHUNK_SIZE) -> Iterator:
+    """리스트 / DataFrame을 size개씩 (DataFrame은 iloc)"""
+    slicer = items.iloc if hasattr(items, "iloc") else items
+    for start in range(0, len(items), max(1, size)):
+        yield slicer[start:start + size]
+
+
+@dataclass
+class StreamResult:
+    """점수 계산이 끝난 뒤의 최종 결과"""
+    response: Dict[str, Any]                             # final 이벤트 본문 (일반 API 응답과 같은 필드)
+    persist: Optional[Callable[[], Dict[str, Any]]] = None  # final 이후 스레드에서 실행, persisted 이벤트 본문
+
+
+# 연결이 끊긴 뒤에도 끝까지 진행할 GMS 저장 Task (GC 방지)
+_persist_tasks: Set[asyncio.Task] = set()
+
+_DONE = object()
+
+
+def _advance(steps: Generator):
+    """제너레이터 한 단계 (StopIteration은 Future로 전달할 수 없어 값으로 변환)"""
+    try:
+        return next(steps)
+    except StopIteration as stop:
+        return _DONE, stop.value
+
+
+def _sse(event: Dict) -> str:
+    return f"data: {json.dumps(event, ensure_ascii=False, default=_json_default)}\n\n"
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+async def _stream_events(endpoint: str, run: Callable[[], Generator]) -> AsyncGenerator[str, None]:
+    stages = metrics.begin_stream()
+    started = time.perf_counter()
+    first_result = None
+    steps = run()
+    try:
+        while True:
+            step = await asyncio.to_thread(_advance, steps)
+            if isinstance(step, tuple) and step[0] is _DONE:
+                result: StreamResult = step[1]
+                break
+            if step.get("event") == "provisional" and first_result is None:
+                first_result = time.perf_counter() - started
+            step["elapsed_ms"] = _ms(time.perf_counter() - started)
+            yield _sse(step)
+
+        total = time.perf_counter() - started
+        if first_result is None:
+            first_result = total  # 청크 없이 바로 끝난 경우 (캐시 적중, M3, 후보 없음)
+        yield _sse({
+            "event": "final",
+            **result.response,
+            "time_to_first_result_ms": _ms(first_result),
+            "total_ms": _ms(total),
+        })
+
+        if result.persist is not None:
+            persist_started = time.perf_counter()
+            task = asyncio.ensure_future(asyncio.to_thread(result.persist))
+            _persist_tasks.add(task)
+            task.add_done_callback(_persist_tasks.discard)
+            try:
+                persisted = await asyncio.shield(task)
+                yield _sse({"event": "persisted", **persisted, "persist_ms": _ms(time.perf_counter() - persist_started)})
+            except Exception as e:
+                logger.error(f"[RecStream] GMS 저장 실패: {e}")
+                yield _sse({"event": "error", "stage": "persist", "error": str(e)})
+        # GMS 저장 단계(gms_persist)까지 모은 뒤 반영
+        metrics.end_stream(stages, endpoint, first_result, total)
+    except Exception as e:
+        logger.exception(f"[RecStream] 스트리밍 추천 실패: {e}")
+        yield _sse({"event": "error", "stage": "score", "error": str(e)})
+    finally:
+        try:
+            steps.close()  # 제너레이터의 finally (DB 세션 반환)
+        except ValueError:
+            pass  # 끊긴 연결의 청크가 아직 스레드에서 실행 중 → 끝나면 GC가 close
+
+
+def stream_recommendation(endpoint: str, run: Callable[[], Generator]) -> StreamingResponse:
+    """
+    점수 계산 제너레이터를 SSE 응답으로
+
+    Args:
+        endpoint: /metrics 레이블 (라우트 경로)
+        run: 호출하면 이벤트 dict를 yield하고 StreamResult를 return하는 동기 제너레이터
+    """
+    return StreamingResponse(
+        _stream_events(endpoint, run),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,336 @@
+"""
+/api/recommend 결과 캐시 (버전 키 기반 자동 무효화)
+
+같은 사용자 / 모델 / 입력으로 반복 호출될 때(데모 페이지의 고정 track_ids 등)
+PMS 프로필, EMS 추출, 피처 생성, 모델 점수 계산을 다시 하지 않고 응답을 돌려줍니다.
+
+키 = (user_id, 모델, 사용자 모델 버전, EMS 카탈로그 버전, PMS/GMS 지문, track_ids 해시, top_k, ems_track_limit)
+
+- 사용자 모델 버전: train_user_model 성공 시 올리는 세대 번호 (Redis면 워커 간 공유)
+  + 모델 파일 mtime (M1 기본 모델, M2 사용자 SVM → 다른 워커에서 재학습해도 감지)
+- PMS/GMS 지문: owned_tracks와 같은 playlist_tracks 지문 (Spring 쪽 수정도 감지)
+- EMS 카탈로그 버전: EMS 매핑 지문(EMS_VERSION_TTL초 캐시) + bump_catalog() 세대 번호
+  (오디오 피처 일괄 갱신처럼 지문으로 안 잡히는 변경)
+- 버전이 바뀌면 키가 달라지므로 옛 항목은 더 조회되지 않고 LRU / TTL로 밀려남
+- 응답 저장 후의 PMS/GMS 지문으로 저장 (추천 결과를 GMS에 저장한 상태 = 그 응답이 유효한 상태)
+  → 같은 요청을 반복하면 GMS 플레이리스트를 새로 만들지 않고 같은 응답
+- 값은 JSON 바이트로 저장 (메모리 사용량 = 바이트 합계, Redis와 같은 형식)
+
+멀티 워커 (gunicorn WEB_WORKERS>1): memory 백엔드는 세대 번호가 워커마다 따로라서
+재학습한 워커 외에는 TTL 동안 이전 결과를 돌려줌 (M1/M3 버전 키에는 사용자별 파일 mtime이 없음)
+→ redis만 사용하고, redis를 쓸 수 없으면 캐시를 끔
+
+설정:
+    RECOMMEND_CACHE_BACKEND  memory(기본, 단일 워커) | redis (멀티 워커) | off
+    REDIS_URL                기본 redis://{REDIS_HOST}:{REDIS_PORT}/0 (docker-compose의 redis)
+    RECOMMEND_CACHE_TTL      항목 유지 시간 (초, 기본 600)
+    RECOMMEND_CACHE_MAX_MB   메모리 백엔드 최대 크기 (기본 64)
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent
+
+CACHE_BACKEND = os.getenv("RECOMMEND_CACHE_BACKEND", "memory").lower()
+CACHE_TTL = int(os.getenv("RECOMMEND_CACHE_TTL", "600"))
+CACHE_MAX_BYTES = int(float(os.getenv("RECOMMEND_CACHE_MAX_MB", "64")) * 1024 * 1024)
+REDIS_URL = os.getenv(
+    "REDIS_URL",
+    f"redis://{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', '6379')}/0",
+)
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1"))  # gunicorn.conf.py가 실제 워커 수로 설정
+EMS_VERSION_TTL = 30        # EMS 지문 재조회 간격 (초)
+KEY_PREFIX = "reccache:v1"  # 키 / 저장 형식을 바꾸면 올림
+
+# 사용자 모델 버전에 mtime을 넣을 모델 파일 (경로를 알 수 있는 것만)
+_MODEL_FILES = {
+    "M1": lambda user_id: BASE_DIR / "M1" / "audio_predictor.pkl",
+    "M2": lambda user_id: BASE_DIR / "M2" / "user_models" / f"user_{user_id}_svm.pkl",
+}
+
+
+def _json_default(value):
+    """numpy 스칼라 / 배열 → 파이썬 기본형"""
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+# ==================== 백엔드 ====================
+
+class _MemoryBackend:
+    """프로세스 내 LRU (바이트 상한 + TTL)"""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                self._drop(key)
+                return None
+            self._items.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        with self._lock:
+            if key in self._items:
+                self._drop(key)
+            self._items[key] = (time.time() + ttl, value)
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes and self._items:
+                self._drop(next(iter(self._items)))
+                self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        _, value = self._items.pop(key)
+        self._bytes -= len(value)
+
+    def incr(self, name: str) -> int:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+            return self._counters[name]
+
+    def counters(self, names: Sequence[str]) -> List[int]:
+        with self._lock:
+            return [self._counters.get(name, 0) for name in names]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {"entries": len(self._items), "bytes": self._bytes, "evictions": self.evictions}
+
+
+class _RedisBackend:
+    """Redis (워커 / 인스턴스 간 공유, 세대 번호는 INCR)"""
+
+    name = "redis"
+
+    def __init__(self, url: str = REDIS_URL):
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.5)
+        self._client.ping()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._client.set(key, value, ex=ttl)
+
+    def incr(self, name: str) -> int:
+        return int(self._client.incr(f"{KEY_PREFIX}:gen:{name}"))
+
+    def counters(self, names: Sequence[str]) -> List[int]:
+        values = self._client.mget([f"{KEY_PREFIX}:gen:{name}" for name in names])
+        return [int(v or 0) for v in values]
+
+    def clear(self) -> None:
+        for key in self._client.scan_iter(f"{KEY_PREFIX}:*", count=1000):
+            self._client.delete(key)
+
+    def stats(self) -> Dict[str, object]:
+        # 항목별 크기는 조회 비용이 커서 인스턴스 전체 사용량만
+        return {"bytes": int(self._client.info("memory").get("used_memory", 0))}
+
+
+def _create_backend(kind: str, workers: int = WEB_WORKERS):
+    if kind == "off":
+        return None
+    if kind == "redis":
+        try:
+            backend = _RedisBackend()
+            logger.info(f"[RecCache] Redis 백엔드: {REDIS_URL}")
+            return backend
+        except Exception as e:
+            logger.warning(f"[RecCache] Redis 연결 실패: {e}")
+    elif kind != "memory":
+        logger.warning(f"[RecCache] 알 수 없는 백엔드 '{kind}'")
+    if workers > 1:
+        # 워커별 메모리 캐시는 다른 워커의 재학습 / 무효화를 모름
+        logger.warning(f"[RecCache] 워커 {workers}개: 메모리 캐시는 공유되지 않아 캐시 끔 (RECOMMEND_CACHE_BACKEND=redis 필요)")
+        return None
+    return _MemoryBackend()
+
+
+# ==================== 캐시 ====================
+
+class RecommendationCache:
+    """통합 추천 응답 캐시"""
+
+    def __init__(self, backend: str = CACHE_BACKEND, ttl: int = CACHE_TTL):
+        self.ttl = ttl
+        self._backend = _create_backend(backend)
+        self._ems_version: Optional[tuple] = None
+        self._ems_checked_at = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._backend is not None
+
+    # ==================== 버전 ====================
+
+    def _ems_fingerprint(self, db) -> tuple:
+        with self._lock:
+            if self._ems_version is not None and time.time() - self._ems_checked_at < EMS_VERSION_TTL:
+                return self._ems_version
+        from owned_tracks import get_owned_track_index
+        version = get_owned_track_index().ems_fingerprint(db)
+        with self._lock:
+            self._ems_version = version
+            self._ems_checked_at = time.time()
+        return version
+
+    def _model_mtime(self, model: str, user_id: int) -> int:
+        path_for = _MODEL_FILES.get(model)
+        if path_for is None:
+            return 0
+        try:
+            return int(path_for(user_id).stat().st_mtime_ns)
+        except OSError:
+            return 0
+
+    def make_key(
+        self,
+        db,
+        user_id: int,
+        model: str,
+        track_ids: Optional[Sequence[int]],
+        top_k: int,
+        ems_limit: int,
+    ) -> Optional[str]:
+        """현재 버전으로 캐시 키 생성 (버전 조회 실패 시 None → 캐시 사용 안 함)"""
+        if self._backend is None:
+            return None
+        try:
+            from owned_tracks import get_owned_track_index
+
+            user_gen, catalog_gen = self._backend.counters([f"user:{user_id}", "catalog"])
+            parts = {
+                "model_version": [user_gen, self._model_mtime(model, user_id)],
+                "ems_version": [catalog_gen, *self._ems_fingerprint(db)],
+                "owned": list(get_owned_track_index().fingerprint(db, user_id)),
+                # 순서가 다른 같은 집합은 같은 후보 → 정렬 후 해시
+                "track_ids": sorted(int(t) for t in track_ids) if track_ids else None,
+                "top_k": top_k,
+                "ems_limit": ems_limit,
+            }
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"[RecCache] 버전 조회 실패: {e}")
+            return None
+        digest = hashlib.sha1(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+        return f"{KEY_PREFIX}:{user_id}:{model}:{digest}"
+
+    # ==================== 조회 / 저장 ====================
+
+    def get(self, key: Optional[str]) -> Optional[Dict]:
+        if key is None:
+            return None
+        try:
+            raw = self._backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"[RecCache] 조회 실패: {e}")
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def put(self, key: Optional[str], response: Dict) -> None:
+        if key is None:
+            return
+        try:
+            raw = json.dumps(response, ensure_ascii=False, default=_json_default).encode("utf-8")
+            self._backend.set(key, raw, self.ttl)
+            self.stores += 1
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"[RecCache] 저장 실패: {e}")
+
+    # ==================== 무효화 ====================
+
+    def invalidate_user(self, user_id: int) -> None:
+        """사용자 모델 재학습 시 호출 (해당 사용자의 모든 모델 항목)"""
+        self._bump(f"user:{user_id}")
+
+    def bump_catalog(self) -> None:
+        """EMS 카탈로그 / 트랙 피처 변경 시 호출 (모든 사용자 항목)"""
+        self._bump("catalog")
+        with self._lock:
+            self._ems_version = None
+
+    def _bump(self, name: str) -> None:
+        if self._backend is None:
+            return
+        try:
+            self._backend.incr(name)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"[RecCache] 세대 번호 갱신 실패 ({name}): {e}")
+
+    def clear(self) -> None:
+        if self._backend is not None:
+            self._backend.clear()
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        stats = {
+            "backend": self._backend.name if self._backend is not None else "off",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "errors": self.errors,
+            "ttl": self.ttl,
+        }
+        if self._backend is not None:
+            try:
+                stats.update(self._backend.stats())
+            except Exception as e:
+                stats["stats_error"] = str(e)
+        return stats
+
+
+# 싱글톤 인스턴스
+_recommendation_cache: Optional[RecommendationCache] = None
+
+
+def get_recommendation_cache() -> RecommendationCache:
+    """추천 결과 캐시 싱글톤"""
+    global _recommendation_cache
+    if _recommendation_cache is None:
+        _recommendation_cache = RecommendationCache()
+    return _recommendation_cache
@@ -0,0 +1,99 @@
+"""
+동일 요청 합치기 (singleflight)
+
+프론트 중복 호출이나 탭 두 개로 같은 추천/학습 요청이 동시에 들어오면
+먼저 온 요청(leader)만 실행하고, 실행 중에 들어온 같은 키의 요청은 그 결과(또는 예외)를 함께 받습니다.
+실행이 끝나면 키를 지우므로 결과를 보관하지는 않습니다 (보관은 recommendation_cache).
+
+- 키 공간(group)을 나눠 학습("train")과 추천 점수("score")가 서로 섞이지 않게 함
+- do():        스레드에서 호출하는 동기 함수용 (asyncio.to_thread 안의 M2 자동 학습 등)
+- do_async():  이벤트 루프의 코루틴용 (L2 query_analyzer의 진행 중 Task 공유와 같은 방식,
+               한 요청이 취소되어도 공유 중인 실행은 유지)
+- 실행 / 합쳐진 호출 수는 /metrics (music_singleflight_calls_total)
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """키별 진행 중 실행 공유"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """같은 키가 실행 중이면 그 결과를 기다리고, 아니면 fn() 실행 (스레드 안전)"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = Future()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return call.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    async def do_async(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """같은 키의 Task가 실행 중이면 그 Task를 기다리고, 아니면 factory()로 새 Task 시작"""
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is not None and not task.done():
+                self.coalesced += 1
+            else:
+                task = asyncio.ensure_future(factory())
+                self._tasks[key] = task
+                self.executed += 1
+                task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            inflight = len(self._calls) + len(self._tasks)
+        return {"executed": self.executed, "coalesced": self.coalesced, "inflight": inflight}
+
+
+# 키 공간별 싱글톤
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def get_singleflight(group: str) -> SingleFlight:
+    """키 공간별 SingleFlight ("train": 모델 학습, "score": 추천 생성)"""
+    with _groups_lock:
+        flight = _groups.get(group)
+        if flight is None:
+            flight = _groups[group] = SingleFlight(group)
+        return flight
+
+
+def all_stats() -> Dict[str, Dict[str, int]]:
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {flight.name: flight.stats() for flight in groups}
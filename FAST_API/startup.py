@@ -0,0 +1,249 @@
+"""
+서버 시작 오케스트레이터
+
+라우터는 즉시 등록하고, 무거운 서브시스템(Kuka FAISS, MiniLM, QLTY 모델, L2 Chroma 등)은
+lifespan에서 백그라운드 스레드로 병렬 로드합니다.
+
+- 서브시스템별 상태: pending → loading → ready | failed
+- 경로 prefix가 등록된 서브시스템이 로드 중이면 해당 요청은 503 (Retry-After)
+  (실패하면 막지 않음 → 핸들러의 대체 경로로 처리)
+- 로드가 끝나면 워밍업 단계(합성 입력으로 첫 추론 경로 예열)를 순서대로 실행
+- 멀티 워커 모드: preload()로 읽기 전용 자산을 fork 전에 마스터에서 로드 (copy-on-write 공유)
+- /ready: 전체 준비 상태 (critical 서브시스템이 모두 ready이고 워밍업이 끝나면 200)
+- 모듈 import / 로드 소요 시간 기록 → 시작 시 breakdown 로그
+"""
+import asyncio
+import gc
+import logging
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PENDING, LOADING, READY, FAILED, SKIPPED = "pending", "loading", "ready", "failed", "skipped"
+
+# 단계: load = 병렬 로드, warmup = 로드 완료 후 순차 실행
+LOAD, WARMUP = "load", "warmup"
+
+
+class Subsystem:
+    """백그라운드로 로드되는 서브시스템 1개"""
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[], object],
+        prefixes: Tuple[str, ...] = (),
+        critical: bool = False,
+        phase: str = LOAD,
+        requires: Tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.loader = loader
+        self.prefixes = prefixes
+        self.critical = critical
+        self.phase = phase
+        self.requires = requires
+        self.state = PENDING
+        self.load_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.details: Optional[Dict[str, object]] = None  # 로더가 dict를 반환하면 저장 (워밍업 단계별 시간 등)
+
+    @property
+    def blocking(self) -> bool:
+        """
+        요청을 막아야 하는 상태인지 (로드 / 워밍업이 끝나기 전만)
+
+        실패하면 막지 않고 핸들러의 대체 경로로 처리합니다
+        (예: 인코더 로드 실패 → M2 TF-IDF, DL 모델 없음 → QLTY 나머지 tier).
+        재시도 없이 막으면 재시작 전까지 해당 prefix 전체가 503이 됩니다.
+        """
+        return self.state in (PENDING, LOADING)
+
+    def to_dict(self) -> Dict[str, object]:
+        data = {
+            "state": self.state,
+            "phase": self.phase,
+            "critical": self.critical,
+            "load_ms": self.load_ms,
+            "error": self.error,
+        }
+        if self.details is not None:
+            data["details"] = self.details
+        return data
+
+
+class StartupOrchestrator:
+    """서브시스템 등록 / 병렬 로드 / 준비 상태 조회"""
+
+    def __init__(self):
+        self.subsystems: "OrderedDict[str, Subsystem]" = OrderedDict()
+        self.import_times: List[Tuple[str, float, bool]] = []  # (모듈, ms, 성공 여부)
+        self.started_at = time.perf_counter()
+        self.all_loaded_ms: Optional[float] = None
+        self.warmup_ms: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ==================== 등록 ====================
+
+    @contextmanager
+    def timed_import(self, name: str):
+        """라우터 import 소요 시간 기록 (예외는 그대로 전달)"""
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.import_times.append((name, round((time.perf_counter() - start) * 1000, 1), ok))
+
+    def register(self, name: str, loader: Callable[[], object], prefixes: Tuple[str, ...] = (), critical: bool = False) -> None:
+        self.subsystems[name] = Subsystem(name, loader, tuple(prefixes), critical)
+
+    def register_warmup(self, name: str, step: Callable[[], object], prefixes: Tuple[str, ...] = (), requires: Tuple[str, ...] = ()) -> None:
+        """워밍업 단계 등록 (requires 서브시스템이 ready가 아니면 건너뜀)"""
+        self.subsystems[name] = Subsystem(name, step, tuple(prefixes), phase=WARMUP, requires=tuple(requires))
+
+    def _phase(self, phase: str) -> List[Subsystem]:
+        return [s for s in self.subsystems.values() if s.phase == phase]
+
+    # ==================== 로드 ====================
+
+    def _load(self, subsystem: Subsystem) -> None:
+        subsystem.state = LOADING
+        start = time.perf_counter()
+        try:
+            result = subsystem.loader()
+            if result is False:
+                raise RuntimeError("loader returned False")
+            if isinstance(result, dict):
+                subsystem.details = result
+            subsystem.state = READY
+        except Exception as e:
+            subsystem.state = FAILED
+            subsystem.error = str(e)
+            logger.warning(f"[Startup] {subsystem.name} 로드 실패: {e}")
+        finally:
+            subsystem.load_ms = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(f"[Startup] {subsystem.name}: {subsystem.state} ({subsystem.load_ms}ms)")
+
+    async def _load_all(self) -> None:
+        pending = [s for s in self._phase(LOAD) if s.state == PENDING]
+        await asyncio.gather(*(asyncio.to_thread(self._load, s) for s in pending))
+        self.all_loaded_ms = round((time.perf_counter() - self.started_at) * 1000, 1)
+        await self._warmup()
+        self.log_breakdown()
+
+    def preload(self, names: Tuple[str, ...]) -> None:
+        """
+        워커 fork 전에 마스터 프로세스에서 읽기 전용 서브시스템을 동기 로드
+
+        fork된 워커는 이 메모리 페이지를 copy-on-write로 공유하고, lifespan에서는
+        남은 서브시스템(DB 확인, 워밍업 등)만 로드합니다. 마스터에서 실패한 항목은
+        pending으로 되돌려 워커가 각자 다시 시도합니다.
+        """
+        for name in names:
+            subsystem = self.subsystems.get(name)
+            if subsystem is None or subsystem.state != PENDING or subsystem.phase != LOAD:
+                continue
+            self._load(subsystem)
+            if subsystem.state == FAILED:
+                subsystem.state = PENDING
+        # 선로드된 객체를 GC 대상에서 제외 → 워커의 GC가 객체 헤더를 건드려 페이지가 복사되는 것 방지
+        gc.collect()
+        gc.freeze()
+
+    async def _warmup(self) -> None:
+        """워밍업 단계 순차 실행 (CPU 경합 없이 단계별 시간을 측정)"""
+        steps = [s for s in self._phase(WARMUP) if s.state == PENDING]
+        if not steps:
+            return
+        start = time.perf_counter()
+        for step in steps:
+            missing = [name for name in step.requires if not self.is_ready(name)]
+            if missing:
+                step.state = SKIPPED
+                step.error = f"not ready: {', '.join(missing)}"
+                logger.info(f"[Startup] warmup {step.name}: skipped ({step.error})")
+                continue
+            await asyncio.to_thread(self._load, step)
+        self.warmup_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    def start(self) -> asyncio.Task:
+        """등록된 서브시스템을 병렬 로드 (기다리지 않음)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._load_all())
+        return self._task
+
+    async def retry_failed(self, critical_only: bool = True) -> None:
+        """실패한 서브시스템 재시도 (예: /ready 호출 시 DB 재연결 확인)"""
+        failed = [
+            s for s in self._phase(LOAD)
+            if s.state == FAILED and (s.critical or not critical_only)
+        ]
+        for subsystem in failed:
+            subsystem.error = None
+        await asyncio.gather(*(asyncio.to_thread(self._load, s) for s in failed))
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    # ==================== 조회 ====================
+
+    def is_ready(self, name: str) -> bool:
+        subsystem = self.subsystems.get(name)
+        return subsystem is not None and subsystem.state == READY
+
+    def blocking_subsystem(self, path: str) -> Optional[Subsystem]:
+        """이 경로를 처리할 서브시스템이 아직 준비되지 않았으면 반환"""
+        for subsystem in self.subsystems.values():
+            if subsystem.blocking and any(path.startswith(p) for p in subsystem.prefixes):
+                return subsystem
+        return None
+
+    @property
+    def ready(self) -> bool:
+        critical_ready = all(s.state == READY for s in self.subsystems.values() if s.critical)
+        warmup_done = not any(s.blocking for s in self._phase(WARMUP))
+        return critical_ready and warmup_done
+
+    def report(self) -> Dict[str, object]:
+        return {
+            "ready": self.ready,
+            "subsystems": {name: s.to_dict() for name, s in self.subsystems.items()},
+            "imports_ms": {name: ms for name, ms, _ in self.import_times},
+            "all_loaded_ms": self.all_loaded_ms,
+            "warmup_ms": self.warmup_ms,
+        }
+
+    def log_breakdown(self) -> None:
+        """import / 로드 시간 breakdown (느린 순)"""
+        lines = ["[Startup] import/load breakdown"]
+        for name, ms, ok in sorted(self.import_times, key=lambda x: -x[1]):
+            lines.append(f"  import {name:28s} {ms:9.1f}ms{'' if ok else '  (failed)'}")
+        for s in sorted(self._phase(LOAD), key=lambda x: -(x.load_ms or 0)):
+            lines.append(f"  load   {s.name:28s} {s.load_ms or 0:9.1f}ms  {s.state}")
+        if self.all_loaded_ms is not None:
+            lines.append(f"  total (process start → all loaded) {self.all_loaded_ms:.1f}ms")
+        for s in self._phase(WARMUP):
+            lines.append(f"  warmup {s.name:28s} {s.load_ms or 0:9.1f}ms  {s.state}")
+            for key, value in (s.details or {}).items():
+                lines.append(f"           {key:26s} {value}")
+        if self.warmup_ms is not None:
+            lines.append(f"  total warmup {self.warmup_ms:.1f}ms")
+        logger.info("\n".join(lines))
+
+
+# 싱글톤 인스턴스
+_orchestrator: Optional[StartupOrchestrator] = None
+
+
+def get_orchestrator() -> StartupOrchestrator:
+    """시작 오케스트레이터 싱글톤"""
+    global _orchestrator
+    if _orchestrator is None:
+        _orchestrator = StartupOrchestrator()
+    return _orchestrator
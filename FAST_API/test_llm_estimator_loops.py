@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+QLTY LLM Estimator — 여러 이벤트 루프에서 estimate 호출
+
+프로세스 전역 Gemini Client를 uvicorn 루프(QLTY 라우터)와
+오디오 피처 보강 전용 루프(audio_enrichment)가 함께 씁니다.
+한 루프가 먼저 쓴 뒤 다른 루프의 호출이 검색 1차 호출에서 실패(fallback으로 전환)하지 않는지 확인합니다.
+
+실행: python test_llm_estimator_loops.py  (또는 pytest)
+"""
+import asyncio
+import sys
+import threading
+
+sys.path.insert(0, '.')
+
+from google import genai
+from google.genai import types
+
+from bench.mock_servers import MockServers
+from QLTY import llm_estimator
+
+
+def _estimate(i: int):
+    return llm_estimator.estimate(title=f"Song {i}", artist=f"Artist {i}")
+
+
+def test_estimate_from_two_loops():
+    with MockServers(latency_ms={"gemini": 20}) as mocks:
+        llm_estimator._client = genai.Client(
+            api_key="test", http_options=types.HttpOptions(base_url=mocks.gemini_base_url)
+        )
+
+        # 오래 사는 루프 (audio_enrichment._get_enrichment_loop와 같은 구성)
+        background = asyncio.new_event_loop()
+        thread = threading.Thread(target=background.run_forever, daemon=True)
+        thread.start()
+        try:
+            results = []
+            for i in range(3):
+                # 요청마다 새 루프 (asyncio.run) ↔ 오래 사는 루프를 번갈아 사용
+                results.append(asyncio.run(_estimate(i)))
+                future = asyncio.run_coroutine_threadsafe(_estimate(100 + i), background)
+                results.append(future.result(timeout=30))
+        finally:
+            background.call_soon_threadsafe(background.stop)
+            thread.join(timeout=5)
+            background.close()
+            llm_estimator._client = None
+
+        assert all(r and len(r) >= 5 for r in results), results
+        # 검색 호출이 실패하면 fallback 호출이 추가되어 Gemini 호출 수가 늘어남
+        assert mocks.counts["gemini"] == len(results), mocks.counts
+
+
+if __name__ == "__main__":
+    test_estimate_from_two_loops()
+    print("OK: 두 이벤트 루프에서 estimate 호출 성공 (fallback 없음)")
@@ -0,0 +1,238 @@
+"""
+스레드 예산 관리 (BLAS / OpenMP / torch / FAISS / CatBoost / LightGBM)
+
+한 프로세스 안에서 NumPy(BLAS), PyTorch(MiniLM), FAISS, CatBoost, LightGBM이
+각자 스레드 풀을 코어 수만큼 잡기 때문에, async_train_m2_m3의 M3 학습 스레드가
+MiniLM 인코딩 / FAISS 검색과 겹치면 코어가 과할당되어 지연시간이 튑니다.
+
+- 서빙 예산 (THREADS_SERVE): 요청 처리 추론이 쓰는 프로세스 전역 스레드 수
+  BLAS/OpenMP 환경변수(numpy/torch/faiss import 전), torch.set_num_threads, threadpoolctl
+- 학습 예산 (THREADS_TRAIN): 학습 작업 1개가 쓰는 스레드 수
+  CatBoost thread_count, LightGBM/RandomForest n_jobs, 학습 스레드의 OpenMP 한도
+- 동시 학습 작업 수 (THREADS_MAX_TRAIN_JOBS): 초과분은 대기 (대기 시간 = 경합 지표)
+
+기본값: 서빙 = CPU 수 / 워커 수, 학습 = 서빙의 절반 (최소 1)
+
+사용:
+    import thread_budget
+    thread_budget.configure_env()          # main.py 최상단, numpy import 전
+
+    with get_thread_budget().training("m3") as threads:
+        CatBoostRegressor(thread_count=threads, ...).fit(...)
+
+    with get_thread_budget().inference("embedding"):
+        model.encode(...)
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CPU_COUNT = os.cpu_count() or 1
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1")) or CPU_COUNT
+
+SERVE_THREADS = int(os.getenv("THREADS_SERVE", "0")) or max(1, CPU_COUNT // WEB_WORKERS)
+TRAIN_THREADS = int(os.getenv("THREADS_TRAIN", "0")) or max(1, SERVE_THREADS // 2)
+MAX_TRAIN_JOBS = int(os.getenv("THREADS_MAX_TRAIN_JOBS", "1"))
+
+# numpy/scipy(BLAS), LightGBM/FAISS(OpenMP), torch 초기 스레드 수를 결정하는 환경변수
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+)
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+def configure_env() -> None:
+    """
+    BLAS/OpenMP 스레드 환경변수를 서빙 예산으로 설정 (이미 설정된 값은 유지)
+
+    라이브러리가 import될 때 한 번 읽으므로 numpy/torch import 전에 호출해야 합니다.
+    """
+    for name in THREAD_ENV_VARS:
+        os.environ.setdefault(name, str(SERVE_THREADS))
+
+
+def _os_thread_count() -> int:
+    """네이티브 스레드 풀을 포함한 프로세스 스레드 수 (/proc 없으면 파이썬 스레드 수)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return threading.active_count()
+
+
+class ThreadBudget:
+    """서빙/학습 스레드 예산 적용 + 경합 지표"""
+
+    def __init__(self, serve_threads: int = SERVE_THREADS, train_threads: int = TRAIN_THREADS,
+                 max_train_jobs: int = MAX_TRAIN_JOBS):
+        from metrics import Histogram
+
+        self.serve_threads = serve_threads
+        self.train_threads = train_threads
+        self.max_train_jobs = max_train_jobs
+        self._train_slots = threading.BoundedSemaphore(max_train_jobs)
+        self._lock = threading.Lock()
+        self.applied = False
+
+        # 경합 지표
+        self.train_active = 0
+        self.train_jobs = 0
+        self.inference_active = 0
+        self.inference_calls = 0
+        self.inference_during_train = 0
+        self.train_wait_hist = Histogram(LATENCY_BUCKETS_MS)
+        self.inference_hist = Histogram(LATENCY_BUCKETS_MS)
+        self.inference_during_train_hist = Histogram(LATENCY_BUCKETS_MS)
+
+    # ==================== 적용 ====================
+
+    def apply_serving(self) -> Dict[str, object]:
+        """
+        이미 로드된 라이브러리의 프로세스 전역 스레드 수를 서빙 예산으로 설정
+
+        OpenMP 한도는 스레드별이라 FAISS/LightGBM의 요청 스레드는 configure_env()의
+        OMP_NUM_THREADS를 따르고, 여기서는 torch 풀과 BLAS(threadpoolctl)만 맞춥니다.
+        """
+        if "torch" in sys.modules:
+            import torch
+            torch.set_num_threads(self.serve_threads)
+        try:
+            from threadpoolctl import threadpool_limits
+            threadpool_limits(limits=self.serve_threads)
+        except ImportError:
+            pass
+        self.applied = True
+        logger.info(
+            f"[ThreadBudget] serve={self.serve_threads}, train={self.train_threads} "
+            f"x{self.max_train_jobs} jobs (cpu={CPU_COUNT}, workers={WEB_WORKERS})"
+        )
+        return self.settings()
+
+    @contextmanager
+    def training(self, name: str):
+        """
+        학습 작업 구간: 동시 학습 수 제한 + 이 스레드의 OpenMP 한도를 학습 예산으로
+
+        yield 값(스레드 수)을 CatBoost thread_count / LightGBM n_jobs에 넘깁니다.
+        OpenMP 한도는 호출 스레드에만 적용되므로 서빙 스레드에는 영향이 없습니다.
+        """
+        wait_start = time.perf_counter()
+        self._train_slots.acquire()
+        wait_ms = (time.perf_counter() - wait_start) * 1000
+        self.train_wait_hist.observe(wait_ms)
+        if wait_ms > 100:
+            logger.info(f"[ThreadBudget] {name} 학습 대기 {wait_ms:.0f}ms (동시 학습 {self.max_train_jobs}개 제한)")
+
+        with self._lock:
+            self.train_active += 1
+            self.train_jobs += 1
+        limiter = None
+        try:
+            try:
+                from threadpoolctl import threadpool_limits
+                limiter = threadpool_limits(limits=self.train_threads, user_api="openmp")
+            except ImportError:
+                pass
+            yield self.train_threads
+        finally:
+            if limiter is not None:
+                limiter.restore_original_limits()
+            with self._lock:
+                self.train_active -= 1
+            self._train_slots.release()
+
+    @contextmanager
+    def inference(self, name: str):
+        """요청 처리 추론 구간 - 학습과 겹친 호출의 지연시간을 따로 기록"""
+        with self._lock:
+            self.inference_active += 1
+            self.inference_calls += 1
+            overlapped = self.train_active > 0
+            if overlapped:
+                self.inference_during_train += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            (self.inference_during_train_hist if overlapped else self.inference_hist).observe(elapsed_ms)
+            with self._lock:
+                self.inference_active -= 1
+
+    # ==================== 조회 ====================
+
+    def settings(self) -> Dict[str, object]:
+        """현재 적용된 라이브러리별 스레드 수"""
+        current = {
+            "cpu_count": CPU_COUNT,
+            "web_workers": WEB_WORKERS,
+            "serve_threads": self.serve_threads,
+            "train_threads": self.train_threads,
+            "max_train_jobs": self.max_train_jobs,
+            "env": {name: os.environ.get(name) for name in THREAD_ENV_VARS},
+        }
+        if "torch" in sys.modules:
+            import torch
+            current["torch"] = torch.get_num_threads()
+        if "faiss" in sys.modules:
+            import faiss
+            current["faiss"] = faiss.omp_get_max_threads()
+        try:
+            from threadpoolctl import threadpool_info
+            current["threadpools"] = [
+                {"api": p["user_api"], "lib": p["internal_api"], "threads": p["num_threads"]}
+                for p in threadpool_info()
+            ]
+        except ImportError:
+            pass
+        return current
+
+    def stats(self) -> Dict[str, object]:
+        """설정 + 경합 지표 (학습 중 추론 비율, 과할당 비율, 구간별 지연시간)"""
+        with self._lock:
+            train_active = self.train_active
+            inference_active = self.inference_active
+        demanded = self.serve_threads + train_active * self.train_threads
+        return {
+            "applied": self.applied,
+            "settings": self.settings(),
+            "train_active": train_active,
+            "train_jobs": self.train_jobs,
+            "inference_active": inference_active,
+            "inference_calls": self.inference_calls,
+            "inference_during_train": self.inference_during_train,
+            "oversubscription": round(demanded / CPU_COUNT * WEB_WORKERS, 2),
+            "os_threads": _os_thread_count(),
+            "train_wait_ms": self.train_wait_hist.snapshot(),
+            "inference_ms": self.inference_hist.snapshot(),
+            "inference_during_train_ms": self.inference_during_train_hist.snapshot(),
+        }
+
+
+# 싱글톤 인스턴스
+_thread_budget: Optional[ThreadBudget] = None
+_singleton_lock = threading.Lock()
+
+
+def get_thread_budget() -> ThreadBudget:
+    """스레드 예산 싱글톤"""
+    global _thread_budget
+    if _thread_budget is None:
+        with _singleton_lock:
+            if _thread_budget is None:
+                _thread_budget = ThreadBudget()
+    return _thread_budget
@@ -0,0 +1,194 @@
+"""
+워밍업 - 트래픽을 받기 전에 모델 로드와 첫 호출 경로를 예열
+
+배포 직후 첫 요청은 곳곳의 lazy load(EmbeddingService.load_model,
+AudioPredictionService.load_model, QLTY _get_dl_model, m1_predictor._get_predictor,
+CatBoost load_model)와 torch / LightGBM / FAISS의 첫 호출 메모리 할당,
+스레드 풀 생성 비용을 모두 떠안습니다.
+
+서브시스템 로드가 끝나면 M1/M2/M3/QLTY/Kuka에 합성 입력을 대표 배치 크기로
+한 번씩 흘려 보내고, 단계별 시간을 /ready와 시작 로그에 남깁니다.
+워밍업이 끝나기 전까지 해당 경로는 503, /ready도 503입니다.
+
+환경변수:
+    WARMUP_ENABLED=0           워밍업 생략
+    WARMUP_STEPS=m1,m2         일부 단계만 실행 (기본: 전체)
+    WARMUP_BATCH_SIZES=1,64    합성 추론 배치 크기 (단건 요청 / 배치 요청)
+"""
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") != "0"
+WARMUP_STEPS = [s.strip() for s in os.getenv("WARMUP_STEPS", "").split(",") if s.strip()]
+WARMUP_BATCH_SIZES = tuple(
+    int(s) for s in os.getenv("WARMUP_BATCH_SIZES", "1,64").split(",") if s.strip()
+)
+
+# (title, artist, album, genre, duration_ms, popularity)
+SYNTHETIC_TRACKS: List[Tuple[str, str, str, str, float, float]] = [
+    ("Blueming", "IU", "Love poem", "k-pop", 217000, 70),
+    ("Karma Police", "Radiohead", "OK Computer", "alternative rock", 264000, 75),
+    ("Get Lucky", "Daft Punk", "Random Access Memories", "disco", 369000, 80),
+    ("So What", "Miles Davis", "Kind of Blue", "jazz", 562000, 65),
+    ("bad guy", "Billie Eilish", "WHEN WE ALL FALL ASLEEP, WHERE DO WE GO?", "pop", 194000, 85),
+    ("Aruarian Dance", "Nujabes", "Samurai Champloo", "hip hop", 246000, 60),
+    ("밤편지", "아이유", "Palette", "발라드", 253000, 72),
+]
+
+
+def synthetic_rows(n: int) -> List[Tuple[str, str, str, str, float, float]]:
+    """합성 트랙 n개 (임베딩 중복 제거에 걸리지 않도록 제목에 번호를 붙임)"""
+    rows = []
+    for i in range(n):
+        title, artist, album, genre, duration_ms, popularity = SYNTHETIC_TRACKS[i % len(SYNTHETIC_TRACKS)]
+        rows.append((f"{title} {i}", artist, album, genre, duration_ms, popularity))
+    return rows
+
+
+def _timed(fn: Callable[[int], object]) -> Dict[str, float]:
+    """배치 크기별 1회 실행 시간 (ms)"""
+    timings = {}
+    for n in WARMUP_BATCH_SIZES:
+        start = time.perf_counter()
+        fn(n)
+        timings[f"batch{n}_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return timings
+
+
+# ==================== 단계 ====================
+
+def warm_m1() -> Dict[str, float]:
+    """M1 기본 모델 (TF-IDF + Ridge) 합성 예측"""
+    from M1.router import m1_service
+
+    if not m1_service.is_model_loaded():
+        raise RuntimeError("M1 base model not loaded")
+
+    def run(n):
+        df = pd.DataFrame(synthetic_rows(n), columns=[
+            "title", "artists", "album_name", "track_genre", "duration_ms", "popularity",
+        ])
+        m1_service.predictor.predict(df)
+
+    return _timed(run)
+
+
+def warm_m2() -> Dict[str, float]:
+    """M2 오디오 예측 모델 로드 + 384D 임베딩 배치 인코딩"""
+    from M2.service import get_m2_service
+
+    service = get_m2_service()
+    start = time.perf_counter()
+    service.audio_service.load_model()
+    timings = {"audio_model_load_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    def run(n):
+        tracks = [
+            {"artist": artist, "track_name": title, "album_name": album, "tags": genre}
+            for title, artist, album, genre, _, _ in synthetic_rows(n)
+        ]
+        service.embedding_service.encode_tracks(tracks)
+        service.audio_service.predict_single(
+            artist=tracks[0]["artist"], track_name=tracks[0]["track_name"], tags=tracks[0]["tags"]
+        )
+
+    timings.update(_timed(run))
+    return timings
+
+
+def warm_m3() -> Dict[str, float]:
+    """M3 CatBoost 기본 모델 로드 + 합성 예측"""
+    from M3.service import FEATURES, get_m3_service
+
+    service = get_m3_service()
+    model_path = service._get_any_model_path()
+    if not model_path:
+        raise RuntimeError("no CatBoost model file")
+
+    start = time.perf_counter()
+    if not service._load_model(model_path):
+        raise RuntimeError(f"CatBoost load failed: {model_path}")
+    timings = {"model_load_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    def run(n):
+        df = pd.DataFrame(
+            [(artist, album, genre) for _, artist, album, genre, _, _ in synthetic_rows(n)],
+            columns=FEATURES,
+        )
+        service.model.predict(df)
+
+    timings.update(_timed(run))
+    return timings
+
+
+def warm_qlty() -> Dict[str, float]:
+    """QLTY DL 모델 + divergence 비교용 M1 예측기 배치 예측"""
+    from QLTY import m1_predictor
+    from QLTY.pipeline import TrackInput, _get_dl_model
+
+    dl_model = _get_dl_model()
+
+    start = time.perf_counter()
+    m1_predictor._get_predictor()
+    timings = {"m1_predictor_load_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    def run(n):
+        tracks = [
+            TrackInput(title=title, artist=artist, album=album, genre=genre,
+                       duration_ms=duration_ms, popularity=popularity)
+            for title, artist, album, genre, duration_ms, popularity in synthetic_rows(n)
+        ]
+        if dl_model is not None:
+            dl_model.predict_batch(tracks)
+        m1_predictor.predict_batch(tracks)
+
+    timings.update(_timed(run))
+    return timings
+
+
+def warm_kuka() -> Dict[str, float]:
+    """Kuka KNN / FAISS 텍스트 / 하이브리드 추천 1회씩 (배치 크기 = 좋아요 곡 수)"""
+    from app.services.Kuka.service import spotify_service
+
+    def run(n):
+        liked = list(range(min(n, len(spotify_service.df))))
+        spotify_service.recommend_knn(liked, k=10)
+        spotify_service.recommend_text(liked, k=10)
+        spotify_service.recommend_hybrid(liked, k=10)
+
+    return _timed(run)
+
+
+# (이름, 함수, 막을 경로, 필요한 서브시스템)
+STEPS = [
+    ("warmup_m1", warm_m1, ("/api/m1",), ()),
+    ("warmup_m2", warm_m2, ("/api/m2",), ("embedding",)),
+    ("warmup_m3", warm_m3, ("/api/m3",), ()),
+    ("warmup_qlty", warm_qlty, ("/api/qlty",), ("embedding", "qlty_dl_model")),
+    ("warmup_kuka", warm_kuka, ("/api/spotify",), ("kuka",)),
+]
+
+
+def register_warmup_steps(orchestrator) -> List[str]:
+    """설정에 따라 워밍업 단계를 오케스트레이터에 등록 (등록된 단계 이름 반환)"""
+    if not WARMUP_ENABLED:
+        logger.info("[Warmup] WARMUP_ENABLED=0 → 생략")
+        return []
+
+    registered = []
+    for name, step, prefixes, requires in STEPS:
+        short_name = name.replace("warmup_", "")
+        if WARMUP_STEPS and short_name not in WARMUP_STEPS:
+            continue
+        # 라우터 등록에 실패한 모듈은 예열하지 않음 (Kuka는 서브시스템 등록 여부로 판단)
+        if any(r not in orchestrator.subsystems for r in requires):
+            continue
+        orchestrator.register_warmup(name, step, prefixes=prefixes, requires=requires)
+        registered.append(name)
+    return registered
@@ -10,6 +10,7 @@
 -- 미적용 마이그레이션 (파일 존재하나 DB에 반영 안됨):
 --   004 (tracks.youtube_id - 코드에서 external_metadata JSON으로 대체 사용, 무해)
 --   006 (ai_analysis_logs: grade/recommendation/reason/request_source - 엔티티에 필드 없어 무해)
+--   009 (tracks.artist_title_key 생성 컬럼 + 인덱스 - FastAPI는 컬럼 없으면 식으로 계산, 무해)
 -- 미문서화 테이블: user_profiles (FastAPI AI 학습 프로필)
 -- 현재 DB 테이블 (20개):
 --   ai_analysis_logs, artist_stats, artists, content_stats, daily_stats_log,
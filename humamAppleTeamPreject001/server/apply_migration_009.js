@@ -0,0 +1,45 @@
+
+import mysql from 'mysql2/promise';
+import fs from 'fs';
+import path from 'path';
+import dotenv from 'dotenv';
+import { fileURLToPath } from 'url';
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+dotenv.config({ path: path.join(__dirname, '.env') });
+
+const dbConfig = {
+    host: process.env.DB_HOST || 'localhost',
+    user: process.env.DB_USER || 'root',
+    password: process.env.DB_PASSWORD,
+    database: process.env.DB_NAME || 'music_space_db',
+    port: parseInt(process.env.DB_PORT || '3306'),
+    multipleStatements: true
+};
+
+async function applyMigration() {
+    console.log('🔄 Applying Migration 009...');
+    let connection;
+    try {
+        connection = await mysql.createConnection(dbConfig);
+        const migrationPath = path.join(__dirname, 'migrations', '009_track_artist_title_key.sql');
+        const sql = fs.readFileSync(migrationPath, 'utf8');
+
+        console.log(`📂 Reading ${migrationPath}...`);
+
+        await connection.query(sql);
+
+        console.log('✅ Migration 009 applied successfully.');
+        console.log('   - Added `tracks.artist_title_key` generated column');
+        console.log('   - Created index `idx_tracks_artist_title_key`');
+
+    } catch (error) {
+        console.error('❌ Migration Failed:', error);
+    } finally {
+        if (connection) await connection.end();
+    }
+}
+
+applyMigration();
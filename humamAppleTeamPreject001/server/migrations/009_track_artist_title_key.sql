@@ -0,0 +1,14 @@
+-- =====================================================
+-- Migration 009: tracks.artist_title_key (정규 곡 키)
+-- 같은 곡이 다른 track_id로 존재하는 경우를 식별하기 위한
+-- 아티스트|제목 소문자 키를 저장 생성 컬럼 + 인덱스로 추가
+-- FastAPI(owned_tracks.py)의 PMS/GMS 중복 제외가 이 컬럼을 사용함
+-- (컬럼이 없으면 동일한 식을 직접 계산)
+-- =====================================================
+
+ALTER TABLE tracks
+    ADD COLUMN IF NOT EXISTS artist_title_key VARCHAR(511)
+        AS (CONCAT(LOWER(artist), '|', LOWER(title))) STORED
+        COMMENT '아티스트|제목 정규 키 (중복곡 식별)';
+
+CREATE INDEX IF NOT EXISTS idx_tracks_artist_title_key ON tracks (artist_title_key);